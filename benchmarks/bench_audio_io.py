@@ -0,0 +1,114 @@
+"""
+Micro-benchmark of the per-turn audio I/O path.
+
+Compares the old temp-file path (write the recording to a WAV file and reopen
+it for upload; write the TTS reply to a WAV file and read it back in CHUNK
+pieces) with the in-memory path (WavUpload + memoryview playback slices).
+Network and audio devices are left out: uploads and playback write into
+null sinks so only the local I/O cost is measured.
+
+Usage:
+    python benchmarks/bench_audio_io.py [--seconds 5] [--turns 200]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from idea_to_markdown.audio_buffers import WavUpload, iter_frame_slices, parse_wav  # noqa: E402
+
+RATE = 16000
+TTS_RATE = 24000
+CHUNK = 1024
+
+
+def make_pcm(seconds: float, rate: int) -> bytes:
+    return bytes(range(256)) * (int(seconds * rate * 2) // 256)
+
+
+def make_wav(pcm: bytes, rate: int) -> bytes:
+    return bytes(WavUpload(pcm, channels=1, rate=rate, sample_width=2).read())
+
+
+def drain(fileobj) -> int:
+    """Reads a file object the way an HTTP client streams an upload."""
+    total = 0
+    while True:
+        chunk = fileobj.read(64 * 1024)
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def temp_file_turn(temp_dir: Path, recording: bytes, reply_wav: bytes) -> int:
+    stt_file = temp_dir / "temp_stt_input.wav"
+    with wave.open(str(stt_file), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(recording)
+    with open(stt_file, "rb") as f:
+        uploaded = drain(f)
+    stt_file.unlink()
+
+    playback_file = temp_dir / "temp_agent_response.wav"
+    with wave.open(str(playback_file), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(reply_wav)
+    played = 0
+    wf = wave.open(str(playback_file), "rb")
+    data = wf.readframes(CHUNK)
+    while data:
+        played += len(data)
+        data = wf.readframes(CHUNK)
+    wf.close()
+    playback_file.unlink()
+    return uploaded + played
+
+
+def in_memory_turn(recording: bytes, reply_wav: bytes) -> int:
+    uploaded = drain(WavUpload(recording, channels=1, rate=RATE, sample_width=2))
+    wav = parse_wav(reply_wav)
+    played = 0
+    for data in iter_frame_slices(wav.frames, CHUNK * 2):
+        played += len(data)
+    return uploaded + played
+
+
+def run(label: str, turn, turns: int) -> float:
+    turn()  # Warm up
+    started = time.perf_counter()
+    for _ in range(turns):
+        turn()
+    per_turn_ms = (time.perf_counter() - started) / turns * 1000
+    print(f"{label:<12} {per_turn_ms:8.3f} ms/turn")
+    return per_turn_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="length of the recording and of the spoken reply")
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    recording = make_pcm(args.seconds, RATE)
+    reply_wav = make_wav(make_pcm(args.seconds, TTS_RATE), TTS_RATE)
+    print(f"{args.seconds:.0f}s recording ({len(recording)} bytes), "
+          f"{len(reply_wav)} byte reply, {args.turns} turns")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        before = run("temp files", lambda: temp_file_turn(
+            Path(temp_dir), recording, reply_wav), args.turns)
+    after = run("in-memory", lambda: in_memory_turn(recording, reply_wav), args.turns)
+    print(f"speedup      {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
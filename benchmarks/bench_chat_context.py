@@ -0,0 +1,108 @@
+"""
+Chat prompt size and reply latency against the context token budget.
+
+Writes one large project (--entries notes), then for each CHAT_CONTEXT_TOKENS
+value in --budgets builds the prompt for a turn with --turns previous
+exchanges, and asks tests.fakes.FakeOpenAIServer for a reply (--chat-latency
+of server time plus an uplink of --uplink-mbps, so bigger prompts cost
+more). Reports the cold build (the latest entries read from the end of the
+file), the warm build (served from the cache), the estimated prompt tokens,
+the notes and exchanges that fit, and the median reply round-trip.
+
+Usage:
+    python benchmarks/bench_chat_context.py [--entries 100000]
+        [--budgets 0 500 1500 4000] [--turns 6] [--chat-latency 0.5]
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from idea_to_markdown.config import AppConfig  # noqa: E402
+from idea_to_markdown.context_builder import ContextBuilder, ConversationHistory  # noqa: E402
+from idea_to_markdown.note_manager import NoteManager  # noqa: E402
+from idea_to_markdown.speech_interface import SpeechInterface  # noqa: E402
+from tests.fakes import FakeOpenAIServer  # noqa: E402
+
+WORDS = ("seed", "bed", "compost", "water", "tomato", "fence", "shade", "mulch",
+         "harvest", "plan", "order", "soil", "trellis", "prune", "frost", "bean")
+
+
+def write_project(path: Path, entries: int, rng: random.Random):
+    started = datetime(2023, 1, 1)
+    lines = ["# Project: Garden - Created 2023-01-01 00:00:00\n\n"]
+    for i in range(entries):
+        moment = started + timedelta(minutes=i)
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+        lines.append(f"\n## Entry: {moment:%Y-%m-%d %H:%M:%S}\n{words}\n")
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 500, 1500, 4000])
+    parser.add_argument("--max-entries", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--replies", type=int, default=5)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--uplink-mbps", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            config = AppConfig(custom_base_dir=Path(temp_dir))
+            config.ensure_directories()
+        write_project(config.get_project_file_path("Garden"), args.entries, rng)
+        note_manager = NoteManager(config)
+        note_manager.count_entries("Garden")  # build the entry index up front
+
+        history = ConversationHistory(args.turns)
+        for i in range(args.turns):
+            history.add(f"what about the {rng.choice(WORDS)} this week, number {i}?",
+                        " ".join(rng.choice(WORDS) for _ in range(25)) + ".")
+
+        print(f"{args.entries} entries in the project, {args.turns} previous exchanges")
+        print(f"{'budget':>7} {'cold ms':>8} {'warm ms':>8} {'tokens':>7} {'notes':>6} "
+              f"{'turns':>6} {'reply p50 s':>12}")
+        with FakeOpenAIServer(chat_latency=args.chat_latency, upload_mbps=args.uplink_mbps) as server:
+            for budget in args.budgets:
+                builder = ContextBuilder(note_manager, max_tokens=budget, max_entries=args.max_entries)
+                started = time.perf_counter()
+                prompt = builder.build("what should I plant next?", "Garden", history)
+                cold_ms = (time.perf_counter() - started) * 1000
+                started = time.perf_counter()
+                for _ in range(100):
+                    builder.build("what should I plant next?", "Garden", history)
+                warm_ms = (time.perf_counter() - started) * 10
+
+                with contextlib.redirect_stdout(io.StringIO()):
+                    speech = SpeechInterface(config, client=server.make_client())
+                speech.context_builder = builder
+                replies = []
+                for _ in range(args.replies):
+                    # A copy, so every reply sees the same exchanges
+                    turns = ConversationHistory(args.turns)
+                    for user_text, reply, _ in history.turns():
+                        turns.add(user_text, reply)
+                    started = time.perf_counter()
+                    speech.generate_reply("what should I plant next?", "Garden", turns)
+                    replies.append(time.perf_counter() - started)
+                speech.close()
+                print(f"{budget:>7} {cold_ms:>8.2f} {warm_ms:>8.3f} {prompt.tokens:>7} "
+                      f"{prompt.entries:>6} {prompt.turns:>6} {statistics.median(replies):>12.3f}")
+        note_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+End-to-end benchmark of voice turns against a local fake OpenAI server.
+
+Drives either a full Agent session (project selection, N dictated notes,
+"exit agent") or N bare SpeechInterface turns. The transcription, chat and
+speech endpoints are served by tests.fakes.FakeOpenAIServer with
+configurable latency and payload sizes, and a fake PyAudio device replays a
+synthetic utterance, so no network or audio hardware is needed.
+
+Reports turns per second, per-stage latency percentiles (from the built-in
+tracer) and the memory high-water mark. Exits with 1 if a --min-turns-per-
+second or --max-rss-mb threshold is missed, so it can guard against
+regressions.
+
+Usage:
+    python benchmarks/bench_end_to_end.py [--mode agent|speech] [--turns 50]
+        [--stt-latency 0.05] [--chat-latency 0.1] [--tts-latency 0.05]
+        [--utterance-seconds 2] [--reply-seconds 1] [--reply-words 20]
+        [--pipelined] [--buffered-tts] [--routing] [--realtime] [--tracemalloc]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from idea_to_markdown.agent import Agent  # noqa: E402
+from idea_to_markdown.config import AppConfig  # noqa: E402
+from idea_to_markdown.speech_interface import SpeechInterface  # noqa: E402
+from idea_to_markdown.tracing import Tracer  # noqa: E402
+from tests.fakes import FakeOpenAIServer, FakePyAudio, make_silence_pcm, make_tone_pcm  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ("record", "stt", "chat", "tts", "tts_first_audio", "playback", "note_write")
+
+
+def peak_rss_mb() -> float | None:
+    """Process resident-set high-water mark, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def make_config(base_dir: Path, args) -> AppConfig:
+    config = AppConfig(custom_base_dir=base_dir)
+    config.ensure_directories()
+    config.voice_recording_duration = 2
+    config.pipelined_turns = args.pipelined
+    config.streaming_tts = not args.buffered_tts
+    config.intent_routing = args.routing
+    config.tracing_enabled = True
+    config.trace_file = base_dir / "logs" / "trace.jsonl"
+    return config
+
+
+def run_agent(config: AppConfig, server: FakeOpenAIServer, audio: FakePyAudio, turns: int) -> tuple[int, dict]:
+    agent = Agent(config, client=server.make_client(), audio_interface=audio)
+    agent.start_session()
+    # Project selection and "exit agent" are turns too
+    return turns + 2, agent.tracer.summary()
+
+
+def run_speech(config: AppConfig, server: FakeOpenAIServer, audio: FakePyAudio, turns: int) -> tuple[int, dict]:
+    tracer = Tracer.from_config(config)
+    speech = SpeechInterface(config, client=server.make_client(), audio_interface=audio, tracer=tracer)
+    for _ in range(turns):
+        speech.conduct_realtime_conversation_turn()
+    speech.close()
+    tracer.close()
+    return turns, tracer.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=("agent", "speech"), default="agent")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--stt-latency", type=float, default=0.05)
+    parser.add_argument("--chat-latency", type=float, default=0.1)
+    parser.add_argument("--tts-latency", type=float, default=0.05)
+    parser.add_argument("--utterance-seconds", type=float, default=2.0,
+                        help="length of the synthetic speech in each recording")
+    parser.add_argument("--reply-seconds", type=float, default=1.0,
+                        help="length of the synthesized reply audio")
+    parser.add_argument("--reply-words", type=int, default=20)
+    parser.add_argument("--pipelined", action="store_true", help="PIPELINED_TURNS=true")
+    parser.add_argument("--buffered-tts", action="store_true", help="STREAMING_TTS=false")
+    parser.add_argument("--routing", action="store_true",
+                        help="enable local intent routing (notes then skip chat/TTS)")
+    parser.add_argument("--realtime", action="store_true",
+                        help="pace the fake microphone and speaker like real audio")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also report the Python heap peak (slows the run)")
+    parser.add_argument("--min-turns-per-second", type=float, default=None)
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    args = parser.parse_args()
+
+    utterance = make_silence_pcm(0.3) + make_tone_pcm(args.utterance_seconds)
+    transcripts = ["use benchmark project"]
+    transcripts += [f"benchmark idea number {i}" for i in range(args.turns)]
+    transcripts.append("exit agent")
+    if args.mode == "speech":
+        transcripts = ["benchmark idea"]
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    server = FakeOpenAIServer(
+        transcript=transcripts,
+        reply=" ".join(["noted"] * args.reply_words),
+        stt_latency=args.stt_latency, chat_latency=args.chat_latency,
+        tts_latency=args.tts_latency, speech_duration=args.reply_seconds,
+        speech_chunk_delay=0.001)
+    audio = FakePyAudio(utterance, realtime=args.realtime, keep_output=False)
+
+    with server, tempfile.TemporaryDirectory() as temp_dir, \
+            contextlib.redirect_stdout(io.StringIO()):
+        config = make_config(Path(temp_dir), args)
+        run = run_agent if args.mode == "agent" else run_speech
+        started = time.perf_counter()
+        turns, summary = run(config, server, audio, args.turns)
+        elapsed = time.perf_counter() - started
+
+    heap_peak_mb = None
+    if args.tracemalloc:
+        heap_peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    rss_mb = peak_rss_mb()
+
+    turns_per_second = turns / elapsed
+    print(f"mode:      {args.mode}, {turns} turns in {elapsed:.2f} s")
+    print(f"requests:  {len(server.requests)} ({', '.join(f'{n} {server.requests.count(n)}' for n in sorted(set(server.requests)))})")
+    print(f"played:    {audio.played_bytes / 1024:.0f} KiB of audio")
+    print(f"throughput: {turns_per_second:.2f} turns/s")
+    print(f"{'stage':<16}{'count':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage in STAGES:
+        stats = summary.get(stage)
+        if stats:
+            print(f"{stage:<16}{stats['count']:>6}{stats['p50_ms']:>10.1f}"
+                  f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    if rss_mb is not None:
+        print(f"memory:    peak RSS {rss_mb:.1f} MiB")
+    if heap_peak_mb is not None:
+        print(f"           peak Python heap {heap_peak_mb:.1f} MiB")
+
+    failed = []
+    if args.min_turns_per_second is not None and turns_per_second < args.min_turns_per_second:
+        failed.append(f"turns/s {turns_per_second:.2f} < {args.min_turns_per_second}")
+    if args.max_rss_mb is not None and rss_mb is not None and rss_mb > args.max_rss_mb:
+        failed.append(f"peak RSS {rss_mb:.1f} MiB > {args.max_rss_mb}")
+    for reason in failed:
+        print(f"REGRESSION: {reason}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Benchmark of note writing throughput for each fsync mode.
+
+Writes a burst of entries spread over a few project files through
+NoteWriter, with and without group commit, and reports entries per second.
+
+Usage:
+    python benchmarks/bench_note_writer.py [--entries 2000] [--projects 4]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from idea_to_markdown.note_store import NoteStore  # noqa: E402
+from idea_to_markdown.note_writer import FSYNC_MODES, NoteWriter  # noqa: E402
+
+
+def run(fsync_mode: str, group_commit: bool, entries: int, projects: int, batch_size: int) -> float:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        notes_dir = Path(temp_dir)
+        store = NoteStore(notes_dir, notes_dir / ".index")
+        writer = NoteWriter(store, fsync_mode=fsync_mode, group_commit=group_commit,
+                            max_batch_entries=batch_size, flush_interval=0.05)
+        paths = [notes_dir / f"Project{i}.md" for i in range(projects)]
+        for path in paths:
+            path.write_text(f"# Project: {path.stem}\n\n", encoding="utf-8")
+
+        started = time.perf_counter()
+        for i in range(entries):
+            block = f"\n## Entry: 2024-05-01 08:00:00\nDictated idea number {i}, a sentence or two long.\n"
+            writer.write(paths[i % projects], block, 1714550400.0 + i)
+        writer.close()
+        elapsed = time.perf_counter() - started
+
+        assert sum(store.count_entries(path) for path in paths) == entries
+    return entries / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{args.entries} entries over {args.projects} project files")
+    print(f"{'fsync mode':<12}{'write-through':>16}{'group commit':>16}")
+    for mode in FSYNC_MODES:
+        direct = run(mode, False, args.entries, args.projects, args.batch_size)
+        grouped = run(mode, True, args.entries, args.projects, args.batch_size)
+        print(f"{mode:<12}{direct:>12.0f} e/s{grouped:>12.0f} e/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark of full-text note search on a synthetic corpus.
+
+Generates project files with the given number of entries in total, builds the
+search index from scratch, reloads it the way a new session would, and times
+a batch of queries. Query latency should stay under 50 ms at 100k entries.
+
+Usage:
+    python benchmarks/bench_search.py [--entries 100000] [--projects 200]
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from idea_to_markdown.config import AppConfig  # noqa: E402
+from idea_to_markdown.note_manager import NoteManager  # noqa: E402
+
+TARGET_MS = 50.0
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+
+def write_corpus(notes_dir: Path, entries: int, projects: int, vocabulary: list[str], rng: random.Random):
+    started = datetime(2023, 1, 1)
+    per_project = entries // projects
+    for p in range(projects):
+        lines = [f"# Project: Project{p:04d} - Created 2023-01-01 00:00:00\n\n"]
+        for i in range(per_project):
+            moment = started + timedelta(minutes=p * per_project + i)
+            # Zipf-like word choice, so some terms are very common
+            words = [vocabulary[min(int(rng.paretovariate(1.1)) - 1, len(vocabulary) - 1)]
+                     for _ in range(rng.randint(8, 30))]
+            lines.append(f"\n## Entry: {moment:%Y-%m-%d %H:%M:%S}\n{' '.join(words)}\n")
+        (notes_dir / f"Project{p:04d}.md").write_text("".join(lines), encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, 20_000)
+
+    with tempfile.TemporaryDirectory() as temp_dir, contextlib.redirect_stdout(io.StringIO()):
+        config = AppConfig(custom_base_dir=Path(temp_dir))
+        config.ensure_directories()
+        write_corpus(config.notes_dir, args.entries, args.projects, vocabulary, rng)
+
+        manager = NoteManager(config)
+        started = time.perf_counter()
+        manager.refresh_search_index()
+        build_seconds = time.perf_counter() - started
+        manager.close()
+
+        manager = NoteManager(config)
+        started = time.perf_counter()
+        unchanged = manager.refresh_search_index()
+        reload_seconds = time.perf_counter() - started
+
+        queries = []
+        for _ in range(args.queries):
+            terms = rng.sample(vocabulary[:2000], rng.randint(1, 3))
+            queries.append(" ".join(terms))
+
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            manager.search(query, limit=10)
+            latencies.append((time.perf_counter() - started) * 1000)
+        indexed = len(manager.search_index)
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"corpus:  {indexed} entries in {args.projects} projects")
+    print(f"build:   {build_seconds:.2f} s (full index)")
+    print(f"reload:  {reload_seconds:.2f} s ({unchanged} files re-indexed)")
+    print(f"query:   p50 {p50:.2f} ms, p95 {p95:.2f} ms, max {latencies[-1]:.2f} ms")
+    verdict = "OK" if p95 < TARGET_MS else "SLOW"
+    print(f"target:  p95 < {TARGET_MS:.0f} ms ... {verdict}")
+    return 0 if p95 < TARGET_MS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
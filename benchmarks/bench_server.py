@@ -0,0 +1,149 @@
+"""
+Load test of the multi-session server against a local fake OpenAI server.
+
+Starts a NoteServer on a free port and N simulated clients. Each client picks
+its own project, then sends T utterances (audio by default, or text with
+--text) and waits for each turn to finish. The transcription, chat and speech
+endpoints are served by tests.fakes.FakeOpenAIServer with configurable
+latency, so no network or audio hardware is needed.
+
+Reports completed turns per second, p50/p95/p99 turn latency as seen by the
+clients and the number of failed turns. Exits with 1 if a --min-turns-per-
+second threshold is missed.
+
+Usage:
+    python benchmarks/bench_server.py [--clients 20] [--turns 10]
+        [--stt-latency 0.05] [--chat-latency 0.1] [--tts-latency 0.05]
+        [--utterance-seconds 2] [--replies] [--text] [--workers 16]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from idea_to_markdown.config import AppConfig  # noqa: E402
+from idea_to_markdown.server import (AUDIO_CHUNK, END_OF_UTTERANCE, SPEECH_AUDIO,  # noqa: E402
+                                     TEXT_UTTERANCE, NoteServer, read_frame, write_frame)
+from idea_to_markdown.tracing import LatencyHistogram  # noqa: E402
+from tests.fakes import FakeOpenAIServer, make_tone_pcm  # noqa: E402
+
+AUDIO_FRAME_BYTES = 8192
+
+
+async def read_turn(reader: asyncio.StreamReader) -> list[dict]:
+    """Reads events up to the end of one turn."""
+    events = []
+    while True:
+        frame = await read_frame(reader)
+        if frame is None:
+            raise ConnectionError("server closed the session")
+        kind, payload = frame
+        if kind == SPEECH_AUDIO:
+            continue
+        event = json.loads(payload)
+        events.append(event)
+        if event["event"] in ("turn_done", "bye"):
+            return events
+
+
+async def run_client(port: int, number: int, turns: int, utterance: bytes | None,
+                     latencies: LatencyHistogram) -> int:
+    """Runs one session; returns the number of failed turns."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    failures = 0
+    try:
+        await read_frame(reader)  # project prompt
+        write_frame(writer, TEXT_UTTERANCE, f"new project load {number}".encode("utf-8"))
+        await writer.drain()
+        await read_turn(reader)
+
+        for turn in range(turns):
+            started = time.perf_counter()
+            if utterance is None:
+                write_frame(writer, TEXT_UTTERANCE, f"client {number} idea {turn}".encode("utf-8"))
+            else:
+                for start in range(0, len(utterance), AUDIO_FRAME_BYTES):
+                    write_frame(writer, AUDIO_CHUNK, utterance[start:start + AUDIO_FRAME_BYTES])
+                write_frame(writer, END_OF_UTTERANCE)
+            await writer.drain()
+            events = await read_turn(reader)
+            latencies.add((time.perf_counter() - started) * 1000)
+            failures += sum(1 for e in events if e["event"] == "error")
+
+        write_frame(writer, TEXT_UTTERANCE, b"exit agent")
+        await writer.drain()
+        await read_turn(reader)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return failures
+
+
+async def run(config: AppConfig, api: FakeOpenAIServer, args) -> tuple[float, LatencyHistogram, int]:
+    server = NoteServer(config, client=api.make_client())
+    await server.start(port=0)
+    utterance = None if args.text else make_tone_pcm(args.utterance_seconds)
+    latencies = LatencyHistogram()
+    try:
+        started = time.perf_counter()
+        failures = await asyncio.gather(
+            *(run_client(server.port, n, args.turns, utterance, latencies)
+              for n in range(args.clients)),
+            return_exceptions=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        await server.close()
+    errors = sum(f if isinstance(f, int) else args.turns for f in failures)
+    return elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10, help="dictated notes per client")
+    parser.add_argument("--stt-latency", type=float, default=0.05)
+    parser.add_argument("--chat-latency", type=float, default=0.1)
+    parser.add_argument("--tts-latency", type=float, default=0.05)
+    parser.add_argument("--utterance-seconds", type=float, default=2.0)
+    parser.add_argument("--replies", action="store_true",
+                        help="INTENT_ROUTING=false: every note also gets a chat and speech reply")
+    parser.add_argument("--text", action="store_true", help="send text utterances instead of audio")
+    parser.add_argument("--workers", type=int, default=16, help="SERVER_MAX_WORKERS")
+    parser.add_argument("--min-turns-per-second", type=float, default=None)
+    args = parser.parse_args()
+
+    api = FakeOpenAIServer(
+        transcript="benchmark idea", stt_latency=args.stt_latency,
+        chat_latency=args.chat_latency, tts_latency=args.tts_latency)
+    with api, tempfile.TemporaryDirectory() as temp_dir, \
+            contextlib.redirect_stdout(io.StringIO()):
+        config = AppConfig(custom_base_dir=Path(temp_dir))
+        config.ensure_directories()
+        config.intent_routing = not args.replies
+        config.server_max_workers = args.workers
+        elapsed, latencies, errors = asyncio.run(run(config, api, args))
+
+    turns = latencies.count
+    turns_per_second = turns / elapsed
+    print(f"sessions:  {args.clients} x {args.turns} turns, {args.workers} workers")
+    print(f"requests:  {len(api.requests)} ({', '.join(f'{n} {api.requests.count(n)}' for n in sorted(set(api.requests)))})")
+    print(f"throughput: {turns_per_second:.1f} turns/s ({turns} turns in {elapsed:.2f} s)")
+    print(f"latency:   p50 {latencies.percentile(50):.1f} ms, p95 {latencies.percentile(95):.1f} ms, "
+          f"p99 {latencies.percentile(99):.1f} ms, max {latencies.max:.1f} ms")
+    print(f"errors:    {errors}")
+
+    if args.min_turns_per_second is not None and turns_per_second < args.min_turns_per_second:
+        print(f"REGRESSION: turns/s {turns_per_second:.1f} < {args.min_turns_per_second}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Transcription latency per turn for each STT engine.
+
+Transcribes the same recordings --turns times with the OpenAI engine
+(against tests.fakes.FakeOpenAIServer with --stt-latency of server time and
+an uplink of --uplink-mbps, standing in for the round-trip to Whisper) and
+with the local faster-whisper engine (STT_ENGINE=local, which needs
+`pip install faster-whisper` and downloads LOCAL_STT_MODEL on first use).
+
+Reports model load and warm-up time for the local engine, then the median
+and p95 seconds per transcription. By default the recordings are synthetic
+tones, which measure speed only; pass WAV files of real speech (16 kHz mono
+16-bit) with --wav to also compare the transcripts.
+
+Usage:
+    python benchmarks/bench_stt_engines.py [--seconds 5 15] [--turns 5]
+        [--wav memo.wav ...] [--stt-latency 0.6] [--uplink-mbps 5]
+"""
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from idea_to_markdown.config import AppConfig  # noqa: E402
+from idea_to_markdown.engines import LocalWhisperEngine  # noqa: E402
+from idea_to_markdown.speech_interface import RATE, SpeechInterface  # noqa: E402
+from tests.fakes import FakeOpenAIServer, make_tone_pcm  # noqa: E402
+
+
+def read_wav(path: Path) -> bytes:
+    with wave.open(str(path), "rb") as wf:
+        if (wf.getnchannels(), wf.getsampwidth(), wf.getframerate()) != (1, 2, RATE):
+            sys.exit(f"{path}: expected 16 kHz mono 16-bit PCM")
+        return wf.readframes(wf.getnframes())
+
+
+def measure(speech: SpeechInterface, pcm: bytes, turns: int) -> tuple[list[float], str]:
+    times, text = [], ""
+    for _ in range(turns):
+        started = time.perf_counter()
+        text = speech.transcribe(pcm)
+        times.append(time.perf_counter() - started)
+    return times, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5, 15],
+                        help="lengths of synthetic recordings")
+    parser.add_argument("--wav", type=Path, nargs="*", default=[], help="recordings of real speech")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--stt-latency", type=float, default=0.6,
+                        help="simulated Whisper API processing time in seconds")
+    parser.add_argument("--uplink-mbps", type=float, default=5.0)
+    args = parser.parse_args()
+
+    recordings = {f"{s:g}s tone": make_tone_pcm(s) for s in args.seconds}
+    recordings.update({path.name: read_wav(path) for path in args.wav})
+
+    with tempfile.TemporaryDirectory() as temp_dir, contextlib.redirect_stdout(io.StringIO()):
+        config = AppConfig(custom_base_dir=Path(temp_dir))
+
+    started = time.perf_counter()
+    local = LocalWhisperEngine.from_config(config)
+    if not local.wait_until_ready():
+        sys.exit("The local engine is not available (see the error above).")
+    print(f"Local model {config.local_stt_model} ({config.local_stt_compute_type}) "
+          f"loaded and warm in {time.perf_counter() - started:.2f}s")
+
+    print(f"{'recording':<16} {'engine':<7} {'p50 s':>7} {'p95 s':>7}  transcript")
+    with FakeOpenAIServer(stt_latency=args.stt_latency, upload_mbps=args.uplink_mbps) as server:
+        engines = {"openai": SpeechInterface(config, client=server.make_client()),
+                   "local": SpeechInterface(config, engine=local)}
+        for name, pcm in recordings.items():
+            for engine, speech in engines.items():
+                times, text = measure(speech, pcm, args.turns)
+                p95 = statistics.quantiles(times, n=20)[-1] if len(times) > 1 else times[0]
+                print(f"{name:<16} {engine:<7} {statistics.median(times):>7.2f} {p95:>7.2f}  {text[:40]}")
+        for speech in engines.values():
+            speech.close()
+
+
+if __name__ == "__main__":
+    main()
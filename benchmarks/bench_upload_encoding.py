@@ -0,0 +1,112 @@
+"""
+Bytes per turn and upload time of the STT upload, before and after encoding.
+
+Builds synthetic 5 s, 30 s and 2 min recordings (voiced, syllable-modulated
+tones over a microphone noise floor, with pauses and a second of silence at
+each end, split into VAD-sized segments) and uploads them to
+tests.fakes.FakeOpenAIServer throttled to --uplink-mbps, once as plain WAV
+(the old upload), once trimmed, and once trimmed and FLAC encoded.
+
+Reports bytes per turn, encode time on the turn's critical path (only the
+last segment: earlier ones are encoded while recording continues), total
+encode CPU time, and the upload time as the median of --turns turns.
+
+Usage:
+    python benchmarks/bench_upload_encoding.py [--durations 5 30 120]
+        [--uplink-mbps 5] [--turns 3]
+"""
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from idea_to_markdown.audio_encoding import UploadEncoder  # noqa: E402
+from idea_to_markdown.config import AppConfig  # noqa: E402
+from idea_to_markdown.speech_interface import RATE, SpeechInterface  # noqa: E402
+from tests.fakes import FakeOpenAIServer  # noqa: E402
+
+MODES = {
+    "wav": ("wav", False),
+    "wav+trim": ("wav", True),
+    "flac+trim": ("flac", True),
+}
+
+
+def make_recording(seconds: float, seed: int = 0) -> bytes:
+    """Speech-like audio with a 1 s silent lead-in and tail."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * RATE)) / RATE
+    pitch = 120 + 20 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / RATE
+    voiced = sum(np.sin(h * phase) / h for h in range(1, 6))
+    syllables = np.abs(np.sin(2 * np.pi * 2.5 * t)) ** 0.5
+    pauses = (t % 4.0) < 3.4  # a short breath every few seconds
+    speech = 5000 * voiced * syllables * pauses
+    speech[(t < 1.0) | (t > seconds - 1.0)] = 0
+    return (speech + rng.normal(0, 40, t.size)).astype(np.int16).tobytes()
+
+
+def split_segments(pcm: bytes, segment_seconds: float) -> list[bytes]:
+    size = int(segment_seconds * RATE) * 2
+    return [pcm[start:start + size] for start in range(0, len(pcm), size)]
+
+
+def measure(speech: SpeechInterface, encoder: UploadEncoder, segments: list[bytes], turns: int):
+    encode_times, uploads = [], []
+    for _ in range(turns):
+        encoded = []
+        for segment in segments:
+            started = time.perf_counter()
+            encoded.append(encoder.encode(segment))
+            encode_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for upload in encoded:
+            speech.transcribe(upload)
+        uploads.append(time.perf_counter() - started)
+    per_segment = len(segments)
+    last_segment = statistics.median(encode_times[per_segment - 1::per_segment])
+    total = statistics.median(
+        sum(encode_times[i:i + per_segment]) for i in range(0, len(encode_times), per_segment))
+    return sum(len(upload) for upload in encoded), last_segment, total, statistics.median(uploads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--durations", type=float, nargs="+", default=[5, 30, 120],
+                        help="recording lengths in seconds")
+    parser.add_argument("--uplink-mbps", type=float, default=5.0, help="simulated upload bandwidth")
+    parser.add_argument("--turns", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir, contextlib.redirect_stdout(io.StringIO()):
+        config = AppConfig(custom_base_dir=Path(temp_dir))
+    segment_seconds = config.vad_max_segment_duration
+
+    print(f"Uplink {args.uplink_mbps:g} Mbit/s, segments of up to {segment_seconds:g} s, "
+          f"median of {args.turns} turns")
+    print(f"{'recording':>9}  {'upload':<10} {'bytes/turn':>11} {'vs wav':>7} "
+          f"{'encode last ms':>15} {'encode total ms':>16} {'upload s':>9}")
+    with FakeOpenAIServer(upload_mbps=args.uplink_mbps) as server:
+        speech = SpeechInterface(config, client=server.make_client())
+        for seconds in args.durations:
+            segments = split_segments(make_recording(seconds), segment_seconds)
+            baseline = None
+            for mode, (audio_format, trim) in MODES.items():
+                encoder = UploadEncoder(RATE, audio_format,
+                                        trim_threshold=config.vad_energy_threshold if trim else None)
+                size, last_ms, total_ms, upload_s = measure(speech, encoder, segments, args.turns)
+                baseline = baseline or size
+                print(f"{seconds:>8g}s  {mode:<10} {size:>11,} {size / baseline:>6.0%} "
+                      f"{last_ms * 1000:>15.1f} {total_ms * 1000:>16.1f} {upload_s:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+#!/usr/bin/env python
+from idea_to_markdown.bulk_import import main
+
+if __name__ == "__main__":
+    main()
@@ -30,8 +30,13 @@ setup(
         "python-dotenv>=1.0.0",
         "openai>=1.5.0",
         "pyaudio>=0.2.13",
+        "numpy>=1.24.0",
     ],
     extras_require={
+        # STT_ENGINE=local
+        "local": [
+            "faster-whisper>=1.0.0",
+        ],
         "dev": [
             "pytest>=7.3.1",
             "pytest-cov>=4.1.0",
@@ -44,6 +49,7 @@ setup(
     entry_points={
         "console_scripts": [
             "idea-to-markdown=idea_to_markdown.main:main",
+            "idea-to-markdown-import=idea_to_markdown.bulk_import:main",
         ],
     },
 )
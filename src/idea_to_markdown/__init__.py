@@ -1,7 +1,27 @@
-from .agent import Agent
-from .config import AppConfig
-from .note_manager import NoteManager
-from .speech_interface import SpeechInterface
+import importlib
+
+# Public names and the modules defining them. They are imported on first
+# access (PEP 562), so tools that only need NoteManager don't pay for
+# openai, numpy and PortAudio at startup.
+_LAZY_ATTRIBUTES = {
+    "Agent": ".agent",
+    "AppConfig": ".config",
+    "NoteManager": ".note_manager",
+    "SpeechInterface": ".speech_interface",
+}
 
 __all__ = ["Agent", "AppConfig", "NoteManager", "SpeechInterface"]
 __version__ = "0.1.0"  # Initial version
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,6 +1,14 @@
+from .capture_spool import CAPTURE_QUEUED, CAPTURE_SAVED, CaptureSpool, SpoolWorker
 from .config import AppConfig
+from .context_builder import ContextBuilder
+from .digest import DigestWorker
+from .intent_router import classify_intent, parse_search_query
 from .note_manager import NoteManager
+from .session import GOODBYE_MESSAGE, WELCOME_GREETING, ConversationSession, note_saved_message
 from .speech_interface import SpeechInterface
+from .tracing import Tracer
+from datetime import datetime
+import threading
 import time
 import sys
 
@@ -11,119 +19,117 @@ class Agent:
     LLM processing (via SpeechInterface), and note management.
     """
 
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, client=None, audio_interface=None):
         self.config = config
-        self.note_manager = NoteManager(config)
-        self.speech_interface = SpeechInterface(config)
-        self.current_project: str | None = None
+        # One tracer so every stage of a turn lands in the same trace
+        self.tracer = Tracer.from_config(config)
+        self.note_manager = NoteManager(config, tracer=self.tracer)
+        # client and audio_interface default to OpenAI and PyAudio; tests and
+        # benchmarks pass stand-ins
+        self.speech_interface = SpeechInterface(
+            config, client=client, audio_interface=audio_interface, tracer=self.tracer)
+        self.session = ConversationSession(config, self.note_manager)
+        # Replies see the session's recent exchanges and the active project's latest notes
+        self.speech_interface.context_builder = ContextBuilder.from_config(config, self.note_manager)
+        self.speech_interface.history = self.session.history
         self.running = False
 
         # Validate critical dependencies
-        if not self.speech_interface.client:
-            print("WARNING: OpenAI client not available. Voice features will be limited.")
-            print("Check your API key in the .env file.")
+        if not self.speech_interface.stt_available:
+            print("WARNING: Speech-to-text not available. Voice features will be limited.")
+            print("Check your API key in the .env file, or STT_ENGINE.")
+
+        # Dictation goes through the on-disk spool, so notes survive outages
+        self.spool_worker: SpoolWorker | None = None
+        if config.capture_spool and self.speech_interface.stt_available:
+            self.spool_worker = SpoolWorker(
+                CaptureSpool(config.spool_dir),
+                self.speech_interface.transcribe,
+                self._save_spooled_note,
+                retry_interval=config.spool_retry_interval,
+                max_attempts=config.spool_max_attempts,
+            )
+            self.speech_interface.spool_worker = self.spool_worker
+
+        # Project digests are brought up to date while the agent is idle
+        self.digest_worker: DigestWorker | None = None
+        if config.digest_enabled and self.speech_interface.chat_available:
+            self.digest_worker = DigestWorker.from_config(
+                config, self.note_manager, self.speech_interface.chat_engine.chat)
+
+    @property
+    def current_project(self) -> str | None:
+        return self.session.current_project
+
+    def _save_spooled_note(self, note_content: str, project: str | None, captured_at: datetime):
+        """Saves a note transcribed by the spool worker to the project it was dictated for."""
+        if project:
+            self.note_manager.add_note_to_project(project, note_content, captured_at=captured_at)
+        else:
+            self.note_manager.add_note_to_scratchpad(note_content, captured_at=captured_at)
+        # On disk before the capture leaves the spool
+        self.note_manager.flush()
 
     def _handle_initial_project_setup(self):
         """Asks user for project context or to use scratchpad via voice."""
-        # Prepare the initial prompt with existing projects
-        existing_projects = self.note_manager.list_projects()
-
-        project_options = ""
-        if existing_projects:
-            project_options = f" Existing projects are: {', '.join(existing_projects)}."
-
-        full_initial_prompt = (
-            "Welcome! Which project are you working on today? "
-            "Or shall we use the general scratchpad?" +
-            project_options +
-            f" You can say 'new project [name]', 'use [project name]', or 'scratchpad'. Default is '{self.config.default_project_name}'."
-        )
-
         # Show the prompt and get user's response
-        print(f"📢 Agent says: {full_initial_prompt}")
+        print(f"📢 Agent says: {self.session.project_prompt()}")
+        self.speech_interface.speak(WELCOME_GREETING)
         response_text = self.speech_interface.conduct_realtime_conversation_turn(
-            "Project name, 'new project [name]', 'use [project name]', or 'scratchpad': "
+            "Project name, 'new project [name]', 'use [project name]', or 'scratchpad': ",
+            context="project",
         )
-
-        if response_text:
-            response_lower = response_text.lower()
-
-            # Handle "new project" command
-            if "new project" in response_lower:
-                name_part = response_lower.replace("new project", "").strip()
-                if name_part:
-                    self.current_project = name_part
-                    self.note_manager.add_note_to_project(
-                        self.current_project, f"Project '{self.current_project}' initiated.")
-                    print(
-                        f"📢 Agent: Okay, working on new project: {self.current_project}.")
-                else:
-                    print(
-                        "📢 Agent: Project name not clearly specified. Using scratchpad for now.")
-                    self.current_project = None
-
-            # Handle "use [project]" command
-            elif "use " in response_lower and "scratchpad" not in response_lower:
-                name_part = response_lower.replace("use", "").strip()
-                if name_part and name_part in existing_projects:
-                    self.current_project = name_part
-                    self.note_manager.add_note_to_project(
-                        self.current_project, f"Continuing project '{self.current_project}'.")
-                    print(
-                        f"📢 Agent: Okay, working on project: {self.current_project}.")
-                elif name_part:  # New project implied by "use"
-                    self.current_project = name_part
-                    self.note_manager.add_note_to_project(
-                        self.current_project, f"Starting new project from 'use' command: '{self.current_project}'.")
-                    print(
-                        f"📢 Agent: Okay, starting new project: {self.current_project}.")
-                else:
-                    print("📢 Agent: Project name not clear. Using scratchpad.")
-                    self.current_project = None
-
-            # Handle "scratchpad" command
-            elif "scratchpad" in response_lower:
-                self.current_project = None
-                print("📢 Agent: Okay, using the global scratchpad.")
-
-            # Handle existing project name
-            elif response_text.strip() and response_text.strip() in existing_projects:
-                self.current_project = response_text.strip()
-                self.note_manager.add_note_to_project(
-                    self.current_project, f"Continuing project '{self.current_project}'.")
-                print(
-                    f"📢 Agent: Okay, working on project: {self.current_project}.")
-
-            # Default handling
-            else:
-                self.current_project = response_text.strip(
-                ) if response_text.strip() else self.config.default_project_name
-                self.note_manager.add_note_to_project(
-                    self.current_project, f"Project '{self.current_project}' selected/initiated.")
-                print(
-                    f"📢 Agent: Okay, working on project: {self.current_project}.")
-        else:
-            # Fallback to default project
-            self.current_project = self.config.default_project_name
-            self.note_manager.add_note_to_project(
-                self.current_project, f"Continuing default project '{self.current_project}'.")
-            print(
-                f"📢 Agent: No project specified or error. Using default project: {self.current_project}.")
+        print(f"📢 Agent: {self.session.select_project(response_text)}")
+
+    def _handle_search(self, query: str):
+        """Searches all notes and reads out a short summary of the matches."""
+        results, summary = self.session.search(query)
+        if not results:
+            print(f"📢 Agent: {summary}")
+            self.speech_interface.say(summary)
+            return
+
+        print(f"🔎 Notes about '{query}':")
+        for result in results:
+            where = result.project or "scratchpad"
+            content = result.entry.content.replace("\n", " ")
+            preview = content[:70] + "..." if len(content) > 70 else content
+            print(f"  - [{where}] {result.entry.timestamp:%Y-%m-%d %H:%M}: {preview}")
+        self.speech_interface.say(summary)
 
     def start_session(self):
         """Starts the interactive voice session."""
         try:
+            self.speech_interface.prewarm_speech_cache(
+                [WELCOME_GREETING, GOODBYE_MESSAGE])
+            if self.spool_worker is not None:
+                # Also saves notes still spooled from an earlier session
+                self.spool_worker.start()
+            if self.digest_worker is not None:
+                self.digest_worker.start()
+            # Pick up notes changed since the last session before the first search
+            threading.Thread(target=self.note_manager.refresh_search_index,
+                             name="search-index-refresh", daemon=True).start()
             self._handle_initial_project_setup()
             self.running = True
 
-            ready_message = f"Ready to capture ideas for '{self.current_project if self.current_project else 'the scratchpad'}'. Say 'exit agent' or 'quit agent' to end."
+            ready_message = f"Ready to capture ideas for '{self.session.target_name}'. Say 'exit agent' or 'quit agent' to end."
             print(f"📢 Agent says: {ready_message}")
 
             while self.running:
                 # Listen for user input
                 user_final_utterance = self.speech_interface.conduct_realtime_conversation_turn(
-                    f"Listening for '{self.current_project or 'scratchpad'}' (or say 'switch project', 'exit agent')..."
+                    f"Listening for '{self.current_project or 'scratchpad'}' (or say 'switch project', 'exit agent')...",
+                    project=self.current_project,
                 )
+                capture_status = self.speech_interface.last_capture_status
+                if self.digest_worker is not None and (user_final_utterance or capture_status):
+                    self.digest_worker.touch()
+
+                if not user_final_utterance and capture_status == CAPTURE_QUEUED:
+                    # Nothing is lost; keep capturing while the spool catches up
+                    print("📢 Agent: Recording queued; it will be saved when transcription succeeds.")
+                    continue
 
                 if not user_final_utterance:
                     print(
@@ -132,28 +138,27 @@ class Agent:
                     continue
 
                 # Process commands
-                if user_final_utterance.lower() in ["exit agent", "quit agent", "stop agent please"]:
-                    print("📢 Agent says: Ending session. Goodbye!")
+                intent = classify_intent(user_final_utterance)
+                if intent == "exit":
+                    print(f"📢 Agent says: {GOODBYE_MESSAGE}")
+                    self.speech_interface.speak(GOODBYE_MESSAGE)
                     self.running = False
                     continue
 
-                if "switch project" in user_final_utterance.lower() or "change project" in user_final_utterance.lower():
+                if intent == "switch_project":
                     self._handle_initial_project_setup()
                     continue
 
-                # Save the note
-                note_content = user_final_utterance
+                search_query = parse_search_query(user_final_utterance) if intent == "search" else None
+                if search_query:
+                    self._handle_search(search_query)
+                    continue
 
-                if self.current_project:
-                    self.note_manager.add_note_to_project(
-                        self.current_project, note_content)
+                # Save the note (the spool worker already has, for spooled dictation)
+                if capture_status == CAPTURE_SAVED:
+                    print(f"📢 Agent: {note_saved_message(user_final_utterance)}")
                 else:
-                    self.note_manager.add_note_to_scratchpad(note_content)
-
-                # Confirm note was saved
-                preview = note_content[:50] + \
-                    "..." if len(note_content) > 50 else note_content
-                print(f"📢 Agent: Note saved: '{preview}'")
+                    print(f"📢 Agent: {self.session.save_note(user_final_utterance)}")
 
         except KeyboardInterrupt:
             print("\n\nSession interrupted by user. Exiting gracefully...")
@@ -163,4 +168,20 @@ class Agent:
             traceback.print_exc()
         finally:
             self.running = False
+            avoided = self.speech_interface.intent_router.avoided_calls
+            if any(avoided.values()):
+                print(f"Local routing avoided {avoided['chat']} chat and {avoided['tts']} speech calls.")
+            # Let any background replies (pipelined turns) finish playing
+            self.speech_interface.close()
+            if self.digest_worker is not None:
+                self.digest_worker.stop()
+            if self.spool_worker is not None:
+                self.spool_worker.stop()
+                queued = len(self.spool_worker.spool)
+                if queued:
+                    print(f"{queued} recording(s) are still queued and will be saved next session.")
+            # Write out any queued notes and close the note files
+            self.note_manager.close()
+            self.tracer.dump_summary()
+            self.tracer.close()
             print("Session ended.")
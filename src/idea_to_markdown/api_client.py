@@ -0,0 +1,234 @@
+import random
+import threading
+import time
+from typing import Callable
+
+import openai
+
+try:
+    import httpx
+except ImportError:  # openai 3.x ships its HTTP stack as httpx2
+    import httpx2 as httpx
+
+from .tracing import Tracer
+
+# Endpoints the agent calls: whisper-1, gpt-4o and tts-1
+ENDPOINTS = ("stt", "chat", "tts")
+
+# Client errors worth retrying; 5xx responses always are
+RETRYABLE_STATUS_CODES = frozenset([408, 409, 429])
+
+
+class ApiUnavailableError(openai.OpenAIError):
+    """Raised without calling the API: the endpoint's circuit is open or
+    every request slot stayed busy for the whole queue timeout."""
+
+    def __init__(self, endpoint: str, reason: str):
+        super().__init__(f"{endpoint} API unavailable: {reason}")
+        self.endpoint = endpoint
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint after repeated failures.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are refused for reset_timeout seconds; then a single probe call is let
+    through, which closes the circuit on success or reopens it on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe may."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._probing = False
+
+
+def is_retryable(error: Exception) -> bool:
+    """Connection errors, timeouts, rate limits and server errors are retried."""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """The delay the server asked for in retry-after-ms or retry-after, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # an HTTP date; fall back to our own backoff
+    return None
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float,
+                  rng: random.Random | None = None) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(max, base * 2**attempt)]."""
+    ceiling = min(max_delay, base_delay * (2 ** attempt))
+    return (rng or random).uniform(0, ceiling)
+
+
+def create_openai_client(config) -> openai.OpenAI:
+    """
+    Builds the OpenAI client with an explicitly sized keep-alive connection
+    pool. Its own retries are disabled; ApiClient retries instead, so a
+    failure is never retried by both layers.
+    """
+    http_client = openai.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=config.api_max_connections,
+            max_keepalive_connections=config.api_keepalive_connections,
+            keepalive_expiry=config.api_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(config.api_chat_timeout, connect=config.api_connect_timeout),
+    )
+    return openai.OpenAI(api_key=config.openai_api_key, max_retries=0, http_client=http_client)
+
+
+class ApiClient:
+    """
+    Runs requests against the OpenAI endpoints with bounded concurrency,
+    per-endpoint timeouts, retries with jittered exponential backoff and a
+    circuit breaker per endpoint.
+
+    Requests are callables taking the timeout to use, so the same request can
+    be rebuilt for every attempt:
+
+        api.call("chat", lambda timeout: client.chat.completions.create(..., timeout=timeout))
+    """
+
+    def __init__(self, max_concurrency: int = 8, queue_timeout: float = 10.0,
+                 max_retries: int = 3, base_delay: float = 0.25, max_delay: float = 4.0,
+                 timeouts: dict[str, float] | None = None, connect_timeout: float = 5.0,
+                 breaker_failures: int = 5, breaker_reset: float = 30.0,
+                 tracer: Tracer | None = None, sleep: Callable[[float], None] = time.sleep):
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeouts = {endpoint: httpx.Timeout(seconds, connect=connect_timeout)
+                         for endpoint, seconds in (timeouts or {}).items()}
+        self.breakers = {endpoint: CircuitBreaker(breaker_failures, breaker_reset)
+                         for endpoint in ENDPOINTS}
+        self.tracer = tracer or Tracer()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._sleep = sleep
+        self._rng = random.Random()
+
+    @classmethod
+    def from_config(cls, config, tracer: Tracer | None = None) -> "ApiClient":
+        return cls(
+            max_concurrency=config.api_max_concurrency,
+            queue_timeout=config.api_queue_timeout,
+            max_retries=config.api_max_retries,
+            base_delay=config.api_retry_base_delay,
+            max_delay=config.api_retry_max_delay,
+            timeouts={"stt": config.api_stt_timeout, "chat": config.api_chat_timeout,
+                      "tts": config.api_tts_timeout},
+            connect_timeout=config.api_connect_timeout,
+            breaker_failures=config.api_breaker_failures,
+            breaker_reset=config.api_breaker_reset,
+            tracer=tracer,
+        )
+
+    def available(self, endpoint: str) -> bool:
+        """False while the endpoint's circuit is open (calls would be refused)."""
+        return self.breakers[endpoint].state != CircuitBreaker.OPEN
+
+    def call(self, endpoint: str, request: Callable, max_retries: int | None = None):
+        """
+        Runs request(timeout), retrying transient failures. Raises
+        ApiUnavailableError when the circuit is open or no slot frees up,
+        otherwise the last error once retries are exhausted.
+        """
+        breaker = self.breakers[endpoint]
+        max_retries = self.max_retries if max_retries is None else max_retries
+        timeout = self.timeouts.get(endpoint, openai.NOT_GIVEN)
+        attempt = 0
+        while True:
+            # Retries stop as soon as other calls have opened the circuit
+            if not (breaker.allow() if attempt == 0 else breaker.state == CircuitBreaker.CLOSED):
+                raise ApiUnavailableError(endpoint, "circuit open after repeated failures")
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                raise ApiUnavailableError(endpoint, "too many requests in flight")
+            try:
+                result = request(timeout)
+            except Exception as e:
+                retryable = is_retryable(e)
+                if not retryable:
+                    # The service answered; the request itself was wrong
+                    breaker.record_success()
+                    raise
+                if attempt >= max_retries or breaker.state != CircuitBreaker.CLOSED:
+                    breaker.record_failure()
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.base_delay, self.max_delay, self._rng)
+                delay = min(delay, self.max_delay)
+            else:
+                breaker.record_success()
+                return result
+            finally:
+                self._slots.release()
+
+            # Sleep without holding a slot, so waiting retries don't block other calls
+            attempt += 1
+            self.tracer.current_span().add("retries")
+            self._sleep(delay)
@@ -0,0 +1,203 @@
+import io
+import struct
+import threading
+
+
+def build_wav_header(data_size: int, channels: int, rate: int, sample_width: int) -> bytes:
+    """Builds a canonical 44-byte PCM WAV header for data_size bytes of frames."""
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, rate, rate * block_align, block_align, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+class WavUpload(io.RawIOBase):
+    """
+    A read-only WAV file view over in-memory PCM frames.
+
+    The header is generated up front and the frames are served straight from
+    a memoryview, so uploading a recording never writes it to disk or copies
+    the PCM into a second buffer.
+    """
+
+    def __init__(self, pcm_data, channels: int, rate: int, sample_width: int,
+                 name: str = "speech.wav"):
+        super().__init__()
+        self._frames = memoryview(pcm_data).cast("B")
+        self._header = memoryview(build_wav_header(
+            len(self._frames), channels, rate, sample_width))
+        self._size = len(self._header) + len(self._frames)
+        self._pos = 0
+        self.name = name
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._pos + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._pos = position
+        return self._pos
+
+    def __len__(self) -> int:
+        return self._size
+
+    def readinto(self, buffer) -> int:
+        target = memoryview(buffer).cast("B")
+        written = 0
+        header_size = len(self._header)
+        while written < len(target) and self._pos < self._size:
+            if self._pos < header_size:
+                source = self._header[self._pos:]
+            else:
+                source = self._frames[self._pos - header_size:]
+            count = min(len(source), len(target) - written)
+            target[written:written + count] = source[:count]
+            written += count
+            self._pos += count
+        return written
+
+
+class WavData:
+    """Format and frames of a WAV buffer, with frames as a memoryview slice."""
+
+    def __init__(self, channels: int, rate: int, sample_width: int, frames: memoryview):
+        self.channels = channels
+        self.rate = rate
+        self.sample_width = sample_width
+        self.frames = frames
+
+
+def parse_wav(data) -> WavData | None:
+    """
+    Locates the fmt and data chunks of an in-memory WAV file without copying.
+    Returns None if the buffer is not a RIFF/WAVE file.
+    """
+    view = memoryview(data).cast("B")
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        return None
+
+    channels = rate = sample_width = None
+    pos = 12
+    while pos + 8 <= len(view):
+        chunk_id = bytes(view[pos:pos + 4])
+        (chunk_size,) = struct.unpack_from("<I", view, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            _, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", view, body)
+            sample_width = bits // 8
+        elif chunk_id == b"data":
+            if channels is None:
+                return None
+            # Streamed WAVs may carry a placeholder size; clamp to what we have
+            end = min(body + chunk_size, len(view))
+            return WavData(channels, rate, sample_width, view[body:end])
+        pos = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def iter_frame_slices(frames: memoryview, slice_size: int):
+    """Yields consecutive memoryview slices of at most slice_size bytes."""
+    for start in range(0, len(frames), slice_size):
+        yield frames[start:start + slice_size]
+
+
+class AudioRingBuffer:
+    """
+    A bounded, thread-safe byte ring buffer between a downloader and playback.
+
+    The writer blocks while the buffer is full, so a fast network can never
+    run ahead of the speaker by more than the buffer's capacity. finish()
+    marks the end of the audio; close() aborts both sides.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self._buffer = bytearray(capacity)
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        self._finished = False
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return self._size
+
+    def write(self, data) -> bool:
+        """
+        Copies data into the buffer, waiting for space as needed.
+        Returns False if the buffer was closed before everything was written.
+        """
+        view = memoryview(data).cast("B")
+        with self._condition:
+            while view:
+                while self._size == self._capacity and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return False
+                end = (self._start + self._size) % self._capacity
+                count = min(len(view), self._capacity - self._size, self._capacity - end)
+                self._buffer[end:end + count] = view[:count]
+                self._size += count
+                view = view[count:]
+                self._condition.notify_all()
+        return True
+
+    def read(self, max_bytes: int, align: int = 1) -> bytes:
+        """
+        Returns up to max_bytes, waiting until data is available.
+        Reads are rounded down to a multiple of align (e.g. one sample frame)
+        unless the writer has finished. Returns b"" at end of audio.
+        """
+        with self._condition:
+            while not self._closed:
+                available = self._size if self._finished else self._size - self._size % align
+                if available:
+                    break
+                if self._finished:
+                    return b""
+                self._condition.wait()
+            else:
+                return b""
+
+            count = min(max_bytes - max_bytes % align or max_bytes, available)
+            first = min(count, self._capacity - self._start)
+            data = bytes(self._buffer[self._start:self._start + first])
+            if first < count:
+                data += bytes(self._buffer[:count - first])
+            self._start = (self._start + count) % self._capacity
+            self._size -= count
+            self._condition.notify_all()
+            return data
+
+    def finish(self):
+        """Marks the end of the audio; readers drain what is left."""
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+    def close(self):
+        """Aborts the buffer, waking any blocked reader or writer."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,292 @@
+import hashlib
+import io
+import struct
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from .audio_buffers import WavUpload
+
+# Formats the transcription endpoint accepts that we can produce ourselves
+UPLOAD_FORMATS = ("flac", "wav")
+
+FLAC_BLOCK_SIZE = 4096
+# Highest Rice parameter the 4-bit residual coding method can express
+_MAX_RICE_PARAMETER = 14
+_FLAC_SAMPLE_RATE_CODES = {8000: 0b0100, 16000: 0b0101, 22050: 0b0110, 24000: 0b0111,
+                           32000: 0b1000, 44100: 0b1001, 48000: 0b1010, 96000: 0b1011}
+
+
+def _crc_table(polynomial: int, width: int) -> list[int]:
+    top = 1 << (width - 1)
+    mask = (1 << width) - 1
+    table = []
+    for byte in range(256):
+        crc = byte << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ polynomial) if crc & top else (crc << 1)
+        table.append(crc & mask)
+    return table
+
+
+_CRC8_TABLE = _crc_table(0x07, 8)
+_CRC16_TABLE = np.array(_crc_table(0x8005, 16), dtype=np.uint16)
+# Row j: the CRC-16 of each byte value followed by j zero bytes. The CRC is
+# linear, so a message's CRC is the XOR of its bytes' rows, looked up at once.
+_crc16_rows = _CRC16_TABLE[None, :]
+_crc16_rows_lock = threading.Lock()
+
+
+def _crc8(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def _crc16_shift_rows(length: int) -> np.ndarray:
+    global _crc16_rows
+    with _crc16_rows_lock:
+        rows = [_crc16_rows]
+        last = _crc16_rows[-1]
+        for _ in range(length - _crc16_rows.shape[0]):
+            last = (last << 8) ^ _CRC16_TABLE[last >> 8]
+            rows.append(last[None, :])
+        if len(rows) > 1:
+            _crc16_rows = np.concatenate(rows)
+        return _crc16_rows
+
+
+def _crc16(data: bytes) -> int:
+    if not data:
+        return 0
+    rows = _crc16_rows
+    if rows.shape[0] < len(data):
+        rows = _crc16_shift_rows(len(data))
+    message = np.frombuffer(data, dtype=np.uint8)
+    return int(np.bitwise_xor.reduce(rows[np.arange(len(data) - 1, -1, -1), message]))
+
+
+def trim_silence(pcm, rate: int, energy_threshold: float, pad_seconds: float = 0.25,
+                 window_seconds: float = 0.02) -> bytes:
+    """
+    Drops leading and trailing silence from 16-bit mono PCM, keeping
+    pad_seconds around the speech so words aren't clipped. Audio that never
+    reaches the threshold is returned unchanged: a quiet speaker is better
+    sent to Whisper than thrown away.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    window = max(1, int(rate * window_seconds))
+    windows = samples.size // window
+    if windows == 0:
+        return bytes(pcm)
+    energy = np.sqrt(np.mean(np.square(
+        samples[:windows * window].reshape(windows, window), dtype=np.float64), axis=1))
+    voiced = np.flatnonzero(energy >= energy_threshold)
+    if voiced.size == 0:
+        return bytes(pcm)
+    pad = int(rate * pad_seconds)
+    start = max(0, voiced[0] * window - pad)
+    end = min(samples.size, (voiced[-1] + 1) * window + pad)
+    return samples[start:end].tobytes()
+
+
+def _bits(value: int, width: int) -> np.ndarray:
+    """The low `width` bits of value, most significant first."""
+    return ((value >> np.arange(width - 1, -1, -1)) & 1).astype(np.uint8)
+
+
+def _utf8_number(number: int) -> bytes:
+    """FLAC's UTF-8-style coding of a frame number."""
+    if number < 0x80:
+        return bytes([number])
+    length = 2
+    while number >= 1 << (5 * length + 1):
+        length += 1
+    out = []
+    for _ in range(length - 1):
+        out.append(0x80 | (number & 0x3F))
+        number >>= 6
+    out.append(((0xFF00 >> length) & 0xFF) | number)
+    return bytes(reversed(out))
+
+
+def _rice_parameters(sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Near-optimal Rice parameters for partitions, from their mean zigzagged residual."""
+    means = sums / np.maximum(counts, 1)
+    return np.clip(np.floor(np.log2(np.maximum(means, 1))), 0, _MAX_RICE_PARAMETER).astype(np.int64)
+
+
+def _rice_bits(values: np.ndarray, k: int) -> np.ndarray:
+    """Rice codes: the quotient in unary (zeros then a one), then k low bits."""
+    quotients = values >> k
+    lengths = quotients + 1 + k
+    bits = np.zeros(int(lengths.sum()), dtype=np.uint8)
+    stops = np.cumsum(lengths) - 1 - k
+    bits[stops] = 1
+    if k:
+        shifts = np.arange(k - 1, -1, -1)
+        bits[(stops[:, None] + 1 + np.arange(k)).ravel()] = ((values[:, None] >> shifts) & 1).ravel()
+    return bits
+
+
+def _residual_bits(residual: np.ndarray, block_size: int, order: int) -> np.ndarray:
+    """Rice-coded residual, with the partition order that codes it smallest."""
+    zigzag = np.where(residual >= 0, residual << 1, ((-residual) << 1) - 1)
+    best = None
+    for partition_order in range(0, 5):
+        partitions = 1 << partition_order
+        if block_size % partitions or block_size >> partition_order <= order:
+            break
+        size = block_size >> partition_order
+        # The first partition is short by the predictor's warm-up samples
+        starts = np.arange(partitions) * size - order
+        starts[0] = 0
+        counts = np.diff(np.append(starts, zigzag.size))
+        parameters = _rice_parameters(np.add.reduceat(zigzag, starts), counts)
+        cost = (int((zigzag >> np.repeat(parameters, counts)).sum())
+                + int((counts * (parameters + 1)).sum()) + 4 * partitions)
+        if best is None or cost < best[0]:
+            best = (cost, partition_order, starts, counts, parameters)
+
+    _, partition_order, starts, counts, parameters = best
+    chunks = [_bits(0b00, 2), _bits(partition_order, 4)]
+    for start, count, k in zip(starts, counts, parameters):
+        chunks.append(_bits(int(k), 4))
+        chunks.append(_rice_bits(zigzag[start:start + count], int(k)))
+    return np.concatenate(chunks)
+
+
+def _subframe_bits(samples: np.ndarray, bits_per_sample: int) -> np.ndarray:
+    """The smallest of a CONSTANT, FIXED (orders 0-4) or VERBATIM subframe."""
+    if np.all(samples == samples[0]):
+        return np.concatenate([_bits(0b00000000, 8), _bits(int(samples[0]), bits_per_sample)])
+
+    # The fixed predictor of order n leaves the nth difference as residual
+    residuals = [samples]
+    for _ in range(min(4, samples.size - 1)):
+        residuals.append(np.diff(residuals[-1]))
+    order = min(range(len(residuals)), key=lambda n: np.abs(residuals[n]).sum())
+    fixed = np.concatenate([
+        _bits(0b00010000 | (order << 1), 8),
+        *[_bits(int(s), bits_per_sample) for s in samples[:order]],
+        _residual_bits(residuals[order], samples.size, order),
+    ])
+    if fixed.size < 8 + bits_per_sample * samples.size:
+        return fixed
+    shifts = np.arange(bits_per_sample - 1, -1, -1)
+    return np.concatenate([_bits(0b00000010, 8),
+                           ((samples[:, None] >> shifts) & 1).astype(np.uint8).ravel()])
+
+
+def encode_flac(pcm, rate: int, block_size: int = FLAC_BLOCK_SIZE) -> bytes:
+    """
+    Losslessly encodes 16-bit mono PCM as a FLAC file, typically about half
+    the size of the WAV. Each block uses the best fixed linear predictor and
+    Rice-coded residuals.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.int64)
+    bits_per_sample = 16
+    rate_code = _FLAC_SAMPLE_RATE_CODES.get(rate, 0b0000)
+
+    frames = []
+    for number, start in enumerate(range(0, samples.size, block_size)):
+        block = samples[start:start + block_size]
+        size_code = 0b1100 if block.size == 4096 else 0b0111
+        header = struct.pack(">HBB", 0xFFF8, (size_code << 4) | rate_code, 0b0000_100_0)
+        header += _utf8_number(number)
+        if size_code == 0b0111:
+            header += struct.pack(">H", block.size - 1)
+        header += bytes([_crc8(header)])
+        frame = header + np.packbits(_subframe_bits(block, bits_per_sample)).tobytes()
+        frames.append(frame + struct.pack(">H", _crc16(frame)))
+
+    frame_sizes = [len(frame) for frame in frames] or [0]
+    stream_info = struct.pack(">HH", block_size, block_size)
+    stream_info += min(frame_sizes).to_bytes(3, "big") + max(frame_sizes).to_bytes(3, "big")
+    stream_info += ((rate << 44) | ((1 - 1) << 41) | ((bits_per_sample - 1) << 36)
+                    | samples.size).to_bytes(8, "big")
+    stream_info += hashlib.md5(samples.astype("<i2").tobytes()).digest()
+    metadata = bytes([0x80]) + len(stream_info).to_bytes(3, "big") + stream_info
+    return b"fLaC" + metadata + b"".join(frames)
+
+
+class EncodedAudio:
+    """
+    One recorded segment, ready to upload. For "wav" the data is the PCM
+    frames and the header is added on upload without copying them; for
+    "flac" it is the complete file.
+    """
+
+    def __init__(self, data, audio_format: str, rate: int = 16000, pcm_bytes: int | None = None):
+        self.data = data
+        self.audio_format = audio_format
+        self.rate = rate
+        # Size of the recorded PCM this came from
+        self.pcm_bytes = len(data) if pcm_bytes is None else pcm_bytes
+
+    @property
+    def filename(self) -> str:
+        return f"speech.{self.audio_format}"
+
+    def open(self):
+        """A file object to upload."""
+        if self.audio_format == "wav":
+            return WavUpload(self.data, channels=1, rate=self.rate, sample_width=2,
+                             name=self.filename)
+        upload = io.BytesIO(self.data)
+        upload.name = self.filename
+        return upload
+
+    def __len__(self) -> int:
+        """Bytes sent when this is uploaded."""
+        if self.audio_format == "wav":
+            return len(self.data) + 44
+        return len(self.data)
+
+
+class UploadEncoder:
+    """
+    Prepares recorded 16-bit mono PCM for upload: trims silence and encodes
+    it to the configured format. submit() runs this on a worker thread, so
+    segments closed mid-recording are encoded while recording goes on.
+    """
+
+    def __init__(self, rate: int, audio_format: str = "flac",
+                 trim_threshold: float | None = None, trim_pad_seconds: float = 0.25):
+        if audio_format not in UPLOAD_FORMATS:
+            raise ValueError(f"Unsupported upload format {audio_format!r}; "
+                             f"expected one of {', '.join(UPLOAD_FORMATS)}")
+        self.rate = rate
+        self.audio_format = audio_format
+        self.trim_threshold = trim_threshold
+        self.trim_pad_seconds = trim_pad_seconds
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, rate: int) -> "UploadEncoder":
+        return cls(rate, audio_format=config.upload_format,
+                   trim_threshold=config.vad_energy_threshold if config.upload_trim_silence else None)
+
+    def encode(self, pcm) -> EncodedAudio:
+        recorded = len(pcm)
+        if self.trim_threshold is not None:
+            pcm = trim_silence(pcm, self.rate, self.trim_threshold, self.trim_pad_seconds)
+        if self.audio_format == "flac":
+            return EncodedAudio(encode_flac(pcm, self.rate), "flac", self.rate, recorded)
+        return EncodedAudio(pcm, "wav", self.rate, recorded)
+
+    def submit(self, pcm) -> Future:
+        """Encodes on the worker thread; the future's result is an EncodedAudio."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+            return self._executor.submit(self.encode, pcm)
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -0,0 +1,320 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from .config import AppConfig
+from .note_manager import NoteManager
+from .tracing import Tracer
+
+AUDIO_SUFFIXES = (".wav",)
+MANIFEST_NAME = ".import_manifest.jsonl"
+# Whisper rejects uploads larger than this
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# How a memo's project is derived (see project_for)
+PROJECT_FROM_FOLDER = "folder"
+PROJECT_FROM_FILENAME = "filename"
+
+# Manifest statuses; both mean the memo is done and skipped on resume
+IMPORT_SAVED = "saved"
+IMPORT_EMPTY = "empty"
+
+_FILENAME_PROJECT_SEPARATOR = re.compile(r"_|\s+-\s+")
+
+
+def project_for(relative_path: Path, project_from: str = PROJECT_FROM_FOLDER) -> str | None:
+    """
+    The project a memo belongs to, or None for the global scratchpad.
+
+    By folder, it is the top-level folder the memo sits in (memos directly in
+    the imported directory go to the scratchpad). By filename, it is the part
+    of the name before the first "_" or " - ", e.g. "Garden - tomatoes.wav".
+    """
+    if project_from == PROJECT_FROM_FILENAME:
+        parts = _FILENAME_PROJECT_SEPARATOR.split(relative_path.stem, maxsplit=1)
+        return (parts[0].strip() or None) if len(parts) == 2 else None
+    if len(relative_path.parts) > 1:
+        return relative_path.parts[0]
+    return None
+
+
+def audio_duration(path: Path) -> float | None:
+    """Length of a WAV file in seconds, or None if its header can't be read."""
+    try:
+        with wave.open(str(path), "rb") as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (OSError, EOFError, wave.Error, ZeroDivisionError):
+        return None
+
+
+class VoiceMemo:
+    """One audio file to import."""
+
+    def __init__(self, path: Path, relative_path: Path, project: str | None):
+        self.path = path
+        self.relative_path = relative_path
+        self.project = project
+        stat = path.stat()
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+
+    @property
+    def recorded_at(self) -> datetime:
+        """When the memo was recorded, taken from the file's modification time."""
+        return datetime.fromtimestamp(self.mtime_ns / 1e9)
+
+    @property
+    def key(self) -> str:
+        """Identifies this version of the file; an edited file is imported again."""
+        return f"{self.relative_path.as_posix()}:{self.size}:{self.mtime_ns}"
+
+    def __repr__(self) -> str:
+        return f"VoiceMemo({self.relative_path.as_posix()!r}, project={self.project!r})"
+
+
+def find_memos(directory: Path, project_from: str = PROJECT_FROM_FOLDER,
+               project: str | None = None) -> list[VoiceMemo]:
+    """Every audio file under directory, oldest first; project overrides project_from."""
+    memos = []
+    for path in directory.rglob("*"):
+        if path.suffix.lower() not in AUDIO_SUFFIXES or not path.is_file():
+            continue
+        relative_path = path.relative_to(directory)
+        if any(part.startswith(".") for part in relative_path.parts):
+            continue
+        memo_project = project or project_for(relative_path, project_from)
+        memos.append(VoiceMemo(path, relative_path, memo_project))
+    memos.sort(key=lambda m: (m.mtime_ns, m.relative_path.as_posix()))
+    return memos
+
+
+class ImportManifest:
+    """
+    Append-only JSONL record of the memos already imported, so an interrupted
+    import can be resumed. A memo is recorded only after its note is on disk.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.done.add(json.loads(line)["key"])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # a line cut short by a crash
+
+    def __contains__(self, memo: VoiceMemo) -> bool:
+        return memo.key in self.done
+
+    def record(self, memo: VoiceMemo, status: str, characters: int = 0):
+        entry = {"key": memo.key, "path": memo.relative_path.as_posix(), "project": memo.project,
+                 "status": status, "characters": characters,
+                 "imported_at": datetime.now().isoformat(timespec="seconds")}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.add(memo.key)
+
+
+class ImportReport:
+    """Counts and throughput of one import run."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.skipped = 0
+        self.saved = 0
+        self.empty = 0
+        self.failed: list[tuple[VoiceMemo, str]] = []
+        self.audio_seconds = 0.0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.saved + self.empty + len(self.failed)
+
+    @property
+    def files_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def realtime_factor(self) -> float:
+        """Seconds of audio transcribed per second of wall-clock time."""
+        return self.audio_seconds / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"Imported {self.saved} memo(s), {self.empty} empty, {len(self.failed)} failed, "
+            f"{self.skipped} already imported.",
+            f"{self.processed} file(s) ({self.bytes / 1e6:.1f} MB, {self.audio_seconds / 60:.1f} min "
+            f"of audio) in {self.elapsed:.1f} s: {self.files_per_second:.2f} files/s, "
+            f"{self.realtime_factor:.1f}x realtime.",
+        ]
+        for memo, error in self.failed:
+            lines.append(f"  failed: {memo.relative_path.as_posix()}: {error}")
+        return "\n".join(lines)
+
+
+class BulkImporter:
+    """
+    Transcribes voice memos with a bounded pool of workers and saves each
+    transcript as a note in its project, stamped with the memo's recording
+    time.
+
+    Transcriptions run in parallel, but notes are written in recording order,
+    so each project's entries stay in time order. Failed memos are reported and left out of the
+    manifest, so the next run retries them.
+    """
+
+    def __init__(self, note_manager: NoteManager, transcribe: Callable[[Path], str],
+                 workers: int = 4, progress: Callable[[str], None] | None = print):
+        self.note_manager = note_manager
+        self.transcribe = transcribe
+        self.workers = max(1, workers)
+        self.progress = progress
+
+    def _transcribe(self, memo: VoiceMemo) -> str:
+        if memo.size > MAX_UPLOAD_BYTES:
+            raise ValueError(f"file is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        return self.transcribe(memo.path).strip()
+
+    def run(self, memos: list[VoiceMemo], manifest: ImportManifest) -> ImportReport:
+        report = ImportReport(len(memos))
+        todo = [memo for memo in memos if memo not in manifest]
+        report.skipped = len(memos) - len(todo)
+
+        # Transcribe a few memos ahead of the one being written, so a slow
+        # memo doesn't leave the workers idle, without reading every file at once
+        window = self.workers * 2
+        pending = deque(todo)
+        in_flight = deque()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import")
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < window:
+                    memo = pending.popleft()
+                    in_flight.append((memo, executor.submit(self._transcribe, memo)))
+                memo, future = in_flight.popleft()
+                try:
+                    text = future.result()
+                except Exception as e:
+                    report.failed.append((memo, str(e)))
+                    self._report_progress(report, memo, f"failed: {e}")
+                    continue
+                self._save(memo, text, manifest, report)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        report.elapsed = time.perf_counter() - report.started
+        return report
+
+    def _save(self, memo: VoiceMemo, text: str, manifest: ImportManifest, report: ImportReport):
+        report.bytes += memo.size
+        report.audio_seconds += audio_duration(memo.path) or 0.0
+        if not text:
+            manifest.record(memo, IMPORT_EMPTY)
+            report.empty += 1
+            self._report_progress(report, memo, "no speech")
+            return
+        if memo.project is None:
+            self.note_manager.add_note_to_scratchpad(text, captured_at=memo.recorded_at)
+        else:
+            self.note_manager.add_note_to_project(memo.project, text, captured_at=memo.recorded_at)
+        # The note must be on disk before the manifest says it's done
+        self.note_manager.flush()
+        manifest.record(memo, IMPORT_SAVED, len(text))
+        report.saved += 1
+        self._report_progress(report, memo, memo.project or "scratchpad")
+
+    def _report_progress(self, report: ImportReport, memo: VoiceMemo, outcome: str):
+        if self.progress is None:
+            return
+        elapsed = time.perf_counter() - report.started
+        rate = report.processed / elapsed if elapsed else 0.0
+        done = report.skipped + report.processed
+        self.progress(f"[{done}/{report.total}] {memo.relative_path.as_posix()} -> {outcome} "
+                      f"({rate:.2f} files/s)")
+
+
+def resolve_project_names(memos: list[VoiceMemo], note_manager: NoteManager):
+    """Files memos under an existing project whose name differs only in case."""
+    for memo in memos:
+        if memo.project is not None:
+            memo.project = note_manager.find_project(memo.project) or memo.project
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Transcribe a directory of voice memos (WAV files) into Markdown notes.")
+    parser.add_argument("directory", type=Path, help="directory to import, searched recursively")
+    parser.add_argument("--project-from", choices=(PROJECT_FROM_FOLDER, PROJECT_FROM_FILENAME),
+                        default=PROJECT_FROM_FOLDER,
+                        help="derive each memo's project from its top-level folder (default) "
+                             "or from its file name, e.g. 'Garden - tomatoes.wav'")
+    parser.add_argument("--project", help="import every memo into this project instead")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="memos transcribed in parallel (default: 4)")
+    parser.add_argument("--manifest", type=Path,
+                        help=f"record of imported memos, used to resume (default: "
+                             f"DIRECTORY/{MANIFEST_NAME})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Imports a directory of voice memos; run again to resume an interrupted import."""
+    args = parse_args(argv)
+    if not args.directory.is_dir():
+        print(f"Error: {args.directory} is not a directory.")
+        sys.exit(2)
+
+    config = AppConfig()
+    config.ensure_directories()
+
+    # Imported here so --help and argument errors don't wait for openai
+    from .speech_interface import SpeechInterface
+
+    tracer = Tracer.from_config(config)
+    speech = SpeechInterface(config, tracer=tracer)
+    # Any engine will do: Whisper needs OPENAI_API_KEY, STT_ENGINE=local does not
+    if not speech.stt_available:
+        print(f"Error: the '{config.stt_engine}' speech-to-text engine is not available "
+              f"(set OPENAI_API_KEY, or STT_ENGINE=local), so memos cannot be transcribed.")
+        speech.close()
+        tracer.close()
+        sys.exit(1)
+    note_manager = NoteManager(config, tracer=tracer)
+    report = None
+    try:
+        memos = find_memos(args.directory, args.project_from, args.project)
+        resolve_project_names(memos, note_manager)
+        manifest = ImportManifest(args.manifest or args.directory / MANIFEST_NAME)
+        print(f"Found {len(memos)} memo(s) in {args.directory}.")
+        importer = BulkImporter(note_manager, speech.transcribe_file, workers=args.workers)
+        report = importer.run(memos, manifest)
+        print(report.summary())
+    except KeyboardInterrupt:
+        print("\nImport interrupted; run the same command again to resume.")
+    finally:
+        speech.close()
+        note_manager.close()
+        tracer.dump_summary()
+        tracer.close()
+    if report is not None and report.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
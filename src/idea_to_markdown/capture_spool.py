@@ -0,0 +1,307 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from .api_client import ApiUnavailableError, is_retryable
+from .audio_encoding import EncodedAudio
+from .dictation import stitch_transcripts
+from .intent_router import classify_intent, parse_search_query
+
+# What became of a spooled capture, as seen by the turn that recorded it
+CAPTURE_SAVED = "saved"        # transcribed and saved as a note
+CAPTURE_COMMAND = "command"    # transcribed; a voice command, so not saved
+CAPTURE_EMPTY = "empty"        # transcribed, but nothing was said
+CAPTURE_QUEUED = "queued"      # still spooled; saved once transcription succeeds
+CAPTURE_FAILED = "failed"      # given up on; moved to the spool's failed/ folder
+
+
+def is_note(text: str) -> bool:
+    """Whether the agent saves this utterance as a note (i.e. it is not a command)."""
+    intent = classify_intent(text)
+    if intent in ("exit", "switch_project"):
+        return False
+    return not (intent == "search" and parse_search_query(text))
+
+
+class SpooledCapture:
+    """One recorded utterance waiting in the spool for transcription."""
+
+    def __init__(self, capture_id: str, captured_at: float, project: str | None,
+                 segment_lengths: list[int], attempts: int = 0, last_error: str | None = None,
+                 audio_format: str = "wav", segment_overlap: float = 0.0):
+        self.capture_id = capture_id
+        self.captured_at = captured_at
+        self.project = project  # None for the global scratchpad
+        self.segment_lengths = segment_lengths
+        # How the segments are encoded ("wav": raw PCM frames; see EncodedAudio)
+        self.audio_format = audio_format
+        # Seconds each segment repeats of the previous one (long dictation)
+        self.segment_overlap = segment_overlap
+        self.attempts = attempts
+        self.last_error = last_error
+
+    @property
+    def captured_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.captured_at)
+
+    def to_json(self) -> dict:
+        return {"captured_at": self.captured_at, "project": self.project,
+                "segment_lengths": self.segment_lengths, "attempts": self.attempts,
+                "last_error": self.last_error, "audio_format": self.audio_format,
+                "segment_overlap": self.segment_overlap}
+
+    def __repr__(self) -> str:
+        return f"SpooledCapture({self.capture_id!r}, project={self.project!r}, attempts={self.attempts})"
+
+
+class CaptureSpool:
+    """
+    Directory of recorded utterances waiting to be transcribed.
+
+    Each capture is an <id>.pcm file with its segments (raw PCM, or encoded
+    for upload, e.g. FLAC) back to back and an
+    <id>.json file with its metadata. The audio is written and fsynced first
+    and the metadata is renamed into place last, so after a crash a capture is
+    either complete or ignored. Ids start with the capture time, so sorting
+    them gives capture order.
+    """
+
+    def __init__(self, spool_dir: Path, fsync: bool = True):
+        self.spool_dir = spool_dir
+        self.failed_dir = spool_dir / "failed"
+        self.fsync = fsync
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._remove_incomplete()
+
+    def _remove_incomplete(self):
+        """Deletes audio whose capture never got its metadata (a crash mid-write)."""
+        for audio_path in self.spool_dir.glob("*.pcm"):
+            if not audio_path.with_suffix(".json").exists():
+                audio_path.unlink(missing_ok=True)
+        for temp_path in self.spool_dir.glob("*.json.tmp"):
+            temp_path.unlink(missing_ok=True)
+
+    def _write_file(self, path: Path, data: bytes):
+        with open(path, "wb") as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _write_metadata(self, capture: SpooledCapture):
+        meta_path = self.spool_dir / f"{capture.capture_id}.json"
+        temp_path = meta_path.with_name(meta_path.name + ".tmp")
+        self._write_file(temp_path, json.dumps(capture.to_json()).encode("utf-8"))
+        os.replace(temp_path, meta_path)
+
+    def enqueue(self, segments: list[bytes | EncodedAudio], project: str | None,
+                captured_at: float | None = None, segment_overlap: float = 0.0) -> SpooledCapture:
+        """Durably stores one utterance's audio segments (raw PCM or all encoded alike)."""
+        captured_at = time.time() if captured_at is None else captured_at
+        capture_id = f"{int(captured_at * 1_000_000):017d}-{uuid.uuid4().hex[:8]}"
+        audio_format = "wav"
+        if segments and isinstance(segments[0], EncodedAudio):
+            audio_format = segments[0].audio_format
+            segments = [segment.data for segment in segments]
+        capture = SpooledCapture(capture_id, captured_at, project,
+                                 [len(segment) for segment in segments],
+                                 audio_format=audio_format, segment_overlap=segment_overlap)
+        self._write_file(self.spool_dir / f"{capture_id}.pcm", b"".join(segments))
+        self._write_metadata(capture)
+        return capture
+
+    def pending(self) -> list[SpooledCapture]:
+        """Spooled captures, oldest first."""
+        captures = []
+        for meta_path in sorted(self.spool_dir.glob("*.json")):
+            try:
+                fields = json.loads(meta_path.read_text(encoding="utf-8"))
+                captures.append(SpooledCapture(meta_path.stem, **fields))
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Skipping unreadable spooled capture {meta_path.name}: {e}")
+        captures.sort(key=lambda c: (c.captured_at, c.capture_id))
+        return captures
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.spool_dir.glob("*.json"))
+
+    def read_segments(self, capture: SpooledCapture) -> list[bytes]:
+        data = (self.spool_dir / f"{capture.capture_id}.pcm").read_bytes()
+        segments, offset = [], 0
+        for length in capture.segment_lengths:
+            segments.append(data[offset:offset + length])
+            offset += length
+        return segments
+
+    def record_failure(self, capture: SpooledCapture, error: str) -> int:
+        """Counts a failed transcription attempt; returns the attempts so far."""
+        capture.attempts += 1
+        capture.last_error = error
+        self._write_metadata(capture)
+        return capture.attempts
+
+    def remove(self, capture: SpooledCapture):
+        """Deletes a capture once its note is safely written."""
+        (self.spool_dir / f"{capture.capture_id}.json").unlink(missing_ok=True)
+        (self.spool_dir / f"{capture.capture_id}.pcm").unlink(missing_ok=True)
+
+    def move_to_failed(self, capture: SpooledCapture):
+        """Sets a capture aside so it no longer holds up the ones after it."""
+        self.failed_dir.mkdir(exist_ok=True)
+        for suffix in (".pcm", ".json"):
+            source = self.spool_dir / f"{capture.capture_id}{suffix}"
+            if source.exists():
+                os.replace(source, self.failed_dir / source.name)
+
+
+class CaptureTicket:
+    """Lets the turn that recorded a capture wait for its transcript."""
+
+    def __init__(self, capture: SpooledCapture):
+        self.capture = capture
+        self.status: str | None = None
+        self.text: str | None = None
+        self.context = contextvars.copy_context()
+        self._done = threading.Event()
+
+    def _resolve(self, status: str, text: str | None = None):
+        self.status = status
+        self.text = text
+        self._done.set()
+
+    def wait(self, timeout: float | None = None) -> str:
+        """Returns the capture's status, or CAPTURE_QUEUED if it is not handled in time."""
+        if self._done.wait(timeout):
+            return self.status
+        return CAPTURE_QUEUED
+
+
+class SpoolWorker:
+    """
+    Background thread that drains a CaptureSpool: each capture is
+    transcribed, saved as a note stamped with its capture time, and only then
+    removed from the spool, so a crash at any point loses nothing (at worst a
+    note is saved twice).
+
+    Captures are handled strictly oldest first. When transcription fails
+    transiently the capture stays put and the worker tries again after
+    retry_interval seconds; other errors set a capture aside after
+    max_attempts tries. Commands such as "exit agent" are never saved.
+    """
+
+    def __init__(self, spool: CaptureSpool, transcribe: Callable[[EncodedAudio], str],
+                 save_note: Callable[[str, str | None, datetime], None],
+                 retry_interval: float = 5.0, max_attempts: int = 5):
+        self.spool = spool
+        self.transcribe = transcribe
+        self.save_note = save_note
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self.saved = 0
+        self._tickets: dict[str, CaptureTicket] = {}
+        self._lock = threading.Lock()
+        # One drain at a time keeps notes in capture order
+        self._drain_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="capture-spool", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        """Stops after the capture in progress; the rest stay spooled."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._release_tickets()
+
+    def submit(self, segments: list[bytes | EncodedAudio], project: str | None,
+               captured_at: float | None = None, segment_overlap: float = 0.0) -> CaptureTicket:
+        """Spools a capture and wakes the worker; the ticket reports what became of it."""
+        capture = self.spool.enqueue(segments, project, captured_at, segment_overlap)
+        ticket = CaptureTicket(capture)
+        with self._lock:
+            self._tickets[capture.capture_id] = ticket
+        self._wake.set()
+        return ticket
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.clear()
+            emptied = self.drain()
+            self._wake.wait(None if emptied else self.retry_interval)
+
+    def drain(self) -> bool:
+        """Handles spooled captures in order; False if one had to be left for later."""
+        with self._drain_lock:
+            for capture in self.spool.pending():
+                if self._stopping.is_set():
+                    return False
+                if not self._process(capture):
+                    # Later captures wait behind this one; don't keep their turns waiting
+                    self._release_tickets()
+                    return False
+            return True
+
+    def _process(self, capture: SpooledCapture) -> bool:
+        with self._lock:
+            ticket = self._tickets.get(capture.capture_id)
+        try:
+            segments = [EncodedAudio(data, capture.audio_format)
+                        for data in self.spool.read_segments(capture)]
+            # Trace the transcription as part of the turn that recorded it
+            context = ticket.context if ticket is not None else contextvars.copy_context()
+            texts = [context.run(self.transcribe, segment) for segment in segments]
+        except Exception as e:
+            print(f"Transcription of spooled capture failed: {e}")
+            attempts = self.spool.record_failure(capture, str(e))
+            if isinstance(e, ApiUnavailableError) or is_retryable(e) or attempts < self.max_attempts:
+                return False
+            print(f"Giving up on spooled capture {capture.capture_id} after {attempts} attempts.")
+            self.spool.move_to_failed(capture)
+            self._resolve(capture, CAPTURE_FAILED)
+            return True
+
+        texts = [t.strip() for t in texts if t and t.strip()]
+        if capture.segment_overlap:
+            text = stitch_transcripts(texts)
+        else:
+            text = " ".join(texts)
+        if not text:
+            status = CAPTURE_EMPTY
+        elif not is_note(text):
+            status = CAPTURE_COMMAND
+            if ticket is None:
+                print(f"Dropping stale spooled command: '{text}'")
+        else:
+            self.save_note(text, capture.project, capture.captured_datetime)
+            self.saved += 1
+            status = CAPTURE_SAVED
+        self.spool.remove(capture)
+        self._resolve(capture, status, text)
+        return True
+
+    def _resolve(self, capture: SpooledCapture, status: str, text: str | None = None):
+        with self._lock:
+            ticket = self._tickets.pop(capture.capture_id, None)
+        if ticket is not None:
+            ticket._resolve(status, text)
+
+    def _release_tickets(self):
+        """Tells every waiting turn that its capture stays queued."""
+        with self._lock:
+            tickets, self._tickets = list(self._tickets.values()), {}
+        for ticket in tickets:
+            ticket._resolve(CAPTURE_QUEUED)
@@ -1,7 +1,17 @@
 import os
-from pathlib import Path
+from pathlib import Path, PureWindowsPath
 from dotenv import load_dotenv
 
+from .note_segments import SEGMENTS_DIR_NAME
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Reads a boolean flag such as 'true', '1' or 'yes' from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 
 class AppConfig:
     """
@@ -36,19 +46,221 @@ class AppConfig:
         self.voice_recording_duration = int(
             os.getenv("VOICE_RECORDING_DURATION", "5"))
 
+        # Spoken project names resolve to an existing project when their
+        # fuzzy match score (0-1) reaches this threshold
+        self.project_match_threshold = float(
+            os.getenv("PROJECT_MATCH_THRESHOLD", "0.75"))
+
+        # Local intent routing: commands and dictated notes are recognized
+        # right after transcription and, per INTENT_POLICY, skip or defer the
+        # chat reply and its speech (see intent_router.DEFAULT_POLICY)
+        self.intent_routing = _env_flag("INTENT_ROUTING", True)
+        self.intent_policy = os.getenv("INTENT_POLICY", "")
+
+        # Latency tracing: per-stage spans appended to TRACE_FILE (JSONL) and
+        # summarized as p50/p95/p99 when the session ends
+        self.tracing_enabled = _env_flag("TRACING_ENABLED")
+        # Relative paths are taken from the project root
+        self.trace_file = self.base_dir / \
+            os.getenv("TRACE_FILE", "logs/trace.jsonl")
+
+        # Note writing: fsync mode is "none", "batch" or "entry". With group
+        # commit, entries are queued and written in batches of up to
+        # NOTE_BATCH_SIZE or every NOTE_FLUSH_INTERVAL seconds.
+        self.note_fsync_mode = os.getenv("NOTE_FSYNC_MODE", "batch").lower()
+        self.note_group_commit = _env_flag("NOTE_GROUP_COMMIT")
+        self.note_batch_size = int(os.getenv("NOTE_BATCH_SIZE", "64"))
+        self.note_flush_interval = float(
+            os.getenv("NOTE_FLUSH_INTERVAL", "0.5"))
+        self.note_max_open_files = int(os.getenv("NOTE_MAX_OPEN_FILES", "16"))
+
+        # Segmented projects (see note_segments.py): with NOTE_SEGMENTS set to
+        # "month" or "size", a project's entries go to
+        # .segments/<project>/YYYY-MM.md files, a new one each month or once the newest reaches
+        # NOTE_SEGMENT_MAX_BYTES. Existing project files are split on their
+        # next write (or with main.py --segment-notes).
+        self.note_segments = os.getenv("NOTE_SEGMENTS", "off").lower()
+        self.note_segment_max_bytes = int(
+            float(os.getenv("NOTE_SEGMENT_MAX_MB", "4")) * 1024 * 1024)
+
+        # Voice activity detection: stop recording on trailing silence instead
+        # of always capturing VOICE_RECORDING_DURATION seconds. With VAD on,
+        # VOICE_RECORDING_DURATION is how long to wait for speech to start.
+        self.vad_enabled = _env_flag("VAD_ENABLED", True)
+        self.vad_energy_threshold = float(
+            os.getenv("VAD_ENERGY_THRESHOLD", "500"))
+        self.vad_silence_duration = float(
+            os.getenv("VAD_SILENCE_DURATION", "1.0"))
+        self.vad_max_segment_duration = float(
+            os.getenv("VAD_MAX_SEGMENT_DURATION", "30"))
+        self.max_recording_duration = float(
+            os.getenv("MAX_RECORDING_DURATION", "300"))
+
+        # Long-form dictation: note turns record until DICTATION_SILENCE_DURATION
+        # seconds of silence (up to DICTATION_MAX_DURATION), cut into segments
+        # of DICTATION_SEGMENT_DURATION seconds that overlap by
+        # DICTATION_OVERLAP_DURATION. Up to DICTATION_PARALLEL_UPLOADS segments
+        # are transcribed while recording goes on, then stitched together.
+        self.long_dictation = _env_flag("LONG_DICTATION")
+        self.dictation_segment_duration = float(
+            os.getenv("DICTATION_SEGMENT_DURATION", "30"))
+        self.dictation_overlap_duration = float(
+            os.getenv("DICTATION_OVERLAP_DURATION", "2"))
+        self.dictation_silence_duration = float(
+            os.getenv("DICTATION_SILENCE_DURATION", "3"))
+        self.dictation_max_duration = float(
+            os.getenv("DICTATION_MAX_DURATION", "1800"))
+        self.dictation_parallel_uploads = int(
+            os.getenv("DICTATION_PARALLEL_UPLOADS", "4"))
+
+        # Recordings are trimmed of leading/trailing silence (below
+        # VAD_ENERGY_THRESHOLD) and encoded as UPLOAD_FORMAT ("flac", lossless
+        # and about half the size, or "wav") before they are sent to Whisper
+        self.upload_format = os.getenv("UPLOAD_FORMAT", "flac").lower()
+        self.upload_trim_silence = _env_flag("UPLOAD_TRIM_SILENCE", True)
+
+        # Speech engines (see engines.py): STT_ENGINE is "openai" (Whisper),
+        # "local" (faster-whisper on the CPU, no network) or "stub"; CHAT_ENGINE
+        # and TTS_ENGINE are "openai" or "stub". The stub answers every
+        # recording with STUB_TRANSCRIPT and every message with STUB_REPLY and
+        # speaks silence, for tests and offline demos.
+        self.stt_engine = os.getenv("STT_ENGINE", "openai").lower()
+        self.chat_engine = os.getenv("CHAT_ENGINE", "openai").lower()
+        self.tts_engine = os.getenv("TTS_ENGINE", "openai").lower()
+        self.stub_transcript = os.getenv("STUB_TRANSCRIPT", "hello agent")
+        self.stub_reply = os.getenv("STUB_REPLY", "Noted.")
+
+        # Local STT: a faster-whisper model name (tiny.en, base.en, small.en,
+        # ...) or directory, downloaded to .cache/models on first use.
+        # LOCAL_STT_THREADS=0 uses every core; LOCAL_STT_LANGUAGE is empty to
+        # detect the language (English-only ".en" models don't need it).
+        self.local_stt_model = os.getenv("LOCAL_STT_MODEL", "base.en")
+        self.local_stt_compute_type = os.getenv("LOCAL_STT_COMPUTE_TYPE", "int8")
+        self.local_stt_threads = int(os.getenv("LOCAL_STT_THREADS", "0"))
+        self.local_stt_beam_size = int(os.getenv("LOCAL_STT_BEAM_SIZE", "1"))
+        self.local_stt_language = os.getenv("LOCAL_STT_LANGUAGE", "")
+
+        # Chat context (see context_builder.py): each reply is asked for with
+        # up to CHAT_HISTORY_TURNS previous exchanges and the latest
+        # CHAT_CONTEXT_ENTRIES notes of the active project, as many as fit in
+        # CHAT_CONTEXT_TOKENS (estimated) with the system prompt and utterance
+        self.chat_context_tokens = int(os.getenv("CHAT_CONTEXT_TOKENS", "1500"))
+        self.chat_history_turns = int(os.getenv("CHAT_HISTORY_TURNS", "6"))
+        self.chat_context_entries = int(os.getenv("CHAT_CONTEXT_ENTRIES", "8"))
+
+        # Project digests (see digest.py): with DIGEST_ENABLED, a background
+        # worker keeps a structured summary of each project in notes/digests,
+        # every DIGEST_INTERVAL seconds once the agent has been idle for
+        # DIGEST_IDLE_SECONDS and a project has DIGEST_MIN_ENTRIES new
+        # entries. New entries are sent DIGEST_BATCH_TOKENS (estimated) at a time.
+        self.digest_enabled = _env_flag("DIGEST_ENABLED")
+        self.digest_interval = float(os.getenv("DIGEST_INTERVAL", "600"))
+        self.digest_idle_seconds = float(os.getenv("DIGEST_IDLE_SECONDS", "30"))
+        self.digest_min_entries = int(os.getenv("DIGEST_MIN_ENTRIES", "3"))
+        self.digest_batch_tokens = int(os.getenv("DIGEST_BATCH_TOKENS", "6000"))
+
+        # Streaming TTS starts playing the reply as soon as the first audio
+        # bytes arrive; the playback buffer bounds how far the download may
+        # run ahead of the speaker
+        self.streaming_tts = _env_flag("STREAMING_TTS", True)
+        self.playback_buffer_seconds = float(
+            os.getenv("PLAYBACK_BUFFER_SECONDS", "2.0"))
+
+        # Cache for fixed spoken phrases (errors, welcome, goodbye)
+        self.cache_dir = self.base_dir / ".cache"
+        self.tts_cache_dir = self.cache_dir / "tts"
+        self.tts_cache_enabled = _env_flag("TTS_CACHE_ENABLED", True)
+        self.tts_cache_memory_bytes = int(
+            float(os.getenv("TTS_CACHE_MEMORY_MB", "8")) * 1024 * 1024)
+        self.tts_cache_disk_bytes = int(
+            float(os.getenv("TTS_CACHE_DISK_MB", "64")) * 1024 * 1024)
+
+        # Pipelined turns return the transcript as soon as STT finishes and
+        # run the chat/TTS reply in the background
+        self.pipelined_turns = _env_flag("PIPELINED_TURNS")
+
+        # Capture spool: dictated recordings are written to SPOOL_DIR before
+        # transcription and saved as notes by a background worker, so notes
+        # survive API outages and restarts. A turn waits up to
+        # SPOOL_WAIT_SECONDS for its transcript before recording again.
+        self.capture_spool = _env_flag("CAPTURE_SPOOL", True)
+        self.spool_dir = self.base_dir / os.getenv("SPOOL_DIR", ".spool")
+        self.spool_wait_seconds = float(os.getenv("SPOOL_WAIT_SECONDS", "10"))
+        self.spool_retry_interval = float(
+            os.getenv("SPOOL_RETRY_INTERVAL", "5"))
+        self.spool_max_attempts = int(os.getenv("SPOOL_MAX_ATTEMPTS", "5"))
+
+        # OpenAI API calls: keep-alive connection pool, how many requests may
+        # be in flight at once (others wait up to API_QUEUE_TIMEOUT seconds),
+        # per-endpoint timeouts in seconds, retries with jittered exponential
+        # backoff, and a circuit breaker that stops calling an endpoint for
+        # API_BREAKER_RESET seconds after API_BREAKER_FAILURES failed calls
+        self.api_max_connections = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+        self.api_keepalive_connections = int(
+            os.getenv("API_KEEPALIVE_CONNECTIONS", "10"))
+        self.api_keepalive_expiry = float(
+            os.getenv("API_KEEPALIVE_EXPIRY", "30"))
+        self.api_max_concurrency = int(os.getenv("API_MAX_CONCURRENCY", "8"))
+        self.api_queue_timeout = float(os.getenv("API_QUEUE_TIMEOUT", "10"))
+        self.api_connect_timeout = float(
+            os.getenv("API_CONNECT_TIMEOUT", "5"))
+        self.api_stt_timeout = float(os.getenv("API_STT_TIMEOUT", "30"))
+        self.api_chat_timeout = float(os.getenv("API_CHAT_TIMEOUT", "30"))
+        self.api_tts_timeout = float(os.getenv("API_TTS_TIMEOUT", "30"))
+        self.api_max_retries = int(os.getenv("API_MAX_RETRIES", "3"))
+        self.api_retry_base_delay = float(
+            os.getenv("API_RETRY_BASE_DELAY", "0.25"))
+        self.api_retry_max_delay = float(
+            os.getenv("API_RETRY_MAX_DELAY", "4"))
+        self.api_breaker_failures = int(
+            os.getenv("API_BREAKER_FAILURES", "5"))
+        self.api_breaker_reset = float(os.getenv("API_BREAKER_RESET", "30"))
+
+        # Multi-session server (main.py --serve): listen address and the
+        # number of threads running blocking API calls and note writes
+        self.server_host = os.getenv("SERVER_HOST", "127.0.0.1")
+        self.server_port = int(os.getenv("SERVER_PORT", "8765"))
+        self.server_max_workers = int(os.getenv("SERVER_MAX_WORKERS", "16"))
+
     def ensure_directories(self):
         """Ensures that the base notes directory exists."""
         self.notes_dir.mkdir(parents=True, exist_ok=True)
         print(f"Notes will be saved in: {self.notes_dir}")
 
+    @staticmethod
+    def _check_project_name(project_name: str):
+        """Rejects names that would place a project's files outside the notes directory."""
+        if (not project_name or project_name in (".", "..")
+                or any(sep in project_name for sep in ("/", "\\", "\0"))
+                or os.path.isabs(project_name) or PureWindowsPath(project_name).drive):
+            raise ValueError(f"Invalid project name {project_name!r}")
+
     def get_project_file_path(self, project_name: str) -> Path:
         """Returns the full path to a project's markdown file."""
+        self._check_project_name(project_name)
         return self.notes_dir / f"{project_name}.md"
 
+    def get_segments_dir(self) -> Path:
+        """Returns the directory holding the segmented projects' folders."""
+        return self.notes_dir / SEGMENTS_DIR_NAME
+
+    def get_project_dir(self, project_name: str) -> Path:
+        """Returns the directory holding a segmented project's files."""
+        self._check_project_name(project_name)
+        return self.get_segments_dir() / project_name
+
     def get_scratchpad_file_path(self) -> Path:
         """Returns the full path to the global scratchpad file."""
         return self.notes_dir / self.scratchpad_file_name
 
+    def get_index_dir(self) -> Path:
+        """Returns the directory holding the note files' sidecar indexes."""
+        return self.notes_dir / ".index"
+
+    def get_digest_dir(self) -> Path:
+        """Returns the directory holding the projects' structured digests."""
+        return self.notes_dir / "digests"
+
 # Example of how to use:
 # config = AppConfig()
 # print(f"OpenAI Key Loaded: {'Yes' if config.openai_api_key else 'No'}")
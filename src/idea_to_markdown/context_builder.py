@@ -0,0 +1,168 @@
+import re
+import threading
+from collections import deque
+from pathlib import Path
+
+SYSTEM_PROMPT = "You are a helpful voice assistant for capturing ideas."
+
+# Roughly how a BPE tokenizer splits English: a token per common word (long
+# words in pieces of up to six characters) and per punctuation mark
+_TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]")
+# Chat formatting around each message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text: str) -> int:
+    """Estimates the tokens the chat model will count for text."""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+class ConversationHistory:
+    """
+    The last few exchanges of one conversation, with their token counts,
+    so the context builder can fit as many as the budget allows.
+    """
+
+    def __init__(self, max_turns: int = 6):
+        # (user text, reply, tokens of both messages)
+        self._turns: deque[tuple[str, str, int]] = deque(maxlen=max(0, max_turns))
+        self._lock = threading.Lock()
+
+    def add(self, user_text: str, reply: str):
+        tokens = count_tokens(user_text) + count_tokens(reply) + 2 * MESSAGE_OVERHEAD_TOKENS
+        with self._lock:
+            self._turns.append((user_text, reply, tokens))
+
+    def turns(self) -> list[tuple[str, str, int]]:
+        """The remembered exchanges, oldest first."""
+        with self._lock:
+            return list(self._turns)
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+
+class _CachedEntries:
+    def __init__(self, size: int, lines: list[tuple[str, str, int]]):
+        self.size = size
+        # (entry content, prompt line, tokens), oldest first
+        self.lines = lines
+
+
+class ChatContext:
+    """The messages for one chat call and what went into them."""
+
+    def __init__(self, messages: list[dict], tokens: int, budget: int, entries: int, turns: int):
+        self.messages = messages
+        self.tokens = tokens
+        self.budget = budget
+        self.entries = entries
+        self.turns = turns
+
+
+class ContextBuilder:
+    """
+    Builds the messages for a chat call within a token budget: the system
+    prompt with the latest entries of the active project (or scratchpad),
+    the recent exchanges of the conversation, and the new utterance.
+
+    The new utterance and system prompt always go in. Of the remaining
+    budget, exchanges and notes are each guaranteed half; whatever one of
+    them leaves unused goes to the other. Both are added newest first and
+    stop at the first one that doesn't fit.
+
+    The latest entries are read from the end of the note file (see
+    NoteStore.tail_entries) and kept with their token counts until the file
+    is appended to, through the note manager or by anyone else.
+    """
+
+    def __init__(self, note_manager=None, max_tokens: int = 1500, max_entries: int = 8,
+                 system_prompt: str = SYSTEM_PROMPT):
+        self.note_manager = note_manager
+        self.max_tokens = max_tokens
+        self.max_entries = max_entries
+        self.system_prompt = system_prompt
+        self._cache: dict[Path, _CachedEntries] = {}
+        self._lock = threading.Lock()
+        if note_manager is not None:
+            note_manager.store.add_append_listener(self._invalidate)
+
+    @classmethod
+    def from_config(cls, config, note_manager=None) -> "ContextBuilder":
+        return cls(note_manager, max_tokens=config.chat_context_tokens,
+                   max_entries=config.chat_context_entries)
+
+    def _invalidate(self, note_path: Path, first_entry_number, records, blocks):
+        with self._lock:
+            self._cache.pop(note_path, None)
+
+    def latest_entries(self, project: str | None) -> list[tuple[str, str, int]]:
+        """The project's latest entries as (content, prompt line, tokens), oldest first."""
+        if self.note_manager is None or self.max_entries <= 0:
+            return []
+        # Only the newest file (segment) of a project is ever appended to
+        path = self.note_manager.latest_note_file(project)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached.size == size:
+            return cached.lines
+
+        entries = self.note_manager.get_latest_entries(project, self.max_entries)
+        lines = []
+        for entry in entries:
+            line = f"- {entry.timestamp:%Y-%m-%d %H:%M}: {entry.content}"
+            lines.append((entry.content, line, count_tokens(line) + 1))
+        # Sized after reading, which flushes any entries still queued
+        size = path.stat().st_size
+        with self._lock:
+            self._cache[path] = _CachedEntries(size, lines)
+        return lines
+
+    def build(self, user_text: str, project: str | None = None,
+              history: ConversationHistory | None = None) -> ChatContext:
+        """The messages to send for user_text, within max_tokens."""
+        user_tokens = count_tokens(user_text) + MESSAGE_OVERHEAD_TOKENS
+        system_tokens = count_tokens(self.system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        remaining = max(0, self.max_tokens - user_tokens - system_tokens)
+
+        turns = history.turns() if history is not None and remaining else []
+        # The utterance may already have been saved as a note before the reply
+        lines = [line for line in (self.latest_entries(project) if remaining else [])
+                 if line[0] != user_text]
+        heading = f"The user's latest notes in {f'the project {project!r}' if project else 'the scratchpad'}, oldest first:"
+        heading_tokens = count_tokens(heading) + 2
+
+        def fit(items, budget: int) -> list:
+            chosen = []
+            for item in reversed(items):
+                if item[-1] > budget:
+                    break
+                chosen.append(item)
+                budget -= item[-1]
+            chosen.reverse()
+            return chosen
+
+        notes_budget = max(0, remaining // 2 - heading_tokens)
+        chosen_lines = fit(lines, notes_budget)
+        used_by_notes = sum(t for *_, t in chosen_lines) + (heading_tokens if chosen_lines else 0)
+        chosen_turns = fit(turns, remaining - used_by_notes)
+        used_by_turns = sum(t for *_, t in chosen_turns)
+        if len(chosen_lines) < len(lines):
+            # Exchanges left part of their half unused
+            chosen_lines = fit(lines, max(0, remaining - used_by_turns - heading_tokens))
+            used_by_notes = sum(t for *_, t in chosen_lines) + (heading_tokens if chosen_lines else 0)
+
+        system = self.system_prompt
+        if chosen_lines:
+            system += "\n\n" + heading + "\n" + "\n".join(line for _, line, _ in chosen_lines)
+        messages = [{"role": "system", "content": system}]
+        for turn_user, turn_reply, _ in chosen_turns:
+            messages.append({"role": "user", "content": turn_user})
+            messages.append({"role": "assistant", "content": turn_reply})
+        messages.append({"role": "user", "content": user_text})
+        return ChatContext(messages, system_tokens + user_tokens + used_by_notes + used_by_turns,
+                           self.max_tokens, len(chosen_lines), len(chosen_turns))
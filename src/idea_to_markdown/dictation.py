@@ -0,0 +1,116 @@
+import contextvars
+import re
+import threading
+from concurrent.futures import Executor, Future
+from difflib import SequenceMatcher
+from typing import Callable
+
+from .audio_encoding import EncodedAudio, UploadEncoder
+
+_WORD_CHARACTERS = re.compile(r"[^\w']+")
+
+
+def _normalize(word: str) -> str:
+    return _WORD_CHARACTERS.sub("", word.lower())
+
+
+def _overlap(tail: list[str], head: list[str], min_match: int, slack: int) -> tuple[int, int] | None:
+    """
+    Where tail's end and head's start say the same words: the longest shared
+    run, of at least min_match words (or one word right at the boundary),
+    leaving at most `slack` words of tail after it and of head before it.
+    Returns the run's end in tail and in head.
+    """
+    matcher = SequenceMatcher(None, [_normalize(w) for w in tail], [_normalize(w) for w in head],
+                              autojunk=False)
+    best = None
+    for a, b, size in matcher.get_matching_blocks():
+        if not size or len(tail) - (a + size) > slack or b > slack:
+            continue
+        at_boundary = a + size == len(tail) and b == 0
+        if (size >= min_match or at_boundary) and (best is None or size > best[2]):
+            best = (a, b, size)
+    if best is None:
+        return None
+    a, b, size = best
+    return a + size, b + size
+
+
+def stitch_transcripts(texts: list[str], window: int = 12, min_match: int = 2,
+                       slack: int = 1) -> str:
+    """
+    Joins the transcripts of overlapping segments, in order, dropping the
+    words transcribed twice.
+
+    The last `window` words so far are aligned with the first `window` words
+    of the next transcript, ignoring case and punctuation. If the end of the
+    one repeats the start of the other (see _overlap), the text continues
+    after the repeated words; up to `slack` words around them, usually a word
+    cut at the segment boundary, are dropped. Otherwise the transcripts are
+    simply joined.
+    """
+    words: list[str] = []
+    for text in texts:
+        following = text.split()
+        if not following:
+            continue
+        tail = words[-window:]
+        overlap = _overlap(tail, following[:window], min_match, slack)
+        if overlap is None:
+            words.extend(following)
+        else:
+            tail_end, head_end = overlap
+            words = words[:len(words) - len(tail) + tail_end] + following[head_end:]
+    return " ".join(words)
+
+
+class SegmentTranscriber:
+    """
+    Transcribes the segments of a long dictation while it is still being
+    recorded: each segment handed to add() is encoded and uploaded on the
+    executor right away, so when the speaker stops only the last segment is
+    still in flight. result() stitches the transcripts back together.
+    """
+
+    def __init__(self, encoder: UploadEncoder, transcribe: Callable[[EncodedAudio], str],
+                 executor: Executor, overlap_seconds: float = 0.0):
+        self.encoder = encoder
+        self.transcribe = transcribe
+        self.executor = executor
+        self.overlap_seconds = overlap_seconds
+        self._encoding: list[Future] = []
+        self._transcribing: list[Future] = []
+        self._lock = threading.Lock()
+
+    def add(self, segment: bytes):
+        """Starts encoding and transcribing a segment; called by the recorder."""
+        encoding = self.encoder.submit(segment)
+        # Trace the upload as part of the turn that recorded it
+        context = contextvars.copy_context()
+        transcribing = self.executor.submit(context.run, self._transcribe_encoded, encoding)
+        with self._lock:
+            self._encoding.append(encoding)
+            self._transcribing.append(transcribing)
+
+    def _transcribe_encoded(self, encoding: Future) -> str:
+        return self.transcribe(encoding.result())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._encoding)
+
+    def uploads(self) -> list[EncodedAudio]:
+        """The encoded segments, in order (waits for encoding to finish)."""
+        with self._lock:
+            encoding = list(self._encoding)
+        return [future.result() for future in encoding]
+
+    def result(self) -> str:
+        """
+        Waits for every segment's transcript and returns them stitched
+        together. Raises the first segment's error if any upload failed.
+        """
+        with self._lock:
+            transcribing = list(self._transcribing)
+        texts = [future.result() for future in transcribing]
+        return stitch_transcripts([text.strip() for text in texts if text and text.strip()])
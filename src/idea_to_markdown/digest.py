@@ -0,0 +1,282 @@
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from .context_builder import count_tokens
+from .note_store import NoteEntry
+from .tracing import Tracer
+
+DIGEST_PROMPT = (
+    "You maintain a structured digest of a project's voice notes. Given the "
+    "current digest (possibly empty) and new raw notes, return the complete "
+    "updated digest in Markdown: a '## Summary' of a few sentences, one '## ' "
+    "section per theme with bullet points, and a '## TODOs' list of '- [ ]' "
+    "items for any actions mentioned. Merge the new notes into the existing "
+    "sections, keep everything still relevant, and don't invent anything. "
+    "Return only the digest."
+)
+
+# First line of a digest file: how much of the raw log it covers. `last` is
+# the timestamp of the last digested entry, so a log that was rewritten
+# rather than appended to is noticed and digested from scratch, while one
+# that was only split into segments is not.
+_HEADER = re.compile(r"<!-- digest entries=(\d+) last=(\d+) -->")
+_CODE_FENCE = re.compile(r"^```(?:markdown|md)?\s*\n(.*?)\n```\s*$", re.DOTALL)
+
+
+class DigestReport:
+    """What one digest run did for a project."""
+
+    def __init__(self, project: str, path: Path, entries: int = 0, total_entries: int = 0,
+                 requests: int = 0, prompt_tokens: int = 0, seconds: float = 0.0,
+                 rebuilt: bool = False, error: str | None = None):
+        self.project = project
+        self.path = path
+        self.entries = entries              # entries digested in this run
+        self.total_entries = total_entries  # entries the digest now covers
+        self.requests = requests
+        self.prompt_tokens = prompt_tokens
+        self.seconds = seconds
+        self.rebuilt = rebuilt              # started over because the log was rewritten
+        self.error = error
+
+    def summary(self) -> str:
+        if self.error is not None:
+            return (f"Digest of '{self.project}' stopped after {self.entries} new entries: "
+                    f"{self.error}")
+        return (f"Digest of '{self.project}' {'rebuilt' if self.rebuilt else 'updated'}: "
+                f"{self.entries} new entries in {self.requests} request(s), "
+                f"~{self.prompt_tokens} tokens, {self.seconds:.1f}s "
+                f"({self.total_entries} entries in {self.path.name})")
+
+    def __repr__(self) -> str:
+        return (f"DigestReport(project={self.project!r}, entries={self.entries}, "
+                f"requests={self.requests}, error={self.error!r})")
+
+
+def read_digest(path: Path) -> tuple[int, int, str]:
+    """The high-water mark (entries, last entry timestamp) and Markdown body of a digest file."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return 0, 0, ""
+    header, _, rest = text.partition("\n")
+    match = _HEADER.fullmatch(header.strip())
+    if match is None:
+        return 0, 0, ""
+    # Drop the title line written by _write_digest
+    _, _, body = rest.lstrip("\n").partition("\n")
+    return int(match.group(1)), int(match.group(2)), body.strip()
+
+
+class Digester:
+    """
+    Keeps a structured Markdown digest of each project next to its raw log,
+    in the digests/ folder of the notes directory.
+
+    Each run only reads the entries added since the digest was last written
+    (its high-water mark) and sends them, with the current digest, to the
+    chat model, batching as many entries per request as fit in batch_tokens.
+    The digest is written after every request, so an interrupted run resumes
+    where it stopped.
+    """
+
+    def __init__(self, note_manager, chat: Callable[[list[dict]], str],
+                 batch_tokens: int = 6000, min_entries: int = 1, tracer: Tracer | None = None):
+        self.note_manager = note_manager
+        self.chat = chat
+        self.batch_tokens = batch_tokens
+        self.min_entries = min_entries
+        self.tracer = tracer or note_manager.tracer
+        self.digest_dir = note_manager.config.get_digest_dir()
+
+    def digest_path(self, project: str) -> Path:
+        return self.digest_dir / f"{project}.md"
+
+    def _high_water_mark(self, project: str) -> tuple[int, str, bool]:
+        """Digested entry count and digest body, and whether the log was rewritten under it."""
+        entries, last, body = read_digest(self.digest_path(project))
+        if not entries:
+            return 0, "", False
+        entry = self.note_manager.get_entry(project, entries - 1)
+        if entry is None or int(entry.timestamp.timestamp()) != last:
+            return 0, "", True
+        return entries, body, False
+
+    def pending_entries(self, project: str) -> int:
+        """Entries of the project not yet in its digest."""
+        entries, _, _ = self._high_water_mark(project)
+        return max(0, self.note_manager.count_entries(project) - entries)
+
+    def _batches(self, entries: list[NoteEntry], digest_tokens: int) -> list[list[tuple[NoteEntry, str]]]:
+        """Groups entries so each request stays within batch_tokens, with at least one entry."""
+        batches, batch, tokens = [], [], digest_tokens
+        for entry in entries:
+            line = f"- {entry.timestamp:%Y-%m-%d %H:%M}: {entry.content}"
+            line_tokens = count_tokens(line) + 1
+            if batch and tokens + line_tokens > self.batch_tokens:
+                batches.append(batch)
+                batch, tokens = [], digest_tokens
+            batch.append((entry, line))
+            tokens += line_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _write_digest(self, project: str, entries: int, last: float, body: str):
+        path = self.digest_path(project)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(
+            f"<!-- digest entries={entries} last={int(last)} -->\n"
+            f"# Digest: {project}\n\n"
+            f"{body}\n", encoding="utf-8")
+        os.replace(temp_path, path)
+
+    def digest_project(self, project: str,
+                       should_continue: Callable[[], bool] | None = None) -> DigestReport:
+        """
+        Brings the project's digest up to date with its raw log. Between
+        requests, stops early if should_continue returns False.
+        """
+        started = time.monotonic()
+        report = DigestReport(project, self.digest_path(project))
+        digested, body, report.rebuilt = self._high_water_mark(project)
+        report.total_entries = digested
+        entries = self.note_manager.get_entries_from(project, digested)
+        if not entries:
+            return report
+
+        # Each batch is sent along with the digest so far; assume it stays about this size
+        batches = self._batches(entries, count_tokens(body) + count_tokens(DIGEST_PROMPT))
+        with self.tracer.span("digest", project=project, entries=len(entries)) as span:
+            for batch in batches:
+                if report.requests and should_continue is not None and not should_continue():
+                    break
+                messages = [
+                    {"role": "system", "content": DIGEST_PROMPT},
+                    {"role": "user", "content": (
+                        f"Project: {project}\n\nCurrent digest:\n{body or '(empty)'}\n\n"
+                        "New notes, oldest first:\n" + "\n".join(line for _, line in batch))},
+                ]
+                tokens = sum(count_tokens(m["content"]) for m in messages)
+                try:
+                    reply = self.chat(messages)
+                except Exception as e:
+                    report.error = str(e)
+                    break
+                body = reply.strip()
+                fenced = _CODE_FENCE.match(body)
+                if fenced:
+                    body = fenced.group(1).strip()
+                report.entries += len(batch)
+                digested += len(batch)
+                self._write_digest(project, digested, batch[-1][0].timestamp.timestamp(), body)
+                report.requests += 1
+                report.prompt_tokens += tokens
+            span.set("requests", report.requests)
+            span.set("prompt_tokens", report.prompt_tokens)
+        report.total_entries = digested
+        report.seconds = time.monotonic() - started
+        return report
+
+    def run(self, projects: list[str] | None = None,
+            should_continue: Callable[[], bool] | None = None) -> list[DigestReport]:
+        """
+        Updates the digest of every project (or the given ones) with at least
+        min_entries new entries. Returns a report per project digested.
+        """
+        reports = []
+        for project in projects if projects is not None else self.note_manager.list_projects():
+            if should_continue is not None and not should_continue():
+                break
+            if self.pending_entries(project) < self.min_entries:
+                continue
+            reports.append(self.digest_project(project, should_continue))
+        return reports
+
+
+class DigestWorker:
+    """
+    Background thread that runs the Digester every `interval` seconds, but
+    only once there has been no activity (see touch) for idle_seconds, and
+    yields again between requests as soon as there is. The thread runs at
+    the lowest CPU priority where the OS allows it, so digests never compete
+    with capturing notes.
+    """
+
+    def __init__(self, digester: Digester, interval: float = 600.0, idle_seconds: float = 30.0):
+        self.digester = digester
+        self.interval = interval
+        self.idle_seconds = idle_seconds
+        self.reports: list[DigestReport] = []
+        self._last_activity = time.monotonic()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_config(cls, config, note_manager, chat: Callable[[list[dict]], str]) -> "DigestWorker":
+        digester = Digester(note_manager, chat, batch_tokens=config.digest_batch_tokens,
+                            min_entries=config.digest_min_entries)
+        return cls(digester, interval=config.digest_interval,
+                   idle_seconds=config.digest_idle_seconds)
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="note-digest", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        """Stops after the request in progress; the rest is digested next time."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def touch(self):
+        """Records activity (e.g. a turn starting); digests wait until it has been idle a while."""
+        self._last_activity = time.monotonic()
+
+    def wake(self):
+        """Runs a digest pass as soon as the agent is idle, without waiting out the interval."""
+        self._wake.set()
+
+    def is_idle(self) -> bool:
+        return (not self._stopping.is_set()
+                and time.monotonic() - self._last_activity >= self.idle_seconds)
+
+    def _lower_priority(self):
+        try:
+            # On Linux this applies to the calling thread only
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+    def _run(self):
+        self._lower_priority()
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            while not self._stopping.is_set() and not self.is_idle():
+                self._stopping.wait(max(0.05, self.idle_seconds - (time.monotonic() - self._last_activity)))
+            if self._stopping.is_set():
+                break
+            self.run_once()
+
+    def run_once(self) -> list[DigestReport]:
+        """One digest pass over every project, reporting each digest it updates."""
+        try:
+            reports = self.digester.run(should_continue=self.is_idle)
+        except Exception as e:
+            print(f"Digest pass failed: {e}")
+            return []
+        for report in reports:
+            print(f"📝 {report.summary()}")
+        self.reports.extend(reports)
+        return reports
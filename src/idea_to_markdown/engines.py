@@ -0,0 +1,303 @@
+import contextlib
+import io
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .api_client import ApiClient, create_openai_client
+from .audio_buffers import WavUpload
+from .audio_encoding import EncodedAudio
+from .tracing import Tracer
+
+# Speech engines a role can be served by (STT_ENGINE, CHAT_ENGINE, TTS_ENGINE)
+ENGINES = {
+    "stt": ("openai", "local", "stub"),
+    "chat": ("openai", "stub"),
+    "tts": ("openai", "stub"),
+}
+
+# Streamed speech is raw PCM like OpenAI's "pcm" format: 24 kHz, 16-bit
+# signed little-endian, mono
+TTS_PCM_RATE = 24000
+TTS_PCM_SAMPLE_WIDTH = 2
+
+# Whisper models take 16 kHz audio
+WHISPER_RATE = 16000
+
+
+class OpenAIEngine:
+    """
+    Speech to text with whisper-1, replies with gpt-4o and speech with tts-1,
+    through the OpenAI API and ApiClient's retries, timeouts and circuit
+    breakers. The client is created on first use.
+    """
+
+    name = "openai"
+    # Recordings are sent as they are encoded for upload (see UPLOAD_FORMAT)
+    accepts_pcm = False
+    tts_model = "tts-1"
+    tts_voice = "alloy"
+
+    def __init__(self, config, api: ApiClient, tracer: Tracer, client=None):
+        self.config = config
+        self.api = api
+        self.tracer = tracer
+        self._client = client
+        self._client_ready = client is not None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The OpenAI client, or None if there is no API key or it could not be created."""
+        if not self._client_ready:
+            with self._client_lock:
+                if not self._client_ready:
+                    self._client = self._create_client()
+                    self._client_ready = True
+        return self._client
+
+    def _create_client(self):
+        if not self.config.openai_api_key:
+            print(
+                "CRITICAL: OPENAI_API_KEY not found in environment. Voice features will not work.")
+            return None
+        try:
+            client = create_openai_client(self.config)
+            print("OpenAI client initialized successfully.")
+            return client
+        except Exception as e:
+            print(f"Error initializing OpenAI client: {e}")
+            return None
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    def _traced(self, raw_response):
+        span = self.tracer.current_span()
+        span.add("retries", getattr(raw_response, "retries_taken", 0))
+        span.set("bytes_down", len(raw_response.content))
+        return raw_response
+
+    def transcribe(self, audio: EncodedAudio) -> str:
+        return self._transcribe_upload(audio.open())
+
+    def transcribe_file(self, path: Path) -> str:
+        upload = io.BytesIO(path.read_bytes())
+        upload.name = path.name
+        return self._transcribe_upload(upload)
+
+    def _transcribe_upload(self, upload) -> str:
+        def request(timeout):
+            upload.seek(0)  # a retry sends the whole file again
+            return self.client.audio.transcriptions.with_raw_response.create(
+                model="whisper-1",
+                file=(upload.name, upload),
+                timeout=timeout
+            )
+
+        return self._traced(self.api.call("stt", request)).parse().text
+
+    def chat(self, messages: list[dict]) -> str:
+        raw_response = self.api.call("chat", lambda timeout: self.client.chat.completions.with_raw_response.create(
+            model="gpt-4o",
+            messages=messages,
+            timeout=timeout
+        ))
+        return self._traced(raw_response).parse().choices[0].message.content
+
+    def synthesize(self, text: str, max_retries: int | None = None) -> bytes:
+        """A complete WAV file of the spoken text."""
+        raw_response = self.api.call("tts", lambda timeout: self.client.audio.speech.with_raw_response.create(
+            model=self.tts_model,
+            voice=self.tts_voice,
+            input=text,
+            response_format="wav",
+            timeout=timeout
+        ), max_retries=max_retries)
+        return self._traced(raw_response).content
+
+    @contextlib.contextmanager
+    def stream_speech(self, text: str, chunk_size: int):
+        """Yields an iterator of raw PCM chunks of the spoken text, as they arrive."""
+        with contextlib.ExitStack() as stack:
+            # Only opening the response is retried; a slot is held until the headers arrive
+            response = self.api.call("tts", lambda timeout: stack.enter_context(
+                self.client.audio.speech.with_streaming_response.create(
+                    model=self.tts_model,
+                    voice=self.tts_voice,
+                    input=text,
+                    response_format="pcm",
+                    timeout=timeout
+                )))
+            self.tracer.current_span().add("retries", getattr(response, "retries_taken", 0))
+            yield response.iter_bytes(chunk_size)
+
+
+class LocalWhisperEngine:
+    """
+    Speech to text on the CPU with faster-whisper (pip install faster-whisper),
+    with no network round-trip. The model is loaded once, on a background
+    thread as soon as the engine is created, and warmed up on a short silent
+    clip, so the first turn doesn't wait for it. Recordings are passed to the
+    model as samples, without encoding them first.
+    """
+
+    name = "local"
+    accepts_pcm = True
+
+    def __init__(self, model_name: str = "base.en", compute_type: str = "int8",
+                 cpu_threads: int = 0, beam_size: int = 1, language: str | None = None,
+                 download_root: Path | None = None, model=None):
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self.language = language
+        self.download_root = download_root
+        self._model = model
+        self._load_error: Exception | None = None
+        self._ready = threading.Event()
+        # The model already uses every CPU thread for a single recording
+        self._lock = threading.Lock()
+        threading.Thread(target=self._load, name="local-stt-load", daemon=True).start()
+
+    @classmethod
+    def from_config(cls, config) -> "LocalWhisperEngine":
+        return cls(model_name=config.local_stt_model, compute_type=config.local_stt_compute_type,
+                   cpu_threads=config.local_stt_threads, beam_size=config.local_stt_beam_size,
+                   language=config.local_stt_language or None,
+                   download_root=config.cache_dir / "models")
+
+    def _load(self):
+        try:
+            if self._model is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError as e:
+                    raise RuntimeError(
+                        "STT_ENGINE=local needs faster-whisper: pip install faster-whisper") from e
+                self._model = WhisperModel(
+                    self.model_name, device="cpu", compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    download_root=str(self.download_root) if self.download_root else None)
+            self._run(np.zeros(WHISPER_RATE // 2, dtype=np.float32))
+        except Exception as e:
+            print(f"Error loading local speech model {self.model_name}: {e}")
+            self._load_error = e
+        finally:
+            self._ready.set()
+
+    @property
+    def available(self) -> bool:
+        return self._load_error is None
+
+    def wait_until_ready(self, timeout: float | None = None) -> bool:
+        """Blocks until the model is loaded and warm; False if it failed to load."""
+        return self._ready.wait(timeout) and self.available
+
+    def transcribe(self, audio: EncodedAudio) -> str:
+        if audio.audio_format == "wav" and audio.rate == WHISPER_RATE:
+            source = np.frombuffer(audio.data, dtype=np.int16).astype(np.float32) / 32768.0
+        else:
+            source = audio.open()
+        return self._transcribe(source)
+
+    def transcribe_file(self, path: Path) -> str:
+        return self._transcribe(str(path))
+
+    def _transcribe(self, source) -> str:
+        self._ready.wait()
+        if self._load_error is not None:
+            raise self._load_error
+        with self._lock:
+            return self._run(source)
+
+    def _run(self, source) -> str:
+        segments, _ = self._model.transcribe(
+            source, beam_size=self.beam_size, language=self.language,
+            condition_on_previous_text=False)
+        # Segments are decoded lazily, as they are iterated
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+class StubEngine:
+    """
+    Deterministic offline engine for tests and demos. Transcriptions return
+    `transcript` (a list is used in turn, repeating its last item), replies
+    are always `reply`, and speech is silence lasting about as long as the
+    text would take to say.
+    """
+
+    name = "stub"
+    accepts_pcm = True
+    tts_model = "stub"
+    tts_voice = "silence"
+    available = True
+
+    def __init__(self, transcript: str | list[str] = "hello agent", reply: str = "Noted.",
+                 seconds_per_character: float = 0.01):
+        self.transcripts = [transcript] if isinstance(transcript, str) else list(transcript)
+        self.reply = reply
+        self.seconds_per_character = seconds_per_character
+        # Calls made, by role ("stt", "chat" or "tts")
+        self.requests: list[str] = []
+        self._index = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "StubEngine":
+        return cls(transcript=config.stub_transcript, reply=config.stub_reply)
+
+    def transcribe(self, audio: EncodedAudio) -> str:
+        with self._lock:
+            self.requests.append("stt")
+            text = self.transcripts[min(self._index, len(self.transcripts) - 1)]
+            self._index += 1
+        return text
+
+    def transcribe_file(self, path: Path) -> str:
+        return self.transcribe(EncodedAudio(path.read_bytes(), path.suffix.lstrip(".")))
+
+    def chat(self, messages: list[dict]) -> str:
+        with self._lock:
+            self.requests.append("chat")
+        return self.reply
+
+    def _silence(self, text: str) -> bytes:
+        samples = int(len(text) * self.seconds_per_character * TTS_PCM_RATE)
+        return bytes(samples * TTS_PCM_SAMPLE_WIDTH)
+
+    def synthesize(self, text: str, max_retries: int | None = None) -> bytes:
+        with self._lock:
+            self.requests.append("tts")
+        pcm = self._silence(text)
+        return WavUpload(pcm, channels=1, rate=TTS_PCM_RATE,
+                         sample_width=TTS_PCM_SAMPLE_WIDTH).read()
+
+    @contextlib.contextmanager
+    def stream_speech(self, text: str, chunk_size: int):
+        with self._lock:
+            self.requests.append("tts")
+        pcm = self._silence(text)
+        yield (pcm[start:start + chunk_size] for start in range(0, len(pcm), chunk_size))
+
+
+def create_engines(config, openai_engine: OpenAIEngine) -> dict[str, object]:
+    """
+    The engines serving STT, chat and TTS, as chosen by STT_ENGINE,
+    CHAT_ENGINE and TTS_ENGINE. Roles choosing the same engine share one
+    instance.
+    """
+    chosen = {"stt": config.stt_engine, "chat": config.chat_engine, "tts": config.tts_engine}
+    created = {"openai": openai_engine}
+    engines = {}
+    for role, name in chosen.items():
+        if name not in ENGINES[role]:
+            raise ValueError(f"Unsupported {role} engine {name!r}; "
+                             f"expected one of {', '.join(ENGINES[role])}")
+        if name not in created:
+            created[name] = (LocalWhisperEngine if name == "local" else StubEngine).from_config(config)
+        engines[role] = created[name]
+    return engines
@@ -0,0 +1,113 @@
+import re
+import threading
+
+from .project_resolver import normalize_transcript
+
+EXIT_PHRASES = frozenset(("exit agent", "quit agent", "stop agent please"))
+SWITCH_PROJECT_PHRASES = ("switch project", "change project")
+# "find notes about X", "search my notes for X", ...
+SEARCH_COMMAND_PATTERN = re.compile(
+    r"^(?:find|search)(?: (?:my|the|all))? notes? (?:about|for|on|mentioning) (.+)$")
+QUESTION_PATTERN = re.compile(
+    r"^(?:what|why|how|who|when|where|which|"
+    r"(?:can|could|would|will|should|do|does|did|is|are) (?:you|i|we|it|there|this|that)|"
+    r"tell me|explain|help me)\b")
+
+# Intents the router can recognize; "project" is a reply to the project prompt
+INTENTS = ("exit", "switch_project", "search", "project", "question", "note")
+# What to do about the chat reply and its speech for each intent
+ACTIONS = ("respond", "defer", "skip")
+DEFAULT_POLICY = {
+    "exit": "skip",
+    "switch_project": "skip",
+    "search": "skip",
+    "project": "skip",
+    "question": "respond",
+    "note": "skip",
+}
+REPLY_CALLS = ("chat", "tts")
+
+
+def parse_search_query(utterance: str) -> str | None:
+    """Returns the query of a 'find notes about X' command, or None."""
+    match = SEARCH_COMMAND_PATTERN.match(normalize_transcript(utterance))
+    return match.group(1) if match else None
+
+
+def classify_intent(utterance: str, context: str | None = None) -> str:
+    """
+    Classifies a transcript locally. context="project" marks a reply to the
+    project-selection prompt, which is always handled as a command.
+    """
+    text = normalize_transcript(utterance)
+    if text in EXIT_PHRASES:
+        return "exit"
+    if any(phrase in text for phrase in SWITCH_PROJECT_PHRASES):
+        return "switch_project"
+    if SEARCH_COMMAND_PATTERN.match(text):
+        return "search"
+    if context == "project":
+        return "project"
+    if utterance.rstrip().endswith("?") or QUESTION_PATTERN.match(text):
+        return "question"
+    return "note"
+
+
+def parse_intent_policy(spec: str | None) -> dict[str, str]:
+    """
+    Parses an "intent=action,..." policy such as "note=defer,question=respond"
+    on top of DEFAULT_POLICY.
+    """
+    policy = dict(DEFAULT_POLICY)
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        intent, _, action = (part.strip().lower() for part in item.partition("="))
+        if intent not in INTENTS:
+            raise ValueError(f"Unknown intent '{intent}'. Expected one of: {', '.join(INTENTS)}")
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action '{action}'. Expected one of: {', '.join(ACTIONS)}")
+        policy[intent] = action
+    return policy
+
+
+class TurnReport:
+    """Which reply calls one conversation turn made, deferred or avoided."""
+
+    def __init__(self, intent: str, action: str):
+        self.intent = intent
+        self.action = action
+        self.avoided_calls = REPLY_CALLS if action == "skip" else ()
+        self.deferred_calls = REPLY_CALLS if action == "defer" else ()
+
+    def summary(self) -> str:
+        if self.avoided_calls:
+            return f"intent '{self.intent}': skipped {', '.join(self.avoided_calls)}"
+        if self.deferred_calls:
+            return f"intent '{self.intent}': deferred {', '.join(self.deferred_calls)}"
+        return f"intent '{self.intent}': responding"
+
+    def __repr__(self) -> str:
+        return f"TurnReport(intent={self.intent!r}, action={self.action!r})"
+
+
+class IntentRouter:
+    """
+    Decides, right after transcription, whether a turn needs the chat reply
+    and its speech. Disabled routing responds to every turn.
+    """
+
+    def __init__(self, policy: dict[str, str] | None = None, enabled: bool = True):
+        self.policy = dict(policy or DEFAULT_POLICY)
+        self.enabled = enabled
+        self.avoided_calls = {call: 0 for call in REPLY_CALLS}
+        self._lock = threading.Lock()
+
+    def route(self, utterance: str, context: str | None = None) -> TurnReport:
+        intent = classify_intent(utterance, context)
+        action = self.policy.get(intent, "respond") if self.enabled else "respond"
+        report = TurnReport(intent, action)
+        with self._lock:
+            for call in report.avoided_calls:
+                self.avoided_calls[call] += 1
+        return report
@@ -1,12 +1,75 @@
-from .agent import Agent
 from .config import AppConfig
+import argparse
+import asyncio
 import sys
 
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Capture spoken ideas as Markdown notes.")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve sessions to network clients instead of using the local microphone")
+    parser.add_argument("--host", help="address to listen on with --serve (default: SERVER_HOST)")
+    parser.add_argument("--port", type=int, help="port to listen on with --serve (default: SERVER_PORT)")
+    parser.add_argument("--digest", nargs="*", metavar="PROJECT",
+                        help="bring the digests of all (or the given) projects up to date, then exit")
+    parser.add_argument("--segment-notes", action="store_true",
+                        help="split every single-file project into segments (NOTE_SEGMENTS), then exit")
+    return parser.parse_args(argv)
+
+
+def digest(config: AppConfig, projects: list[str]) -> int:
+    """Runs one digest pass and prints a report per project; returns the number of failures."""
+    from .digest import Digester
+    from .note_manager import NoteManager
+    from .speech_interface import SpeechInterface
+
+    speech = SpeechInterface(config)
+    if not speech.chat_available:
+        print("A chat engine is needed to write digests (see CHAT_ENGINE and OPENAI_API_KEY).")
+        return 1
+    note_manager = NoteManager(config, tracer=speech.tracer)
+    digester = Digester(note_manager, speech.chat_engine.chat,
+                        batch_tokens=config.digest_batch_tokens)
+    try:
+        reports = digester.run(projects or None)
+    finally:
+        note_manager.close()
+        speech.close()
+    for report in reports:
+        print(report.summary())
+    if not reports:
+        print("All digests are up to date.")
+    return sum(report.error is not None for report in reports)
+
+
+def segment_notes(config: AppConfig):
+    """Splits single-file projects into segment files up front, rather than on their next note."""
+    from .note_manager import NoteManager
+
+    note_manager = NoteManager(config)
+    try:
+        split = note_manager.split_projects_into_segments()
+    finally:
+        note_manager.close()
+    print(f"Split {len(split)} project(s) into segments." if split else "No projects to split.")
+
+
+async def serve(config: AppConfig, host: str | None = None, port: int | None = None):
+    """Runs the multi-session server until interrupted."""
+    from .server import NoteServer
+
+    server = NoteServer(config)
+    try:
+        await server.serve_forever(host, port)
+    finally:
+        await server.close()
+
+
+def main(argv=None):
     """
     Main function to initialize and run the Idea to Markdown agent.
     """
+    args = parse_args(argv)
     print("Initializing Idea to Markdown Agent...")
 
     try:
@@ -15,7 +78,22 @@ def main():
         # Ensure necessary directories exist
         config.ensure_directories()
 
+        if args.serve:
+            asyncio.run(serve(config, args.host, args.port))
+            return
+
+        if args.segment_notes:
+            segment_notes(config)
+            return
+
+        if args.digest is not None:
+            if digest(config, args.digest):
+                sys.exit(1)
+            return
+
         # Initialize and start the agent
+        from .agent import Agent
+
         agent = Agent(config)
         agent.start_session()
 
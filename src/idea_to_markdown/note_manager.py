@@ -1,69 +1,421 @@
+import os
+import shutil
+import threading
 from pathlib import Path
 from datetime import datetime
 from .config import AppConfig
+from .file_lock import FileLock, create_exclusive
+from .note_segments import SEGMENT_MODES, SEGMENTS_DIR_NAME, Segment, SegmentManifest, needs_new_segment, plan_segments
+from .note_store import NoteEntry, NoteStore
+from .note_writer import NoteWriter
+from .project_catalog import ProjectCatalog, ProjectInfo
+from .project_resolver import ProjectMatch, ProjectResolver
+from .search_index import SearchIndex, SearchResult
+from .tracing import Tracer
 
 
 class NoteManager:
     """
     Handles creation, writing, and management of Markdown note files.
+
+    A project's notes are one <project>.md file, or with NOTE_SEGMENTS a
+    <project>/ directory of segment files listed in a manifest (see
+    note_segments.py). The read methods cover every segment; reads of
+    recent entries only open the newest one(s).
     """
 
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, tracer: Tracer | None = None):
+        if config.note_segments not in SEGMENT_MODES:
+            raise ValueError(f"Unknown NOTE_SEGMENTS mode '{config.note_segments}'. "
+                             f"Expected one of: {', '.join(SEGMENT_MODES)}")
         self.config = config
+        self.tracer = tracer or Tracer.from_config(config)
+        self.store = NoteStore(config.notes_dir, config.get_index_dir())
+        self.writer = NoteWriter(
+            self.store,
+            fsync_mode=config.note_fsync_mode,
+            group_commit=config.note_group_commit,
+            max_batch_entries=config.note_batch_size,
+            flush_interval=config.note_flush_interval,
+            max_open_files=config.note_max_open_files,
+        )
+        self.search_index = SearchIndex(config.get_index_dir() / "search.json")
+        self.store.add_append_listener(self._index_appended_entries)
+        self.catalog = ProjectCatalog(config.notes_dir, config.scratchpad_file_name, self.store)
+        self.store.add_append_listener(self.catalog.record_append)
+        self.resolver = ProjectResolver()
+        self._resolver_generation: int | None = None
+        self._resolver_lock = threading.Lock()
+        # One lock per note file, shared with other processes writing to the
+        # same notes directory, so concurrent sessions create a project's
+        # file (or segment) once and append to it in order
+        self._file_locks: dict[Path, FileLock] = {}
+        self._file_locks_guard = threading.Lock()
+        # Manifests of segmented projects, by project directory
+        self._manifests: dict[Path, SegmentManifest] = {}
+        self._manifests_lock = threading.Lock()
 
-    def _get_timestamp_prefix(self) -> str:
+    def _get_timestamp_prefix(self, moment: datetime | None = None) -> str:
         """Generates a timestamp prefix for notes."""
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    def _ensure_file_exists(self, file_path: Path):
-        """Ensures a file exists, creating it with a header if not."""
-        if not file_path.exists():
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(file_path, "w", encoding="utf-8") as f:
-                if file_path.name == self.config.scratchpad_file_name:
-                    f.write(
-                        f"# Global Scratchpad - {self._get_timestamp_prefix()}\n\n")
-                else:
-                    project_name = file_path.stem
-                    f.write(
-                        f"# Project: {project_name} - Created {self._get_timestamp_prefix()}\n\n")
+        return (moment or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+    def _entry_moment(self, captured_at: datetime | None) -> datetime:
+        """
+        The time to stamp a new entry with: when it was captured, if given
+        (even if the file already has later entries; the entry index keeps
+        track of backdated entries), otherwise now.
+        """
+        return (captured_at or datetime.now()).replace(microsecond=0)
+
+    def _append_entry(self, file_path: Path, heading: str, content: str,
+                      captured_at: datetime | None = None):
+        """Appends one entry block to a note file through the indexed store."""
+        moment = self._entry_moment(captured_at)
+        block = f"\n## {heading}: {self._get_timestamp_prefix(moment)}\n{content.strip()}\n"
+        with self.tracer.span("note_write", bytes=len(block.encode("utf-8")),
+                              queued=self.writer.group_commit):
+            self.writer.write(file_path, block, moment.timestamp(), backdated=captured_at is not None)
+
+    def flush(self):
+        """Writes any queued entries to disk."""
+        with self.tracer.span("note_flush", pending=self.writer.pending):
+            self.writer.flush()
+
+    def close(self):
+        """Flushes queued entries, closes open note files and saves the search index."""
+        self.writer.close()
+        if self.search_index.loaded:
+            self.search_index.save()
+
+    def _note_file_key(self, file_path: Path) -> str:
+        return file_path.relative_to(self.config.notes_dir).as_posix()
+
+    def _project_for_key(self, key: str) -> str | None:
+        """Maps a search index file key back to its project (None for the scratchpad)."""
+        path = Path(key)
+        if len(path.parts) == 3 and path.parts[0] == SEGMENTS_DIR_NAME:
+            # A segment: .segments/<project>/YYYY-MM.md
+            return path.parts[1]
+        if path.name == self.config.scratchpad_file_name:
+            return None
+        return path.stem
+
+    def _note_files(self) -> dict[str, Path]:
+        """Returns every note file (projects, segments and scratchpad) by search index key."""
+        files = {}
+        if self.config.notes_dir.exists():
+            for item in self.config.notes_dir.iterdir():
+                if item.is_file() and item.suffix == ".md":
+                    files[self._note_file_key(item)] = item
+        segments_dir = self.config.get_segments_dir()
+        if segments_dir.exists():
+            for item in segments_dir.iterdir():
+                manifest = SegmentManifest.load(item) if not item.name.startswith(".") else None
+                for path in manifest.paths() if manifest is not None else []:
+                    files[self._note_file_key(path)] = path
+        return files
+
+    def _index_appended_entries(self, file_path: Path, first_entry_number: int, records, blocks):
+        if self.search_index.loaded:
+            self.search_index.add_entries(
+                self._note_file_key(file_path), file_path, first_entry_number, records, blocks)
+
+    def refresh_search_index(self) -> int:
+        """
+        Loads the search index and re-indexes note files that changed since it
+        was saved. Returns the number of files re-indexed.
+        """
+        self.flush()
+        return self.search_index.refresh(self._note_files(), self.store)
+
+    def search(self, query: str, project: str | None = None, limit: int = 10) -> list[SearchResult]:
+        """
+        Full-text search over all notes, or only the given project's notes.
+        Results are ranked by matched terms, relevance and recency. Files
+        changed since they were indexed (by hand, the bulk importer or
+        another process) are re-synced first; the check is a stat per file.
+        """
+        self.refresh_search_index()
+        with self.tracer.span("search") as span:
+            results = self._search(query, project, limit)
+            span.set("results", len(results))
+        return results
+
+    def _search(self, query: str, project: str | None, limit: int) -> list[SearchResult]:
+        file_keys = None
+        if project is not None:
+            file_keys = [self._note_file_key(path) for path in self.project_files(project)]
+
+        results = []
+        for hit in self.search_index.search(query, file_keys=file_keys, limit=limit):
+            path = self.config.notes_dir / hit.file_key
+            entry = self.store.get_entry(path, hit.entry_number)
+            if entry is not None:
+                results.append(SearchResult(self._project_for_key(hit.file_key), entry, hit.score))
+        return results
+
+    def _file_lock(self, file_path: Path) -> FileLock:
+        with self._file_locks_guard:
+            lock = self._file_locks.get(file_path)
+            if lock is None:
+                lock = self._file_locks[file_path] = FileLock(
+                    self.config.get_index_dir() / "locks" / f"{self._note_file_key(file_path)}.add.lock")
+            return lock
+
+    def _ensure_file_exists(self, file_path: Path, title: str | None = None):
+        """Ensures a file exists, creating it with a header (title, if given) if not."""
+        if file_path.exists():
+            return
+        if title is None:
+            if file_path.name == self.config.scratchpad_file_name:
+                title = f"# Global Scratchpad - {self._get_timestamp_prefix()}"
+            else:
+                title = f"# Project: {file_path.stem} - Created {self._get_timestamp_prefix()}"
+        # O_EXCL, under the file's append lock, so a header is written exactly
+        # once and always before the first entry, whichever process gets here first
+        with self.store.lock(file_path):
+            created = create_exclusive(file_path, f"{title}\n\n".encode("utf-8"))
+        if created:
             print(f"Created new note file: {file_path}")
 
-    def add_note_to_project(self, project_name: str, content: str):
+    def add_note_to_project(self, project_name: str, content: str,
+                            captured_at: datetime | None = None):
         """
         Adds a note to the specified project's Markdown file.
-        Each project has its own .md file.
+        Each project has its own .md file. captured_at stamps a note that
+        was recorded earlier than it is written (see _entry_moment).
         """
         if not project_name:
             print("Error: Project name cannot be empty.")
             return
 
         project_file_path = self.config.get_project_file_path(project_name)
-        self._ensure_file_exists(project_file_path)
-
-        with open(project_file_path, "a", encoding="utf-8") as f:
-            f.write(f"\n## Entry: {self._get_timestamp_prefix()}\n")
-            f.write(content.strip() + "\n")
+        with self._file_lock(project_file_path):
+            manifest = self._manifest(project_name)
+            if manifest is None and self.config.note_segments != "off":
+                try:
+                    manifest = self._split_into_segments(project_name)
+                except OSError as e:
+                    # Keep saving to the single file rather than losing the note
+                    print(f"Could not split project '{project_name}' into segments: {e}")
+            if manifest is None:
+                self._ensure_file_exists(project_file_path)
+                self._append_entry(project_file_path, "Entry", content, captured_at)
+            else:
+                self._append_segment_entry(project_name, manifest, content, captured_at)
         print(f"Note added to project '{project_name}'.")
 
-    def add_note_to_scratchpad(self, content: str):
+    def _manifest(self, project_name: str) -> SegmentManifest | None:
+        """The segment manifest of a project, or None if it is a single file."""
+        directory = self.config.get_project_dir(project_name)
+        with self._manifests_lock:
+            manifest = self._manifests.get(directory)
+            if manifest is not None and manifest.is_current():
+                return manifest
+            manifest = SegmentManifest.load(directory)
+            if manifest is None:
+                self._manifests.pop(directory, None)
+            else:
+                self._manifests[directory] = manifest
+            return manifest
+
+    def _append_segment_entry(self, project_name: str, manifest: SegmentManifest, content: str,
+                              captured_at: datetime | None):
+        """Appends to the newest segment, starting a new one first if it is due."""
+        newest = manifest.newest() or self.config.get_project_file_path(project_name)
+        moment = self._entry_moment(captured_at)
+        if needs_new_segment(manifest, moment, self.config.note_segments,
+                             self.config.note_segment_max_bytes):
+            newest = manifest.add(moment)
+            self._ensure_file_exists(
+                newest, f"# Project: {project_name} ({moment:%Y-%m}) - Created {self._get_timestamp_prefix()}")
+        self._append_entry(newest, "Entry", content, captured_at)
+
+    def _split_into_segments(self, project_name: str) -> SegmentManifest:
+        """
+        Turns a project into a segmented one, moving the entries of an
+        existing <project>.md into segments as NOTE_SEGMENTS would have
+        placed them. The caller holds the project's file lock.
+        """
+        file_path = self.config.get_project_file_path(project_name)
+        directory = self.config.get_project_dir(project_name)
+        # Dot-prefixed, so an interrupted split is never taken for a project
+        temp_dir = directory.with_name(f".{directory.name}.segmenting")
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        manifest = SegmentManifest(temp_dir)
+        if file_path.exists():
+            self.writer.release(file_path)
+            records = self.store.index_for(file_path).records()
+            data = file_path.read_bytes()
+            if not records and data.strip():
+                # Only a header so far: it becomes the first segment
+                now = datetime.now()
+                segment = Segment(manifest.new_segment_name(now), now.timestamp())
+                temp_dir.mkdir(parents=True, exist_ok=True)
+                (temp_dir / segment.name).write_bytes(data)
+                manifest.segments.append(segment)
+            starts = plan_segments([(r.timestamp, r.length) for r in records],
+                                   self.config.note_segments, self.config.note_segment_max_bytes)
+            for number, start in enumerate(starts):
+                stop = starts[number + 1] if number + 1 < len(starts) else len(records)
+                moment = datetime.fromtimestamp(records[start].timestamp)
+                segment = Segment(manifest.new_segment_name(moment), records[start].timestamp)
+                # The first segment keeps the file's original header
+                header = data[:records[0].offset] if number == 0 else (
+                    f"# Project: {project_name} ({moment:%Y-%m}) - "
+                    f"Created {self._get_timestamp_prefix()}\n\n").encode("utf-8")
+                temp_dir.mkdir(parents=True, exist_ok=True)
+                (temp_dir / segment.name).write_bytes(
+                    header + data[records[start].offset:records[stop - 1].end])
+                manifest.segments.append(segment)
+        manifest.save()
+        os.replace(temp_dir, directory)
+        if file_path.exists():
+            file_path.unlink()
+            self.store.forget(file_path)
+            # Search keys change from <project>.md to its segments
+            self.search_index.needs_refresh = True
+            print(f"Split project '{project_name}' into {len(manifest.segments)} segment file(s).")
+        return self._manifest(project_name)
+
+    def split_projects_into_segments(self) -> list[str]:
+        """Splits every single-file project into segments (NOTE_SEGMENTS); returns their names."""
+        if self.config.note_segments == "off":
+            raise ValueError("Set NOTE_SEGMENTS to 'month' or 'size' to split projects.")
+        self.flush()
+        split = []
+        for project_name in self.list_projects():
+            with self._file_lock(self.config.get_project_file_path(project_name)):
+                if self._manifest(project_name) is None:
+                    self._split_into_segments(project_name)
+                    split.append(project_name)
+        return split
+
+    def project_files(self, project_name: str) -> list[Path]:
+        """A project's note files, oldest first: its segments, or its single file."""
+        manifest = self._manifest(project_name)
+        if manifest is not None:
+            return manifest.paths()
+        return [self.config.get_project_file_path(project_name)]
+
+    def latest_note_file(self, project_name: str | None) -> Path:
+        """The file a project's (None: the scratchpad's) newest entries are in."""
+        if not project_name:
+            return self.config.get_scratchpad_file_path()
+        manifest = self._manifest(project_name)
+        if manifest is not None and manifest.segments:
+            return manifest.newest()
+        return self.config.get_project_file_path(project_name)
+
+    def add_note_to_scratchpad(self, content: str, captured_at: datetime | None = None):
         """
         Adds a note to the global scratchpad file.
         """
         scratchpad_path = self.config.get_scratchpad_file_path()
-        self._ensure_file_exists(scratchpad_path)
-
-        with open(scratchpad_path, "a", encoding="utf-8") as f:
-            f.write(f"\n## Scratchpad Entry: {self._get_timestamp_prefix()}\n")
-            f.write(content.strip() + "\n")
+        with self._file_lock(scratchpad_path):
+            self._ensure_file_exists(scratchpad_path)
+            self._append_entry(scratchpad_path, "Scratchpad Entry", content, captured_at)
         print("Note added to scratchpad.")
 
     def list_projects(self) -> list[str]:
-        """Lists all existing project markdown files."""
-        projects = []
-        if self.config.notes_dir.exists():
-            for item in self.config.notes_dir.iterdir():
-                if item.is_file() and item.suffix == ".md" and item.name != self.config.scratchpad_file_name:
-                    # .stem gives filename without extension
-                    projects.append(item.stem)
-        return projects
+        """Lists all existing projects, sorted case-insensitively."""
+        return self.catalog.names()
+
+    def find_project(self, name: str) -> str | None:
+        """Returns the existing project matching name case-insensitively, or None."""
+        return self.catalog.find(name)
+
+    def _current_resolver(self) -> ProjectResolver:
+        with self._resolver_lock:
+            generation, names = self.catalog.snapshot()
+            if generation != self._resolver_generation:
+                # Swapped, not updated in place, so concurrent lookups never
+                # see a half-built index
+                self.resolver = ProjectResolver(names)
+                self._resolver_generation = generation
+            return self.resolver
+
+    def match_projects(self, spoken_name: str, limit: int = 5) -> list[ProjectMatch]:
+        """Ranks existing projects by how well they match a spoken (noisy) name."""
+        return self._current_resolver().resolve(spoken_name, limit)
+
+    def resolve_project(self, spoken_name: str, threshold: float | None = None) -> str | None:
+        """
+        Returns the existing project a spoken name refers to, or None if no
+        project matches with at least threshold confidence.
+        """
+        if threshold is None:
+            threshold = self.config.project_match_threshold
+        return self._current_resolver().best(spoken_name, threshold)
+
+    def get_project_info(self, project_name: str) -> ProjectInfo | None:
+        """Returns size, last-modified time and entry count of a project, or None."""
+        self.flush()
+        return self.catalog.get(project_name)
+
+    def count_entries(self, project_name: str) -> int:
+        """Returns the number of entries in a project's notes."""
+        self.flush()
+        return sum(self.store.count_entries(path) for path in self.project_files(project_name))
+
+    def get_entry(self, project_name: str, n: int) -> NoteEntry | None:
+        """
+        Returns the Nth entry of a project (0 is the oldest, -1 the latest),
+        or None if there is no such entry.
+        """
+        self.flush()
+        files = self.project_files(project_name)
+        # Counting from the end only opens segments as far back as needed
+        for path in (reversed(files) if n < 0 else files):
+            count = self.store.count_entries(path)
+            if -count <= n < count:
+                return self.store.get_entry(path, n)
+            n = n + count if n < 0 else n - count
+        return None
+
+    def get_latest_entry(self, project_name: str) -> NoteEntry | None:
+        """Returns the most recent entry of a project, or None."""
+        return self.get_entry(project_name, -1)
+
+    def get_latest_entries(self, project_name: str | None, n: int) -> list[NoteEntry]:
+        """
+        Returns the last n entries of a project (None: the scratchpad), oldest
+        first, reading only the end of the file.
+        """
+        self.flush()
+        files = self.project_files(project_name) if project_name else [
+            self.config.get_scratchpad_file_path()]
+        entries = []
+        for path in reversed(files):
+            if len(entries) >= n:
+                break
+            entries[:0] = self.store.tail_entries(path, n - len(entries))
+        return entries
+
+    def get_entries_from(self, project_name: str, start: int) -> list[NoteEntry]:
+        """Returns a project's entries from the start-th (0: the oldest) on, in order."""
+        self.flush()
+        entries = []
+        for path in self.project_files(project_name):
+            count = self.store.count_entries(path)
+            if start < count:
+                index = self.store.index_for(path)
+                entries += self.store.read_entries(path, index.records(max(0, start)))
+            start -= count
+        return entries
+
+    def get_entries_between(self, project_name: str, start: datetime, end: datetime) -> list[NoteEntry]:
+        """Returns a project's entries with start <= timestamp < end, oldest first."""
+        self.flush()
+        manifest = self._manifest(project_name)
+        if manifest is None:
+            return self.store.get_entries_between(
+                self.config.get_project_file_path(project_name), start.timestamp(), end.timestamp())
+        # Backdated entries go in the newest segment, so any segment can hold
+        # entries from any time; each one answers from its index
+        entries = []
+        for segment in manifest.segments:
+            entries += self.store.get_entries_between(
+                manifest.directory / segment.name, start.timestamp(), end.timestamp())
+        entries.sort(key=lambda entry: entry.timestamp)
+        return entries
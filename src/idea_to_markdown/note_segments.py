@@ -0,0 +1,137 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+# How a segmented project's entries are split into files (NOTE_SEGMENTS):
+# "month" starts a new file for each calendar month, "size" once the newest
+# file reaches NOTE_SEGMENT_MAX_BYTES; "off" keeps one file per project
+SEGMENT_MODES = ("off", "month", "size")
+MANIFEST_NAME = "manifest.json"
+# Segmented projects live in <notes_dir>/.segments/<project>/, so they never
+# collide with digests/ or folders the user keeps in the notes directory
+SEGMENTS_DIR_NAME = ".segments"
+MANIFEST_VERSION = 1
+
+
+class Segment:
+    """One file of a segmented project and when its first entry was written."""
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.start = start
+
+    def __repr__(self) -> str:
+        return f"Segment({self.name!r}, start={datetime.fromtimestamp(self.start):%Y-%m-%d %H:%M:%S})"
+
+
+class SegmentManifest:
+    """
+    The segment files of one project, oldest first, kept in
+    <notes_dir>/.segments/<project>/manifest.json. Only creating a segment rewrites
+    the manifest; entries are appended to the segment files as usual.
+    """
+
+    def __init__(self, directory: Path, segments: list[Segment] | None = None,
+                 mtime_ns: int | None = None):
+        self.directory = directory
+        self.segments = segments or []
+        self.mtime_ns = mtime_ns
+
+    @property
+    def path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, directory: Path) -> "SegmentManifest | None":
+        """The project's manifest, or None if the project is not segmented."""
+        path = directory / MANIFEST_NAME
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        segments = [Segment(item["file"], item["start"]) for item in data.get("segments", [])]
+        return cls(directory, segments, mtime_ns)
+
+    def save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        temp_path.write_text(json.dumps({
+            "version": MANIFEST_VERSION,
+            "segments": [{"file": s.name, "start": s.start} for s in self.segments],
+        }, indent=1), encoding="utf-8")
+        os.replace(temp_path, self.path)
+        self.mtime_ns = self.path.stat().st_mtime_ns
+
+    def is_current(self) -> bool:
+        """Whether the manifest on disk is still the one this was loaded from."""
+        try:
+            return self.path.stat().st_mtime_ns == self.mtime_ns
+        except OSError:
+            return False
+
+    def paths(self) -> list[Path]:
+        return [self.directory / s.name for s in self.segments]
+
+    def newest(self) -> Path | None:
+        return self.directory / self.segments[-1].name if self.segments else None
+
+    def new_segment_name(self, moment: datetime) -> str:
+        """YYYY-MM.md for the month of moment, numbered if that month already has one."""
+        taken = {s.name for s in self.segments}
+        name, number = f"{moment:%Y-%m}.md", 2
+        while name in taken:
+            name = f"{moment:%Y-%m}-{number}.md"
+            number += 1
+        return name
+
+    def add(self, moment: datetime) -> Path:
+        """Starts a new segment for entries from moment on and saves the manifest."""
+        segment = Segment(self.new_segment_name(moment), moment.timestamp())
+        self.segments.append(segment)
+        self.save()
+        return self.directory / segment.name
+
+
+def needs_new_segment(manifest: SegmentManifest, moment: datetime, mode: str, max_bytes: int) -> bool:
+    """
+    Whether an entry stamped moment starts a new segment rather than going in
+    the newest. A backdated entry goes in the newest segment.
+    """
+    newest = manifest.newest()
+    if newest is None:
+        return True
+    if mode == "month":
+        start = datetime.fromtimestamp(manifest.segments[-1].start)
+        return (moment.year, moment.month) > (start.year, start.month)
+    if mode == "size":
+        try:
+            return newest.stat().st_size >= max_bytes
+        except OSError:
+            return False
+    return False
+
+
+def plan_segments(timestamps_and_lengths: list[tuple[float, int]], mode: str,
+                  max_bytes: int) -> list[int]:
+    """
+    Positions at which existing entries (timestamp, length in bytes) start a
+    new segment when a monolithic project is split; the first is always 0.
+    """
+    starts, size, month = [], 0, None
+    for position, (timestamp, length) in enumerate(timestamps_and_lengths):
+        moment = datetime.fromtimestamp(timestamp)
+        if not starts:
+            new = True
+        elif mode == "month":
+            # Backdated entries stay in the segment they were appended to
+            new = (moment.year, moment.month) > month
+        else:
+            new = size >= max_bytes
+        if new:
+            starts.append(position)
+            size = 0
+        month = max(month or (moment.year, moment.month), (moment.year, moment.month))
+        size += length
+    return starts
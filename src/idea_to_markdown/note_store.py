@@ -0,0 +1,523 @@
+import os
+import re
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .file_lock import FileLock
+
+# Matches entry headings such as "## Entry: 2024-01-31 09:15:00"
+ENTRY_HEADING_PATTERN = re.compile(
+    rb"^## (?:Scratchpad )?Entry: ([^\r\n]*)$", re.MULTILINE)
+ENTRY_MARKER = b"\n## "
+_BLOCK_HEADING_PATTERN = re.compile(r"^(## (?:Scratchpad )?Entry: )[^\r\n]*$", re.MULTILINE)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+INDEX_MAGIC = b"I2MIDX02"
+# Magic, the note file size covered while the index is empty, and the
+# position of the first entry older than one before it (0 while in order)
+INDEX_HEADER = struct.Struct("<8sQQ")
+INDEX_HEADER_SIZE = INDEX_HEADER.size
+# Byte offset of the entry block, its timestamp (epoch seconds), its length
+INDEX_RECORD = struct.Struct("<QdI")
+
+
+class EntryRecord:
+    """Location and time of one entry block inside a Markdown note file."""
+
+    def __init__(self, offset: int, timestamp: float, length: int):
+        self.offset = offset
+        self.timestamp = timestamp
+        self.length = length
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.length
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, EntryRecord) and
+                (self.offset, self.timestamp, self.length) ==
+                (other.offset, other.timestamp, other.length))
+
+    def __repr__(self) -> str:
+        return f"EntryRecord(offset={self.offset}, timestamp={self.timestamp}, length={self.length})"
+
+
+class NoteEntry:
+    """A single entry read back from a note file."""
+
+    def __init__(self, timestamp: datetime, content: str, offset: int):
+        self.timestamp = timestamp
+        self.content = content
+        self.offset = offset
+
+    def __repr__(self) -> str:
+        return f"NoteEntry(timestamp={self.timestamp!r}, content={self.content!r})"
+
+
+def parse_timestamp(value: str) -> float | None:
+    """Parses an entry heading timestamp into epoch seconds."""
+    try:
+        return datetime.strptime(value.strip(), TIMESTAMP_FORMAT).timestamp()
+    except ValueError:
+        return None
+
+
+def entry_content(block: str) -> str:
+    """Returns the text of an entry block without its heading line."""
+    _, _, content = block.lstrip("\n").partition("\n")
+    return content.strip("\n")
+
+
+def restamp_block(block: str, timestamp: float) -> str:
+    """Returns an entry block with its heading's time replaced by timestamp."""
+    stamp = datetime.fromtimestamp(timestamp).strftime(TIMESTAMP_FORMAT)
+    return _BLOCK_HEADING_PATTERN.sub(lambda match: match.group(1) + stamp, block, count=1)
+
+
+def entry_from_block(block: str, record: EntryRecord) -> NoteEntry:
+    return NoteEntry(datetime.fromtimestamp(record.timestamp),
+                     entry_content(block), record.offset)
+
+
+def scan_entries(data: bytes, base_offset: int = 0) -> list[EntryRecord]:
+    """Finds every entry block in a chunk of a Markdown note file."""
+    starts = []
+    previous_timestamp = 0.0
+    for match in ENTRY_HEADING_PATTERN.finditer(data):
+        start = match.start()
+        # Entry blocks are written with a leading newline; include it
+        if start > 0 and data[start - 1:start] == b"\n":
+            start -= 1
+        timestamp = parse_timestamp(match.group(1).decode("utf-8", "replace"))
+        if timestamp is None:
+            timestamp = previous_timestamp
+        previous_timestamp = timestamp
+        starts.append((start, timestamp))
+
+    records = []
+    for i, (start, timestamp) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(data)
+        records.append(EntryRecord(base_offset + start, timestamp, end - start))
+    return records
+
+
+def _first_out_of_order(records: list[EntryRecord], first_position: int,
+                        previous: float | None) -> int:
+    """Position of the first record older than the one before it, or 0 if they are in order."""
+    for position, record in enumerate(records, start=first_position):
+        if previous is not None and record.timestamp < previous:
+            return position
+        previous = record.timestamp
+    return 0
+
+
+class EntryIndex:
+    """
+    Fixed-size sidecar index of the entry blocks in one note file.
+
+    Each record holds an entry's byte offset, timestamp and length, so the
+    Nth entry is a single seek and time ranges are a binary search. The index
+    is only ever appended to; if the note file was changed behind our back it
+    is rebuilt (or extended, when entries were only appended) on open.
+
+    Entries are usually in time order, but a backdated one (an imported memo,
+    a replayed capture) keeps its real time wherever it is appended. The
+    header records the first such position, unsorted_at; time ranges are
+    only binary-searched before it.
+    """
+
+    def __init__(self, note_path: Path, index_path: Path):
+        self.note_path = note_path
+        self.index_path = index_path
+        self._count = 0
+        self._end = 0  # Note file size covered by the index
+        self._last: EntryRecord | None = None
+        self.unsorted_at = 0
+        self._latest: float | None = None  # Latest timestamp, once looked up
+        self.sync()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def end(self) -> int:
+        return self._end
+
+    @property
+    def in_order(self) -> bool:
+        return self.unsorted_at == 0
+
+    def sync(self):
+        """Brings the index in line with the note file on disk."""
+        note_size = self.note_path.stat().st_size if self.note_path.exists() else 0
+        if not self._load():
+            self.rebuild()
+            return
+        if note_size == self._end:
+            return
+        if note_size > self._end and self._entry_starts_at(self._end):
+            self._extend_from(self._end)
+        else:
+            self.rebuild()
+
+    def _load(self) -> bool:
+        """Reads the index header and last record. Returns False if unusable."""
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(INDEX_HEADER_SIZE)
+                if len(header) != INDEX_HEADER_SIZE or header[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                    return False
+                _, empty_end, self.unsorted_at = INDEX_HEADER.unpack(header)
+                self._latest = None
+                size = os.fstat(f.fileno()).st_size
+                if (size - INDEX_HEADER_SIZE) % INDEX_RECORD.size:
+                    return False
+                self._count = (size - INDEX_HEADER_SIZE) // INDEX_RECORD.size
+                if self._count:
+                    f.seek(-INDEX_RECORD.size, os.SEEK_END)
+                    self._last = EntryRecord(*INDEX_RECORD.unpack(f.read(INDEX_RECORD.size)))
+                    self._end = self._last.end
+                else:
+                    self._last = None
+                    self._end = empty_end
+        except OSError:
+            return False
+
+        # The last indexed entry must still be where we left it
+        if self._last is not None and not self._entry_starts_at(self._last.offset):
+            return False
+        return True
+
+    def _entry_starts_at(self, offset: int) -> bool:
+        try:
+            with open(self.note_path, "rb") as f:
+                f.seek(offset)
+                head = f.read(len(ENTRY_MARKER) + 1)
+        except OSError:
+            return False
+        return head.lstrip(b"\n").startswith(b"## ")
+
+    def _extend_from(self, offset: int):
+        with open(self.note_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        records = scan_entries(data, base_offset=offset)
+        if not records:
+            self.rebuild()
+            return
+        # Anything between the old end and the first new entry is whitespace
+        records[0] = EntryRecord(offset, records[0].timestamp,
+                                 records[0].end - offset)
+        self.append(records)
+
+    def rebuild(self):
+        """Rescans the whole note file and rewrites the index."""
+        data = self.note_path.read_bytes() if self.note_path.exists() else b""
+        records = scan_entries(data)
+        end = records[0].offset if records else len(data)
+        self.unsorted_at = _first_out_of_order(records, 0, None)
+        self._latest = None
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, end, self.unsorted_at))
+            for record in records:
+                f.write(INDEX_RECORD.pack(record.offset, record.timestamp, record.length))
+        os.replace(temp_path, self.index_path)
+        self._count = len(records)
+        self._last = records[-1] if records else None
+        self._end = self._last.end if records else end
+
+    def append(self, records: list[EntryRecord]):
+        """Records entries that were just appended to the note file."""
+        if not records:
+            return
+        unsorted_at = self.unsorted_at or _first_out_of_order(
+            records, self._count, self._last.timestamp if self._last is not None else None)
+        try:
+            f = open(self.index_path, "r+b")
+        except FileNotFoundError:
+            # The index was deleted under us; the note file already has the entries
+            self.rebuild()
+            return
+        with f:
+            if unsorted_at != self.unsorted_at:
+                f.seek(INDEX_HEADER.size - 8)
+                f.write(struct.pack("<Q", unsorted_at))
+            f.seek(0, os.SEEK_END)
+            f.write(b"".join(INDEX_RECORD.pack(r.offset, r.timestamp, r.length)
+                             for r in records))
+        self.unsorted_at = unsorted_at
+        if self._latest is not None:
+            self._latest = max(self._latest, *(r.timestamp for r in records))
+        self._count += len(records)
+        self._last = records[-1]
+        self._end = self._last.end
+
+    @property
+    def latest_timestamp(self) -> float | None:
+        """The latest entry timestamp, which need not be the last entry's."""
+        if self._last is None:
+            return None
+        if self.in_order:
+            return self._last.timestamp
+        if self._latest is None:
+            self._latest = max(r.timestamp for r in self.records(self.unsorted_at - 1))
+        return self._latest
+
+    def record(self, n: int) -> EntryRecord:
+        """Returns the Nth entry record; negative n counts from the end."""
+        if n < 0:
+            n += self._count
+        if not 0 <= n < self._count:
+            raise IndexError("entry index out of range")
+        if n == self._count - 1 and self._last is not None:
+            return self._last
+        with open(self.index_path, "rb") as f:
+            f.seek(INDEX_HEADER_SIZE + n * INDEX_RECORD.size)
+            return EntryRecord(*INDEX_RECORD.unpack(f.read(INDEX_RECORD.size)))
+
+    def records(self, start: int = 0, stop: int | None = None) -> list[EntryRecord]:
+        """Returns the records for positions start..stop-1 with a single read."""
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return []
+        with open(self.index_path, "rb") as f:
+            f.seek(INDEX_HEADER_SIZE + start * INDEX_RECORD.size)
+            data = f.read((stop - start) * INDEX_RECORD.size)
+        return [EntryRecord(*fields) for fields in INDEX_RECORD.iter_unpack(data)]
+
+    def bisect_time(self, timestamp: float, stop: int | None = None) -> int:
+        """
+        Returns the position of the first entry at or after timestamp among
+        the first stop entries (all of them by default), which must be in order.
+        """
+        low, high = 0, self._count if stop is None else min(stop, self._count)
+        with open(self.index_path, "rb") as f:
+            while low < high:
+                mid = (low + high) // 2
+                f.seek(INDEX_HEADER_SIZE + mid * INDEX_RECORD.size + 8)
+                (mid_timestamp,) = struct.unpack("<d", f.read(8))
+                if mid_timestamp < timestamp:
+                    low = mid + 1
+                else:
+                    high = mid
+        return low
+
+
+class NoteStore:
+    """
+    Append-only storage for Markdown note files.
+
+    The Markdown files stay the human-readable output; every entry appended
+    through the store is also recorded in a sidecar EntryIndex under
+    index_dir, which makes reading entries back cheap on very large files.
+    """
+
+    def __init__(self, notes_dir: Path, index_dir: Path):
+        self.notes_dir = notes_dir
+        self.index_dir = index_dir
+        self._indexes: dict[Path, EntryIndex] = {}
+        self._lock = threading.RLock()
+        self._file_locks: dict[Path, FileLock] = {}
+        self._append_listeners = []
+
+    def add_append_listener(self, listener):
+        """
+        Registers listener(note_path, first_entry_number, records, blocks),
+        called after entries are appended through the store.
+        """
+        self._append_listeners.append(listener)
+
+    def _relative(self, note_path: Path) -> Path:
+        try:
+            return note_path.relative_to(self.notes_dir)
+        except ValueError:
+            return Path(note_path.name)
+
+    def _index_path(self, note_path: Path) -> Path:
+        relative = self._relative(note_path)
+        return self.index_dir / relative.with_name(relative.name + ".idx")
+
+    def lock(self, note_path: Path) -> FileLock:
+        """
+        The lock held while a note file and its index are written, shared
+        with other processes using the same notes directory.
+        """
+        with self._lock:
+            lock = self._file_locks.get(note_path)
+            if lock is None:
+                relative = self._relative(note_path)
+                lock = self._file_locks[note_path] = FileLock(
+                    self.index_dir / "locks" / relative.with_name(relative.name + ".lock"))
+            return lock
+
+    @staticmethod
+    def _size(note_path: Path) -> int:
+        try:
+            return note_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def index_for(self, note_path: Path) -> EntryIndex:
+        """Returns the (synced) index for a note file."""
+        with self._lock:
+            index = self._indexes.get(note_path)
+            if index is not None and self._size(note_path) == index.end:
+                return index
+        # Syncing may write the index, so it must not overlap another
+        # process appending to the same file
+        with self.lock(note_path), self._lock:
+            index = self._indexes.get(note_path)
+            if index is None:
+                index = EntryIndex(note_path, self._index_path(note_path))
+                self._indexes[note_path] = index
+            elif self._size(note_path) != index.end:
+                index.sync()
+            return index
+
+    def forget(self, note_path: Path):
+        """Drops the index of a note file that was removed."""
+        with self.lock(note_path), self._lock:
+            self._indexes.pop(note_path, None)
+            self._index_path(note_path).unlink(missing_ok=True)
+
+    def append_entry(self, note_path: Path, block: str, timestamp: float,
+                     backdated: bool = False) -> EntryRecord:
+        """Appends an entry block to the note file and indexes it."""
+        with open(note_path, "ab") as f:
+            return self.append_blocks(note_path, f, [(block, timestamp, backdated)])[0]
+
+    def append_blocks(self, note_path: Path, handle, entries, fsync_each: bool = False) -> list[EntryRecord]:
+        """
+        Appends (block, timestamp, backdated) entries through an open binary
+        append handle and indexes them. The handle is flushed before returning.
+
+        The file lock is held from syncing the index to recording the new
+        entries, so appends from other processes can neither interleave
+        with these nor be mistaken for them. Each block goes out in a single
+        write (the whole batch in one, unless fsync_each).
+
+        Entries are stamped when they are made, before the lock is taken, so
+        another process may have written a later one in between. A live
+        entry stamped earlier than the file's latest is restamped with that
+        time, keeping live entries in time order; backdated ones (imported or
+        replayed captures) keep their own time.
+        """
+        blocks = []
+        with self.lock(note_path), self._lock:
+            # Sync against the file as it is on disk before adding to it
+            handle.flush()
+            index = self.index_for(note_path)
+            latest = index.latest_timestamp
+            offset = handle.seek(0, os.SEEK_END)
+            records, chunks = [], []
+            for block, timestamp, backdated in entries:
+                if not backdated and latest is not None and timestamp < latest:
+                    block, timestamp = restamp_block(block, latest), latest
+                latest = timestamp if latest is None else max(latest, timestamp)
+                blocks.append(block)
+                data = block.encode("utf-8")
+                if fsync_each:
+                    handle.write(data)
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                else:
+                    chunks.append(data)
+                records.append(EntryRecord(offset, timestamp, len(data)))
+                offset += len(data)
+            if chunks:
+                handle.write(b"".join(chunks))
+            handle.flush()
+            first_entry_number = len(index)
+            index.append(records)
+
+        # Listeners run outside the lock so they may read from the store
+        for listener in self._append_listeners:
+            try:
+                listener(note_path, first_entry_number, records, blocks)
+            except Exception as e:
+                print(f"Error in note append listener: {e}")
+        return records
+
+    def read_block(self, note_path: Path, record: EntryRecord) -> str:
+        """Reads the raw text of one entry block."""
+        with open(note_path, "rb") as f:
+            f.seek(record.offset)
+            return f.read(record.length).decode("utf-8", "replace")
+
+    def read_entry(self, note_path: Path, record: EntryRecord) -> NoteEntry:
+        """Reads one entry block and splits it into heading time and content."""
+        return entry_from_block(self.read_block(note_path, record), record)
+
+    def iter_entries(self, note_path: Path, start: int = 0):
+        """Yields the entries of a note file from position start onwards, in order."""
+        if not note_path.exists():
+            return
+        index = self.index_for(note_path)
+        with open(note_path, "rb") as f:
+            for record in index.records(start):
+                f.seek(record.offset)
+                block = f.read(record.length).decode("utf-8", "replace")
+                yield entry_from_block(block, record)
+
+    def count_entries(self, note_path: Path) -> int:
+        if not note_path.exists():
+            return 0
+        return len(self.index_for(note_path))
+
+    def latest_timestamp(self, note_path: Path) -> float | None:
+        """The latest entry timestamp in a note file, or None if it has none."""
+        if not note_path.exists():
+            return None
+        return self.index_for(note_path).latest_timestamp
+
+    def get_entry(self, note_path: Path, n: int) -> NoteEntry | None:
+        """Returns the Nth entry (negative n counts from the end), or None."""
+        if not note_path.exists():
+            return None
+        index = self.index_for(note_path)
+        try:
+            record = index.record(n)
+        except IndexError:
+            return None
+        return self.read_entry(note_path, record)
+
+    def tail_entries(self, note_path: Path, n: int) -> list[NoteEntry]:
+        """
+        Returns the last n entries, oldest first. They are read with a single
+        seek to where the first of them starts, however large the file is.
+        """
+        if n <= 0 or not note_path.exists():
+            return []
+        index = self.index_for(note_path)
+        return self.read_entries(note_path, index.records(max(0, len(index) - n)))
+
+    def read_entries(self, note_path: Path, records: list[EntryRecord]) -> list[NoteEntry]:
+        """Reads consecutive entries with a single seek and read."""
+        if not records:
+            return []
+        start = records[0].offset
+        with open(note_path, "rb") as f:
+            f.seek(start)
+            data = f.read(records[-1].end - start)
+        return [entry_from_block(data[r.offset - start:r.end - start].decode("utf-8", "replace"), r)
+                for r in records]
+
+    def get_entries_between(self, note_path: Path, start: float, end: float) -> list[NoteEntry]:
+        """Returns entries with start <= timestamp < end, oldest first."""
+        if not note_path.exists():
+            return []
+        index = self.index_for(note_path)
+        if index.in_order:
+            first = index.bisect_time(start)
+            last = index.bisect_time(end)
+            return [self.read_entry(note_path, record) for record in index.records(first, last)]
+        # Backdated entries may sit anywhere after unsorted_at: filter from
+        # the first candidate in the ordered part
+        first = index.bisect_time(start, stop=index.unsorted_at)
+        records = [r for r in index.records(first) if start <= r.timestamp < end]
+        records.sort(key=lambda r: r.timestamp)
+        return [self.read_entry(note_path, record) for record in records]
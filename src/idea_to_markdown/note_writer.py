@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .note_store import NoteStore
+
+FSYNC_MODES = ("none", "batch", "entry")
+
+
+class FileHandlePool:
+    """
+    Keeps binary append handles to note files open between writes.
+    At most max_open handles are kept; the least recently used is closed.
+    """
+
+    def __init__(self, max_open: int = 16):
+        self.max_open = max(1, max_open)
+        self._handles: OrderedDict[Path, object] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def get(self, path: Path):
+        handle = self._handles.get(path)
+        if handle is not None:
+            self._handles.move_to_end(path)
+            return handle
+        handle = open(path, "ab")
+        self._handles[path] = handle
+        while len(self._handles) > self.max_open:
+            _, oldest = self._handles.popitem(last=False)
+            oldest.close()
+        return handle
+
+    def discard(self, path: Path):
+        """Closes the handle to path, if one is open."""
+        handle = self._handles.pop(path, None)
+        if handle is not None:
+            handle.close()
+
+    def close_all(self):
+        while self._handles:
+            _, handle = self._handles.popitem(last=False)
+            handle.close()
+
+
+class NoteWriter:
+    """
+    Writes entry blocks to note files through a pool of open handles.
+
+    With group commit enabled, entries are queued and written in batches by a
+    background thread once max_batch_entries are pending or flush_interval
+    seconds have passed; otherwise each entry is written immediately.
+    fsync_mode controls durability: "none" leaves data in the OS cache,
+    "batch" fsyncs each file once per batch, "entry" fsyncs after every entry.
+    """
+
+    def __init__(self, store: NoteStore, fsync_mode: str = "batch", group_commit: bool = False,
+                 max_batch_entries: int = 64, flush_interval: float = 0.5, max_open_files: int = 16):
+        if fsync_mode not in FSYNC_MODES:
+            raise ValueError(f"Unknown fsync mode '{fsync_mode}'. Expected one of: {', '.join(FSYNC_MODES)}")
+        self.store = store
+        self.fsync_mode = fsync_mode
+        self.group_commit = group_commit
+        self.max_batch_entries = max(1, max_batch_entries)
+        self.flush_interval = flush_interval
+        self.handles = FileHandlePool(max_open_files)
+
+        self._pending: list[tuple[Path, str, float, bool]] = []
+        self._condition = threading.Condition()
+        # Serializes batches so entries reach each file in queue order
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._flusher: threading.Thread | None = None
+        self.entries_written = 0
+        self.batches_written = 0
+
+    @property
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def write(self, path: Path, block: str, timestamp: float, backdated: bool = False):
+        """
+        Queues (or, without group commit, immediately writes) one entry block.
+        Unless backdated, it may be restamped when written so it does not go
+        before entries other processes wrote meanwhile.
+        """
+        if self._closed:
+            raise ValueError("NoteWriter is closed")
+        if not self.group_commit:
+            with self._write_lock:
+                self._write_batch([(path, block, timestamp, backdated)])
+            return
+
+        with self._condition:
+            self._pending.append((path, block, timestamp, backdated))
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name="note-writer", daemon=True)
+                self._flusher.start()
+            self._condition.notify_all()
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._pending:
+                    self._condition.wait()
+                # The first queued entry waits at most flush_interval
+                deadline = time.monotonic() + self.flush_interval
+                while (not self._closed and len(self._pending) < self.max_batch_entries
+                       and time.monotonic() < deadline):
+                    self._condition.wait(deadline - time.monotonic())
+                if self._closed and not self._pending:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing notes: {e}")
+
+    def flush(self):
+        """Writes every queued entry to disk, honouring the fsync mode."""
+        with self._write_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, batch: list[tuple[Path, str, float, bool]]):
+        """Writes a batch of entries; the caller holds the write lock."""
+        by_file: dict[Path, list[tuple[str, float, bool]]] = {}
+        for path, block, timestamp, backdated in batch:
+            by_file.setdefault(path, []).append((block, timestamp, backdated))
+
+        for path, entries in by_file.items():
+            handle = self.handles.get(path)
+            self.store.append_blocks(path, handle, entries,
+                                     fsync_each=self.fsync_mode == "entry")
+            if self.fsync_mode == "batch":
+                os.fsync(handle.fileno())
+        self.entries_written += len(batch)
+        self.batches_written += 1
+
+    def release(self, path: Path):
+        """Writes queued entries and closes the handle to path (e.g. before it is moved)."""
+        with self._write_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+            if batch:
+                self._write_batch(batch)
+            self.handles.discard(path)
+
+    def close(self):
+        """Flushes queued entries, stops the background thread and closes all files."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        with self._write_lock:
+            self.handles.close_all()
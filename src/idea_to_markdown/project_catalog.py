@@ -0,0 +1,194 @@
+import os
+import threading
+from pathlib import Path
+
+from .note_segments import MANIFEST_NAME, SEGMENTS_DIR_NAME, SegmentManifest
+from .note_store import NoteStore
+
+
+class ProjectInfo:
+    """Catalog metadata for one project's note file."""
+
+    def __init__(self, name: str, path: Path, size: int, mtime: float,
+                 entry_count: int | None = None, segmented: bool = False):
+        self.name = name
+        self.path = path  # the project directory, for a segmented project
+        self.size = size
+        self.mtime = mtime
+        self.entry_count = entry_count  # None until first needed
+        self.segmented = segmented
+
+    def __repr__(self) -> str:
+        return (f"ProjectInfo(name={self.name!r}, size={self.size}, "
+                f"entry_count={self.entry_count})")
+
+
+class ProjectCatalog:
+    """
+    In-memory catalog of the projects in the notes directory.
+
+    Projects are keyed by their case-folded name, so lookups are
+    case-insensitive and O(1). A project is a <name>.md file, or a <name>/
+    directory with a segment manifest (whose size, mtime and entry count
+    cover all its segments). The directory is only re-scanned when its
+    mtime changes (a file was created, renamed or deleted); appends made
+    through the store update the catalog directly. Entry counts are read
+    from the entry index lazily and then kept up to date on writes.
+    """
+
+    def __init__(self, notes_dir: Path, scratchpad_file_name: str, store: NoteStore):
+        self.notes_dir = notes_dir
+        self.segments_dir = notes_dir / SEGMENTS_DIR_NAME
+        self.scratchpad_file_name = scratchpad_file_name
+        self.store = store
+        self._projects: dict[str, ProjectInfo] = {}
+        self._dir_mtime_ns: tuple[int, int | None] | None = None
+        self._lock = threading.Lock()
+        self.scans = 0
+        # Bumped whenever the set of projects changes
+        self.generation = 0
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return name.strip().casefold()
+
+    def _is_project_file(self, name: str) -> bool:
+        return name.endswith(".md") and name != self.scratchpad_file_name
+
+    @staticmethod
+    def _segments_stat(directory: Path) -> tuple[list[Path], int, float] | None:
+        """Segment files, total size and latest mtime of a segmented project."""
+        manifest = SegmentManifest.load(directory)
+        if manifest is None:
+            return None
+        paths, size, mtime = manifest.paths(), 0, manifest.path.stat().st_mtime
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            size += stat.st_size
+            mtime = max(mtime, stat.st_mtime)
+        return paths, size, mtime
+
+    def _refresh_if_stale(self):
+        """Re-scans the directories if their mtimes changed; the caller holds the lock."""
+        try:
+            dir_mtime_ns = self.notes_dir.stat().st_mtime_ns
+        except OSError:
+            self._projects, self._dir_mtime_ns = {}, None
+            return
+        try:
+            # Segmented projects are created inside .segments/
+            dir_mtime_ns = (dir_mtime_ns, self.segments_dir.stat().st_mtime_ns)
+        except OSError:
+            dir_mtime_ns = (dir_mtime_ns, None)
+        if dir_mtime_ns == self._dir_mtime_ns:
+            return
+
+        found = []
+        with os.scandir(self.notes_dir) as entries:
+            for item in entries:
+                if self._is_project_file(item.name) and item.is_file():
+                    stat = item.stat()
+                    found.append(ProjectInfo(item.name[:-len(".md")], Path(item.path),
+                                             stat.st_size, stat.st_mtime))
+        if dir_mtime_ns[1] is not None:
+            with os.scandir(self.segments_dir) as entries:
+                for item in entries:
+                    if (item.name.startswith(".") or not item.is_dir()
+                            or not os.path.exists(os.path.join(item.path, MANIFEST_NAME))):
+                        continue
+                    segments = self._segments_stat(Path(item.path))
+                    if segments is not None:
+                        # Listed last, so it replaces a file left over from splitting the project
+                        found.append(ProjectInfo(item.name, Path(item.path), segments[1], segments[2],
+                                                 segmented=True))
+
+        projects = {}
+        for info in found:
+            name = info.name
+            known = self._projects.get(self._key(name))
+            # Keep the entry count of files that did not change
+            if known is not None and (known.size, known.mtime) == (info.size, info.mtime):
+                info.entry_count = known.entry_count
+            projects[self._key(name)] = info
+        if projects.keys() != self._projects.keys():
+            self.generation += 1
+        self._projects = projects
+        self._dir_mtime_ns = dir_mtime_ns
+        self.scans += 1
+
+    def names(self) -> list[str]:
+        """Returns project names sorted case-insensitively."""
+        return self.snapshot()[1]
+
+    def snapshot(self) -> tuple[int, list[str]]:
+        """Returns the current generation together with the project names."""
+        with self._lock:
+            self._refresh_if_stale()
+            return self.generation, [self._projects[key].name for key in sorted(self._projects)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh_if_stale()
+            return len(self._projects)
+
+    def __contains__(self, name: str) -> bool:
+        return self.find(name) is not None
+
+    def find(self, name: str) -> str | None:
+        """Returns the stored spelling of a project name, matched case-insensitively."""
+        with self._lock:
+            self._refresh_if_stale()
+            info = self._projects.get(self._key(name))
+            return info.name if info is not None else None
+
+    def get(self, name: str) -> ProjectInfo | None:
+        """Returns the metadata of a project, loading its entry count if needed."""
+        with self._lock:
+            self._refresh_if_stale()
+            info = self._projects.get(self._key(name))
+            if info is None:
+                return None
+            # Hand edits change a file without touching the directory mtime
+            if info.segmented:
+                segments = self._segments_stat(info.path)
+                if segments is None:
+                    return None
+                paths, size, mtime = segments
+            else:
+                try:
+                    stat = info.path.stat()
+                except OSError:
+                    return None
+                paths, size, mtime = [info.path], stat.st_size, stat.st_mtime
+            if (size, mtime) != (info.size, info.mtime):
+                info.size, info.mtime, info.entry_count = size, mtime, None
+            if info.entry_count is None:
+                info.entry_count = sum(self.store.count_entries(path) for path in paths)
+            return info
+
+    def record_append(self, note_path: Path, first_entry_number: int, records, blocks):
+        """NoteStore append listener: keeps size, mtime and entry count current."""
+        segment = note_path.parent.parent == self.segments_dir
+        if not segment and (note_path.parent != self.notes_dir
+                            or not self._is_project_file(note_path.name)):
+            return
+        with self._lock:
+            info = self._projects.get(self._key(note_path.parent.name if segment else note_path.stem))
+            if info is None or info.segmented != segment:
+                # Created (or split into segments) since the last scan; the next lookup re-scans
+                return
+            try:
+                stat = note_path.stat()
+            except OSError:
+                return
+            if segment:
+                info.size += sum(record.length for record in records)
+                info.mtime = max(info.mtime, stat.st_mtime)
+                if info.entry_count is not None:
+                    info.entry_count += len(records)
+            else:
+                info.size, info.mtime = stat.st_size, stat.st_mtime
+                info.entry_count = first_entry_number + len(records)
@@ -0,0 +1,136 @@
+import heapq
+import re
+from difflib import SequenceMatcher
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+# Words Whisper or the speaker often put around a project name
+FILLER_WORDS = frozenset(("the", "my", "a", "please"))
+# Transcripts spell small numbers either way ("project two" / "project 2")
+NUMBER_WORDS = {word: str(value) for value, word in enumerate(
+    "zero one two three four five six seven eight nine ten".split())}
+NGRAM_SIZE = 3
+# Only the best trigram candidates get the more expensive edit-distance check
+MAX_CANDIDATES = 20
+
+NEW_PROJECT_PATTERN = re.compile(r"\bnew project(?: (?:called|named))? (.+)$")
+USE_PROJECT_PATTERN = re.compile(r"^(?:use|open|switch to|continue)(?: project)? (.+)$")
+
+
+def normalize_transcript(text: str) -> str:
+    """Lowercases text, drops punctuation and collapses whitespace."""
+    return " ".join(WORD_PATTERN.findall(text.casefold()))
+
+
+def project_key(name: str) -> str:
+    """
+    The form names are compared in: normalized, number words as digits and
+    without filler words or spaces, so "the Alpha-Project." and
+    "alpha project" share a key.
+    """
+    words = [NUMBER_WORDS.get(w, w) for w in normalize_transcript(name).split()]
+    return "".join(w for w in words if w not in FILLER_WORDS) or "".join(words)
+
+
+def ngrams(key: str, size: int = NGRAM_SIZE) -> set[str]:
+    padded = f"^{key}$"
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def parse_project_command(transcript: str) -> tuple[str | None, str]:
+    """
+    Classifies a project-selection reply. Returns (action, name) where
+    action is "new", "use", "scratchpad" or None (a bare project name).
+    """
+    text = normalize_transcript(transcript)
+    match = NEW_PROJECT_PATTERN.search(text)
+    if match:
+        return "new", match.group(1)
+    if "scratchpad" in text.split():
+        return "scratchpad", ""
+    match = USE_PROJECT_PATTERN.match(text)
+    if match:
+        return "use", match.group(1)
+    return None, text
+
+
+class ProjectMatch:
+    """A candidate project for a spoken name, with a confidence in [0, 1]."""
+
+    def __init__(self, name: str, score: float):
+        self.name = name
+        self.score = score
+
+    def __repr__(self) -> str:
+        return f"ProjectMatch(name={self.name!r}, score={self.score:.2f})"
+
+
+class ProjectResolver:
+    """
+    Resolves noisy spoken project names against the known projects.
+
+    Names are reduced to a key (see project_key) and indexed by character
+    trigrams. A lookup gathers the projects sharing the most trigrams with
+    the spoken name and scores them by averaging trigram overlap (Dice) and
+    edit-distance similarity; an identical key scores 1.0.
+    """
+
+    def __init__(self, names=()):
+        self._names: list[str] = []
+        self._keys: list[str] = []
+        self._grams: list[set[str]] = []
+        self._postings: dict[str, list[int]] = {}
+        self._by_key: dict[str, int] = {}
+        self.update(names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def update(self, names):
+        """Rebuilds the index for a new set of project names."""
+        self._names, self._keys, self._grams = [], [], []
+        self._postings, self._by_key = {}, {}
+        for name in names:
+            key = project_key(name)
+            if not key or key in self._by_key:
+                continue
+            number = len(self._names)
+            grams = ngrams(key)
+            self._names.append(name)
+            self._keys.append(key)
+            self._grams.append(grams)
+            self._by_key[key] = number
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(number)
+
+    def resolve(self, spoken: str, limit: int = 5) -> list[ProjectMatch]:
+        """Returns up to limit candidate projects, best first."""
+        key = project_key(spoken)
+        if not key or limit <= 0:
+            return []
+        exact = self._by_key.get(key)
+        if exact is not None:
+            return [ProjectMatch(self._names[exact], 1.0)]
+
+        grams = ngrams(key)
+        shared: dict[int, int] = {}
+        for gram in grams:
+            for number in self._postings.get(gram, ()):
+                shared[number] = shared.get(number, 0) + 1
+        candidates = heapq.nlargest(MAX_CANDIDATES, shared, key=shared.get)
+
+        matches = []
+        for number in candidates:
+            dice = 2 * shared[number] / (len(grams) + len(self._grams[number]))
+            ratio = SequenceMatcher(None, key, self._keys[number], autojunk=False).ratio()
+            matches.append(ProjectMatch(self._names[number], (dice + ratio) / 2))
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches[:limit]
+
+    def best(self, spoken: str, threshold: float) -> str | None:
+        """Returns the top candidate if its score reaches threshold, else None."""
+        matches = self.resolve(spoken, limit=1)
+        if matches and matches[0].score >= threshold:
+            return matches[0].name
+        return None
@@ -0,0 +1,312 @@
+import heapq
+import math
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from .note_store import EntryRecord, NoteEntry, NoteStore, entry_content
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+STOPWORDS = frozenset(
+    "a about an and are as at be but by for from i in is it me my of on or "
+    "that the this to was we with".split())
+INDEX_VERSION = 2
+# Terms found in more than this share of entries only re-rank candidates
+COMMON_TERM_FRACTION = 0.05
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits text into lowercase search terms, dropping common stopwords."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def term_counts(text: str) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class SearchHit:
+    """One ranked search result: an entry of a note file."""
+
+    def __init__(self, file_key: str, entry_number: int, timestamp: float,
+                 score: float, matched_terms: int):
+        self.file_key = file_key
+        self.entry_number = entry_number
+        self.timestamp = timestamp
+        self.score = score
+        self.matched_terms = matched_terms
+
+    def __repr__(self) -> str:
+        return (f"SearchHit(file_key={self.file_key!r}, entry_number={self.entry_number}, "
+                f"score={self.score:.3f})")
+
+
+class SearchResult:
+    """A search hit resolved to its project and entry."""
+
+    def __init__(self, project: str | None, entry: NoteEntry, score: float):
+        self.project = project  # None for the global scratchpad
+        self.entry = entry
+        self.score = score
+
+    def __repr__(self) -> str:
+        return f"SearchResult(project={self.project!r}, entry={self.entry!r})"
+
+
+class _FileState:
+    """What the index knows about one note file."""
+
+    def __init__(self, mtime_ns: int, size: int):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.timestamps: list[float] = []
+        self.terms: set[str] = set()
+
+
+class SearchIndex:
+    """
+    Inverted index over the entries of all note files.
+
+    Terms map to {file key: {entry number: term frequency}}. Entries are added
+    incrementally as notes are written; refresh() re-indexes only files whose
+    mtime or size changed since they were last seen. The index is persisted
+    as JSON next to the entry indexes, grouped by file, so loading it never
+    runs code from the (possibly shared or synced) notes directory.
+    """
+
+    def __init__(self, index_path: Path):
+        self.index_path = index_path
+        self._postings: dict[str, dict[str, dict[int, int]]] = {}
+        self._doc_freq: dict[str, int] = {}
+        self._files: dict[str, _FileState] = {}
+        self._entry_count = 0
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.loaded = False
+        # Set when an incremental update was missed; cleared by refresh()
+        self.needs_refresh = False
+
+    def __len__(self) -> int:
+        return self._entry_count
+
+    def load(self):
+        """
+        Loads the persisted index. If it is missing, stale or unreadable for
+        any reason, starts empty so the next refresh rebuilds it.
+        """
+        with self._lock:
+            try:
+                with open(self.index_path, "rb") as f:
+                    data = json.load(f)
+                if data.get("version") != INDEX_VERSION:
+                    raise ValueError("index version changed")
+                self._load_files(data["files"])
+            except FileNotFoundError:
+                self._reset()
+            except Exception:
+                self._reset()
+                self.needs_refresh = True
+            self.loaded = True
+
+    def _reset(self):
+        self._postings, self._doc_freq, self._files = {}, {}, {}
+        self._entry_count = 0
+
+    def _load_files(self, files: dict):
+        self._reset()
+        for key, item in files.items():
+            state = _FileState(int(item["mtime_ns"]), int(item["size"]))
+            state.timestamps = [float(t) for t in item["timestamps"]]
+            for term, flat in item["terms"].items():
+                # [entry number, term frequency, entry number, ...]
+                entries = {int(n): int(c) for n, c in zip(flat[::2], flat[1::2])}
+                if any(not 0 <= n < len(state.timestamps) for n in entries):
+                    raise ValueError(f"entry out of range in {key}")
+                self._postings.setdefault(term, {})[key] = entries
+                self._doc_freq[term] = self._doc_freq.get(term, 0) + len(entries)
+                state.terms.add(term)
+            self._files[str(key)] = state
+            self._entry_count += len(state.timestamps)
+
+    def save(self):
+        """Persists the index if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            files = {}
+            for key, state in self._files.items():
+                terms = {}
+                for term in state.terms:
+                    terms[term] = [value for item in self._postings[term][key].items() for value in item]
+                files[key] = {"mtime_ns": state.mtime_ns, "size": state.size,
+                              "timestamps": state.timestamps, "terms": terms}
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "files": files}, f, separators=(",", ":"))
+            os.replace(temp_path, self.index_path)
+            self._dirty = False
+
+    def refresh(self, note_files: dict[str, Path], store: NoteStore) -> int:
+        """
+        Re-indexes files that are new or whose mtime/size changed and drops
+        files that no longer exist. Files that were only appended to (e.g.
+        by another process) just have their new entries added. Returns the
+        number of files re-indexed.
+        """
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            for key in list(self._files):
+                if key not in note_files:
+                    self.remove_file(key)
+            reindexed = 0
+            for key, path in note_files.items():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                state = self._files.get(key)
+                if state is None or (state.mtime_ns, state.size) != (stat.st_mtime_ns, stat.st_size):
+                    if not self._index_appended(key, path, state, stat, store):
+                        self.index_file(key, path, store)
+                    reindexed += 1
+            self.needs_refresh = False
+            return reindexed
+
+    def _index_appended(self, key: str, path: Path, state: _FileState | None, stat,
+                        store: NoteStore) -> bool:
+        """
+        Adds the entries appended to a file since it was indexed, if that is
+        all that changed: it grew and its last indexed entry is where it was.
+        """
+        if state is None or stat.st_size <= state.size:
+            return False
+        count = len(state.timestamps)
+        index = store.index_for(path)
+        if count:
+            if len(index) < count:
+                return False
+            last = index.record(count - 1)
+            if last.end > state.size or last.timestamp != state.timestamps[-1]:
+                return False
+        for number, entry in enumerate(store.iter_entries(path, count), start=count):
+            self._add(key, state, number, entry.timestamp.timestamp(), entry.content)
+        state.mtime_ns, state.size = stat.st_mtime_ns, stat.st_size
+        self._dirty = True
+        return True
+
+    def index_file(self, key: str, path: Path, store: NoteStore):
+        """(Re)builds the postings for every entry of one note file."""
+        with self._lock:
+            self.remove_file(key)
+            stat = path.stat()
+            state = _FileState(stat.st_mtime_ns, stat.st_size)
+            self._files[key] = state
+            for number, entry in enumerate(store.iter_entries(path)):
+                self._add(key, state, number, entry.timestamp.timestamp(), entry.content)
+            self._dirty = True
+
+    def remove_file(self, key: str):
+        with self._lock:
+            state = self._files.pop(key, None)
+            if state is None:
+                return
+            for term in state.terms:
+                entries = self._postings[term].pop(key, {})
+                self._doc_freq[term] -= len(entries)
+                if not self._postings[term]:
+                    del self._postings[term]
+                    del self._doc_freq[term]
+            self._entry_count -= len(state.timestamps)
+            self._dirty = True
+
+    def add_entries(self, key: str, path: Path, first_entry_number: int,
+                    records: list[EntryRecord], blocks: list[str]):
+        """Indexes entries that were just appended to a note file."""
+        with self._lock:
+            state = self._files.get(key)
+            if state is None and first_entry_number == 0:
+                state = self._files[key] = _FileState(0, 0)
+            elif state is None or len(state.timestamps) != first_entry_number:
+                # We missed earlier changes to this file; pick them up on refresh
+                self.needs_refresh = True
+                return
+            for offset, (record, block) in enumerate(zip(records, blocks)):
+                self._add(key, state, first_entry_number + offset, record.timestamp, entry_content(block))
+            stat = path.stat()
+            state.mtime_ns, state.size = stat.st_mtime_ns, stat.st_size
+            self._dirty = True
+
+    def _add(self, key: str, state: _FileState, number: int, timestamp: float, text: str):
+        state.timestamps.append(timestamp)
+        self._entry_count += 1
+        for term, count in term_counts(text).items():
+            files = self._postings.setdefault(term, {})
+            files.setdefault(key, {})[number] = count
+            self._doc_freq[term] = self._doc_freq.get(term, 0) + 1
+            state.terms.add(term)
+
+    def search(self, query: str, file_keys=None, limit: int = 10) -> list[SearchHit]:
+        """
+        Ranks entries by how many query terms they contain, then by TF-IDF
+        score, then by recency. file_keys optionally restricts the search.
+
+        When the query has at least one selective term, candidates come from
+        the selective terms only and very common terms just add to their
+        scores, so a frequent word never forces a scan of most of the corpus.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit <= 0:
+            return []
+        allowed = set(file_keys) if file_keys is not None else None
+
+        with self._lock:
+            total = max(1, self._entry_count)
+            present = sorted((t for t in terms if t in self._postings),
+                             key=lambda t: self._doc_freq[t])
+            if not present:
+                return []
+            selective = [t for t in present if self._doc_freq[t] <= total * COMMON_TERM_FRACTION]
+            # Without selective terms, the rarest common term picks candidates
+            gathering = selective or present[:1]
+            boosting = present[len(gathering):]
+
+            scores: dict[tuple[str, int], list] = {}
+            for term in gathering:
+                idf = math.log(1 + total / self._doc_freq[term])
+                # Term frequencies are small integers; weigh each one once
+                weights: dict[int, float] = {}
+                for key, entries in self._postings[term].items():
+                    if allowed is not None and key not in allowed:
+                        continue
+                    for number, count in entries.items():
+                        weight = weights.get(count)
+                        if weight is None:
+                            weight = weights[count] = (1 + math.log(count)) * idf
+                        hit = scores.get((key, number))
+                        if hit is None:
+                            scores[(key, number)] = [1, weight]
+                        else:
+                            hit[0] += 1
+                            hit[1] += weight
+
+            for term in boosting:
+                idf = math.log(1 + total / self._doc_freq[term])
+                files = self._postings[term]
+                for (key, number), hit in scores.items():
+                    count = files.get(key, {}).get(number)
+                    if count:
+                        hit[0] += 1
+                        hit[1] += (1 + math.log(count)) * idf
+
+            files = self._files
+            best = heapq.nlargest(limit, (
+                (matched, score, files[key].timestamps[number], key, number)
+                for (key, number), (matched, score) in scores.items()))
+            return [SearchHit(key, number, timestamp, score, matched)
+                    for matched, score, timestamp, key, number in best]
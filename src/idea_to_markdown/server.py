@@ -0,0 +1,295 @@
+"""
+Multi-session note-taking server.
+
+Clients (phones, browser bridges, other machines) stream microphone audio over
+a plain TCP socket; each connection gets its own ConversationSession, while
+the OpenAI client (and its connection pool), the NoteManager and the tracer
+are shared by all of them.
+
+Every message is a frame: a 1-byte type, a 4-byte big-endian payload length
+and the payload.
+
+Client to server:
+    A  a chunk of 16 kHz mono 16-bit PCM of the current utterance
+    E  end of the utterance: transcribe and handle it
+    T  a UTF-8 text utterance (skips transcription)
+    Q  quit
+
+Server to client:
+    J  a UTF-8 JSON event, {"event": ..., ...}: prompt, transcript, project,
+       note_saved, search_results, reply, error, turn_done, bye
+    S  WAV audio of the spoken reply
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import struct
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import AppConfig
+from .context_builder import ContextBuilder
+from .digest import DigestWorker
+from .intent_router import classify_intent, parse_search_query
+from .note_manager import NoteManager
+from .session import GOODBYE_MESSAGE, ConversationSession
+from .speech_interface import NOT_CAUGHT_MESSAGE, RATE, SAMPLE_WIDTH, SpeechInterface
+from .tracing import Tracer
+
+FRAME_HEADER = struct.Struct(">cI")
+AUDIO_CHUNK = b"A"
+END_OF_UTTERANCE = b"E"
+TEXT_UTTERANCE = b"T"
+QUIT = b"Q"
+JSON_EVENT = b"J"
+SPEECH_AUDIO = b"S"
+
+# Largest frame a client may send; audio arrives in many small chunks
+MAX_FRAME_BYTES = 1024 * 1024
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[bytes, bytes] | None:
+    """Reads one (type, payload) frame; None once the peer has closed."""
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    kind, length = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    try:
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+    return kind, payload
+
+
+def write_frame(writer: asyncio.StreamWriter, kind: bytes, payload: bytes = b""):
+    """Queues one frame; the caller drains the writer."""
+    writer.write(FRAME_HEADER.pack(kind, len(payload)) + payload)
+
+
+def write_event(writer: asyncio.StreamWriter, event: str, **fields):
+    write_frame(writer, JSON_EVENT, json.dumps({"event": event, **fields}).encode("utf-8"))
+
+
+class NoteServer:
+    """
+    Serves voice note-taking sessions to many concurrent clients.
+
+    The event loop only moves frames; transcription, replies, speech and
+    note writes run on a bounded thread pool, so a slow API call delays
+    only the session that made it.
+    """
+
+    def __init__(self, config: AppConfig, client=None, tracer: Tracer | None = None):
+        self.config = config
+        self.tracer = tracer or Tracer.from_config(config)
+        self.note_manager = NoteManager(config, tracer=self.tracer)
+        # API only: the shared interface never opens an audio device
+        self.speech_interface = SpeechInterface(config, client=client, tracer=self.tracer)
+        if not self.speech_interface.stt_available:
+            print("WARNING: Speech-to-text not available. Only text utterances will be served.")
+        # Replies see the session's own exchanges and its project's latest notes
+        self.speech_interface.context_builder = ContextBuilder.from_config(config, self.note_manager)
+        # Project digests are brought up to date while no session is talking
+        self.digest_worker: DigestWorker | None = None
+        if config.digest_enabled and self.speech_interface.chat_available:
+            self.digest_worker = DigestWorker.from_config(
+                config, self.note_manager, self.speech_interface.chat_engine.chat)
+        self.max_utterance_bytes = int(config.max_recording_duration * RATE * SAMPLE_WIDTH)
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.server_max_workers, thread_name_prefix="note-server")
+        self._server: asyncio.Server | None = None
+        self.sessions = 0
+        self.active_sessions = 0
+
+    @property
+    def port(self) -> int | None:
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str | None = None, port: int | None = None) -> asyncio.Server:
+        """Starts listening; port 0 picks a free port (see .port)."""
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            host or self.config.server_host,
+            self.config.server_port if port is None else port)
+        if self.digest_worker is not None:
+            self.digest_worker.start()
+        return self._server
+
+    async def serve_forever(self, host: str | None = None, port: int | None = None):
+        server = await self.start(host, port)
+        print(f"Serving note sessions on {self.config.server_host if host is None else host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        """Stops accepting sessions, then flushes notes and stops the workers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        loop = asyncio.get_running_loop()
+        if self.digest_worker is not None:
+            await loop.run_in_executor(self._executor, self.digest_worker.stop)
+        await loop.run_in_executor(self._executor, self.note_manager.close)
+        self._executor.shutdown(wait=True)
+        self.tracer.dump_summary()
+        self.tracer.close()
+
+    async def _run_blocking(self, func, *args):
+        """Runs func on the worker pool in a copy of this session's context."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(context.run, func, *args))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.sessions += 1
+        self.active_sessions += 1
+        session = ConversationSession(self.config, self.note_manager)
+        audio = bytearray()
+        too_long = False
+        try:
+            prompt = await self._run_blocking(session.project_prompt)
+            write_event(writer, "prompt", text=prompt)
+            await writer.drain()
+
+            while True:
+                frame = await read_frame(reader)
+                if frame is None or frame[0] == QUIT:
+                    break
+                kind, payload = frame
+
+                if kind == AUDIO_CHUNK:
+                    if too_long:
+                        continue
+                    if len(audio) + len(payload) > self.max_utterance_bytes:
+                        # Drop the rest of this utterance up to its end frame
+                        too_long = True
+                        audio = bytearray()
+                        write_event(writer, "error", message="Utterance too long; discarded.")
+                        await writer.drain()
+                        continue
+                    audio += payload
+                    continue
+
+                if kind == END_OF_UTTERANCE:
+                    if too_long:
+                        too_long = False
+                        continue
+                    recording, audio = bytes(audio), bytearray()
+                    keep_going = await self._handle_turn(session, writer, recording=recording)
+                elif kind == TEXT_UTTERANCE:
+                    keep_going = await self._handle_turn(
+                        session, writer, text=payload.decode("utf-8", errors="replace"))
+                else:
+                    write_event(writer, "error", message=f"Unknown frame type {kind!r}.")
+                    keep_going = True
+                await writer.drain()
+                if not keep_going:
+                    break
+        except (ConnectionError, ValueError) as e:
+            print(f"Session ended abnormally: {e}")
+        except Exception as e:
+            print(f"Session failed: {e}")
+            traceback.print_exc()
+        finally:
+            self.active_sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _handle_turn(self, session: ConversationSession, writer: asyncio.StreamWriter,
+                           recording: bytes | None = None, text: str | None = None) -> bool:
+        """
+        Handles one utterance; returns False when the session should end.
+        A turn that fails (a local engine, a note write, TTS) is reported to
+        the client and ends with turn_done, and the session carries on.
+        """
+        try:
+            return await self._run_turn(session, writer, recording, text)
+        except Exception as e:
+            print(f"Error handling turn: {e}")
+            traceback.print_exc()
+            write_event(writer, "error", message=f"Something went wrong: {e}")
+            write_event(writer, "turn_done", intent=None, action="error", avoided_calls=[])
+            return True
+
+    async def _run_turn(self, session: ConversationSession, writer: asyncio.StreamWriter,
+                        recording: bytes | None, text: str | None) -> bool:
+        self.tracer.start_turn()
+        if self.digest_worker is not None:
+            self.digest_worker.touch()
+        if recording is not None:
+            if not recording:
+                write_event(writer, "error", message="No audio received.")
+                return True
+            if not self.speech_interface.stt_available:
+                write_event(writer, "error", message="Transcription is not available.")
+                return True
+            try:
+                text = await self._run_blocking(self.speech_interface.transcribe, recording)
+            except Exception as e:
+                # API errors, and local engines failing (e.g. RuntimeError)
+                write_event(writer, "error", message=f"Transcription failed: {e}")
+                return True
+            write_event(writer, "transcript", text=text)
+
+        text = (text or "").strip()
+        if not text:
+            write_event(writer, "error", message=NOT_CAUGHT_MESSAGE)
+            return True
+
+        context = "project" if session.awaiting_project else None
+        report = self.speech_interface.intent_router.route(text, context)
+        keep_going = True
+
+        if session.awaiting_project:
+            message = await self._run_blocking(session.select_project, text)
+            write_event(writer, "project", project=session.current_project, text=message)
+        else:
+            intent = classify_intent(text)
+            search_query = parse_search_query(text) if intent == "search" else None
+            if intent == "exit":
+                write_event(writer, "bye", text=GOODBYE_MESSAGE)
+                keep_going = False
+            elif intent == "switch_project":
+                session.awaiting_project = True
+                prompt = await self._run_blocking(session.project_prompt)
+                write_event(writer, "prompt", text=prompt)
+            elif search_query:
+                results, summary = await self._run_blocking(session.search, search_query)
+                write_event(writer, "search_results", query=search_query, text=summary, results=[
+                    {"project": r.project, "timestamp": r.entry.timestamp.isoformat(),
+                     "content": r.entry.content, "score": r.score} for r in results])
+            else:
+                message = await self._run_blocking(session.save_note, text)
+                write_event(writer, "note_saved", project=session.current_project, text=message)
+
+        if keep_going and report.action != "skip" and self.speech_interface.chat_available:
+            # Local events are sent first, so a deferred reply only adds latency after them
+            await writer.drain()
+            await self._reply(session, writer, text)
+
+        write_event(writer, "turn_done", intent=report.intent, action=report.action,
+                    avoided_calls=list(report.avoided_calls))
+        return keep_going
+
+    async def _reply(self, session: ConversationSession, writer: asyncio.StreamWriter, text: str):
+        """Sends the chat reply and its speech as a WAV frame."""
+        try:
+            reply = await self._run_blocking(self.speech_interface.generate_reply, text,
+                                             session.current_project, session.history)
+            write_event(writer, "reply", text=reply)
+            speech = await self._run_blocking(self.speech_interface.synthesize_speech, reply)
+            write_frame(writer, SPEECH_AUDIO, speech)
+        except Exception as e:
+            # The turn's note is already saved; only the reply is lost
+            write_event(writer, "error", message=f"Reply failed: {e}")
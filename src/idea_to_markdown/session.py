@@ -0,0 +1,135 @@
+from .config import AppConfig
+from .context_builder import ConversationHistory
+from .note_manager import NoteManager
+from .project_resolver import parse_project_command
+
+# Fixed prompts spoken every session; served from the TTS cache
+WELCOME_GREETING = ("Welcome! Which project are you working on today? "
+                    "Or shall we use the general scratchpad?")
+GOODBYE_MESSAGE = "Ending session. Goodbye!"
+
+
+def note_saved_message(note_content: str) -> str:
+    """The confirmation shown after a note is saved."""
+    preview = note_content[:50] + \
+        "..." if len(note_content) > 50 else note_content
+    return f"Note saved: '{preview}'"
+
+
+class ConversationSession:
+    """
+    The state of one user's conversation: which project notes go to and
+    whether the next utterance answers the project prompt.
+
+    The local Agent keeps one session; the server keeps one per connection,
+    all sharing a single NoteManager.
+    """
+
+    def __init__(self, config: AppConfig, note_manager: NoteManager):
+        self.config = config
+        self.note_manager = note_manager
+        self.current_project: str | None = None
+        self.awaiting_project = True
+        # Recent exchanges with the chat model, sent with the next reply request
+        self.history = ConversationHistory(config.chat_history_turns)
+
+    @property
+    def target_name(self) -> str:
+        return self.current_project or "the scratchpad"
+
+    def project_prompt(self) -> str:
+        """The full project-selection prompt, listing existing projects."""
+        existing_projects = self.note_manager.list_projects()
+
+        project_options = ""
+        if existing_projects:
+            project_options = f" Existing projects are: {', '.join(existing_projects)}."
+
+        return (
+            WELCOME_GREETING +
+            project_options +
+            f" You can say 'new project [name]', 'use [project name]', or 'scratchpad'. Default is '{self.config.default_project_name}'."
+        )
+
+    def select_project(self, response_text: str | None) -> str:
+        """
+        Applies the user's reply to the project prompt and returns the
+        confirmation to show. A missing reply selects the default project.
+        """
+        self.awaiting_project = False
+        if not response_text:
+            # Fallback to default project
+            self.current_project = self.config.default_project_name
+            self.note_manager.add_note_to_project(
+                self.current_project, f"Continuing default project '{self.current_project}'.")
+            return f"No project specified or error. Using default project: {self.current_project}."
+
+        action, name_part = parse_project_command(response_text)
+        # A bare reply may be a (misheard) existing project name
+        matched_project = self.note_manager.resolve_project(name_part) if action is None else None
+
+        # Handle "new project" command
+        if action == "new":
+            if not name_part:
+                self.current_project = None
+                return "Project name not clearly specified. Using scratchpad for now."
+            # Reuse an existing project only if the name is the same
+            self.current_project = self.note_manager.resolve_project(
+                name_part, threshold=1.0) or name_part
+            self.note_manager.add_note_to_project(
+                self.current_project, f"Project '{self.current_project}' initiated.")
+            return f"Okay, working on new project: {self.current_project}."
+
+        # Handle "use [project]" command
+        if action == "use":
+            existing_name = self.note_manager.resolve_project(name_part)
+            if existing_name:
+                self.current_project = existing_name
+                self.note_manager.add_note_to_project(
+                    self.current_project, f"Continuing project '{self.current_project}'.")
+                return f"Okay, working on project: {self.current_project}."
+            if name_part:  # New project implied by "use"
+                self.current_project = name_part
+                self.note_manager.add_note_to_project(
+                    self.current_project, f"Starting new project from 'use' command: '{self.current_project}'.")
+                return f"Okay, starting new project: {self.current_project}."
+            self.current_project = None
+            return "Project name not clear. Using scratchpad."
+
+        # Handle "scratchpad" command
+        if action == "scratchpad":
+            self.current_project = None
+            return "Okay, using the global scratchpad."
+
+        # Handle existing project name
+        if matched_project:
+            self.current_project = matched_project
+            self.note_manager.add_note_to_project(
+                self.current_project, f"Continuing project '{self.current_project}'.")
+            return f"Okay, working on project: {self.current_project}."
+
+        # Default handling: the normalized reply, like "new" and "use" names,
+        # so a name can never carry path separators into the notes directory
+        self.current_project = name_part or self.config.default_project_name
+        self.note_manager.add_note_to_project(
+            self.current_project, f"Project '{self.current_project}' selected/initiated.")
+        return f"Okay, working on project: {self.current_project}."
+
+    def search(self, query: str, limit: int = 5) -> tuple[list, str]:
+        """Searches all notes; returns the matches and a spoken summary of them."""
+        results = self.note_manager.search(query, limit=limit)
+        if not results:
+            return results, f"I couldn't find any notes about {query}."
+        best = results[0]
+        summary = (f"I found {len(results)} notes about {query}. The best match, from "
+                   f"{best.project or 'the scratchpad'}, says: {best.entry.content[:200]}")
+        return results, summary
+
+    def save_note(self, note_content: str) -> str:
+        """Saves a dictated note to the current target and returns the confirmation."""
+        if self.current_project:
+            self.note_manager.add_note_to_project(
+                self.current_project, note_content)
+        else:
+            self.note_manager.add_note_to_scratchpad(note_content)
+        return note_saved_message(note_content)
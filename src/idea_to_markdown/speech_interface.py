@@ -1,44 +1,156 @@
+import contextvars
 import openai
-import pyaudio
-import wave
+import threading
 import time
-import os
-import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
+from .api_client import ApiClient, ApiUnavailableError
+from .audio_buffers import AudioRingBuffer, iter_frame_slices, parse_wav
+from .audio_encoding import EncodedAudio, UploadEncoder
+from .capture_spool import CAPTURE_EMPTY, CAPTURE_FAILED, CAPTURE_QUEUED, SpoolWorker
+from .context_builder import ContextBuilder, ConversationHistory
+from .dictation import SegmentTranscriber
+from .engines import TTS_PCM_RATE, TTS_PCM_SAMPLE_WIDTH, OpenAIEngine, create_engines
+from .intent_router import IntentRouter, TurnReport, parse_intent_policy
+from .tracing import Tracer
+from .tts_cache import TTSCache
+from .vad import VoiceActivityDetector, record_with_vad
+
 # Configuration for audio recording
-FORMAT = pyaudio.paInt16
+FORMAT = 8  # pyaudio.paInt16; PyAudio itself is imported on first use
 CHANNELS = 1
 RATE = 16000
 CHUNK = 1024
+SAMPLE_WIDTH = 2  # bytes per paInt16 sample
+
+# Fixed phrases the agent speaks on error paths; cached and prewarmed
+NOT_CAUGHT_MESSAGE = "Sorry, I didn't catch that."
+API_ERROR_MESSAGE = "I encountered an API error."
+UNEXPECTED_ERROR_MESSAGE = "An unexpected error occurred."
+QUEUED_MESSAGE = "I'll save that note as soon as I can transcribe it."
+ERROR_MESSAGES = (NOT_CAUGHT_MESSAGE, API_ERROR_MESSAGE, UNEXPECTED_ERROR_MESSAGE, QUEUED_MESSAGE)
 
 
 class SpeechInterface:
     """
-    Handles real-time voice interaction using OpenAI's services.
-    Provides speech-to-text and text-to-speech functionality for the agent.
+    Handles real-time voice interaction: recording, speech-to-text, replies
+    and text-to-speech for the agent. STT, chat and TTS are served by speech
+    engines (see engines.py): OpenAI's services by default, a local model
+    for STT, or a stub.
     """
 
-    def __init__(self, config):
+    def __init__(self, config, client=None, audio_interface=None, tracer: Tracer | None = None,
+                 engine=None):
         self.config = config
-        if not self.config.openai_api_key:
-            print(
-                "CRITICAL: OPENAI_API_KEY not found in environment. Voice features will not work.")
-            self.client = None
+        self.tracer = tracer or Tracer.from_config(config)
+
+        # Retries, timeouts, concurrency limit and circuit breakers for API calls
+        self.api = ApiClient.from_config(config, tracer=self.tracer)
+        # The OpenAI client is created on first use, so text-only sessions and
+        # tools that never call the API don't build an HTTP client
+        self.openai_engine = OpenAIEngine(config, self.api, self.tracer, client=client)
+        # `engine` serves every role (e.g. a StubEngine in tests); otherwise
+        # STT_ENGINE, CHAT_ENGINE and TTS_ENGINE choose
+        if engine is not None:
+            engines = {"stt": engine, "chat": engine, "tts": engine}
         else:
-            try:
-                self.client = openai.OpenAI(api_key=self.config.openai_api_key)
-                print("OpenAI client initialized successfully.")
-            except Exception as e:
-                print(f"Error initializing OpenAI client: {e}")
-                self.client = None
+            engines = create_engines(config, self.openai_engine)
+        self.stt_engine = engines["stt"]
+        self.chat_engine = engines["chat"]
+        self.tts_engine = engines["tts"]
+
+        # Opened on first use, so API-only users (e.g. the server) need no device
+        self._audio_interface = audio_interface
+
+        self.vad = VoiceActivityDetector(
+            rate=RATE,
+            frame_size=CHUNK,
+            energy_threshold=self.config.vad_energy_threshold,
+            silence_duration=self.config.vad_silence_duration,
+            max_segment_duration=self.config.vad_max_segment_duration,
+            no_speech_timeout=self.config.voice_recording_duration,
+            max_duration=self.config.max_recording_duration,
+        )
+        # Long dictation waits out longer pauses and cuts overlapping segments
+        self.dictation_vad = VoiceActivityDetector(
+            rate=RATE,
+            frame_size=CHUNK,
+            energy_threshold=self.config.vad_energy_threshold,
+            silence_duration=self.config.dictation_silence_duration,
+            max_segment_duration=self.config.dictation_segment_duration,
+            no_speech_timeout=self.config.voice_recording_duration,
+            max_duration=self.config.dictation_max_duration,
+            overlap_duration=self.config.dictation_overlap_duration,
+        )
+        self._dictation_executor: ThreadPoolExecutor | None = None
+
+        # Trims and compresses recordings before upload, on a worker thread;
+        # engines taking PCM get it uncompressed
+        self.encoder = UploadEncoder.from_config(config, RATE)
+        if self.stt_engine.accepts_pcm:
+            self.encoder.audio_format = "wav"
+
+        # Seconds of silence skipped by VAD during the last turn
+        self.last_dead_air_seconds = 0.0
+        # Seconds from the TTS request to the first audio written to the
+        # speaker, for the last streamed reply
+        self.last_time_to_first_audio: float | None = None
+
+        self.tts_cache = None
+        if self.config.tts_cache_enabled:
+            self.tts_cache = TTSCache(
+                self.config.tts_cache_dir,
+                memory_limit_bytes=self.config.tts_cache_memory_bytes,
+                disk_limit_bytes=self.config.tts_cache_disk_bytes,
+            )
+
+        self.intent_router = IntentRouter(
+            parse_intent_policy(self.config.intent_policy),
+            enabled=self.config.intent_routing)
+        # Intent and avoided reply calls of the last turn
+        self.last_turn_report: TurnReport | None = None
+
+        # Recent exchanges and (once given a note manager, see Agent) the
+        # active project's latest notes go into each chat call, within
+        # CHAT_CONTEXT_TOKENS
+        self.history = ConversationHistory(config.chat_history_turns)
+        self.context_builder = ContextBuilder.from_config(config)
+
+        # When set, dictation is spooled to disk and transcribed (and saved
+        # as a note) by the worker; see capture_spool.SpoolWorker
+        self.spool_worker: SpoolWorker | None = None
+        # What became of the last spooled capture (a capture_spool.CAPTURE_* status)
+        self.last_capture_status: str | None = None
+
+        # Single worker so background replies are spoken in turn order
+        self._response_executor: ThreadPoolExecutor | None = None
+        self._pending_responses: list[Future] = []
+
+    @property
+    def client(self):
+        """The OpenAI client, or None if there is no API key or it could not be created."""
+        return self.openai_engine.client
+
+    @property
+    def stt_available(self) -> bool:
+        return self.stt_engine.available
 
-        self.audio_interface = pyaudio.PyAudio()
+    @property
+    def chat_available(self) -> bool:
+        return self.chat_engine.available
 
-        # Create project-specific temp directory instead of global one
-        self.temp_dir = Path(tempfile.gettempdir()) / "idea_to_markdown_audio"
-        self.temp_dir.mkdir(exist_ok=True)
-        print(f"Using temporary audio directory: {self.temp_dir}")
+    @property
+    def tts_available(self) -> bool:
+        return self.tts_engine.available
+
+    @property
+    def audio_interface(self):
+        if self._audio_interface is None:
+            import pyaudio
+
+            self._audio_interface = pyaudio.PyAudio()
+        return self._audio_interface
 
     def _record_audio_chunk(self, stream):
         """Record audio from the user until they stop speaking or timeout occurs."""
@@ -49,50 +161,157 @@ class SpeechInterface:
             for _ in range(0, int(RATE / CHUNK * self.config.voice_recording_duration)):
                 data = stream.read(CHUNK, exception_on_overflow=False)
                 frames.append(data)
-                # Future enhancement: Implement VAD here
         except KeyboardInterrupt:
             print("Recording stopped by user.")
 
         return b''.join(frames)
 
+    def _record_speech_segments(self, stream, on_segment=None, dictation: bool = False) -> list[bytes]:
+        """
+        Records one utterance. With VAD enabled, recording stops after trailing
+        silence and long monologues come back as several segments; otherwise a
+        single fixed-duration recording is returned. on_segment is called with
+        each segment as soon as it is complete. A dictation always uses the
+        dictation detector, with its longer pauses and overlapping segments.
+        """
+        if not self.config.vad_enabled and not dictation:
+            audio_data = self._record_audio_chunk(stream)
+            if audio_data and on_segment is not None:
+                on_segment(audio_data)
+            return [audio_data] if audio_data else []
+
+        detector = self.dictation_vad if dictation else self.vad
+        if dictation:
+            print("🔴 Dictating... (Speak now, recording stops after a longer pause)")
+        else:
+            print("🔴 Recording... (Speak now, recording stops when you pause)")
+        detector.on_segment = on_segment
+        try:
+            result = record_with_vad(stream, detector, CHUNK)
+        finally:
+            detector.on_segment = None
+        self.last_dead_air_seconds = result.dead_air_seconds
+        if result.segments:
+            print(f"⏱️ Captured {result.speech_seconds:.1f}s of speech in "
+                  f"{len(result.segments)} segment(s), skipped {result.dead_air_seconds:.1f}s of silence.")
+        return result.segments
+
     def play_audio_stream(self, audio_stream_data):
-        """Play audio data using PyAudio."""
+        """
+        Play audio data using PyAudio.
+        WAV responses are played with their own format; anything else is
+        treated as raw PCM in the recording format. Frames are written to the
+        output stream as slices of the response buffer, without temp files.
+        """
         if not audio_stream_data:
             print("No audio data to play.")
             return
 
-        temp_playback_file = self.temp_dir / "temp_agent_response.wav"
+        wav = parse_wav(audio_stream_data)
+        if wav is not None:
+            channels, rate, sample_width = wav.channels, wav.rate, wav.sample_width
+            frames = wav.frames
+        else:
+            channels, rate = CHANNELS, RATE
+            sample_width = self.audio_interface.get_sample_size(FORMAT)
+            frames = memoryview(audio_stream_data).cast("B")
+
+        stream = None
         try:
-            with wave.open(str(temp_playback_file), 'wb') as wf:
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(self.audio_interface.get_sample_size(FORMAT))
-                wf.setframerate(RATE)
-                wf.writeframes(audio_stream_data)
-
-            print("📢 Playing agent response...")
-            wf = wave.open(str(temp_playback_file), 'rb')
-            stream = self.audio_interface.open(format=self.audio_interface.get_format_from_width(wf.getsampwidth()),
-                                               channels=wf.getnchannels(),
-                                               rate=wf.getframerate(),
-                                               output=True)
-            data = wf.readframes(CHUNK)
-            while data:
-                stream.write(data)
-                data = wf.readframes(CHUNK)
-
-            stream.stop_stream()
-            stream.close()
-            wf.close()
+            with self.tracer.span("playback", bytes=len(frames)):
+                print("📢 Playing agent response...")
+                stream = self.audio_interface.open(format=self.audio_interface.get_format_from_width(sample_width),
+                                                   channels=channels,
+                                                   rate=rate,
+                                                   output=True)
+                for data in iter_frame_slices(frames, CHUNK * channels * sample_width):
+                    stream.write(data)
         except Exception as e:
             print(f"Error playing audio: {e}")
         finally:
-            # Clean up temp file
+            if stream is not None:
+                stream.stop_stream()
+                stream.close()
+
+    def play_pcm_stream(self, chunks, rate: int = TTS_PCM_RATE,
+                        sample_width: int = TTS_PCM_SAMPLE_WIDTH,
+                        started: float | None = None) -> float | None:
+        """
+        Plays mono PCM from an iterable of byte chunks while it is still arriving.
+
+        A background thread copies chunks into a bounded ring buffer and this
+        thread feeds the output stream from it, so playback begins with the
+        first chunk. Returns the time to first audio in seconds, measured from
+        `started` (a time.monotonic() value, defaulting to now).
+        """
+        started = time.monotonic() if started is None else started
+        capacity = max(CHUNK * sample_width, int(
+            self.config.playback_buffer_seconds * rate * sample_width))
+        ring = AudioRingBuffer(capacity)
+        download_errors = []
+
+        def download():
             try:
-                temp_playback_file.unlink(missing_ok=True)
-            except Exception:
-                pass
+                for chunk in chunks:
+                    if not ring.write(chunk):
+                        break
+            except Exception as e:
+                download_errors.append(e)
+            finally:
+                ring.finish()
+
+        downloader = threading.Thread(
+            target=download, name="tts-download", daemon=True)
+        downloader.start()
+
+        stream = None
+        time_to_first_audio = None
+        with self.tracer.span("playback", streamed=True) as span:
+            try:
+                while True:
+                    data = ring.read(CHUNK * sample_width, align=sample_width)
+                    if not data:
+                        break
+                    if stream is None:
+                        time_to_first_audio = time.monotonic() - started
+                        self.last_time_to_first_audio = time_to_first_audio
+                        print(f"📢 Playing agent response... (first audio after {time_to_first_audio * 1000:.0f} ms)")
+                        stream = self.audio_interface.open(format=self.audio_interface.get_format_from_width(sample_width),
+                                                           channels=1,
+                                                           rate=rate,
+                                                           output=True)
+                    stream.write(data)
+                    span.add("bytes", len(data))
+            finally:
+                ring.close()
+                downloader.join()
+                if stream is not None:
+                    stream.stop_stream()
+                    stream.close()
+
+        if download_errors:
+            raise download_errors[0]
+        return time_to_first_audio
 
-    def conduct_realtime_conversation_turn(self, prompt_message: str = "Listening...") -> str | None:
+    def _speak_streaming(self, text: str):
+        """Synthesizes text as raw PCM and plays it while it downloads."""
+        started = time.monotonic()
+        # Download and playback overlap, so this span includes the playback span
+        with self.tracer.span("tts", bytes_up=len(text.encode("utf-8")), streamed=True) as span, \
+                self.tts_engine.stream_speech(text, CHUNK * TTS_PCM_SAMPLE_WIDTH) as speech_chunks:
+
+            def counted_chunks():
+                for chunk in speech_chunks:
+                    span.add("bytes_down", len(chunk))
+                    yield chunk
+
+            time_to_first_audio = self.play_pcm_stream(counted_chunks(), started=started)
+            if time_to_first_audio is not None:
+                self.tracer.record("tts_first_audio", time_to_first_audio)
+
+    def conduct_realtime_conversation_turn(self, prompt_message: str = "Listening...",
+                                           context: str | None = None,
+                                           project: str | None = None) -> str | None:
         """
         Conducts a single turn of voice conversation:
         1. Records user's speech
@@ -100,105 +319,359 @@ class SpeechInterface:
         3. Gets AI response via OpenAI
         4. Converts response to speech and plays it
         5. Returns transcribed user input
+
+        With pipelined turns enabled, steps 3 and 4 are handed to a background
+        worker and the transcript is returned right after step 2, so the caller
+        can save the note (and start the next recording) while the reply plays.
+
+        Before step 3 the transcript is classified locally (context="project"
+        marks a reply to the project prompt); the intent policy decides whether
+        steps 3-4 run, run in the background, or are skipped for this turn.
+
+        With a spool worker, dictation (context None) is spooled before step 2
+        and transcribed by the worker, which also saves it as a note for
+        `project` (None: the scratchpad). The turn waits at most
+        SPOOL_WAIT_SECONDS; a capture not transcribed by then stays queued and
+        the turn returns None (see last_capture_status).
+
+        With LONG_DICTATION, dictation is instead transcribed segment by
+        segment while it is recorded (see dictation.SegmentTranscriber), and
+        spooled only if a segment could not be transcribed.
         """
-        if not self.client:
-            print("OpenAI client not available. Cannot conduct voice turn.")
+        if not self.stt_available:
+            print("Speech-to-text not available. Cannot conduct voice turn.")
             # Fallback to text input for basic testing
             return input(f"🎤 (Fallback Text Input) {prompt_message}: ")
 
         print(prompt_message)
 
-        # 1. Record User Audio
-        p_stream = self.audio_interface.open(format=FORMAT, channels=CHANNELS,
-                                             rate=RATE, input=True,
-                                             frames_per_buffer=CHUNK)
-        user_audio_data = self._record_audio_chunk(p_stream)
-        p_stream.stop_stream()
-        p_stream.close()
+        self.tracer.start_turn()
+
+        # 1. Record User Audio; segments are encoded for upload as they close
+        dictation = self.config.long_dictation and context is None
+        encoding = []
+        if dictation:
+            # ...and in a dictation, transcribed right away too
+            transcriber = SegmentTranscriber(self.encoder, self.transcribe,
+                                             self._get_dictation_executor(),
+                                             self.config.dictation_overlap_duration)
+            on_segment = transcriber.add
+        else:
+            on_segment = lambda segment: encoding.append(self.encoder.submit(segment))  # noqa: E731
+        with self.tracer.span("record") as span:
+            p_stream = self.audio_interface.open(format=FORMAT, channels=CHANNELS,
+                                                 rate=RATE, input=True,
+                                                 frames_per_buffer=CHUNK)
+            recorded_segments = self._record_speech_segments(
+                p_stream, on_segment=on_segment, dictation=dictation)
+            p_stream.stop_stream()
+            p_stream.close()
+            span.set("segments", len(recorded_segments))
+            span.set("bytes", sum(len(segment) for segment in recorded_segments))
 
-        if not user_audio_data:
+        if not recorded_segments:
             print("No audio recorded.")
             return None
 
-        try:
-            # 2. Transcribe user's audio (STT)
-            temp_stt_input_file = self.temp_dir / "temp_stt_input.wav"
-            with wave.open(str(temp_stt_input_file), 'wb') as wf:
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(self.audio_interface.get_sample_size(FORMAT))
-                wf.setframerate(RATE)
-                wf.writeframes(user_audio_data)
-
-            with open(temp_stt_input_file, "rb") as audio_file_for_stt:
-                transcription_response = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file_for_stt
-                )
-            user_transcribed_text = transcription_response.text
-            print(f"👤 You said (transcribed): {user_transcribed_text}")
-
-            if not user_transcribed_text:
-                self.play_audio_stream(self._generate_error_speech(
-                    "Sorry, I didn't catch that."))
+        # 2. Transcribe user's audio (STT)
+        self.last_capture_status = None
+        if dictation:
+            user_transcribed_text = self._transcribe_dictation(transcriber, project)
+            if user_transcribed_text is None:
                 return None
+            return self._route_and_respond(user_transcribed_text, context, project)
 
-            # 3. Get LLM response based on transcription
-            chat_completion_response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system",
-                        "content": "You are a helpful voice assistant for capturing ideas."},
-                    {"role": "user", "content": user_transcribed_text}
-                ]
-            )
-            agent_text_response = chat_completion_response.choices[0].message.content
-            print(f"🧠 Agent thinks: {agent_text_response}")
+        # Usually only the last segment is still being encoded by now
+        with self.tracer.span("encode") as span:
+            user_audio_segments = [future.result() for future in encoding]
+            span.set("bytes_in", sum(upload.pcm_bytes for upload in user_audio_segments))
+            span.set("bytes_out", sum(len(upload) for upload in user_audio_segments))
 
-            # 4. Synthesize agent's text response to speech (TTS)
-            tts_response = self.client.audio.speech.create(
-                model="tts-1",
-                voice="alloy",
-                input=agent_text_response,
-                response_format="wav"
-            )
-            agent_audio_data = tts_response.content
+        if self.spool_worker is not None and context is None:
+            user_transcribed_text = self._transcribe_spooled(user_audio_segments, project)
+        else:
+            user_transcribed_text = self._transcribe_turn(user_audio_segments)
+        if user_transcribed_text is None:
+            return None
+        return self._route_and_respond(user_transcribed_text, context, project)
 
-            # 5. Play Agent's Voice Response
-            self.play_audio_stream(agent_audio_data)
+    def _route_and_respond(self, user_transcribed_text: str, context: str | None,
+                           project: str | None = None) -> str:
+        """Steps 3-4 of a turn: classifies the transcript and replies if the policy says so."""
+        # Commands and dictated notes usually need no LLM reply
+        report = self.intent_router.route(user_transcribed_text, context)
+        self.last_turn_report = report
+        if report.action != "respond":
+            print(f"⚡ Local routing, {report.summary()}")
+
+        # A local STT engine can be used without any chat engine
+        if not self.chat_available:
+            return user_transcribed_text
+
+        # 3-4. Reply to the user, in the background when pipelining
+        if report.action == "defer" or (report.action == "respond" and self.config.pipelined_turns):
+            self._submit_response(user_transcribed_text, project)
+        elif report.action == "respond":
+            self._respond(user_transcribed_text, project)
+
+        return user_transcribed_text
+
+    def _transcribe_turn(self, user_audio_segments: list[EncodedAudio]) -> str | None:
+        """Transcribes a turn's segments; on failure speaks the error and returns None."""
+        try:
+            # One request per segment
+            segment_texts = [self.transcribe(segment)
+                             for segment in user_audio_segments]
+        except Exception as e:
+            self._report_transcription_error(e)
+            return None
+        user_transcribed_text = " ".join(
+            text.strip() for text in segment_texts if text and text.strip())
+        return self._checked_transcript(user_transcribed_text)
 
-            # Cleanup
+    def _transcribe_dictation(self, transcriber: SegmentTranscriber,
+                              project: str | None) -> str | None:
+        """
+        Collects a dictation's stitched transcript, most of which was uploaded
+        while it was recorded. If a segment failed, the recording is spooled
+        (when there is a spool worker) so the note is saved later.
+        """
+        with self.tracer.span("stt_wait", segments=len(transcriber)):
             try:
-                temp_stt_input_file.unlink(missing_ok=True)
-            except Exception:
-                pass
+                user_transcribed_text = transcriber.result()
+            except Exception as e:
+                error = e
+            else:
+                return self._checked_transcript(user_transcribed_text)
+        if self.spool_worker is None:
+            self._report_transcription_error(error)
+            return None
+        print(f"Transcribing the dictation failed ({error}); spooling it.")
+        return self._transcribe_spooled(transcriber.uploads(), project,
+                                        segment_overlap=transcriber.overlap_seconds)
 
-            return user_transcribed_text
+    def _checked_transcript(self, user_transcribed_text: str) -> str | None:
+        """Echoes a transcript; if nothing was said, says so and returns None."""
+        print(f"👤 You said (transcribed): {user_transcribed_text}")
+        if not user_transcribed_text:
+            self.play_audio_stream(self._generate_error_speech(
+                NOT_CAUGHT_MESSAGE))
+            return None
+        return user_transcribed_text
+
+    def _report_transcription_error(self, error: Exception):
+        if isinstance(error, (openai.APIError, ApiUnavailableError)):
+            print(f"OpenAI API Error: {error}")
+            self.play_audio_stream(self._generate_error_speech(
+                API_ERROR_MESSAGE))
+        else:
+            print(f"An unexpected error occurred in voice interaction: {error}")
+            self.play_audio_stream(self._generate_error_speech(
+                UNEXPECTED_ERROR_MESSAGE))
+
+    def _transcribe_spooled(self, user_audio_segments: list[EncodedAudio],
+                            project: str | None, segment_overlap: float = 0.0) -> str | None:
+        """
+        Spools a dictation turn and waits for the worker's transcript. Returns
+        None, after saying why, if the capture was empty, failed or is still queued.
+        """
+        try:
+            ticket = self.spool_worker.submit(user_audio_segments, project,
+                                              segment_overlap=segment_overlap)
+        except OSError as e:
+            print(f"Could not spool the recording ({e}); transcribing it directly.")
+            return self._transcribe_turn(user_audio_segments)
+        status = ticket.wait(self.config.spool_wait_seconds)
+        self.last_capture_status = status
+        if status == CAPTURE_QUEUED:
+            print("⏳ Transcription is unavailable or slow; the recording is queued and will be saved as a note later.")
+            self.play_audio_stream(self._generate_error_speech(QUEUED_MESSAGE))
+            return None
+        if status == CAPTURE_FAILED:
+            self.play_audio_stream(self._generate_error_speech(API_ERROR_MESSAGE))
+            return None
+        print(f"👤 You said (transcribed): {ticket.text}")
+        if status == CAPTURE_EMPTY:
+            self.play_audio_stream(self._generate_error_speech(NOT_CAUGHT_MESSAGE))
+            return None
+        return ticket.text
+
+    def transcribe(self, audio_data: bytes | EncodedAudio) -> str:
+        """
+        Transcribes a recording with the STT engine, from memory. Raw 16 kHz
+        mono 16-bit PCM is trimmed and encoded first (see UPLOAD_FORMAT).
+        """
+        if not isinstance(audio_data, EncodedAudio):
+            audio_data = self.encoder.encode(audio_data)
+        with self.tracer.span("stt", bytes_up=len(audio_data), engine=self.stt_engine.name):
+            return self.stt_engine.transcribe(audio_data)
+
+    def transcribe_file(self, path: Path) -> str:
+        """Transcribes an audio file (e.g. a recorded voice memo) as it is."""
+        with self.tracer.span("stt", bytes_up=path.stat().st_size, engine=self.stt_engine.name):
+            return self.stt_engine.transcribe_file(path)
+
+    def generate_reply(self, user_text: str, project: str | None = None,
+                       history: ConversationHistory | None = None) -> str:
+        """
+        Asks the chat model for a reply to the user's text, with the recent
+        exchanges of `history` (default: this interface's) and the latest
+        notes of `project` (None: the scratchpad) that fit the token budget.
+        The exchange is then added to the history.
+        """
+        history = self.history if history is None else history
+        prompt = self.context_builder.build(user_text, project, history)
+        with self.tracer.span("chat", prompt_tokens=prompt.tokens, budget_tokens=prompt.budget,
+                              notes=prompt.entries, turns=prompt.turns) as span:
+            span.set("bytes_up", sum(len(m["content"].encode("utf-8")) for m in prompt.messages))
+            reply = self.chat_engine.chat(prompt.messages)
+        history.add(user_text, reply)
+        return reply
+
+    def _respond(self, user_text: str, project: str | None = None):
+        """Gets the LLM reply for the user's text, synthesizes it and plays it."""
+        try:
+            # 3. Get LLM response based on transcription
+            agent_text_response = self.generate_reply(user_text, project)
+            print(f"🧠 Agent thinks: {agent_text_response}")
 
-        except openai.APIError as e:
+            # 4-5. Synthesize the reply and play it
+            self._speak(agent_text_response)
+
+        except (openai.APIError, ApiUnavailableError) as e:
             print(f"OpenAI API Error: {e}")
             self.play_audio_stream(self._generate_error_speech(
-                "I encountered an API error."))
+                API_ERROR_MESSAGE))
         except Exception as e:
             print(f"An unexpected error occurred in voice interaction: {e}")
             self.play_audio_stream(self._generate_error_speech(
-                "An unexpected error occurred."))
+                UNEXPECTED_ERROR_MESSAGE))
+
+    def _speak(self, text: str):
+        """Synthesizes text to speech (TTS) and plays it."""
+        # Play while the audio is still downloading
+        if self.config.streaming_tts:
+            self._speak_streaming(text)
+            return
 
-        return None
+        self.play_audio_stream(self.synthesize_speech(text))
 
-    def _generate_error_speech(self, error_text: str) -> bytes | None:
-        """Generates speech for a given error text if client is available."""
-        if not self.client:
-            return None
+    def synthesize_speech(self, text: str) -> bytes:
+        """Synthesizes text to a complete WAV file."""
+        with self.tracer.span("tts", bytes_up=len(text.encode("utf-8"))):
+            return self.tts_engine.synthesize(text)
+
+    def say(self, text: str):
+        """Speaks arbitrary text to the user; failures are reported, not raised."""
+        if not self.tts_available or not text:
+            return
         try:
-            response = self.client.audio.speech.create(
-                model="tts-1", voice="alloy", input=error_text, response_format="wav"
-            )
-            return response.content
+            self._speak(text)
         except Exception as e:
-            print(f"Failed to generate error speech: {e}")
+            print(f"Failed to speak: {e}")
+
+    def _get_dictation_executor(self) -> ThreadPoolExecutor:
+        if self._dictation_executor is None:
+            self._dictation_executor = ThreadPoolExecutor(
+                max_workers=max(1, self.config.dictation_parallel_uploads),
+                thread_name_prefix="dictation-upload")
+        return self._dictation_executor
+
+    def _submit_response(self, user_text: str, project: str | None = None) -> Future:
+        """Queues the chat/TTS reply on the background response worker."""
+        if self._response_executor is None:
+            self._response_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="agent-response")
+        # Run in a copy of this context so the reply's spans keep the turn
+        future = self._response_executor.submit(
+            contextvars.copy_context().run, self._respond, user_text, project)
+        self._pending_responses = [
+            f for f in self._pending_responses if not f.done()]
+        self._pending_responses.append(future)
+        return future
+
+    def wait_for_pending_responses(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until all queued background replies have been played.
+        Returns False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in list(self._pending_responses):
+            remaining = None if deadline is None else max(
+                0.0, deadline - time.monotonic())
+            try:
+                future.result(timeout=remaining)
+            except Exception:
+                return False
+        self._pending_responses = []
+        return True
+
+    def close(self):
+        """Lets any queued replies finish and stops the background workers."""
+        if self._response_executor is not None:
+            self.wait_for_pending_responses()
+            self._response_executor.shutdown(wait=True)
+            self._response_executor = None
+        if self._dictation_executor is not None:
+            self._dictation_executor.shutdown(wait=True)
+            self._dictation_executor = None
+        self.encoder.close()
+
+    def _generate_error_speech(self, error_text: str) -> bytes | None:
+        """
+        Returns the spoken error from the TTS cache. On a miss it is
+        synthesized with a single attempt, and not at all while the speech
+        endpoint's circuit is open, so failures never multiply TTS calls.
+        """
+        if self.tts_engine is self.openai_engine and not self.api.available("tts"):
+            if self.tts_cache is None:
+                return None
+            return self.tts_cache.get(TTSCache.make_key(
+                self.tts_engine.tts_model, self.tts_engine.tts_voice, "wav", error_text))
+        return self.synthesize_cached_speech(error_text, max_retries=0)
+
+    def synthesize_cached_speech(self, text: str, max_retries: int | None = None) -> bytes | None:
+        """
+        Returns WAV audio for a fixed phrase, served from the TTS cache when
+        possible so repeated prompts and errors cost no API call.
+        """
+        if not self.tts_available:
+            return None
+
+        def synthesize() -> bytes | None:
+            try:
+                with self.tracer.span("tts", bytes_up=len(text.encode("utf-8")), cached_phrase=True):
+                    return self.tts_engine.synthesize(text, max_retries=max_retries)
+            except Exception as e:
+                print(f"Failed to generate speech: {e}")
+                return None
+
+        if self.tts_cache is None:
+            return synthesize()
+        return self.tts_cache.get_or_create(self.tts_engine.tts_model, self.tts_engine.tts_voice,
+                                            "wav", text, synthesize)
+
+    def speak(self, text: str):
+        """Speaks a fixed phrase through the TTS cache, if speech is available."""
+        audio_data = self.synthesize_cached_speech(text)
+        if audio_data:
+            self.play_audio_stream(audio_data)
+
+    def prewarm_speech_cache(self, phrases=()) -> threading.Thread | None:
+        """
+        Fills the TTS cache with the error phrases and the given fixed prompts
+        in a background thread, so they are ready before they are needed.
+        """
+        if not self.tts_available or self.tts_cache is None:
             return None
+        to_warm = list(dict.fromkeys([*ERROR_MESSAGES, *phrases]))
+        thread = threading.Thread(
+            target=lambda: [self.synthesize_cached_speech(p) for p in to_warm],
+            name="tts-prewarm", daemon=True)
+        thread.start()
+        return thread
 
     def __del__(self):
         # Clean up PyAudio
-        if hasattr(self, 'audio_interface') and self.audio_interface:
-            self.audio_interface.terminate()
+        if getattr(self, '_audio_interface', None):
+            self._audio_interface.terminate()
@@ -0,0 +1,234 @@
+import contextvars
+import json
+import math
+import threading
+import time
+from pathlib import Path
+
+# Turn and span of the code currently running; copied into background work
+# with contextvars.copy_context() so replies are attributed to their turn
+_current_turn: contextvars.ContextVar[int | None] = contextvars.ContextVar("trace_turn", default=None)
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("trace_span", default=None)
+
+PERCENTILES = (50, 95, 99)
+STAT_KEYS = frozenset(["count", "max_ms", *(f"p{p}_ms" for p in PERCENTILES)])
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory latency histogram with log-spaced buckets, so percentiles
+    are accurate to within a few percent however many samples are added.
+    """
+
+    GROWTH = 1.04
+    _LOG_GROWTH = math.log(GROWTH)
+
+    def __init__(self):
+        self._buckets: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value_ms: float):
+        bucket = math.floor(math.log(max(value_ms, 0.001)) / self._LOG_GROWTH)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, p: float) -> float:
+        """Returns the p-th percentile in milliseconds (0.0 if empty)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                # Upper edge of the bucket, but never beyond the largest sample
+                return min(self.GROWTH ** (bucket + 1), self.max)
+        return self.max
+
+
+class Span:
+    """One timed stage; attributes are written with the span when it ends."""
+
+    __slots__ = ("name", "turn", "attrs", "start", "wall_start", "duration")
+
+    def __init__(self, name: str, turn: int | None, attrs: dict):
+        self.name = name
+        self.turn = turn
+        self.attrs = attrs
+        self.start = 0.0
+        self.wall_start = 0.0
+        self.duration = 0.0
+
+    def set(self, key: str, value):
+        self.attrs[key] = value
+
+    def add(self, key: str, amount=1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+
+class _NullSpan:
+    """Stands in for a span when tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value):
+        pass
+
+    def add(self, key: str, amount=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        self.span.wall_start = time.time()
+        self.span.start = time.monotonic()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration = time.monotonic() - self.span.start
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            self.span.attrs["error"] = exc_type.__name__
+        self.tracer._finish(self.span)
+        return False
+
+
+class Tracer:
+    """
+    Records per-stage spans (monotonic durations plus numeric attributes
+    such as bytes or retries) into per-stage latency histograms and,
+    optionally, a JSONL trace file with one line per span.
+
+    When disabled, span() returns a shared no-op object, so instrumented
+    code pays only a method call.
+    """
+
+    def __init__(self, enabled: bool = False, trace_path: Path | None = None):
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._totals: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._turns = 0
+
+    @classmethod
+    def from_config(cls, config) -> "Tracer":
+        return cls(enabled=config.tracing_enabled,
+                   trace_path=config.trace_file if config.tracing_enabled else None)
+
+    def start_turn(self) -> int | None:
+        """Starts a new conversation turn; later spans in this context belong to it."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._turns += 1
+            turn = self._turns
+        _current_turn.set(turn)
+        return turn
+
+    def span(self, name: str, **attrs):
+        """Context manager timing one stage: `with tracer.span("stt") as span: ...`"""
+        if not self.enabled:
+            return NULL_SPAN
+        return _SpanContext(self, Span(name, _current_turn.get(), attrs))
+
+    def current_span(self):
+        """The innermost open span of this context (a no-op span if none)."""
+        return _current_span.get() or NULL_SPAN
+
+    def record(self, name: str, duration: float, **attrs):
+        """Records a stage that was timed elsewhere (duration in seconds)."""
+        if not self.enabled:
+            return
+        span = Span(name, _current_turn.get(), attrs)
+        span.wall_start = time.time() - duration
+        span.duration = duration
+        self._finish(span)
+
+    def _finish(self, span: Span):
+        duration_ms = span.duration * 1000
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = LatencyHistogram()
+            histogram.add(duration_ms)
+            totals = self._totals.setdefault(span.name, {})
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[key] = totals.get(key, 0) + value
+            if self.trace_path is not None:
+                self._write(span, duration_ms)
+
+    def _write(self, span: Span, duration_ms: float):
+        """Appends one JSONL record; the caller holds the lock."""
+        try:
+            if self._file is None:
+                self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.trace_path, "a", encoding="utf-8")
+            record = {"ts": round(span.wall_start, 6), "turn": span.turn, "span": span.name,
+                      "duration_ms": round(duration_ms, 3), **span.attrs}
+            self._file.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            print(f"Failed to write trace: {e}")
+            self.trace_path = None
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Per-stage count, p50/p95/p99/max in ms and totals of numeric attributes."""
+        with self._lock:
+            result = {}
+            for name, histogram in self._histograms.items():
+                stats = {"count": histogram.count}
+                for p in PERCENTILES:
+                    stats[f"p{p}_ms"] = histogram.percentile(p)
+                stats["max_ms"] = histogram.max
+                stats.update(self._totals.get(name, {}))
+                result[name] = stats
+            return result
+
+    def format_summary(self) -> str:
+        lines = [f"{'stage':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, stats in sorted(self.summary().items()):
+            lines.append(f"{name:<14}{stats['count']:>7}{stats['p50_ms']:>10.1f}"
+                         f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+            extras = {k: v for k, v in stats.items() if k not in STAT_KEYS}
+            if extras:
+                lines.append("  " + ", ".join(f"{k}={v:g}" for k, v in sorted(extras.items())))
+        return "\n".join(lines)
+
+    def dump_summary(self):
+        """Prints the latency table and flushes the trace file."""
+        if not self.enabled or not self._histograms:
+            return
+        print("⏱️ Latency by stage:")
+        print(self.format_summary())
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
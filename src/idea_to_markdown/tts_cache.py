@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+
+class TTSCache:
+    """
+    Content-addressed cache for synthesized speech.
+
+    Entries are keyed by a hash of (model, voice, format, text) and kept in
+    two tiers: a small in-memory LRU and a larger on-disk directory. Both
+    tiers evict least recently used entries once they exceed their size limit.
+    """
+
+    def __init__(self, cache_dir: Path | None, memory_limit_bytes: int = 8 * 1024 * 1024,
+                 disk_limit_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.memory_limit_bytes = memory_limit_bytes
+        self.disk_limit_bytes = disk_limit_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._disk_bytes = 0
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(
+                p.stat().st_size for p in self.cache_dir.glob("*.audio"))
+
+    @staticmethod
+    def make_key(model: str, voice: str, response_format: str, text: str) -> str:
+        """Returns the content address for a synthesis request."""
+        payload = json.dumps([model, voice, response_format, text],
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.audio"
+
+    def get(self, key: str) -> bytes | None:
+        """Looks up audio by key, promoting disk hits into memory."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store_in_memory(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Stores audio in both tiers."""
+        if not data:
+            return
+        with self._lock:
+            self._store_in_memory(key, data)
+        self._write_disk(key, data)
+
+    def get_or_create(self, model: str, voice: str, response_format: str, text: str,
+                      synthesize: Callable[[], bytes | None]) -> bytes | None:
+        """Returns cached audio for the request, synthesizing it on a miss."""
+        key = self.make_key(model, voice, response_format, text)
+        data = self.get(key)
+        if data is None:
+            data = synthesize()
+            if data:
+                self.put(key, data)
+        return data
+
+    def _store_in_memory(self, key: str, data: bytes):
+        if len(data) > self.memory_limit_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_limit_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _read_disk(self, key: str) -> bytes | None:
+        if self.cache_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # Mark as recently used for eviction
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, data: bytes):
+        if self.cache_dir is None or len(data) > self.disk_limit_bytes:
+            return
+        path = self._disk_path(key)
+        if path.exists():
+            return
+        # Write under a temporary name so readers never see partial audio
+        temp_path = path.with_suffix(f".tmp{threading.get_ident()}")
+        try:
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Failed to write TTS cache entry: {e}")
+            temp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._disk_bytes += len(data)
+            if self._disk_bytes > self.disk_limit_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Removes least recently used files until the disk tier fits its limit."""
+        entries = []
+        for path in self.cache_dir.glob("*.audio"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.disk_limit_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._disk_bytes = total
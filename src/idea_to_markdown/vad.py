@@ -0,0 +1,182 @@
+import math
+from collections import deque
+from typing import Callable
+
+import numpy as np
+
+
+def frame_rms(frame: bytes) -> float:
+    """Returns the RMS energy of a buffer of 16-bit mono PCM samples."""
+    samples = np.frombuffer(frame, dtype=np.int16)
+    if samples.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+
+
+class VADResult:
+    """Outcome of one voice-activity-detected recording."""
+
+    def __init__(self, segments: list[bytes], speech_seconds: float, dead_air_seconds: float):
+        self.segments = segments
+        self.speech_seconds = speech_seconds
+        self.dead_air_seconds = dead_air_seconds
+
+    @property
+    def audio(self) -> bytes:
+        """All speech segments joined back together."""
+        return b"".join(self.segments)
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based voice activity detector for 16-bit mono PCM.
+
+    Frames are fed one at a time. Recording starts once a few consecutive
+    frames are above the energy threshold, stops after a stretch of trailing
+    silence, and long monologues are split into segments (preferably at a
+    quiet frame) so each one stays a manageable upload. With an overlap, each
+    split-off segment's last overlap_duration seconds are repeated at the
+    start of the next one, so a word cut at the split is whole in one of them.
+    """
+
+    def __init__(self, rate: int = 16000, frame_size: int = 1024,
+                 energy_threshold: float = 500.0, silence_duration: float = 1.0,
+                 max_segment_duration: float = 30.0, no_speech_timeout: float = 5.0,
+                 max_duration: float = 300.0, pre_roll_duration: float = 0.3,
+                 hangover_duration: float = 0.2, min_speech_duration: float = 0.1,
+                 overlap_duration: float = 0.0):
+        self.frame_seconds = frame_size / rate
+        # Called with each segment as soon as it is closed, e.g. to start
+        # encoding it while the rest of the utterance is still being recorded
+        self.on_segment: Callable[[bytes], None] | None = None
+        self.energy_threshold = energy_threshold
+        self.silence_frames = self._to_frames(silence_duration)
+        self.max_segment_frames = self._to_frames(max_segment_duration)
+        self.no_speech_frames = self._to_frames(no_speech_timeout)
+        self.max_frames = self._to_frames(max_duration)
+        self.pre_roll_frames = self._to_frames(pre_roll_duration)
+        self.hangover_frames = min(self._to_frames(hangover_duration), self.silence_frames)
+        self.min_speech_frames = self._to_frames(min_speech_duration)
+        # At most half a segment, so every split still makes progress
+        self.overlap_frames = min(math.ceil(overlap_duration / self.frame_seconds),
+                                  self.max_segment_frames // 2)
+        # Segment cuts look this far back for a quiet frame before cutting hard
+        self.cut_search_frames = self._to_frames(1.0)
+        self.reset()
+
+    def _to_frames(self, seconds: float) -> int:
+        return max(1, math.ceil(seconds / self.frame_seconds))
+
+    def reset(self):
+        """Clears all state so the detector can be reused for a new turn."""
+        self.started = False
+        self.finished = False
+        self._pre_roll: deque[bytes] = deque(maxlen=self.pre_roll_frames)
+        self._voiced_run = 0
+        self._current: list[bytes] = []
+        self._trailing_silence = 0
+        self._last_quiet = -1
+        self._segments: list[bytes] = []
+        self._total_frames = 0
+        self._dead_frames = 0
+        self._speech_frames = 0
+
+    def is_speech(self, frame: bytes) -> bool:
+        """Returns True if the frame's energy is above the threshold."""
+        return frame_rms(frame) >= self.energy_threshold
+
+    def feed(self, frame: bytes) -> bool:
+        """
+        Processes one frame of audio.
+        Returns True once recording should stop.
+        """
+        if self.finished:
+            return True
+        self._total_frames += 1
+        speech = self.is_speech(frame)
+
+        if not self.started:
+            self._voiced_run = self._voiced_run + 1 if speech else 0
+            if len(self._pre_roll) == self._pre_roll.maxlen:
+                self._dead_frames += 1  # Oldest pre-roll frame falls off
+            self._pre_roll.append(frame)
+            if self._voiced_run >= self.min_speech_frames:
+                self.started = True
+                self._current = list(self._pre_roll)
+                self._pre_roll.clear()
+            elif self._total_frames >= self.no_speech_frames:
+                self._dead_frames += len(self._pre_roll)
+                self._pre_roll.clear()
+                self.finished = True
+            return self.finished
+
+        self._current.append(frame)
+        if speech:
+            self._trailing_silence = 0
+        else:
+            self._trailing_silence += 1
+            self._last_quiet = len(self._current) - 1
+
+        if self._trailing_silence >= self.silence_frames:
+            # Keep a short tail so words aren't clipped, drop the dead air
+            drop = self._trailing_silence - self.hangover_frames
+            if drop > 0:
+                del self._current[-drop:]
+                self._dead_frames += drop
+            return self.finish()
+
+        if len(self._current) >= self.max_segment_frames:
+            self._split_segment()
+
+        if self._total_frames >= self.max_frames:
+            return self.finish()
+        return False
+
+    def _split_segment(self):
+        """Closes the current segment, cutting at a recent quiet frame if possible."""
+        cut = len(self._current)
+        if self._last_quiet >= len(self._current) - self.cut_search_frames:
+            cut = self._last_quiet + 1
+        closed = self._current[:cut]
+        self._close_segment(closed)
+        overlap = min(self.overlap_frames, len(closed) // 2)
+        carried = closed[len(closed) - overlap:]
+        self._current = carried + self._current[cut:]
+        # Carried frames are counted again when the next segment closes
+        self._speech_frames -= len(carried)
+        self._last_quiet = -1
+
+    def _close_segment(self, frames: list[bytes]):
+        if frames:
+            segment = b"".join(frames)
+            self._segments.append(segment)
+            self._speech_frames += len(frames)
+            if self.on_segment is not None:
+                self.on_segment(segment)
+
+    def finish(self) -> bool:
+        """Closes any open segment; used when the stream ends early."""
+        self._close_segment(self._current)
+        self._current = []
+        self.finished = True
+        return True
+
+    def result(self) -> VADResult:
+        """Returns the recorded segments and the amount of skipped silence."""
+        return VADResult(
+            segments=list(self._segments),
+            speech_seconds=self._speech_frames * self.frame_seconds,
+            dead_air_seconds=self._dead_frames * self.frame_seconds,
+        )
+
+
+def record_with_vad(stream, detector: VoiceActivityDetector, frame_size: int) -> VADResult:
+    """Reads frames from an audio input stream until the detector says stop."""
+    detector.reset()
+    try:
+        while not detector.feed(stream.read(frame_size, exception_on_overflow=False)):
+            pass
+    except KeyboardInterrupt:
+        print("Recording stopped by user.")
+        detector.finish()
+    return detector.result()
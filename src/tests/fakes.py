@@ -0,0 +1,320 @@
+"""
+Test doubles for the OpenAI HTTP API, the PyAudio device layer and the
+local Whisper model, so voice turns can be exercised without network
+access, audio hardware or model weights.
+"""
+import io
+import json
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def make_wav_bytes(duration: float = 0.1, rate: int = 24000) -> bytes:
+    """Builds a mono 16-bit WAV file of silence."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b"\x00\x00" * int(duration * rate))
+    return buffer.getvalue()
+
+
+def make_tone_pcm(seconds: float, rate: int = 16000, amplitude: int = 6000,
+                  frequency: float = 220.0) -> bytes:
+    """Builds 16-bit mono PCM of a sine tone, standing in for speech."""
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16).tobytes()
+
+
+def make_silence_pcm(seconds: float, rate: int = 16000) -> bytes:
+    """Builds 16-bit mono PCM of digital silence."""
+    return b"\x00\x00" * int(seconds * rate)
+
+
+class FakeOpenAIServer:
+    """
+    A local stand-in for the transcription, chat and speech endpoints.
+    Each endpoint sleeps for its configured latency before answering.
+    `transcript` may be a list: successive transcriptions return its items
+    in order and then keep repeating the last one.
+    `failures` maps an endpoint to how many requests it fails with a 500
+    (asking for a 10 ms retry delay) before it starts answering.
+    `upload_mbps` simulates a slow uplink: each request also waits as long as
+    sending its body at that many megabits per second would take.
+    """
+
+    def __init__(self, transcript: str | list[str] = "hello agent", reply: str = "Noted.",
+                 stt_latency: float = 0.0, chat_latency: float = 0.0,
+                 tts_latency: float = 0.0, speech_duration: float = 0.1,
+                 speech_chunk_size: int = 4800, speech_chunk_delay: float = 0.0,
+                 failures: dict[str, int] | None = None, upload_mbps: float | None = None):
+        self.transcripts = [transcript] if isinstance(transcript, str) else list(transcript)
+        self._transcript_index = 0
+        self.reply = reply
+        self.latency = {
+            "transcriptions": stt_latency,
+            "chat": chat_latency,
+            "speech": tts_latency,
+        }
+        self.speech_duration = speech_duration
+        self.speech_chunk_size = speech_chunk_size
+        self.speech_chunk_delay = speech_chunk_delay
+        self.failures = dict(failures or {})
+        self.upload_mbps = upload_mbps
+        self.requests: list[str] = []
+        self.uploads: list[bytes] = []
+        self._lock = threading.Lock()
+        self._httpd: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this,
+            # Nagle plus delayed ACKs add ~40 ms to every response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                server._handle(self, body)
+
+        class Server(ThreadingHTTPServer):
+            # Many pooled client connections may open at once
+            request_queue_size = 128
+
+        self._httpd = Server(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body: bytes):
+        path = handler.path
+        if path.endswith("/audio/transcriptions"):
+            endpoint = "transcriptions"
+            payload = None  # Picked once the request is known not to fail
+            content_type = "application/json"
+        elif path.endswith("/chat/completions"):
+            endpoint = "chat"
+            payload = json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "gpt-4o",
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": self.reply},
+                }],
+            }).encode()
+            content_type = "application/json"
+        elif path.endswith("/audio/speech"):
+            endpoint = "speech"
+            request = json.loads(body or b"{}")
+            if request.get("response_format") == "pcm":
+                payload = make_tone_pcm(self.speech_duration, rate=24000)
+                content_type = "audio/pcm"
+            else:
+                payload = make_wav_bytes(self.speech_duration)
+                content_type = "audio/wav"
+        else:
+            handler.send_response(404)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        with self._lock:
+            self.requests.append(endpoint)
+            failing = self.failures.get(endpoint, 0) > 0
+            if failing:
+                self.failures[endpoint] -= 1
+            elif endpoint == "transcriptions":
+                self.uploads.append(body)
+                text = self.transcripts[min(self._transcript_index, len(self.transcripts) - 1)]
+                self._transcript_index += 1
+                payload = json.dumps({"text": text}).encode()
+        if failing:
+            error = json.dumps({"error": {"message": "fake outage", "type": "server_error"}}).encode()
+            handler.send_response(500)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("retry-after-ms", "10")
+            handler.send_header("Content-Length", str(len(error)))
+            handler.end_headers()
+            handler.wfile.write(error)
+            return
+        if self.upload_mbps:
+            time.sleep(len(body) * 8 / (self.upload_mbps * 1e6))
+        time.sleep(self.latency[endpoint])
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        if endpoint == "speech" and self.speech_chunk_delay:
+            # Stream the audio in chunks, like a TTS service still synthesizing
+            handler.send_header("Transfer-Encoding", "chunked")
+            handler.end_headers()
+            for start in range(0, len(payload), self.speech_chunk_size):
+                chunk = payload[start:start + self.speech_chunk_size]
+                handler.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                handler.wfile.flush()
+                time.sleep(self.speech_chunk_delay)
+            handler.wfile.write(b"0\r\n\r\n")
+            return
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def make_client(self, max_retries: int = 0):
+        """Returns an openai.OpenAI client pointed at this server."""
+        import openai
+        return openai.OpenAI(api_key="sk-test", base_url=self.base_url,
+                             max_retries=max_retries)
+
+
+class FakeStream:
+    """
+    Mimics a PyAudio stream: serves canned input and records output.
+    With realtime=True, reads and writes take as long as the audio lasts.
+    """
+
+    def __init__(self, input_data: bytes = b"", output: bool = False, rate: int = 16000,
+                 realtime: bool = False, keep_output: bool = True):
+        self._input = input_data
+        self._pos = 0
+        self.output = output
+        self.rate = rate
+        self.realtime = realtime
+        self.keep_output = keep_output
+        self.written: list[bytes] = []
+        self.bytes_written = 0
+        self.closed = False
+
+    def _pace(self, num_bytes: int):
+        if self.realtime:
+            time.sleep(num_bytes / (2 * self.rate))
+
+    def read(self, num_frames: int, exception_on_overflow: bool = True) -> bytes:
+        size = num_frames * 2
+        chunk = self._input[self._pos:self._pos + size]
+        self._pos += size
+        self._pace(size)
+        # A real microphone never runs dry; pad with silence
+        return chunk + b"\x00" * (size - len(chunk))
+
+    def write(self, data) -> None:
+        self.bytes_written += len(data)
+        if self.keep_output:
+            self.written.append(bytes(data))
+        self._pace(len(data))
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakePyAudio:
+    """
+    Mimics pyaudio.PyAudio for 16-bit audio. Every input stream replays
+    input_data. keep_output=False only counts played bytes, so long runs
+    do not accumulate audio in memory.
+    """
+
+    def __init__(self, input_data: bytes = b"", realtime: bool = False, keep_output: bool = True):
+        self.input_data = input_data
+        self.realtime = realtime
+        self.keep_output = keep_output
+        self.streams: list[FakeStream] = []
+        self._closed_bytes = 0
+        self.terminated = False
+
+    def open(self, format=None, channels=1, rate=16000, input=False,
+             output=False, frames_per_buffer=1024, **kwargs) -> FakeStream:
+        stream = FakeStream(self.input_data if input else b"", output=output, rate=rate,
+                            realtime=self.realtime, keep_output=self.keep_output)
+        if not self.keep_output:
+            # Forget finished streams, remembering only what they played
+            self._closed_bytes += sum(s.bytes_written for s in self.streams if s.closed)
+            self.streams = [s for s in self.streams if not s.closed]
+        self.streams.append(stream)
+        return stream
+
+    def get_sample_size(self, format) -> int:
+        return 2
+
+    def get_format_from_width(self, width: int) -> int:
+        return 8
+
+    def terminate(self):
+        self.terminated = True
+
+    @property
+    def played_bytes(self) -> int:
+        return self._closed_bytes + sum(stream.bytes_written for stream in self.streams
+                                        if stream.output)
+
+
+class FakeWhisperModel:
+    """
+    Mimics faster_whisper.WhisperModel: transcribe() returns a lazy generator
+    of segments, like the real model, saying `text` for any audio that is
+    not silent. Records what it was given.
+    """
+
+    class Segment:
+        def __init__(self, text: str):
+            self.text = text
+
+    def __init__(self, text: str = "hello agent", latency: float = 0.0):
+        self.text = text
+        self.latency = latency
+        self.inputs: list = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio, **options):
+        self.inputs.append(audio)
+
+        def segments():
+            with self._lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            time.sleep(self.latency)
+            with self._lock:
+                self.in_flight -= 1
+            if isinstance(audio, np.ndarray) and not audio.any():
+                return
+            for word in self.text.split():
+                yield self.Segment(f" {word}")
+
+        return segments(), None
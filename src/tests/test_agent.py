@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.agent import Agent
+from idea_to_markdown.config import AppConfig
+from tests.fakes import FakeOpenAIServer, FakePyAudio, make_silence_pcm, make_tone_pcm
+
+SPOKEN_INPUT = make_silence_pcm(0.3) + make_tone_pcm(1.0)
+
+
+@pytest.fixture
+def test_config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    config.voice_recording_duration = 2
+    return config
+
+
+class TestAgentSession:
+    def test_scripted_session_saves_notes(self, test_config: AppConfig):
+        transcripts = ["Use garden planner.", "Plant tomatoes in May.",
+                       "Water the beans daily.", "Exit agent."]
+        audio = FakePyAudio(SPOKEN_INPUT, keep_output=False)
+        with FakeOpenAIServer(transcript=transcripts) as server:
+            agent = Agent(test_config, client=server.make_client(), audio_interface=audio)
+            agent.start_session()
+
+        assert agent.current_project == "garden planner"
+        assert not agent.running
+        assert server.requests.count("transcriptions") == 4
+        # Notes and commands are routed locally: no chat reply was requested
+        assert "chat" not in server.requests
+        assert agent.note_manager.count_entries("garden planner") == 3
+        latest = agent.note_manager.get_latest_entry("garden planner")
+        assert latest.content == "Water the beans daily."
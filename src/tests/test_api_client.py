@@ -0,0 +1,143 @@
+import random
+import threading
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.api_client import (ApiClient, ApiUnavailableError, CircuitBreaker,
+                                         backoff_delay)
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.speech_interface import API_ERROR_MESSAGE, SpeechInterface
+from idea_to_markdown.tracing import Tracer
+from tests.fakes import FakeOpenAIServer, FakePyAudio, make_silence_pcm, make_tone_pcm
+
+
+def chat_request(client):
+    return lambda timeout: client.chat.completions.create(
+        model="gpt-4o", messages=[{"role": "user", "content": "hi"}], timeout=timeout)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_probes_once(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+        clock.now = 10
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()  # only one probe at a time
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.times_opened == 2
+
+        clock.now = 20
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_backoff_is_jittered_and_capped():
+    rng = random.Random(7)
+    delays = [backoff_delay(attempt, 0.25, 2.0, rng) for attempt in range(10)]
+    assert all(0 <= d <= min(2.0, 0.25 * 2 ** a) for a, d in enumerate(delays))
+    assert len(set(delays)) == len(delays)
+
+
+class TestApiClient:
+    def test_transient_failures_are_retried(self):
+        tracer = Tracer(enabled=True)
+        api = ApiClient(max_retries=3, base_delay=0.001, tracer=tracer)
+        with FakeOpenAIServer(reply="hello", failures={"chat": 2}) as server:
+            with tracer.span("chat"):
+                completion = api.call("chat", chat_request(server.make_client()))
+
+        assert completion.choices[0].message.content == "hello"
+        assert server.requests.count("chat") == 3
+        assert tracer.summary()["chat"]["retries"] == 2
+
+    def test_open_circuit_stops_calling_the_endpoint(self):
+        api = ApiClient(max_retries=1, base_delay=0.001, breaker_failures=2)
+        with FakeOpenAIServer(failures={"chat": 100}) as server:
+            client = server.make_client()
+            for _ in range(2):
+                with pytest.raises(Exception) as error:
+                    api.call("chat", chat_request(client))
+                assert not isinstance(error.value, ApiUnavailableError)
+            with pytest.raises(ApiUnavailableError):
+                api.call("chat", chat_request(client))
+
+        # Two calls of two attempts each; the third never reached the server
+        assert server.requests.count("chat") == 4
+        assert not api.available("chat")
+        assert api.available("tts")
+
+    def test_errors_that_are_not_transient_are_not_retried(self):
+        api = ApiClient(breaker_failures=1)
+        attempts = []
+
+        def bad_request(timeout):
+            attempts.append(timeout)
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            api.call("stt", bad_request)
+        assert len(attempts) == 1
+        assert api.available("stt")
+
+    def test_concurrency_is_bounded(self):
+        api = ApiClient(max_concurrency=2, queue_timeout=0.05)
+        release = threading.Event()
+        started = threading.Barrier(3)
+
+        def slow_request(timeout):
+            started.wait()
+            release.wait()
+
+        workers = [threading.Thread(target=api.call, args=("chat", slow_request)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        started.wait()
+        try:
+            with pytest.raises(ApiUnavailableError, match="in flight"):
+                api.call("tts", lambda timeout: None)
+        finally:
+            release.set()
+            for worker in workers:
+                worker.join()
+        assert api.call("tts", lambda timeout: "ok") == "ok"
+
+
+class TestSpeechInterfaceOutage:
+    def test_outage_plays_cached_error_audio_without_new_calls(self, tmp_path: Path):
+        config = AppConfig(custom_base_dir=tmp_path)
+        config.voice_recording_duration = 1
+        config.api_max_retries = 0
+        config.api_breaker_failures = 1
+        audio = FakePyAudio(make_silence_pcm(0.2) + make_tone_pcm(0.5))
+        with FakeOpenAIServer(failures={"transcriptions": 100}) as server:
+            speech = SpeechInterface(config, client=server.make_client(), audio_interface=audio)
+            speech.prewarm_speech_cache().join(timeout=10)
+            speech_calls = server.requests.count("speech")
+
+            for _ in range(3):
+                assert speech.conduct_realtime_conversation_turn() is None
+
+        # The first turn opened the circuit; later turns never called Whisper
+        assert server.requests.count("transcriptions") == 1
+        # Each turn still spoke the error, always from the cache
+        assert server.requests.count("speech") == speech_calls
+        assert speech.tts_cache.get(speech.tts_cache.make_key("tts-1", "alloy", "wav", API_ERROR_MESSAGE))
+        assert audio.played_bytes > 0
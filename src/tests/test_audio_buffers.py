@@ -0,0 +1,115 @@
+import io
+import threading
+import wave
+
+import pytest
+
+from idea_to_markdown.audio_buffers import AudioRingBuffer, WavUpload, build_wav_header, iter_frame_slices, parse_wav
+from tests.fakes import make_tone_pcm, make_wav_bytes
+
+
+def wave_module_bytes(pcm: bytes, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class TestWavBuffers:
+    def test_header_matches_wave_module(self):
+        pcm = make_tone_pcm(0.25)
+        expected = wave_module_bytes(pcm)
+        assert build_wav_header(len(pcm), 1, 16000, 2) == expected[:44]
+
+    @pytest.mark.parametrize("read_size", [1, 7, 44, 4096, -1])
+    def test_upload_reads_header_then_frames(self, read_size: int):
+        pcm = make_tone_pcm(0.25)
+        upload = WavUpload(pcm, channels=1, rate=16000, sample_width=2)
+
+        chunks = []
+        while True:
+            chunk = upload.read(read_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        assert b"".join(chunks) == wave_module_bytes(pcm)
+        assert len(upload) == 44 + len(pcm)
+
+    def test_upload_can_be_rewound(self):
+        upload = WavUpload(make_tone_pcm(0.1), channels=1, rate=16000, sample_width=2)
+        first = upload.read()
+        upload.seek(0)
+        assert upload.read() == first
+        assert upload.seek(0, io.SEEK_END) == len(first)
+
+    def test_parse_wav_returns_frame_view(self):
+        wav_bytes = make_wav_bytes(duration=0.2, rate=24000)
+        wav = parse_wav(wav_bytes)
+
+        assert (wav.channels, wav.rate, wav.sample_width) == (1, 24000, 2)
+        assert isinstance(wav.frames, memoryview)
+        assert len(wav.frames) == int(0.2 * 24000) * 2
+
+    def test_parse_wav_clamps_streamed_size(self):
+        pcm = make_tone_pcm(0.1)
+        header = bytearray(build_wav_header(len(pcm), 1, 16000, 2))
+        header[40:44] = b"\xff\xff\xff\xff"
+        wav = parse_wav(bytes(header) + pcm)
+        assert bytes(wav.frames) == pcm
+
+    def test_parse_wav_rejects_raw_pcm(self):
+        assert parse_wav(make_tone_pcm(0.1)) is None
+
+    def test_iter_frame_slices(self):
+        frames = memoryview(bytes(range(10)))
+        assert [bytes(s) for s in iter_frame_slices(frames, 4)] == [
+            bytes([0, 1, 2, 3]), bytes([4, 5, 6, 7]), bytes([8, 9])]
+
+
+class TestAudioRingBuffer:
+    def test_round_trip_with_wraparound(self):
+        ring = AudioRingBuffer(8)
+        assert ring.write(b"abcdef")
+        assert ring.read(4) == b"abcd"
+        assert ring.write(b"ghijkl")
+        assert len(ring) == 8
+        ring.finish()
+        assert ring.read(100) == b"efghijkl"
+        assert ring.read(100) == b""
+
+    def test_reads_are_frame_aligned_until_finished(self):
+        ring = AudioRingBuffer(16)
+        ring.write(b"abc")
+        assert ring.read(16, align=2) == b"ab"
+        ring.finish()
+        assert ring.read(16, align=2) == b"c"
+
+    def test_writer_blocks_when_full(self):
+        ring = AudioRingBuffer(4)
+        payload = bytes(range(64))
+        received = []
+
+        writer = threading.Thread(target=lambda: (ring.write(payload), ring.finish()))
+        writer.start()
+        while True:
+            assert len(ring) <= 4
+            data = ring.read(3)
+            if not data:
+                break
+            received.append(data)
+        writer.join()
+        assert b"".join(received) == payload
+
+    def test_close_unblocks_writer(self):
+        ring = AudioRingBuffer(2)
+        results = []
+        writer = threading.Thread(target=lambda: results.append(ring.write(b"abcdef")))
+        writer.start()
+        ring.close()
+        writer.join(timeout=2)
+        assert results == [False]
+        assert ring.read(10) == b""
@@ -0,0 +1,182 @@
+import hashlib
+import io
+import struct
+
+import numpy as np
+import pytest
+
+from idea_to_markdown.audio_encoding import (UploadEncoder, _crc8, _crc16, encode_flac,
+                                             trim_silence)
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.speech_interface import SpeechInterface
+from tests.fakes import FakeOpenAIServer, FakePyAudio, make_silence_pcm, make_tone_pcm
+
+RATE = 16000
+
+
+class BitReader:
+    def __init__(self, data: bytes):
+        self.bits = "".join(f"{byte:08b}" for byte in data)
+        self.pos = 0
+
+    def read(self, n: int) -> int:
+        value = int(self.bits[self.pos:self.pos + n] or "0", 2)
+        self.pos += n
+        return value
+
+    def read_signed(self, n: int) -> int:
+        value = self.read(n)
+        return value - (1 << n) if value >> (n - 1) else value
+
+    def read_rice(self, k: int) -> int:
+        quotient = self.bits.index("1", self.pos) - self.pos
+        self.pos += quotient + 1
+        value = (quotient << k) | self.read(k)
+        return (value >> 1) ^ -(value & 1)
+
+
+def decode_flac(data: bytes) -> tuple[int, np.ndarray]:
+    """A reference decoder for the subset of FLAC encode_flac writes; checks every CRC."""
+    assert data[:4] == b"fLaC" and data[4] == 0x80
+    info = data[8:42]
+    packed = int.from_bytes(info[10:18], "big")
+    rate, bits_per_sample, total = packed >> 44, ((packed >> 36) & 0x1F) + 1, packed & (2 ** 36 - 1)
+    samples = []
+    pos = 42
+    while pos < len(data):
+        reader = BitReader(data[pos:])
+        assert reader.read(15) == 0x7FFC and reader.read(1) == 0
+        size_code, _, channels, _, _ = reader.read(4), reader.read(4), reader.read(4), reader.read(3), reader.read(1)
+        assert channels == 0
+        first = reader.read(8)
+        for _ in range(bin(first)[2:].zfill(8).index("0") - 1 if first >= 0x80 else 0):
+            reader.read(8)
+        block_size = 4096 if size_code == 0b1100 else reader.read(16) + 1
+        header_end = reader.pos // 8
+        assert reader.read(8) == _crc8(data[pos:pos + header_end])
+
+        assert reader.read(1) == 0
+        kind = reader.read(6)
+        assert reader.read(1) == 0
+        if kind == 0:
+            block = [reader.read_signed(bits_per_sample)] * block_size
+        elif kind == 1:
+            block = [reader.read_signed(bits_per_sample) for _ in range(block_size)]
+        else:
+            order = kind & 0b111
+            block = [reader.read_signed(bits_per_sample) for _ in range(order)]
+            assert reader.read(2) == 0
+            partition_order = reader.read(4)
+            residual = []
+            for partition in range(1 << partition_order):
+                count = (block_size >> partition_order) - (order if partition == 0 else 0)
+                k = reader.read(4)
+                residual.extend(reader.read_rice(k) for _ in range(count))
+            coefficients = {0: [], 1: [1], 2: [2, -1], 3: [3, -3, 1], 4: [4, -6, 4, -1]}[order]
+            for r in residual:
+                block.append(r + sum(c * block[-1 - i] for i, c in enumerate(coefficients)))
+        samples.extend(block)
+        reader.pos += -reader.pos % 8
+        end = pos + reader.pos // 8
+        assert struct.unpack(">H", data[end:end + 2])[0] == _crc16(data[pos:end])
+        pos = end + 2
+
+    decoded = np.array(samples, dtype=np.int16)
+    assert decoded.size == total
+    assert hashlib.md5(decoded.astype("<i2").tobytes()).digest() == info[18:34]
+    return rate, decoded
+
+
+def speech_like_pcm(seconds: float, seed: int = 0) -> bytes:
+    """A syllable-modulated voiced tone over a low noise floor."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * RATE)) / RATE
+    envelope = np.abs(np.sin(2 * np.pi * 3 * t))
+    voiced = 4000 * envelope * (np.sin(2 * np.pi * 140 * t) + 0.5 * np.sin(2 * np.pi * 420 * t))
+    return (voiced + rng.normal(0, 60, t.size)).astype(np.int16).tobytes()
+
+
+class TestFlac:
+    @pytest.mark.parametrize("length", [1, 2, 100, 4096, 5000, 3 * 4096 + 17])
+    def test_round_trip(self, length: int):
+        pcm = (speech_like_pcm(1.0) * 2)[:length * 2]
+        rate, decoded = decode_flac(encode_flac(pcm, RATE))
+        assert rate == RATE
+        assert decoded.tobytes() == pcm
+
+    @pytest.mark.parametrize("rate, length", [(RATE, 1), (RATE, 4096), (RATE, 3 * 4096 + 17),
+                                              (11025, 5000), (44100, 9000), (48000, 4096)])
+    def test_decodes_with_libflac(self, rate: int, length: int):
+        # A real decoder, so the encoder isn't only checked against decode_flac above
+        soundfile = pytest.importorskip("soundfile")
+        noise = np.random.default_rng(length).integers(-32768, 32768, length).astype(np.int16).tobytes()
+        # Speech then noise, so blocks use both predicted and verbatim subframes
+        half = length // 2
+        pcm = (speech_like_pcm(1.0) * 3)[:half * 2] + noise[:(length - half) * 2]
+        decoded, decoded_rate = soundfile.read(io.BytesIO(encode_flac(pcm, rate)), dtype="int16")
+        assert decoded_rate == rate
+        assert decoded.tobytes() == pcm
+
+    def test_silence_decodes_with_libflac(self):
+        soundfile = pytest.importorskip("soundfile")
+        pcm = make_silence_pcm(0.6) + speech_like_pcm(0.4)
+        decoded, _ = soundfile.read(io.BytesIO(encode_flac(pcm, RATE)), dtype="int16")
+        assert decoded.tobytes() == pcm
+
+    def test_noise_and_silence_round_trip(self):
+        noise = np.random.default_rng(3).integers(-32768, 32768, 5000).astype(np.int16).tobytes()
+        pcm = make_silence_pcm(0.3) + noise
+        assert decode_flac(encode_flac(pcm, 11025))[1].tobytes() == pcm
+
+    def test_speech_compresses_to_about_half(self):
+        pcm = speech_like_pcm(5.0)
+        assert len(encode_flac(pcm, RATE)) < 0.6 * len(pcm)
+
+    def test_crc16_matches_bitwise_definition(self):
+        data = np.random.default_rng(5).integers(0, 256, 9000, dtype=np.uint8).tobytes()
+        crc = 0
+        for byte in data:
+            crc ^= byte << 8
+            for _ in range(8):
+                crc = ((crc << 1) ^ 0x8005 if crc & 0x8000 else crc << 1) & 0xFFFF
+        assert _crc16(data) == crc
+
+
+class TestTrimSilence:
+    def test_keeps_speech_and_padding(self):
+        pcm = make_silence_pcm(2.0) + make_tone_pcm(1.0) + make_silence_pcm(3.0)
+        trimmed = trim_silence(pcm, RATE, energy_threshold=500, pad_seconds=0.25)
+        assert len(trimmed) / (2 * RATE) == pytest.approx(1.5, abs=0.05)
+
+    def test_quiet_audio_is_left_alone(self):
+        pcm = make_tone_pcm(1.0, amplitude=100)
+        assert trim_silence(pcm, RATE, energy_threshold=500) == pcm
+
+
+def test_encoder_trims_then_compresses():
+    encoder = UploadEncoder(RATE, "flac", trim_threshold=500)
+    pcm = make_silence_pcm(2.0) + speech_like_pcm(2.0) + make_silence_pcm(2.0)
+    encoded = encoder.submit(pcm).result()
+    encoder.close()
+
+    assert encoded.pcm_bytes == len(pcm)
+    assert len(encoded) < len(pcm) / 4
+    assert encoded.open().read(4) == b"fLaC"
+
+
+def test_turn_uploads_flac(tmp_path):
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.voice_recording_duration = 1
+    config.intent_routing = False
+    with FakeOpenAIServer() as server:
+        speech = SpeechInterface(config, client=server.make_client(),
+                                 audio_interface=FakePyAudio(make_silence_pcm(0.5) + make_tone_pcm(1.0)))
+        speech.conduct_realtime_conversation_turn()
+        speech.close()
+
+    body = server.uploads[0]
+    flac = body[body.index(b"fLaC"):body.rindex(b"\r\n--")]
+    rate, decoded = decode_flac(flac)
+    assert rate == RATE
+    # VAD's pre-roll and hangover are trimmed down to the padding
+    assert decoded.size / RATE == pytest.approx(1.0 + 2 * 0.25, abs=0.1)
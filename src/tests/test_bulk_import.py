@@ -0,0 +1,151 @@
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.bulk_import import (PROJECT_FROM_FILENAME, BulkImporter, ImportManifest,
+                                          find_memos, project_for)
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.speech_interface import SpeechInterface
+from tests.fakes import FakeOpenAIServer, make_wav_bytes
+
+BASE_TIME = datetime(2023, 5, 1, 9, 0).timestamp()
+
+
+def write_memo(directory: Path, relative: str, minutes: int) -> Path:
+    path = directory / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(make_wav_bytes(0.5, rate=16000))
+    recorded = BASE_TIME + minutes * 60
+    os.utime(path, (recorded, recorded))
+    return path
+
+
+class FakeFileTranscriber:
+    """Transcribes a memo to its file stem; later memos finish first."""
+
+    def __init__(self, failing: set[str] = frozenset()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, path: Path) -> str:
+        self.calls.append(path.name)
+        time.sleep(0.05 if path.stem.endswith("1") else 0.0)
+        if path.stem in self.failing:
+            raise ConnectionError("network down")
+        return "" if path.stem.startswith("silence") else f"idea {path.stem}"
+
+
+@pytest.fixture
+def notes(tmp_path: Path) -> NoteManager:
+    config = AppConfig(custom_base_dir=tmp_path / "base")
+    config.ensure_directories()
+    return NoteManager(config)
+
+
+@pytest.mark.parametrize("relative, project_from, expected", [
+    ("Garden/idea.wav", "folder", "Garden"),
+    ("Garden/2023/idea.wav", "folder", "Garden"),
+    ("idea.wav", "folder", None),
+    ("Garden - tomatoes.wav", PROJECT_FROM_FILENAME, "Garden"),
+    ("Garden_tomatoes.wav", PROJECT_FROM_FILENAME, "Garden"),
+    ("tomatoes.wav", PROJECT_FROM_FILENAME, None),
+])
+def test_project_for(relative, project_from, expected):
+    assert project_for(Path(relative), project_from) == expected
+
+
+def test_memos_are_saved_in_recording_order_with_their_timestamps(tmp_path: Path, notes: NoteManager):
+    memos_dir = tmp_path / "memos"
+    write_memo(memos_dir, "Garden/memo3.wav", 30)
+    write_memo(memos_dir, "Garden/memo1.wav", 10)
+    write_memo(memos_dir, "Garden/memo2.wav", 20)
+    write_memo(memos_dir, "loose.wav", 5)
+    write_memo(memos_dir, "silence.wav", 6)
+
+    importer = BulkImporter(notes, FakeFileTranscriber(), workers=3, progress=None)
+    report = importer.run(find_memos(memos_dir), ImportManifest(tmp_path / "manifest.jsonl"))
+
+    assert (report.saved, report.empty, report.failed) == (4, 1, [])
+    assert report.audio_seconds == pytest.approx(2.5)
+    entries = notes.get_entries_between("Garden", datetime(2000, 1, 1), datetime(2100, 1, 1))
+    assert [e.content for e in entries] == ["idea memo1", "idea memo2", "idea memo3"]
+    assert [e.timestamp.timestamp() for e in entries] == [BASE_TIME + m * 60 for m in (10, 20, 30)]
+    scratchpad = notes.config.get_scratchpad_file_path().read_text(encoding="utf-8")
+    assert "## Scratchpad Entry: 2023-05-01 09:05:00\nidea loose" in scratchpad
+
+
+def test_resume_skips_imported_memos_and_retries_failures(tmp_path: Path, notes: NoteManager):
+    memos_dir = tmp_path / "memos"
+    for minute in range(1, 4):
+        write_memo(memos_dir, f"Garden/memo{minute}.wav", minute)
+    manifest_path = tmp_path / "manifest.jsonl"
+
+    first = FakeFileTranscriber(failing={"memo2"})
+    report = BulkImporter(notes, first, workers=2, progress=None).run(
+        find_memos(memos_dir), ImportManifest(manifest_path))
+    assert report.saved == 2
+    assert [memo.relative_path.name for memo, _ in report.failed] == ["memo2.wav"]
+
+    second = FakeFileTranscriber()
+    report = BulkImporter(notes, second, workers=2, progress=None).run(
+        find_memos(memos_dir), ImportManifest(manifest_path))
+    assert second.calls == ["memo2.wav"]
+    assert (report.saved, report.skipped) == (1, 2)
+    assert notes.count_entries("Garden") == 3
+
+
+def test_import_through_whisper(tmp_path: Path, notes: NoteManager):
+    memos_dir = tmp_path / "memos"
+    for minute in range(1, 6):
+        write_memo(memos_dir, f"Reading/memo{minute}.wav", minute)
+    notes.config.api_max_retries = 1
+    notes.config.api_retry_base_delay = 0.001
+
+    with FakeOpenAIServer(transcript="finish chapter two", failures={"transcriptions": 1}) as server:
+        speech = SpeechInterface(notes.config, client=server.make_client())
+        importer = BulkImporter(notes, speech.transcribe_file, workers=4, progress=None)
+        report = importer.run(find_memos(memos_dir), ImportManifest(tmp_path / "manifest.jsonl"))
+
+    assert report.saved == 5 and not report.failed
+    assert server.requests.count("transcriptions") == 6
+    assert notes.get_latest_entry("Reading").content == "finish chapter two"
+
+
+def test_main_imports_with_an_offline_engine(tmp_path: Path, monkeypatch):
+    from idea_to_markdown import bulk_import
+
+    write_memo(tmp_path / "memos", "Garden/memo1.wav", 1)
+    config = AppConfig(custom_base_dir=tmp_path / "base")
+    config.openai_api_key = None
+    config.stt_engine = "stub"
+    config.stub_transcript = "offline idea"
+    monkeypatch.setattr(bulk_import, "AppConfig", lambda: config)
+
+    bulk_import.main([str(tmp_path / "memos")])
+
+    notes = NoteManager(config)
+    assert notes.get_latest_entry("Garden").content == "offline idea"
+    notes.close()
+
+
+def test_memos_imported_into_a_project_with_newer_entries_keep_their_time(tmp_path: Path, notes: NoteManager):
+    notes.add_note_to_project("Garden", "written today")
+    write_memo(tmp_path / "memos", "Garden/memo1.wav", 10)
+    write_memo(tmp_path / "memos", "Garden/memo2.wav", 20)
+
+    BulkImporter(notes, FakeFileTranscriber(), workers=2, progress=None).run(
+        find_memos(tmp_path / "memos"), ImportManifest(tmp_path / "manifest.jsonl"))
+
+    text = notes.config.get_project_file_path("Garden").read_text(encoding="utf-8")
+    assert "## Entry: 2023-05-01 09:10:00\nidea memo1" in text
+    assert "## Entry: 2023-05-01 09:20:00\nidea memo2" in text
+    may = notes.get_entries_between("Garden", datetime(2023, 5, 1), datetime(2023, 6, 1))
+    assert [(e.content, e.timestamp.timestamp()) for e in may] == \
+        [("idea memo1", BASE_TIME + 600), ("idea memo2", BASE_TIME + 1200)]
+    everything = notes.get_entries_between("Garden", datetime(2000, 1, 1), datetime(2100, 1, 1))
+    assert [e.content for e in everything] == ["idea memo1", "idea memo2", "written today"]
+    assert notes.get_latest_entry("Garden").content == "idea memo2"
@@ -0,0 +1,144 @@
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.api_client import ApiUnavailableError
+from idea_to_markdown.audio_encoding import EncodedAudio
+from idea_to_markdown.capture_spool import (CAPTURE_COMMAND, CAPTURE_FAILED, CAPTURE_QUEUED,
+                                            CAPTURE_SAVED, CaptureSpool, SpoolWorker)
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.speech_interface import SpeechInterface
+from tests.fakes import FakeOpenAIServer, FakePyAudio, make_silence_pcm, make_tone_pcm
+
+
+class FakeTranscriber:
+    """Transcribes b"text" audio to "text"; fails while `outage` is set."""
+
+    def __init__(self):
+        self.outage: Exception | None = None
+        self.calls = 0
+
+    def __call__(self, audio: EncodedAudio) -> str:
+        self.calls += 1
+        if self.outage is not None:
+            raise self.outage
+        return bytes(audio.data).decode()
+
+
+class TestCaptureSpool:
+    def test_captures_survive_reopening_in_capture_order(self, tmp_path: Path):
+        spool = CaptureSpool(tmp_path / "spool", fsync=False)
+        spool.enqueue([b"second"], "Garden", captured_at=200.0)
+        spool.enqueue([b"first ", b"idea"], None, captured_at=100.0)
+
+        reopened = CaptureSpool(tmp_path / "spool")
+        pending = reopened.pending()
+        assert [c.captured_at for c in pending] == [100.0, 200.0]
+        assert reopened.read_segments(pending[0]) == [b"first ", b"idea"]
+        assert pending[1].project == "Garden"
+
+        reopened.remove(pending[0])
+        assert len(reopened) == 1
+
+    def test_audio_without_metadata_is_discarded(self, tmp_path: Path):
+        spool_dir = tmp_path / "spool"
+        spool_dir.mkdir()
+        (spool_dir / "00000000000000001-deadbeef.pcm").write_bytes(b"half written")
+
+        spool = CaptureSpool(spool_dir)
+        assert spool.pending() == []
+        assert list(spool_dir.glob("*.pcm")) == []
+
+
+class TestSpoolWorker:
+    @pytest.fixture
+    def notes(self, tmp_path: Path) -> NoteManager:
+        config = AppConfig(custom_base_dir=tmp_path)
+        config.ensure_directories()
+        return NoteManager(config)
+
+    def make_worker(self, notes: NoteManager, transcribe, **kwargs) -> SpoolWorker:
+        def save_note(text, project, captured_at):
+            notes.add_note_to_project(project, text, captured_at=captured_at)
+
+        spool = CaptureSpool(notes.config.base_dir / "spool", fsync=False)
+        return SpoolWorker(spool, transcribe, save_note, **kwargs)
+
+    def test_outage_keeps_captures_until_transcription_recovers(self, notes: NoteManager):
+        transcribe = FakeTranscriber()
+        transcribe.outage = ApiUnavailableError("stt", "circuit open")
+        worker = self.make_worker(notes, transcribe)
+        # Recorded out of order, e.g. left over from an earlier session
+        late = worker.submit([b"third idea"], "Garden", captured_at=time.time())
+        early = worker.submit([b"first idea"], "Garden", captured_at=time.time() - 60)
+        worker.spool.enqueue([b"second idea"], "Garden", captured_at=time.time() - 30)
+
+        assert not worker.drain()
+        assert late.wait(0) == CAPTURE_QUEUED and early.wait(0) == CAPTURE_QUEUED
+        assert len(worker.spool) == 3
+        assert worker.spool.pending()[0].attempts == 1
+
+        transcribe.outage = None
+        assert worker.drain()
+        assert len(worker.spool) == 0
+        entries = notes.get_entries_between("Garden", datetime(2000, 1, 1), datetime(2100, 1, 1))
+        assert [e.content for e in entries] == ["first idea", "second idea", "third idea"]
+        # Stamped with when they were recorded, not when they were written
+        assert entries[0].timestamp < entries[2].timestamp
+
+    def test_commands_are_not_saved(self, notes: NoteManager):
+        worker = self.make_worker(notes, FakeTranscriber())
+        note = worker.submit([b"buy seeds"], "Garden")
+        command = worker.submit([b"exit agent"], "Garden")
+        worker.drain()
+
+        assert note.wait(0) == CAPTURE_SAVED and note.text == "buy seeds"
+        assert command.wait(0) == CAPTURE_COMMAND
+        assert notes.count_entries("Garden") == 1
+
+    def test_persistent_errors_set_the_capture_aside(self, notes: NoteManager):
+        transcribe = FakeTranscriber()
+        transcribe.outage = ValueError("unreadable audio")
+        worker = self.make_worker(notes, transcribe, max_attempts=2)
+        ticket = worker.submit([b"noise"], "Garden")
+
+        assert not worker.drain()
+        assert worker.drain()
+        assert ticket.wait(0) in (CAPTURE_QUEUED, CAPTURE_FAILED)
+        assert len(worker.spool) == 0
+        assert len(list(worker.spool.failed_dir.glob("*.json"))) == 1
+
+    def test_background_worker_retries_after_an_outage(self, tmp_path: Path):
+        config = AppConfig(custom_base_dir=tmp_path)
+        config.ensure_directories()
+        config.voice_recording_duration = 1
+        config.intent_routing = True
+        config.api_max_retries = 0
+        config.spool_wait_seconds = 5
+        notes = NoteManager(config)
+        audio = FakePyAudio(make_silence_pcm(0.2) + make_tone_pcm(0.5))
+        with FakeOpenAIServer(transcript="water the beans", failures={"transcriptions": 1}) as server:
+            speech = SpeechInterface(config, client=server.make_client(), audio_interface=audio)
+            worker = SpoolWorker(
+                CaptureSpool(config.spool_dir),
+                speech.transcribe,
+                lambda text, project, captured_at: notes.add_note_to_project(
+                    project, text, captured_at=captured_at),
+                retry_interval=0.05)
+            speech.spool_worker = worker
+            worker.start()
+            try:
+                assert speech.conduct_realtime_conversation_turn(project="Garden") is None
+                assert speech.last_capture_status == CAPTURE_QUEUED
+
+                deadline = time.monotonic() + 5
+                while len(worker.spool) and time.monotonic() < deadline:
+                    time.sleep(0.02)
+            finally:
+                worker.stop()
+
+        assert server.requests.count("transcriptions") == 2
+        assert notes.get_latest_entry("Garden").content == "water the beans"
@@ -0,0 +1,166 @@
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.context_builder import (SYSTEM_PROMPT, ContextBuilder, ConversationHistory,
+                                              count_tokens)
+from idea_to_markdown.engines import StubEngine
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.speech_interface import SpeechInterface
+from idea_to_markdown.tracing import Tracer
+
+
+@pytest.fixture
+def test_config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    return config
+
+
+@pytest.fixture
+def note_manager(test_config: AppConfig) -> NoteManager:
+    manager = NoteManager(test_config)
+    yield manager
+    manager.close()
+
+
+class RecordingEngine(StubEngine):
+    def __init__(self):
+        super().__init__(reply="Sounds good.")
+        self.prompts: list[list[dict]] = []
+
+    def chat(self, messages: list[dict]) -> str:
+        self.prompts.append(messages)
+        return super().chat(messages)
+
+
+def test_count_tokens_approximates_words_and_punctuation():
+    assert count_tokens("") == 0
+    assert count_tokens("plant the beans.") == 4
+    # Long words count a token per six characters
+    assert count_tokens("internationalization") == 4
+
+
+class TestContextBuilder:
+    def test_latest_notes_oldest_first(self, note_manager: NoteManager):
+        for i in range(5):
+            note_manager.add_note_to_project("Garden", f"idea {i}")
+        builder = ContextBuilder(note_manager, max_entries=3)
+
+        prompt = builder.build("what next?", "Garden")
+
+        system = prompt.messages[0]["content"]
+        assert system.startswith(SYSTEM_PROMPT)
+        assert "'Garden'" in system
+        assert [line.split(": ", 1)[1] for line in system.splitlines()[-3:]] == \
+            ["idea 2", "idea 3", "idea 4"]
+        assert prompt.entries == 3
+        assert prompt.messages[-1] == {"role": "user", "content": "what next?"}
+
+    def test_prompt_stays_within_budget(self, note_manager: NoteManager):
+        for i in range(40):
+            note_manager.add_note_to_scratchpad(f"a longer scratchpad thought number {i} about the garden")
+        history = ConversationHistory(max_turns=20)
+        for i in range(20):
+            history.add(f"question {i} about the beds", f"answer {i} with some detail")
+        builder = ContextBuilder(note_manager, max_tokens=200, max_entries=40)
+
+        prompt = builder.build("what should I plant?", None, history)
+
+        assert prompt.tokens <= 200
+        assert 0 < prompt.entries < 40
+        assert 0 < prompt.turns < 20
+        # Only the most recent items were dropped
+        assert "number 39" in prompt.messages[0]["content"]
+        assert prompt.messages[-3]["content"] == "question 19 about the beds"
+
+    def test_unused_history_budget_goes_to_notes(self, note_manager: NoteManager):
+        for i in range(40):
+            note_manager.add_note_to_project("Garden", f"thought number {i} about compost")
+        builder = ContextBuilder(note_manager, max_tokens=200, max_entries=40)
+        history = ConversationHistory(max_turns=20)
+        for i in range(20):
+            history.add(f"question {i} about the compost heap", f"answer {i} with some detail")
+
+        alone = builder.build("and then?", "Garden")
+        shared = builder.build("and then?", "Garden", history)
+
+        # Without exchanges the notes may use more than their half
+        assert alone.tokens > 200 * 3 // 4
+        assert shared.turns > 0
+        assert 0 < shared.entries < alone.entries
+        assert shared.tokens <= 200
+
+    def test_zero_budget_sends_only_system_prompt_and_utterance(self, note_manager: NoteManager):
+        note_manager.add_note_to_project("Garden", "idea")
+        history = ConversationHistory()
+        history.add("hello", "hi")
+
+        prompt = ContextBuilder(note_manager, max_tokens=0).build("what next?", "Garden", history)
+
+        assert prompt.messages == [{"role": "system", "content": SYSTEM_PROMPT},
+                                   {"role": "user", "content": "what next?"}]
+
+    def test_cached_entries_are_invalidated_on_append(self, note_manager: NoteManager, monkeypatch):
+        note_manager.add_note_to_project("Garden", "first")
+        builder = ContextBuilder(note_manager)
+        reads = []
+        original = note_manager.get_latest_entries
+        monkeypatch.setattr(note_manager, "get_latest_entries",
+                            lambda *args: reads.append(args) or original(*args))
+
+        assert builder.build("q", "Garden").entries == 1
+        assert builder.build("q", "Garden").entries == 1
+        assert len(reads) == 1
+
+        note_manager.add_note_to_project("Garden", "second")
+        note_manager.flush()
+        prompt = builder.build("q", "Garden")
+        assert len(reads) == 2
+        assert prompt.entries == 2
+        assert prompt.messages[0]["content"].endswith(": second")
+
+    def test_cache_notices_writes_by_other_processes(self, note_manager: NoteManager,
+                                                     test_config: AppConfig):
+        note_manager.add_note_to_project("Garden", "first")
+        builder = ContextBuilder(note_manager)
+        assert builder.build("q", "Garden").entries == 1
+
+        path = test_config.get_project_file_path("Garden")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n## Entry: 2030-01-01 08:00:00\nfrom elsewhere\n")
+
+        assert builder.build("q", "Garden").messages[0]["content"].endswith(": from elsewhere")
+
+    def test_utterance_already_saved_as_note_is_not_repeated(self, note_manager: NoteManager):
+        note_manager.add_note_to_project("Garden", "older idea")
+        note_manager.add_note_to_project("Garden", "water the tomatoes")
+
+        prompt = ContextBuilder(note_manager).build("water the tomatoes", "Garden")
+
+        assert prompt.entries == 1
+        assert "water the tomatoes" not in prompt.messages[0]["content"]
+
+
+class TestRepliesWithContext:
+    def test_reply_includes_previous_exchanges(self, test_config: AppConfig,
+                                               note_manager: NoteManager):
+        note_manager.add_note_to_project("Garden", "raised beds by the fence")
+        engine = RecordingEngine()
+        tracer = Tracer(enabled=True)
+        speech = SpeechInterface(test_config, engine=engine, tracer=tracer)
+        speech.context_builder = ContextBuilder.from_config(test_config, note_manager)
+
+        speech.generate_reply("how big should they be?", "Garden")
+        speech.generate_reply("and how deep?", "Garden")
+
+        second = engine.prompts[-1]
+        assert "raised beds by the fence" in second[0]["content"]
+        assert [m["content"] for m in second[1:]] == \
+            ["how big should they be?", "Sounds good.", "and how deep?"]
+        chat = tracer.summary()["chat"]
+        assert chat["turns"] == 1
+        assert chat["notes"] == 2
+        assert chat["prompt_tokens"] > 0
+        speech.close()
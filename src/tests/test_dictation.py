@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.audio_encoding import EncodedAudio, UploadEncoder
+from idea_to_markdown.capture_spool import CAPTURE_SAVED, CaptureSpool, SpoolWorker
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.dictation import SegmentTranscriber, stitch_transcripts
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.speech_interface import SpeechInterface
+from idea_to_markdown.tracing import Tracer
+from tests.fakes import FakeOpenAIServer, FakePyAudio, make_silence_pcm, make_tone_pcm
+
+RATE = 16000
+
+
+class TestStitchTranscripts:
+    def test_repeated_words_are_dropped(self):
+        texts = ["We could plant the beans", "The beans along the fence", "the fence, for the sun."]
+        assert stitch_transcripts(texts) == "We could plant the beans along the fence for the sun."
+
+    def test_word_cut_at_the_boundary_is_dropped(self):
+        # The split cut "along" in half; the next segment has it whole
+        assert stitch_transcripts(["plant the beans al", "the beans along the fence"]) == \
+            "plant the beans along the fence"
+
+    def test_similar_openings_are_not_merged(self):
+        assert stitch_transcripts(["I think we should", "I think so"]) == "I think we should I think so"
+
+    def test_unrelated_transcripts_are_joined(self):
+        assert stitch_transcripts(["first idea", "", "second idea"]) == "first idea second idea"
+
+
+class SlowTranscriber:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, audio: EncodedAudio) -> str:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        return bytes(audio.data).decode()
+
+
+def test_segments_are_transcribed_while_recording():
+    encoder = UploadEncoder(RATE, "wav")
+    transcribe = SlowTranscriber(latency=0.2)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        transcriber = SegmentTranscriber(encoder, transcribe, executor)
+        for segment in [b"one two", b"two three", b"three four", b"four five"]:
+            transcriber.add(segment)
+        started = time.monotonic()
+        text = transcriber.result()
+        waited = time.monotonic() - started
+    encoder.close()
+
+    assert text == "one two three four five"
+    assert transcribe.max_in_flight > 1
+    # Not four uploads one after another
+    assert waited < 2 * transcribe.latency
+
+
+@pytest.fixture
+def dictation_config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    config.intent_routing = False
+    config.upload_format = "wav"
+    config.long_dictation = True
+    config.dictation_segment_duration = 0.8
+    config.dictation_overlap_duration = 0.25
+    config.dictation_silence_duration = 0.3
+    return config
+
+
+DICTATION = make_silence_pcm(0.2) + make_tone_pcm(2.4) + make_silence_pcm(1.0)
+TRANSCRIPTS = ["we could plant", "plant beans along", "along the fence", "fence in spring",
+               "in spring", "spring"]
+
+
+class TestLongDictation:
+    def test_turn_stitches_segments_uploaded_while_recording(self, dictation_config: AppConfig):
+        tracer = Tracer(enabled=True)
+        with FakeOpenAIServer(transcript=TRANSCRIPTS, stt_latency=0.3) as server:
+            speech = SpeechInterface(dictation_config, client=server.make_client(), tracer=tracer,
+                                     audio_interface=FakePyAudio(DICTATION, realtime=True))
+            text = speech.conduct_realtime_conversation_turn()
+            speech.close()
+
+        segments = len(speech.dictation_vad.result().segments)
+        assert segments >= 3
+        assert server.requests.count("transcriptions") == segments
+        assert text == stitch_transcripts(TRANSCRIPTS[:segments])
+        assert text.startswith("we could plant beans along the fence in spring")
+        # Only the last upload was still in flight when the speaker stopped
+        assert tracer.summary()["stt_wait"]["max_ms"] < 2 * 300
+
+    def test_project_replies_are_not_dictation(self, dictation_config: AppConfig):
+        with FakeOpenAIServer(transcript="add a task") as server:
+            speech = SpeechInterface(dictation_config, client=server.make_client(),
+                                     audio_interface=FakePyAudio(DICTATION))
+            speech.conduct_realtime_conversation_turn(context="project")
+            speech.close()
+
+        assert speech.dictation_vad.result().segments == []
+        assert server.requests.count("transcriptions") == 1
+
+    def test_failed_dictation_is_spooled(self, dictation_config: AppConfig):
+        dictation_config.api_max_retries = 0
+        dictation_config.spool_wait_seconds = 5
+        notes = NoteManager(dictation_config)
+        # Every segment hears the same words, so they are all overlap
+        with FakeOpenAIServer(transcript="plant the beans", failures={"transcriptions": 1}) as server:
+            speech = SpeechInterface(dictation_config, client=server.make_client(),
+                                     audio_interface=FakePyAudio(DICTATION))
+            worker = SpoolWorker(
+                CaptureSpool(dictation_config.spool_dir, fsync=False),
+                speech.transcribe,
+                lambda text, project, captured_at: notes.add_note_to_project(
+                    project, text, captured_at=captured_at),
+                retry_interval=0.05)
+            speech.spool_worker = worker
+            worker.start()
+            try:
+                text = speech.conduct_realtime_conversation_turn(project="Garden")
+            finally:
+                worker.stop()
+                speech.close()
+
+        assert speech.last_capture_status == CAPTURE_SAVED
+        # The spooled capture's transcripts are stitched like the live ones
+        assert text == "plant the beans"
+        assert notes.get_latest_entry("Garden").content == text
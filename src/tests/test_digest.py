@@ -0,0 +1,169 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.digest import Digester, DigestWorker, read_digest
+from idea_to_markdown.note_manager import NoteManager
+
+
+@pytest.fixture
+def test_config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    return config
+
+
+@pytest.fixture
+def note_manager(test_config: AppConfig) -> NoteManager:
+    manager = NoteManager(test_config)
+    yield manager
+    manager.close()
+
+
+class FakeChat:
+    """Returns a digest listing every note it has been sent so far."""
+
+    def __init__(self, fail_after: int | None = None):
+        self.requests: list[list[dict]] = []
+        self.fail_after = fail_after
+        self.notes: list[str] = []
+
+    def __call__(self, messages: list[dict]) -> str:
+        if self.fail_after is not None and len(self.requests) >= self.fail_after:
+            raise RuntimeError("API unavailable")
+        self.requests.append(messages)
+        new_notes = messages[-1]["content"].split("New notes")[1]
+        self.notes += [line.split(": ", 1)[1] for line in new_notes.splitlines() if line.startswith("- ")]
+        return "```markdown\n## Summary\n" + "\n".join(f"- {note}" for note in self.notes) + "\n```"
+
+
+def add_notes(note_manager: NoteManager, project: str, count: int, start: int = 0):
+    for i in range(start, start + count):
+        note_manager.add_note_to_project(project, f"garden idea {i}")
+
+
+class TestDigester:
+    def test_first_run_batches_all_entries_into_one_request(self, note_manager: NoteManager,
+                                                            test_config: AppConfig):
+        add_notes(note_manager, "Garden", 20)
+        chat = FakeChat()
+
+        report = Digester(note_manager, chat).digest_project("Garden")
+
+        assert (report.entries, report.requests, report.total_entries) == (20, 1, 20)
+        assert report.error is None and not report.rebuilt
+        path = test_config.get_digest_dir() / "Garden.md"
+        assert report.path == path
+        entries, _, body = read_digest(path)
+        assert entries == 20
+        assert body.startswith("## Summary") and "garden idea 19" in body
+        # Digests are not mistaken for projects
+        assert note_manager.list_projects() == ["Garden"]
+
+    def test_later_runs_send_only_new_entries(self, note_manager: NoteManager):
+        add_notes(note_manager, "Garden", 5)
+        chat = FakeChat()
+        digester = Digester(note_manager, chat)
+        digester.digest_project("Garden")
+
+        assert digester.run() == []
+        assert len(chat.requests) == 1
+
+        add_notes(note_manager, "Garden", 2, start=5)
+        (report,) = digester.run()
+
+        assert report.entries == 2 and report.total_entries == 7
+        prompt = chat.requests[-1][-1]["content"]
+        assert "garden idea 4" in prompt.split("New notes")[0]  # in the current digest
+        assert prompt.split("New notes")[1].count("garden idea") == 2
+
+    def test_large_backlog_is_split_into_batches(self, note_manager: NoteManager):
+        add_notes(note_manager, "Garden", 30)
+        chat = FakeChat()
+
+        report = Digester(note_manager, chat, batch_tokens=300).digest_project("Garden")
+
+        assert report.requests == len(chat.requests) > 1
+        assert report.total_entries == 30
+        assert len(chat.notes) == 30
+
+    def test_failure_keeps_progress_of_earlier_batches(self, note_manager: NoteManager,
+                                                       test_config: AppConfig):
+        add_notes(note_manager, "Garden", 30)
+        digester = Digester(note_manager, FakeChat(fail_after=1), batch_tokens=300)
+
+        report = digester.digest_project("Garden")
+
+        assert report.error == "API unavailable"
+        assert 0 < report.entries < 30
+        assert read_digest(test_config.get_digest_dir() / "Garden.md")[0] == report.entries
+        digester.chat = FakeChat()
+        assert digester.digest_project("Garden").entries == 30 - report.entries
+
+    def test_rewritten_log_is_digested_from_scratch(self, note_manager: NoteManager,
+                                                    test_config: AppConfig):
+        add_notes(note_manager, "Garden", 3)
+        digester = Digester(note_manager, FakeChat())
+        digester.digest_project("Garden")
+
+        path = test_config.get_project_file_path("Garden")
+        path.write_text("# Project: Garden\n\n\n## Entry: 2030-01-01 08:00:00\nonly this\n",
+                        encoding="utf-8")
+        digester.chat = FakeChat()
+        report = digester.digest_project("Garden")
+
+        assert report.rebuilt
+        assert report.total_entries == 1
+        assert digester.chat.notes == ["only this"]
+
+    def test_projects_below_min_entries_wait(self, note_manager: NoteManager):
+        add_notes(note_manager, "Garden", 2)
+        add_notes(note_manager, "Kitchen", 5)
+        chat = FakeChat()
+
+        reports = Digester(note_manager, chat, min_entries=3).run()
+
+        assert [r.project for r in reports] == ["Kitchen"]
+
+
+class TestDigestWorker:
+    def test_waits_for_idle_and_reports(self, note_manager: NoteManager):
+        add_notes(note_manager, "Garden", 3)
+        done = threading.Event()
+
+        class Chat(FakeChat):
+            def __call__(self, messages):
+                reply = super().__call__(messages)
+                done.set()
+                return reply
+
+        worker = DigestWorker(Digester(note_manager, Chat()), interval=0.01, idle_seconds=0.3)
+        worker.start()
+        worker.touch()
+        started = time.monotonic()
+        assert done.wait(5)
+        worker.stop(5)
+
+        assert time.monotonic() - started >= 0.25
+        (report,) = worker.reports
+        assert report.project == "Garden" and report.entries == 3
+
+    def test_activity_stops_a_pass_between_requests(self, note_manager: NoteManager):
+        add_notes(note_manager, "Garden", 30)
+        worker = DigestWorker(Digester(note_manager, FakeChat(), batch_tokens=300),
+                              idle_seconds=0.0)
+
+        class BusyChat(FakeChat):
+            def __call__(self, messages):
+                worker.idle_seconds = 60
+                worker.touch()  # a turn started while the first request was out
+                return super().__call__(messages)
+
+        worker.digester.chat = BusyChat()
+        (report,) = worker.run_once()
+
+        assert report.requests == 1
+        assert report.total_entries < 30
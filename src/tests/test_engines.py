@@ -0,0 +1,114 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from idea_to_markdown.audio_encoding import EncodedAudio
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.engines import LocalWhisperEngine, StubEngine
+from idea_to_markdown.speech_interface import SpeechInterface
+from tests.fakes import FakePyAudio, FakeWhisperModel, make_silence_pcm, make_tone_pcm
+
+
+@pytest.fixture
+def test_config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.voice_recording_duration = 1
+    config.intent_routing = False
+    return config
+
+
+SPOKEN_INPUT = make_silence_pcm(0.5) + make_tone_pcm(1.0)
+
+
+class TestEngineSelection:
+    def test_stub_engine_serves_a_whole_turn_offline(self, test_config: AppConfig):
+        engine = StubEngine("remember the milk", reply="Will do.")
+        audio = FakePyAudio(SPOKEN_INPUT)
+        speech = SpeechInterface(test_config, engine=engine, audio_interface=audio)
+
+        assert speech.conduct_realtime_conversation_turn() == "remember the milk"
+        speech.close()
+        assert engine.requests == ["stt", "chat", "tts"]
+        # The reply was spoken: about 8 characters of streamed silence
+        assert audio.played_bytes == pytest.approx(len("Will do.") * 0.01 * 24000 * 2, abs=2048)
+        # No OpenAI client was ever needed
+        assert not speech.openai_engine._client_ready
+
+    def test_config_chooses_engine_per_role(self, test_config: AppConfig):
+        test_config.stt_engine = "stub"
+        test_config.tts_engine = "stub"
+        speech = SpeechInterface(test_config)
+
+        assert isinstance(speech.stt_engine, StubEngine)
+        assert speech.tts_engine is speech.stt_engine
+        assert speech.chat_engine is speech.openai_engine
+        # Stub recordings are transcribed as PCM, so nothing is encoded as FLAC
+        assert speech.encoder.audio_format == "wav"
+
+    def test_unknown_engine_is_rejected(self, test_config: AppConfig):
+        test_config.chat_engine = "local"
+        with pytest.raises(ValueError, match="chat engine"):
+            SpeechInterface(test_config)
+
+    def test_spoken_errors_are_cached_per_engine(self, test_config: AppConfig):
+        engine = StubEngine()
+        speech = SpeechInterface(test_config, engine=engine)
+        first = speech.synthesize_cached_speech("One moment.")
+        assert speech.synthesize_cached_speech("One moment.") == first
+        assert engine.requests == ["tts"]
+        assert speech.tts_cache.get(speech.tts_cache.make_key("stub", "silence", "wav", "One moment."))
+
+
+class TestLocalWhisperEngine:
+    def test_model_is_warmed_up_once_and_given_samples(self):
+        model = FakeWhisperModel("water the beans")
+        engine = LocalWhisperEngine(model=model)
+        assert engine.wait_until_ready(5)
+
+        pcm = make_tone_pcm(0.5, amplitude=16384)
+        assert engine.transcribe(EncodedAudio(pcm, "wav")) == "water the beans"
+        assert engine.transcribe(EncodedAudio(pcm, "wav")) == "water the beans"
+
+        warm_up, first, _ = model.inputs
+        assert not warm_up.any()
+        assert first.dtype == np.float32
+        assert np.abs(first).max() == pytest.approx(0.5, abs=0.01)
+
+    def test_recordings_are_transcribed_one_at_a_time(self):
+        model = FakeWhisperModel(latency=0.05)
+        engine = LocalWhisperEngine(model=model)
+        pcm = make_tone_pcm(0.2)
+        threads = [threading.Thread(target=engine.transcribe, args=(EncodedAudio(pcm, "wav"),))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(model.inputs) == 5
+        assert model.max_in_flight == 1
+
+    def test_load_failure_makes_engine_unavailable(self):
+        class BrokenModel(FakeWhisperModel):
+            def transcribe(self, audio, **options):
+                raise RuntimeError("model file is corrupt")
+
+        engine = LocalWhisperEngine(model=BrokenModel())
+        assert not engine.wait_until_ready(5)
+        assert not engine.available
+        with pytest.raises(RuntimeError, match="corrupt"):
+            engine.transcribe(EncodedAudio(make_tone_pcm(0.2), "wav"))
+
+    def test_turn_with_local_stt_and_no_api_key(self, test_config: AppConfig):
+        test_config.openai_api_key = None
+        engine = LocalWhisperEngine(model=FakeWhisperModel("buy more seeds"))
+        speech = SpeechInterface(test_config, audio_interface=FakePyAudio(SPOKEN_INPUT))
+        speech.stt_engine = engine
+
+        assert speech.conduct_realtime_conversation_turn() == "buy more seeds"
+        speech.close()
+        # No chat engine, so no reply was attempted
+        assert speech.last_turn_report.action == "respond"
+        assert not speech.chat_available
@@ -0,0 +1,90 @@
+import multiprocessing
+import re
+import threading
+from pathlib import Path
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.file_lock import FileLock, create_exclusive
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.note_store import NoteStore, scan_entries
+
+PROCESSES = 6
+NOTES_PER_PROCESS = 40
+ENTRY_PATTERN = re.compile(
+    r"\n## (?:Scratchpad )?Entry: (\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\n"
+    r"worker (\d+) note (\d+)\n(x+)\n")
+
+
+def append_notes(base_dir: str, worker: int, group_commit: bool, start):
+    config = AppConfig(custom_base_dir=Path(base_dir))
+    config.note_group_commit = group_commit
+    config.note_batch_size = 8
+    manager = NoteManager(config)
+    start.wait()
+    for n in range(NOTES_PER_PROCESS):
+        # Long enough that an entry written in pieces would show up torn
+        content = f"worker {worker} note {n}\n" + "x" * (1000 + 97 * worker)
+        manager.add_note_to_project("Garden", content)
+        if n % 4 == 0:
+            manager.add_note_to_scratchpad(content)
+    manager.close()
+
+
+def test_concurrent_processes_append_intact_entries(tmp_path: Path):
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    context = multiprocessing.get_context("spawn")
+    start = context.Event()
+    workers = [context.Process(target=append_notes, args=(str(tmp_path), worker, worker % 2 == 1, start))
+               for worker in range(PROCESSES)]
+    for process in workers:
+        process.start()
+    start.set()
+    for process in workers:
+        process.join(120)
+        assert process.exitcode == 0
+
+    for path, expected in ((config.get_project_file_path("Garden"), NOTES_PER_PROCESS),
+                           (config.get_scratchpad_file_path(), NOTES_PER_PROCESS // 4)):
+        text = path.read_text(encoding="utf-8")
+        header, _, body = text.partition("\n\n")
+        # Exactly one header, at the top, then nothing but whole entries
+        assert header.startswith("# ") and "\n" not in header
+        assert text.count("\n# ") == 0
+        assert ENTRY_PATTERN.sub("", body) == ""
+        seen, stamps = {}, []
+        for match in ENTRY_PATTERN.finditer(body):
+            worker, n = int(match.group(2)), int(match.group(3))
+            assert len(match.group(4)) == 1000 + 97 * worker
+            seen.setdefault(worker, []).append(n)
+            stamps.append(match.group(1))
+        # Every note exactly once, and each process's notes in the order it wrote them
+        assert seen == {worker: list(range(0, NOTES_PER_PROCESS, NOTES_PER_PROCESS // expected))
+                        for worker in range(PROCESSES)}
+        # Entries queued before another process's batch are restamped, not left behind it
+        assert stamps == sorted(stamps)
+
+        # The shared entry index matches a fresh scan of the file
+        index = NoteStore(config.notes_dir, config.get_index_dir()).index_for(path)
+        assert index.records() == scan_entries(path.read_bytes())
+
+
+def test_lock_is_reentrant_and_excludes_other_threads(tmp_path: Path):
+    lock = FileLock(tmp_path / "locks" / "a.lock")
+    order = []
+    with lock:
+        with lock:
+            thread = threading.Thread(target=lambda: lock.acquire() or order.append("thread") or lock.release())
+            thread.start()
+            thread.join(0.1)
+            order.append("main")
+        assert thread.is_alive()
+    thread.join(5)
+    assert order == ["main", "thread"]
+
+
+def test_create_exclusive_writes_once(tmp_path: Path):
+    path = tmp_path / "notes" / "a.md"
+    assert create_exclusive(path, b"# First\n\n")
+    assert not create_exclusive(path, b"# Second\n\n")
+    assert path.read_bytes() == b"# First\n\n"
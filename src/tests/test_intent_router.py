@@ -0,0 +1,77 @@
+import pytest
+
+from idea_to_markdown.intent_router import (
+    DEFAULT_POLICY, IntentRouter, classify_intent, parse_intent_policy, parse_search_query)
+
+
+class TestClassifyIntent:
+    @pytest.mark.parametrize("utterance, expected", [
+        ("exit agent", "exit"),
+        ("Exit agent.", "exit"),
+        ("QUIT AGENT!", "exit"),
+        ("Stop agent, please.", "exit"),
+        ("Switch project.", "switch_project"),
+        ("I want to change project now", "switch_project"),
+        ("Find notes about solar panels.", "search"),
+        ("search my notes for the budget", "search"),
+        ("What's a good name for this?", "question"),
+        ("how do I split this feature", "question"),
+        ("Can you summarize my last idea", "question"),
+        ("Is there a cheaper option?", "question"),
+        ("Remember to call the plumber.", "note"),
+        ("Idea: a bike rack that folds into the wall", "note"),
+        ("The exit agent idea needs more thought", "note"),
+        ("Whatever happens, ship on Friday", "note"),
+    ])
+    def test_session_utterances(self, utterance, expected):
+        assert classify_intent(utterance) == expected
+
+    @pytest.mark.parametrize("utterance, expected", [
+        ("use garden planner", "project"),
+        ("What about the scratchpad?", "project"),
+        ("exit agent", "exit"),
+    ])
+    def test_project_prompt_replies(self, utterance, expected):
+        assert classify_intent(utterance, context="project") == expected
+
+
+class TestSearchQuery:
+    def test_extracts_normalized_query(self):
+        assert parse_search_query("Find my notes about Solar Panels!") == "solar panels"
+
+    def test_ignores_other_utterances(self):
+        assert parse_search_query("find the milk") is None
+
+
+class TestIntentPolicy:
+    def test_empty_spec_is_default(self):
+        assert parse_intent_policy("") == DEFAULT_POLICY
+
+    def test_overrides(self):
+        policy = parse_intent_policy(" note = Defer , question=skip")
+        assert policy["note"] == "defer"
+        assert policy["question"] == "skip"
+        assert policy["exit"] == DEFAULT_POLICY["exit"]
+
+    @pytest.mark.parametrize("spec", ["chitchat=skip", "note=later", "note"])
+    def test_rejects_unknown_values(self, spec):
+        with pytest.raises(ValueError):
+            parse_intent_policy(spec)
+
+
+class TestIntentRouter:
+    def test_counts_avoided_calls(self):
+        router = IntentRouter()
+        reports = [router.route(u) for u in ["exit agent", "buy milk", "why is the sky blue?"]]
+
+        assert [r.action for r in reports] == ["skip", "skip", "respond"]
+        assert router.avoided_calls == {"chat": 2, "tts": 2}
+        assert "skipped chat, tts" in reports[0].summary()
+
+    def test_disabled_router_always_responds(self):
+        router = IntentRouter(enabled=False)
+        report = router.route("exit agent")
+
+        assert report.intent == "exit"
+        assert report.action == "respond"
+        assert router.avoided_calls == {"chat": 0, "tts": 0}
@@ -1,6 +1,7 @@
 import pytest
 from pathlib import Path
 import shutil  # For cleaning up test directories
+from datetime import datetime
 
 from idea_to_markdown.note_manager import NoteManager
 from idea_to_markdown.config import AppConfig
@@ -75,11 +76,45 @@ class TestNoteManager:
         projects = sorted(note_manager.list_projects())
         assert projects == sorted(["ProjectAlpha", "ProjectBeta"])
 
+    def test_find_project_ignores_case(self, note_manager: NoteManager):
+        note_manager.add_note_to_project("ProjectAlpha", "note a")
+
+        assert note_manager.find_project("projectalpha") == "ProjectAlpha"
+        assert note_manager.find_project("ProjectBeta") is None
+
+    def test_resolve_noisy_project_name(self, note_manager: NoteManager):
+        assert note_manager.resolve_project("alpha project") is None
+        note_manager.add_note_to_project("Alpha Project", "note a")
+
+        # The resolver follows the catalog as projects are created
+        assert note_manager.resolve_project("Alpha-project.") == "Alpha Project"
+        assert note_manager.resolve_project("alfa project") == "Alpha Project"
+        assert note_manager.resolve_project("grocery list") is None
+        assert note_manager.match_projects("alfa project")[0].name == "Alpha Project"
+
+    def test_project_info(self, note_manager: NoteManager, test_config: AppConfig):
+        note_manager.add_note_to_project("ProjectAlpha", "note a")
+        note_manager.add_note_to_project("ProjectAlpha", "note b")
+
+        info = note_manager.get_project_info("projectALPHA")
+        assert info.name == "ProjectAlpha"
+        assert info.entry_count == 2
+        assert info.size == (test_config.notes_dir / "ProjectAlpha.md").stat().st_size
+        assert note_manager.get_project_info("missing") is None
+
     def test_add_note_empty_project_name(self, note_manager: NoteManager, capsys):
         note_manager.add_note_to_project("", "This note should not be saved")
         captured = capsys.readouterr()
         assert "Error: Project name cannot be empty." in captured.out
 
+    @pytest.mark.parametrize("name", ["../escaped", "a/b", "a\\b", "..", "/tmp/escaped", "C:escaped"])
+    def test_project_names_outside_the_notes_dir_are_rejected(self, note_manager: NoteManager,
+                                                              test_config: AppConfig, name: str):
+        with pytest.raises(ValueError):
+            note_manager.add_note_to_project(name, "nope")
+        with pytest.raises(ValueError):
+            test_config.get_project_dir(name)
+
     def test_timestamp_format(self, note_manager: NoteManager):
         """Test the timestamp format used in notes"""
         timestamp = note_manager._get_timestamp_prefix()
@@ -115,3 +150,77 @@ class TestNoteManager:
 
             # Check bullet formatting is preserved
             assert "- Third note\n- With bullets" in content
+
+
+class TestIndexedEntries:
+    def test_get_entry_by_position(self, note_manager: NoteManager):
+        for i in range(5):
+            note_manager.add_note_to_project("Indexed", f"note {i}")
+
+        assert note_manager.count_entries("Indexed") == 5
+        assert note_manager.get_entry("Indexed", 0).content == "note 0"
+        assert note_manager.get_entry("Indexed", 3).content == "note 3"
+        assert note_manager.get_latest_entry("Indexed").content == "note 4"
+        assert note_manager.get_entry("Indexed", 5) is None
+
+    def test_missing_project_has_no_entries(self, note_manager: NoteManager):
+        assert note_manager.count_entries("Nope") == 0
+        assert note_manager.get_latest_entry("Nope") is None
+        assert note_manager.get_entries_between("Nope", datetime(2000, 1, 1), datetime.now()) == []
+
+    def test_multiline_entry_round_trip(self, note_manager: NoteManager):
+        note_manager.add_note_to_project("Indexed", "- first\n- second")
+        entry = note_manager.get_latest_entry("Indexed")
+        assert entry.content == "- first\n- second"
+        assert entry.timestamp <= datetime.now()
+
+    def test_time_range_slicing(self, note_manager: NoteManager, test_config: AppConfig):
+        project_file = test_config.get_project_file_path("Timeline")
+        project_file.write_text(
+            "# Project: Timeline - Created 2024-01-01 00:00:00\n\n"
+            "\n## Entry: 2024-01-01 09:00:00\njanuary\n"
+            "\n## Entry: 2024-02-01 09:00:00\nfebruary\n"
+            "\n## Entry: 2024-03-01 09:00:00\nmarch\n",
+            encoding="utf-8")
+
+        entries = note_manager.get_entries_between(
+            "Timeline", datetime(2024, 1, 15), datetime(2024, 3, 1, 9, 0, 0))
+        assert [e.content for e in entries] == ["february"]
+
+    def test_index_picks_up_external_edits(self, note_manager: NoteManager, test_config: AppConfig):
+        note_manager.add_note_to_project("Edited", "first")
+        project_file = test_config.get_project_file_path("Edited")
+
+        # Appended by hand in an editor
+        with open(project_file, "a", encoding="utf-8") as f:
+            f.write("\n## Entry: 2030-01-01 10:00:00\nadded by hand\n")
+        assert note_manager.get_latest_entry("Edited").content == "added by hand"
+
+        # Rewritten by hand: the index is rebuilt
+        project_file.write_text("# Project: Edited\n\n## Entry: 2030-01-01 10:00:00\nonly\n", encoding="utf-8")
+        assert note_manager.count_entries("Edited") == 1
+        assert note_manager.get_latest_entry("Edited").content == "only"
+
+        note_manager.add_note_to_project("Edited", "after rewrite")
+        assert [note_manager.get_entry("Edited", i).content for i in range(2)] == ["only", "after rewrite"]
+
+
+class TestGroupCommit:
+    def test_reads_see_queued_entries(self, test_config: AppConfig):
+        test_config.note_group_commit = True
+        test_config.note_flush_interval = 60
+        manager = NoteManager(test_config)
+        manager.add_note_to_project("Queued", "not yet on disk")
+
+        assert manager.get_latest_entry("Queued").content == "not yet on disk"
+        manager.close()
+
+    def test_close_writes_queued_entries(self, test_config: AppConfig):
+        test_config.note_group_commit = True
+        test_config.note_flush_interval = 60
+        manager = NoteManager(test_config)
+        manager.add_note_to_scratchpad("late thought")
+        manager.close()
+
+        scratchpad = test_config.get_scratchpad_file_path().read_text(encoding="utf-8")
+        assert "late thought" in scratchpad
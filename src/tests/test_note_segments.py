@@ -0,0 +1,202 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.context_builder import ContextBuilder
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.note_segments import plan_segments
+
+
+@pytest.fixture
+def test_config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    config.note_segments = "month"
+    return config
+
+
+@pytest.fixture
+def note_manager(test_config: AppConfig) -> NoteManager:
+    manager = NoteManager(test_config)
+    yield manager
+    manager.close()
+
+
+def add_monthly_notes(note_manager: NoteManager, months=(1, 2, 3), per_month: int = 3):
+    for month in months:
+        for day in range(1, per_month + 1):
+            note_manager.add_note_to_project(
+                "Garden", f"note {month}-{day}", captured_at=datetime(2024, month, day, 9, 0))
+
+
+class TestSegmentedProjects:
+    def test_entries_go_to_monthly_segments(self, note_manager: NoteManager, test_config: AppConfig):
+        add_monthly_notes(note_manager)
+
+        directory = test_config.notes_dir / ".segments" / "Garden"
+        manifest = json.loads((directory / "manifest.json").read_text())
+        assert [s["file"] for s in manifest["segments"]] == ["2024-01.md", "2024-02.md", "2024-03.md"]
+        assert "note 2-3" in (directory / "2024-02.md").read_text()
+        assert not test_config.get_project_file_path("Garden").exists()
+
+        assert note_manager.list_projects() == ["Garden"]
+        assert note_manager.count_entries("Garden") == 9
+        assert note_manager.get_project_info("Garden").entry_count == 9
+        assert note_manager.get_entry("Garden", 0).content == "note 1-1"
+        assert note_manager.get_entry("Garden", 4).content == "note 2-2"
+        assert note_manager.get_entry("Garden", -4).content == "note 2-3"
+        assert note_manager.get_entry("Garden", 9) is None
+        assert [e.content for e in note_manager.get_latest_entries("Garden", 4)] == \
+            ["note 2-3", "note 3-1", "note 3-2", "note 3-3"]
+        assert len(note_manager.get_entries_from("Garden", 2)) == 7
+        between = note_manager.get_entries_between("Garden", datetime(2024, 1, 3), datetime(2024, 2, 2, 12))
+        assert [e.content for e in between] == ["note 1-3", "note 2-1", "note 2-2"]
+
+    def test_size_segments_roll_over(self, note_manager: NoteManager, test_config: AppConfig):
+        test_config.note_segments = "size"
+        test_config.note_segment_max_bytes = 200
+        for i in range(10):
+            note_manager.add_note_to_project("Garden", f"a fairly long note about the garden, number {i}")
+
+        files = note_manager.project_files("Garden")
+        assert len(files) > 2
+        assert files[1].name.endswith("-2.md")
+        assert all(path.stat().st_size < 200 + 100 for path in files)
+        assert note_manager.count_entries("Garden") == 10
+
+    def test_range_covers_segments_starting_in_the_same_second(self, note_manager: NoteManager,
+                                                               test_config: AppConfig):
+        test_config.note_segments = "size"
+        test_config.note_segment_max_bytes = 1
+        moment = datetime(2026, 1, 1, 10, 0, 0)
+        for i in range(4):
+            note_manager.add_note_to_project("Garden", f"same second {i}", captured_at=moment)
+
+        assert len(note_manager.project_files("Garden")) == 4
+        between = note_manager.get_entries_between("Garden", moment, datetime(2026, 1, 1, 10, 0, 1))
+        assert [e.content for e in between] == [f"same second {i}" for i in range(4)]
+
+    def test_backdated_entry_goes_in_the_newest_segment(self, note_manager: NoteManager):
+        add_monthly_notes(note_manager, months=(2, 3), per_month=2)
+        note_manager.add_note_to_project("Garden", "remembered late", captured_at=datetime(2024, 1, 15, 9, 0))
+
+        assert [f.name for f in note_manager.project_files("Garden")] == ["2024-02.md", "2024-03.md"]
+        assert note_manager.get_latest_entry("Garden").timestamp == datetime(2024, 1, 15, 9, 0)
+        between = note_manager.get_entries_between("Garden", datetime(2024, 1, 1), datetime(2024, 2, 2))
+        assert [e.content for e in between] == ["remembered late", "note 2-1"]
+
+    def test_recent_reads_open_only_the_newest_segment(self, note_manager: NoteManager, monkeypatch):
+        add_monthly_notes(note_manager)
+        newest = note_manager.project_files("Garden")[-1]
+        opened = []
+        for method in ("count_entries", "tail_entries", "get_entry"):
+            original = getattr(note_manager.store, method)
+            monkeypatch.setattr(note_manager.store, method,
+                                lambda path, *args, original=original: opened.append(path) or original(path, *args))
+
+        assert note_manager.get_latest_entry("Garden").content == "note 3-3"
+        assert len(note_manager.get_latest_entries("Garden", 3)) == 3
+        assert set(opened) == {newest}
+
+    def test_existing_project_file_is_split_on_next_note(self, tmp_path: Path):
+        config = AppConfig(custom_base_dir=tmp_path)
+        config.ensure_directories()
+        single = NoteManager(config)
+        add_monthly_notes(single, months=(1, 2))
+        header = config.get_project_file_path("Garden").read_text().splitlines()[0]
+        assert single.search("note")  # indexed under Garden.md
+        single.close()
+
+        config.note_segments = "month"
+        manager = NoteManager(config)
+        manager.add_note_to_project("Garden", "after the split", captured_at=datetime(2024, 2, 20))
+
+        assert not config.get_project_file_path("Garden").exists()
+        files = manager.project_files("Garden")
+        assert [f.name for f in files] == ["2024-01.md", "2024-02.md"]
+        # The original header stays at the top of the first segment
+        assert files[0].read_text().splitlines()[0] == header
+        assert [e.content for e in manager.get_entries_from("Garden", 0)] == \
+            ["note 1-1", "note 1-2", "note 1-3", "note 2-1", "note 2-2", "note 2-3", "after the split"]
+        assert manager.get_entry("Garden", 3).timestamp == datetime(2024, 2, 1, 9, 0)
+        results = manager.search("split")
+        assert [(r.project, r.entry.content) for r in results] == [("Garden", "after the split")]
+        assert len(manager.search("note", project="Garden")) == 6
+        manager.close()
+
+    def test_project_named_like_an_existing_folder(self, note_manager: NoteManager, test_config: AppConfig):
+        (test_config.notes_dir / "digests").mkdir()
+        (test_config.notes_dir / "digests" / "Garden.md").write_text("# Digest\n")
+        for name in ("digests", "Garden"):
+            note_manager.add_note_to_project(name, "kept")
+
+        assert note_manager.list_projects() == ["digests", "Garden"]
+        assert note_manager.get_latest_entry("digests").content == "kept"
+        assert (test_config.notes_dir / "digests" / "Garden.md").read_text() == "# Digest\n"
+
+    def test_failed_split_keeps_saving_to_the_file(self, note_manager: NoteManager,
+                                                   test_config: AppConfig, monkeypatch):
+        def fail(project_name):
+            raise OSError("no space left")
+
+        monkeypatch.setattr(note_manager, "_split_into_segments", fail)
+        note_manager.add_note_to_project("Garden", "still saved")
+
+        assert note_manager.get_latest_entry("Garden").content == "still saved"
+        assert test_config.get_project_file_path("Garden").exists()
+
+    def test_header_only_file_keeps_its_header(self, tmp_path: Path):
+        config = AppConfig(custom_base_dir=tmp_path)
+        config.ensure_directories()
+        config.get_project_file_path("Garden").write_text("# Project: Garden - my plans\n\n")
+        config.note_segments = "month"
+        manager = NoteManager(config)
+
+        assert manager.split_projects_into_segments() == ["Garden"]
+        (segment,) = manager.project_files("Garden")
+        assert segment.read_text() == "# Project: Garden - my plans\n\n"
+        manager.add_note_to_project("Garden", "first")
+        assert segment.read_text().startswith("# Project: Garden - my plans\n\n\n## Entry: ")
+        assert manager.count_entries("Garden") == 1
+        manager.close()
+
+    def test_split_all_projects(self, tmp_path: Path):
+        config = AppConfig(custom_base_dir=tmp_path)
+        config.ensure_directories()
+        manager = NoteManager(config)
+        manager.add_note_to_project("Garden", "one")
+        manager.add_note_to_project("Kitchen", "two")
+        with pytest.raises(ValueError):
+            manager.split_projects_into_segments()
+
+        config.note_segments = "size"
+        assert manager.split_projects_into_segments() == ["Garden", "Kitchen"]
+        assert manager.split_projects_into_segments() == []
+        assert manager.list_projects() == ["Garden", "Kitchen"]
+        assert manager.get_latest_entry("Kitchen").content == "two"
+        manager.close()
+
+    def test_context_builder_follows_the_newest_segment(self, note_manager: NoteManager):
+        add_monthly_notes(note_manager, months=(1,))
+        builder = ContextBuilder(note_manager, max_entries=2)
+        assert builder.build("q", "Garden").entries == 2
+
+        note_manager.add_note_to_project("Garden", "in a new month", captured_at=datetime(2024, 2, 1))
+        note_manager.flush()
+        system = builder.build("q", "Garden").messages[0]["content"]
+        assert system.endswith(": in a new month")
+        assert "note 1-3" in system
+
+
+def test_plan_segments():
+    jan, feb = datetime(2024, 1, 5).timestamp(), datetime(2024, 2, 5).timestamp()
+    entries = [(jan, 100), (jan, 100), (feb, 100), (feb, 100), (feb, 100)]
+
+    assert plan_segments(entries, "month", 0) == [0, 2]
+    assert plan_segments(entries, "size", 250) == [0, 3]
+    assert plan_segments([], "month", 0) == []
+    # A backdated January entry after February ones stays in February's segment
+    assert plan_segments(entries + [(jan, 100)], "month", 0) == [0, 2]
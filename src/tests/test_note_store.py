@@ -0,0 +1,123 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.note_store import INDEX_HEADER_SIZE, INDEX_RECORD, EntryIndex, NoteStore, scan_entries
+
+NOTE = (
+    "# Project: Demo - Created 2024-05-01 08:00:00\n\n"
+    "\n## Entry: 2024-05-01 08:00:00\nfirst\n"
+    "\n## Entry: 2024-05-02 08:00:00\nsecond\nline two\n"
+)
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> NoteStore:
+    return NoteStore(tmp_path, tmp_path / ".index")
+
+
+class TestScanEntries:
+    def test_offsets_and_lengths_cover_blocks(self):
+        data = NOTE.encode()
+        records = scan_entries(data)
+
+        assert len(records) == 2
+        assert data[records[0].offset:records[0].end] == b"\n## Entry: 2024-05-01 08:00:00\nfirst\n"
+        assert records[1].end == len(data)
+        assert records[0].timestamp < records[1].timestamp
+
+    def test_scratchpad_entries(self):
+        data = b"# Global Scratchpad\n\n\n## Scratchpad Entry: 2024-05-01 08:00:00\nidea\n"
+        assert len(scan_entries(data)) == 1
+
+
+class TestNoteStore:
+    def test_append_records_offsets(self, store: NoteStore, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+
+        record = store.append_entry(note, "\n## Entry: 2024-05-03 08:00:00\nthird\n", 3.0)
+
+        assert record.offset == len(NOTE.encode())
+        assert store.count_entries(note) == 3
+        assert store.get_entry(note, -1).content == "third"
+        assert store.get_entry(note, 1).content == "second\nline two"
+
+    def test_index_is_fixed_size_records(self, store: NoteStore, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+        store.count_entries(note)
+
+        index_file = tmp_path / ".index" / "Demo.md.idx"
+        assert index_file.stat().st_size == INDEX_HEADER_SIZE + 2 * INDEX_RECORD.size
+
+    def test_reopened_index_is_reused(self, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+        first = EntryIndex(note, tmp_path / "Demo.idx")
+        reopened = EntryIndex(note, tmp_path / "Demo.idx")
+
+        assert len(reopened) == 2
+        assert reopened.record(0) == first.record(0)
+
+    def test_corrupt_index_is_rebuilt(self, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+        (tmp_path / "Demo.idx").write_bytes(b"garbage")
+
+        assert len(EntryIndex(note, tmp_path / "Demo.idx")) == 2
+
+    def test_unicode_offsets(self, store: NoteStore, tmp_path: Path):
+        note = tmp_path / "Unicode.md"
+        note.write_text("# Project: Unicode\n\n", encoding="utf-8")
+        store.append_entry(note, "\n## Entry: 2024-05-01 08:00:00\ncafé ☕\n", 1.0)
+        store.append_entry(note, "\n## Entry: 2024-05-01 08:00:01\nnext\n", 2.0)
+
+        assert store.get_entry(note, 0).content == "café ☕"
+        assert store.get_entry(note, 1).content == "next"
+
+    def test_tail_entries_match_get_entry(self, store: NoteStore, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+        store.append_entry(note, "\n## Entry: 2024-05-03 08:00:00\nthird ☕\n", 3.0)
+
+        tail = store.tail_entries(note, 2)
+        assert [e.content for e in tail] == ["second\nline two", "third ☕"]
+        assert [e.offset for e in tail] == [store.get_entry(note, i).offset for i in (1, 2)]
+        assert len(store.tail_entries(note, 10)) == 3
+        assert store.tail_entries(note, 0) == []
+        assert store.tail_entries(tmp_path / "Missing.md", 3) == []
+
+    def test_range_reads_include_backdated_entries(self, store: NoteStore, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+        may = lambda day: datetime(2024, 5, day, 8, 0).timestamp()
+        index = store.index_for(note)
+        assert index.in_order
+
+        store.append_entry(note, "\n## Entry: 2024-04-30 08:00:00\nbackdated\n", may(1) - 86400,
+                           backdated=True)
+        store.append_entry(note, "\n## Entry: 2024-05-01 12:00:00\nlate morning\n", may(1) + 4 * 3600,
+                           backdated=True)
+        assert not index.in_order
+        assert index.unsorted_at == 2
+
+        between = store.get_entries_between(note, may(1) - 86400, may(2))
+        assert [e.content for e in between] == ["backdated", "first", "late morning"]
+        assert [e.content for e in store.get_entries_between(note, may(2), may(3))] == ["second\nline two"]
+        # A reopened or rebuilt index remembers where order was lost
+        assert EntryIndex(note, index.index_path).unsorted_at == 2
+        index.rebuild()
+        assert index.unsorted_at == 2
+
+    def test_live_entry_is_never_stamped_before_the_latest(self, store: NoteStore, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+        late = datetime(2024, 5, 2, 8, 0).timestamp()
+
+        record = store.append_entry(note, "\n## Entry: 2024-05-01 09:00:00\nstale clock\n", late - 3600)
+
+        assert record.timestamp == late
+        assert note.read_text(encoding="utf-8").endswith("\n## Entry: 2024-05-02 08:00:00\nstale clock\n")
+        assert store.get_entry(note, -1).content == "stale clock"
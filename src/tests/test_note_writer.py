@@ -0,0 +1,121 @@
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.note_store import NoteStore
+from idea_to_markdown.note_writer import FileHandlePool, NoteWriter
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> NoteStore:
+    return NoteStore(tmp_path, tmp_path / ".index")
+
+
+def block(text: str, stamp: str = "2024-05-01 08:00:00") -> str:
+    return f"\n## Entry: {stamp}\n{text}\n"
+
+
+def at(stamp: str) -> float:
+    return datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+class TestFileHandlePool:
+    def test_reuses_and_bounds_open_handles(self, tmp_path: Path):
+        pool = FileHandlePool(max_open=2)
+        a = pool.get(tmp_path / "a.md")
+        assert pool.get(tmp_path / "a.md") is a
+        pool.get(tmp_path / "b.md")
+        pool.get(tmp_path / "c.md")
+
+        assert len(pool) == 2
+        assert a.closed
+        pool.close_all()
+        assert len(pool) == 0
+
+
+class TestNoteWriter:
+    def test_rejects_unknown_fsync_mode(self, store: NoteStore):
+        with pytest.raises(ValueError):
+            NoteWriter(store, fsync_mode="sometimes")
+
+    @pytest.mark.parametrize("fsync_mode", ["none", "batch", "entry"])
+    def test_write_through_without_group_commit(self, store: NoteStore, tmp_path: Path, fsync_mode: str):
+        writer = NoteWriter(store, fsync_mode=fsync_mode)
+        note = tmp_path / "Demo.md"
+        writer.write(note, block("one"), 1.0)
+        writer.write(note, block("two"), 2.0)
+
+        assert note.read_text(encoding="utf-8").count("## Entry:") == 2
+        assert store.get_entry(note, -1).content == "two"
+        assert writer.batches_written == 2
+        writer.close()
+
+    def test_group_commit_batches_until_flush(self, store: NoteStore, tmp_path: Path):
+        writer = NoteWriter(store, group_commit=True, max_batch_entries=100, flush_interval=60)
+        note = tmp_path / "Demo.md"
+        for i in range(10):
+            writer.write(note, block(f"entry {i}"), float(i))
+
+        assert not note.exists() or "entry" not in note.read_text(encoding="utf-8")
+        assert writer.pending == 10
+
+        writer.flush()
+        assert store.count_entries(note) == 10
+        assert writer.batches_written == 1
+        writer.close()
+
+    def test_group_commit_flushes_on_size_threshold(self, store: NoteStore, tmp_path: Path):
+        writer = NoteWriter(store, group_commit=True, max_batch_entries=5, flush_interval=60)
+        note = tmp_path / "Demo.md"
+        for i in range(5):
+            writer.write(note, block(f"entry {i}"), float(i))
+
+        deadline = time.monotonic() + 5
+        while writer.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+        assert store.count_entries(note) == 5
+
+    def test_group_commit_flushes_on_time_threshold(self, store: NoteStore, tmp_path: Path):
+        writer = NoteWriter(store, group_commit=True, max_batch_entries=100, flush_interval=0.05)
+        note = tmp_path / "Demo.md"
+        writer.write(note, block("lonely"), 1.0)
+
+        time.sleep(0.5)
+        assert writer.pending == 0
+        assert "lonely" in note.read_text(encoding="utf-8")
+        writer.close()
+
+    def test_close_flushes_and_rejects_further_writes(self, store: NoteStore, tmp_path: Path):
+        writer = NoteWriter(store, group_commit=True, flush_interval=60)
+        notes = [tmp_path / f"P{i}.md" for i in range(3)]
+        for note in notes:
+            writer.write(note, block("x"), 1.0)
+
+        writer.close()
+        assert all(store.count_entries(note) == 1 for note in notes)
+        assert len(writer.handles) == 0
+        with pytest.raises(ValueError):
+            writer.write(notes[0], block("late"), 2.0)
+
+    def test_queued_entry_is_restamped_after_another_processes_later_one(self, tmp_path: Path):
+        # Two stores on one directory stand in for two processes
+        queued = NoteWriter(NoteStore(tmp_path, tmp_path / ".index"), group_commit=True, flush_interval=60)
+        other = NoteStore(tmp_path, tmp_path / ".index")
+        note = tmp_path / "Demo.md"
+        queued.write(note, block("queued first", "2024-05-01 08:00:05"), at("2024-05-01 08:00:05"))
+        queued.write(note, block("memo", "2023-01-01 12:00:00"), at("2023-01-01 12:00:00"), backdated=True)
+        other.append_entry(note, block("written first", "2024-05-01 08:00:07"), at("2024-05-01 08:00:07"))
+        queued.close()
+
+        text = note.read_text(encoding="utf-8")
+        assert "## Entry: 2024-05-01 08:00:07\nqueued first" in text
+        assert "## Entry: 2023-01-01 12:00:00\nmemo" in text
+        entries = other.get_entries_between(note, 0, at("2025-01-01 00:00:00"))
+        assert [(e.content, e.timestamp) for e in entries] == [
+            ("memo", datetime(2023, 1, 1, 12)),
+            ("written first", datetime(2024, 5, 1, 8, 0, 7)),
+            ("queued first", datetime(2024, 5, 1, 8, 0, 7)),
+        ]
@@ -0,0 +1,90 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.note_store import NoteStore
+from idea_to_markdown.project_catalog import ProjectCatalog
+
+NOTE = (
+    "# Project: Demo - Created 2024-05-01 08:00:00\n\n"
+    "\n## Entry: 2024-05-01 08:00:00\nfirst\n"
+    "\n## Entry: 2024-05-02 08:00:00\nsecond\n"
+)
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> NoteStore:
+    return NoteStore(tmp_path, tmp_path / ".index")
+
+
+@pytest.fixture
+def catalog(tmp_path: Path, store: NoteStore) -> ProjectCatalog:
+    catalog = ProjectCatalog(tmp_path, "_scratchpad.md", store)
+    store.add_append_listener(catalog.record_append)
+    return catalog
+
+
+class TestProjectCatalog:
+    def test_lists_projects_without_scratchpad(self, catalog: ProjectCatalog, tmp_path: Path):
+        (tmp_path / "beta.md").write_text(NOTE, encoding="utf-8")
+        (tmp_path / "Alpha.md").write_text(NOTE, encoding="utf-8")
+        (tmp_path / "_scratchpad.md").write_text("# Global Scratchpad\n", encoding="utf-8")
+        (tmp_path / "notes.txt").write_text("not a project", encoding="utf-8")
+
+        assert catalog.names() == ["Alpha", "beta"]
+
+    def test_lookup_is_case_insensitive(self, catalog: ProjectCatalog, tmp_path: Path):
+        (tmp_path / "Garden Planner.md").write_text(NOTE, encoding="utf-8")
+
+        assert catalog.find("garden planner") == "Garden Planner"
+        assert catalog.find("  GARDEN PLANNER ") == "Garden Planner"
+        assert "garden PLANNER" in catalog
+        assert catalog.find("garden") is None
+
+    def test_rescans_only_when_directory_changes(self, catalog: ProjectCatalog, tmp_path: Path):
+        (tmp_path / "one.md").write_text(NOTE, encoding="utf-8")
+        catalog.names()
+        catalog.names()
+        catalog.find("one")
+        assert catalog.scans == 1
+
+        (tmp_path / "two.md").write_text(NOTE, encoding="utf-8")
+        # Make the change visible even on filesystems with coarse timestamps
+        stat = tmp_path.stat()
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert catalog.names() == ["one", "two"]
+        assert catalog.scans == 2
+
+        (tmp_path / "one.md").unlink()
+        stat = tmp_path.stat()
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert catalog.names() == ["two"]
+
+    def test_metadata_follows_appends(self, catalog: ProjectCatalog, store: NoteStore, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+        (tmp_path / ".index").mkdir()
+        assert catalog.get("demo").entry_count == 2
+
+        scans = catalog.scans
+        store.append_entry(note, "\n## Entry: 2024-05-03 08:00:00\nthird\n", 3.0)
+        info = catalog.get("DEMO")
+
+        assert info.entry_count == 3
+        assert info.size == note.stat().st_size
+        assert catalog.scans == scans
+
+    def test_hand_edits_reload_entry_count(self, catalog: ProjectCatalog, tmp_path: Path):
+        note = tmp_path / "Demo.md"
+        note.write_text(NOTE, encoding="utf-8")
+        assert catalog.get("Demo").entry_count == 2
+
+        with open(note, "a", encoding="utf-8") as f:
+            f.write("\n## Entry: 2024-05-03 08:00:00\nadded by hand\n")
+        assert catalog.get("Demo").entry_count == 3
+
+    def test_missing_directory_is_empty(self, tmp_path: Path, store: NoteStore):
+        catalog = ProjectCatalog(tmp_path / "missing", "_scratchpad.md", store)
+        assert catalog.names() == []
+        assert catalog.get("anything") is None
@@ -0,0 +1,120 @@
+import time
+
+import pytest
+
+from idea_to_markdown.project_resolver import (
+    ProjectResolver, normalize_transcript, parse_project_command, project_key)
+
+PROJECTS = [
+    "Alpha Project",
+    "Alpha Project 2",
+    "Garden Planner",
+    "My Novel",
+    "Podcast_Ideas",
+    "Home-Renovation",
+    "QA",
+    "General_Ideas",
+]
+
+THRESHOLD = 0.75
+
+
+@pytest.fixture(scope="module")
+def resolver() -> ProjectResolver:
+    return ProjectResolver(PROJECTS)
+
+
+class TestNormalization:
+    @pytest.mark.parametrize("text, expected", [
+        ("Use Alpha Project.", "use alpha project"),
+        ("  NEW   project:  Garden-Planner!! ", "new project garden planner"),
+        ("podcast_ideas?", "podcast ideas"),
+        ("Café Notes", "café notes"),
+    ])
+    def test_normalize_transcript(self, text, expected):
+        assert normalize_transcript(text) == expected
+
+    @pytest.mark.parametrize("a, b", [
+        ("Alpha Project", "alpha-project."),
+        ("Alpha Project", "the ALPHA  project"),
+        ("Podcast_Ideas", "podcast ideas"),
+        ("My Novel", "novel"),
+        ("Alpha Project 2", "alpha project two"),
+    ])
+    def test_equivalent_keys(self, a, b):
+        assert project_key(a) == project_key(b)
+
+
+class TestParseProjectCommand:
+    @pytest.mark.parametrize("transcript, expected", [
+        ("New project Garden Planner.", ("new", "garden planner")),
+        ("I'd like a new project called Space Notes!", ("new", "space notes")),
+        ("new project", (None, "new project")),
+        ("Use Alpha Project.", ("use", "alpha project")),
+        ("use project alpha project", ("use", "alpha project")),
+        ("Open my novel", ("use", "my novel")),
+        ("Switch to the garden planner?", ("use", "the garden planner")),
+        ("Scratchpad.", ("scratchpad", "")),
+        ("Let's use the scratchpad, please.", ("scratchpad", "")),
+        ("Alpha project.", (None, "alpha project")),
+        ("the house plans", (None, "the house plans")),
+    ])
+    def test_commands(self, transcript, expected):
+        assert parse_project_command(transcript) == expected
+
+
+class TestProjectResolver:
+    @pytest.mark.parametrize("spoken, expected", [
+        # Punctuation, casing and separators
+        ("Alpha Project.", "Alpha Project"),
+        ("ALPHA-PROJECT", "Alpha Project"),
+        ("alpha project two", "Alpha Project 2"),
+        ("alpha project 2.", "Alpha Project 2"),
+        ("podcast ideas", "Podcast_Ideas"),
+        ("home renovation!", "Home-Renovation"),
+        ("the garden planner", "Garden Planner"),
+        ("my novel", "My Novel"),
+        ("QA", "QA"),
+        # Mis-transcriptions
+        ("alfa project", "Alpha Project"),
+        ("garden planer", "Garden Planner"),
+        ("pod cast ideas", "Podcast_Ideas"),
+        ("home renovations", "Home-Renovation"),
+        ("general ideas.", "General_Ideas"),
+        # Unrelated names must not resolve
+        ("grocery list", None),
+        ("quarterly taxes", None),
+        ("garden", None),
+        ("", None),
+    ])
+    def test_best_match(self, resolver: ProjectResolver, spoken, expected):
+        assert resolver.best(spoken, THRESHOLD) == expected
+
+    def test_exact_key_scores_one(self, resolver: ProjectResolver):
+        matches = resolver.resolve("garden-planner")
+        assert [(m.name, m.score) for m in matches] == [("Garden Planner", 1.0)]
+
+    def test_candidates_are_ranked(self, resolver: ProjectResolver):
+        matches = resolver.resolve("alpha projekt", limit=3)
+
+        assert matches[0].name == "Alpha Project"
+        assert matches[1].name == "Alpha Project 2"
+        assert all(a.score >= b.score for a, b in zip(matches, matches[1:]))
+        assert all(0 < m.score < 1 for m in matches)
+
+    def test_update_replaces_projects(self):
+        resolver = ProjectResolver(["Old Name"])
+        resolver.update(["New Name"])
+
+        assert len(resolver) == 1
+        assert resolver.best("old name", THRESHOLD) is None
+        assert resolver.best("new name", THRESHOLD) == "New Name"
+
+    def test_scales_to_thousands_of_projects(self):
+        names = [f"Atlas Project {i}" for i in range(5000)] + ["Garden Planner"]
+        resolver = ProjectResolver(names)
+
+        start = time.perf_counter()
+        for _ in range(50):
+            assert resolver.best("garden planer", THRESHOLD) == "Garden Planner"
+        assert (time.perf_counter() - start) / 50 < 0.05
@@ -0,0 +1,119 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.search_index import SearchIndex, tokenize
+
+
+@pytest.fixture
+def test_config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    return config
+
+
+@pytest.fixture
+def note_manager(test_config: AppConfig) -> NoteManager:
+    manager = NoteManager(test_config)
+    manager.add_note_to_project("Garden", "Plant tomatoes near the south fence")
+    manager.add_note_to_project("Garden", "Order compost for the raised beds")
+    manager.add_note_to_project("Startup", "Pitch deck needs a slide on compost logistics")
+    manager.add_note_to_scratchpad("Buy tomatoes and basil")
+    return manager
+
+
+class TestTokenize:
+    def test_lowercases_and_drops_stopwords(self):
+        assert tokenize("Find the Notes about Project-X, please!") == ["find", "notes", "project", "x", "please"]
+
+    def test_unicode_terms(self):
+        assert tokenize("Café déjà vu") == ["café", "déjà", "vu"]
+
+
+class TestSearch:
+    def test_finds_entries_across_projects(self, note_manager: NoteManager):
+        results = note_manager.search("compost")
+        assert {r.project for r in results} == {"Garden", "Startup"}
+
+    def test_all_terms_rank_first(self, note_manager: NoteManager):
+        results = note_manager.search("compost beds")
+        assert results[0].entry.content == "Order compost for the raised beds"
+
+    def test_scratchpad_results_have_no_project(self, note_manager: NoteManager):
+        results = note_manager.search("basil")
+        assert len(results) == 1 and results[0].project is None
+
+    def test_project_filter_and_limit(self, note_manager: NoteManager):
+        assert [r.project for r in note_manager.search("compost", project="Startup")] == ["Startup"]
+        assert len(note_manager.search("compost", limit=1)) == 1
+        assert note_manager.search("the") == []
+
+    def test_new_notes_are_indexed_incrementally(self, note_manager: NoteManager):
+        note_manager.search("warm up")
+        note_manager.add_note_to_project("Garden", "Zucchini glut again")
+        note_manager.add_note_to_project("Recipes", "Zucchini bread")
+
+        assert note_manager.search_index.needs_refresh is False
+        assert {r.project for r in note_manager.search("zucchini")} == {"Garden", "Recipes"}
+
+
+class TestRefresh:
+    def test_only_changed_files_are_reindexed(self, note_manager: NoteManager, test_config: AppConfig):
+        assert note_manager.refresh_search_index() == 3
+        note_manager.close()
+
+        reopened = NoteManager(test_config)
+        assert reopened.refresh_search_index() == 0
+
+        project_file = test_config.get_project_file_path("Startup")
+        with open(project_file, "a", encoding="utf-8") as f:
+            f.write("\n## Entry: 2030-01-01 10:00:00\nHand written idea about hydroponics\n")
+        assert reopened.refresh_search_index() == 1
+        assert reopened.search("hydroponics")[0].project == "Startup"
+
+    def test_deleted_files_are_dropped(self, note_manager: NoteManager, test_config: AppConfig):
+        note_manager.refresh_search_index()
+        os.remove(test_config.get_project_file_path("Startup"))
+
+        note_manager.refresh_search_index()
+        assert {r.project for r in note_manager.search("compost")} == {"Garden"}
+        assert len(note_manager.search_index) == 3
+
+    @pytest.mark.parametrize("data", [
+        b"not json",
+        b"\x80\x04\x95\x00\x00\x00\x00\x00\x00\x00\x00.",  # a pickle
+        b'{"version": 2, "files": {"a.md": {"mtime_ns": 0, "size": 0, "timestamps": [], '
+        b'"terms": {"x": [5, 1]}}}}',
+        b'{"version": 2, "files": []}',
+    ])
+    def test_unreadable_index_file_starts_over(self, tmp_path: Path, data: bytes):
+        index_path = tmp_path / "search.json"
+        index_path.write_bytes(data)
+        index = SearchIndex(index_path)
+        index.load()
+        assert index.loaded and len(index) == 0
+        assert index.needs_refresh
+
+    def test_saved_index_round_trips(self, note_manager: NoteManager, test_config: AppConfig):
+        note_manager.refresh_search_index()
+        note_manager.close()
+
+        index = SearchIndex(test_config.get_index_dir() / "search.json")
+        index.load()
+        assert len(index) == 4 and not index.needs_refresh
+        assert [(h.file_key, h.entry_number) for h in index.search("compost beds")][0] == ("Garden.md", 1)
+
+    def test_entries_written_by_another_process_are_found(self, note_manager: NoteManager,
+                                                         test_config: AppConfig):
+        note_manager.search("warm up")
+        other = NoteManager(test_config)  # stands in for another process
+        other.add_note_to_project("Garden", "Hydroponic lettuce tower")
+        other.add_note_to_project("Orchard", "Hydroponic figs")
+        other.close()
+
+        results = note_manager.search("hydroponic")
+        assert {r.project for r in results} == {"Garden", "Orchard"}
+        assert len(note_manager.search("compost")) == 2
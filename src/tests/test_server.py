@@ -0,0 +1,184 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.server import (AUDIO_CHUNK, END_OF_UTTERANCE, JSON_EVENT, MAX_FRAME_BYTES,
+                                     NoteServer, SPEECH_AUDIO, TEXT_UTTERANCE, read_frame,
+                                     write_frame)
+from tests.fakes import FakeOpenAIServer, make_tone_pcm
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    config.server_max_workers = 8
+    return config
+
+
+class Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, port: int) -> "Client":
+        client = cls(*await asyncio.open_connection("127.0.0.1", port))
+        assert (await client.next_event())["event"] == "prompt"
+        return client
+
+    async def next_event(self) -> dict:
+        kind, payload = await read_frame(self.reader)
+        assert kind == JSON_EVENT
+        return json.loads(payload)
+
+    async def say(self, text: str) -> tuple[list[dict], bytes | None]:
+        """Sends a text utterance; returns its events and any reply audio."""
+        write_frame(self.writer, TEXT_UTTERANCE, text.encode("utf-8"))
+        await self.writer.drain()
+        return await self.read_turn()
+
+    async def read_turn(self) -> tuple[list[dict], bytes | None]:
+        events, speech = [], None
+        while True:
+            kind, payload = await read_frame(self.reader)
+            if kind == SPEECH_AUDIO:
+                speech = payload
+                continue
+            event = json.loads(payload)
+            events.append(event)
+            if event["event"] in ("turn_done", "bye"):
+                return events, speech
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run_with_server(config: AppConfig, api: FakeOpenAIServer, scenario):
+    server = NoteServer(config, client=api.make_client())
+    await server.start(port=0)
+    try:
+        return await scenario(server)
+    finally:
+        await server.close()
+
+
+class TestNoteServer:
+    def test_concurrent_sessions_keep_their_own_projects(self, config: AppConfig):
+        async def session(port: int, number: int):
+            client = await Client.connect(port)
+            events, _ = await client.say(f"new project plot {number}")
+            assert events[0]["project"] == f"plot {number}"
+            for i in range(3):
+                events, _ = await client.say(f"idea {i} from client {number}")
+                assert events[0]["event"] == "note_saved"
+                assert events[0]["project"] == f"plot {number}"
+            events, _ = await client.say("exit agent")
+            assert events[-1]["event"] == "bye"
+            await client.close()
+
+        async def scenario(server: NoteServer):
+            await asyncio.gather(*(session(server.port, n) for n in range(6)))
+            return server
+
+        with FakeOpenAIServer() as api:
+            server = asyncio.run(run_with_server(config, api, scenario))
+
+        assert server.sessions == 6 and server.active_sessions == 0
+        # Notes and commands are routed locally: no chat reply was requested
+        assert "chat" not in api.requests
+        for n in range(6):
+            # "initiated" marker plus three notes
+            assert server.note_manager.count_entries(f"plot {n}") == 4
+            assert server.note_manager.get_latest_entry(f"plot {n}").content == f"idea 2 from client {n}"
+
+    def test_shared_project_is_created_once(self, config: AppConfig):
+        async def scenario(server: NoteServer):
+            clients = await asyncio.gather(*(Client.connect(server.port) for _ in range(4)))
+            await asyncio.gather(*(c.say("scratchpad") for c in clients))
+            await asyncio.gather(*(c.say(f"shared note {i}") for i, c in enumerate(clients)))
+            for c in clients:
+                await c.close()
+            return server
+
+        with FakeOpenAIServer() as api:
+            server = asyncio.run(run_with_server(config, api, scenario))
+
+        text = config.get_scratchpad_file_path().read_text(encoding="utf-8")
+        assert text.count("# Global Scratchpad") == 1
+        assert text.count("shared note") == 4
+
+    def test_audio_utterance_is_transcribed_and_questions_answered(self, config: AppConfig):
+        async def scenario(server: NoteServer):
+            client = await Client.connect(server.port)
+            await client.say("scratchpad")
+            recording = make_tone_pcm(0.5)
+            for start in range(0, len(recording), 4096):
+                write_frame(client.writer, AUDIO_CHUNK, recording[start:start + 4096])
+            write_frame(client.writer, END_OF_UTTERANCE)
+            await client.writer.drain()
+            result = await client.read_turn()
+            await client.close()
+            return result
+
+        with FakeOpenAIServer(transcript="what should I plant next?", reply="Try beans.") as api:
+            events, speech = asyncio.run(run_with_server(config, api, scenario))
+
+        names = [e["event"] for e in events]
+        assert names == ["transcript", "note_saved", "reply", "turn_done"]
+        assert events[2]["text"] == "Try beans."
+        assert speech[:4] == b"RIFF"
+        assert api.requests.count("transcriptions") == 1
+
+    def test_oversized_frame_closes_the_session(self, config: AppConfig):
+        async def scenario(server: NoteServer):
+            client = await Client.connect(server.port)
+            client.writer.write(b"T" + (MAX_FRAME_BYTES + 1).to_bytes(4, "big"))
+            await client.writer.drain()
+            return await read_frame(client.reader)
+
+        with FakeOpenAIServer() as api:
+            assert asyncio.run(run_with_server(config, api, scenario)) is None
+
+    def test_failed_turn_is_reported_and_session_continues(self, config: AppConfig, monkeypatch):
+        async def scenario(server: NoteServer):
+            client = await Client.connect(server.port)
+            await client.say("scratchpad")
+            save_note = server.note_manager.add_note_to_scratchpad
+
+            def failing_write(content, captured_at=None):
+                raise OSError("disk full")
+
+            monkeypatch.setattr(server.note_manager, "add_note_to_scratchpad", failing_write)
+            failed = await client.say("this one is lost")
+            monkeypatch.setattr(server.note_manager, "add_note_to_scratchpad", save_note)
+            saved = await client.say("this one is kept")
+            await client.close()
+            return failed, saved
+
+        with FakeOpenAIServer() as api:
+            (failed, _), (saved, _) = asyncio.run(run_with_server(config, api, scenario))
+
+        assert [e["event"] for e in failed] == ["error", "turn_done"]
+        assert "disk full" in failed[0]["message"]
+        assert saved[0]["event"] == "note_saved"
+
+    def test_project_name_cannot_escape_the_notes_directory(self, config: AppConfig):
+        async def scenario(server: NoteServer):
+            client = await Client.connect(server.port)
+            events, _ = await client.say("x/../../../escaped")
+            await client.say("a note")
+            await client.close()
+            return events
+
+        with FakeOpenAIServer() as api:
+            events = asyncio.run(run_with_server(config, api, scenario))
+
+        project = events[0]["project"]
+        assert "/" not in project and ".." not in project
+        assert config.get_project_file_path(project).parent == config.notes_dir
+        assert not (config.notes_dir / "x/../../../escaped.md").resolve().exists()
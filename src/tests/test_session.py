@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.session import ConversationSession
+
+
+@pytest.fixture
+def notes(tmp_path: Path) -> NoteManager:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.ensure_directories()
+    notes = NoteManager(config)
+    notes.add_note_to_project("Garden Planner", "first idea")
+    return notes
+
+
+@pytest.mark.parametrize("reply, project", [
+    ("use the garden planer", "Garden Planner"),
+    ("garden planner", "Garden Planner"),
+    ("new project Bird Feeder", "bird feeder"),
+    ("scratchpad", None),
+    (None, "General_Ideas"),
+])
+def test_select_project(notes: NoteManager, reply, project):
+    session = ConversationSession(notes.config, notes)
+    message = session.select_project(reply)
+
+    assert session.current_project == project
+    assert not session.awaiting_project
+    assert message.startswith(("Okay", "No project"))
+
+
+def test_sessions_share_notes_but_not_projects(notes: NoteManager):
+    first = ConversationSession(notes.config, notes)
+    second = ConversationSession(notes.config, notes)
+    first.select_project("use garden planner")
+    second.select_project("scratchpad")
+
+    assert first.save_note("plant beans") == "Note saved: 'plant beans'"
+    second.save_note("buy a notebook")
+
+    assert notes.get_latest_entry("Garden Planner").content == "plant beans"
+    assert "buy a notebook" in notes.config.get_scratchpad_file_path().read_text(encoding="utf-8")
+    results, summary = second.search("beans")
+    assert results[0].project == "Garden Planner"
+    assert "Garden Planner" in summary
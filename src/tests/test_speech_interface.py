@@ -0,0 +1,274 @@
+import time
+
+import pytest
+from pathlib import Path
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.speech_interface import SpeechInterface
+from tests.fakes import FakeOpenAIServer, FakePyAudio, make_silence_pcm, make_tone_pcm, make_wav_bytes
+
+
+@pytest.fixture
+def test_config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.voice_recording_duration = 1
+    # Most tests exercise the reply path, which routing skips for notes
+    config.intent_routing = False
+    return config
+
+
+SPOKEN_INPUT = make_silence_pcm(0.5) + make_tone_pcm(1.0)
+
+
+@pytest.fixture
+def slow_reply_server():
+    with FakeOpenAIServer(transcript="remember the milk", stt_latency=0.05,
+                          chat_latency=0.4, tts_latency=0.4) as server:
+        yield server
+
+
+class TestIntentRouting:
+    def test_dictated_note_skips_reply_calls(self, test_config: AppConfig):
+        test_config.intent_routing = True
+        audio = FakePyAudio(SPOKEN_INPUT)
+        with FakeOpenAIServer(transcript="Remember the milk.") as server:
+            speech = SpeechInterface(test_config, client=server.make_client(), audio_interface=audio)
+            text = speech.conduct_realtime_conversation_turn()
+
+        assert text == "Remember the milk."
+        assert server.requests == ["transcriptions"]
+        assert speech.last_turn_report.intent == "note"
+        assert speech.last_turn_report.avoided_calls == ("chat", "tts")
+        assert speech.intent_router.avoided_calls == {"chat": 1, "tts": 1}
+        assert audio.played_bytes == 0
+
+    def test_question_still_gets_a_reply(self, test_config: AppConfig):
+        test_config.intent_routing = True
+        with FakeOpenAIServer(transcript="What should I call this project?") as server:
+            speech = SpeechInterface(test_config, client=server.make_client(),
+                                     audio_interface=FakePyAudio(SPOKEN_INPUT))
+            speech.conduct_realtime_conversation_turn()
+
+        assert server.requests == ["transcriptions", "chat", "speech"]
+        assert speech.last_turn_report.avoided_calls == ()
+
+    def test_deferred_reply_runs_in_background(self, test_config: AppConfig, slow_reply_server):
+        test_config.intent_routing = True
+        test_config.intent_policy = "note=defer"
+        speech = SpeechInterface(test_config, client=slow_reply_server.make_client(),
+                                 audio_interface=FakePyAudio(SPOKEN_INPUT))
+
+        started = time.monotonic()
+        speech.conduct_realtime_conversation_turn()
+        assert time.monotonic() - started < 0.4
+        assert speech.last_turn_report.deferred_calls == ("chat", "tts")
+
+        assert speech.wait_for_pending_responses(timeout=5)
+        assert slow_reply_server.requests == ["transcriptions", "chat", "speech"]
+        speech.close()
+
+    def test_project_reply_is_a_command(self, test_config: AppConfig):
+        test_config.intent_routing = True
+        with FakeOpenAIServer(transcript="What about the garden planner?") as server:
+            speech = SpeechInterface(test_config, client=server.make_client(),
+                                     audio_interface=FakePyAudio(SPOKEN_INPUT))
+            speech.conduct_realtime_conversation_turn(context="project")
+
+        assert speech.last_turn_report.intent == "project"
+        assert server.requests == ["transcriptions"]
+
+
+class TestPipelinedTurns:
+    def test_sequential_turn_waits_for_reply(self, test_config: AppConfig, slow_reply_server):
+        audio = FakePyAudio(SPOKEN_INPUT)
+        speech = SpeechInterface(
+            test_config, client=slow_reply_server.make_client(), audio_interface=audio)
+
+        started = time.monotonic()
+        text = speech.conduct_realtime_conversation_turn()
+        elapsed = time.monotonic() - started
+
+        assert text == "remember the milk"
+        assert elapsed >= 0.8
+        assert slow_reply_server.requests == ["transcriptions", "chat", "speech"]
+        assert audio.played_bytes > 0
+
+    def test_pipelined_turn_returns_after_transcription(self, test_config: AppConfig, slow_reply_server):
+        test_config.pipelined_turns = True
+        audio = FakePyAudio(SPOKEN_INPUT)
+        speech = SpeechInterface(
+            test_config, client=slow_reply_server.make_client(), audio_interface=audio)
+
+        started = time.monotonic()
+        text = speech.conduct_realtime_conversation_turn()
+        elapsed = time.monotonic() - started
+
+        assert text == "remember the milk"
+        assert elapsed < 0.4
+        assert audio.played_bytes == 0
+
+        assert speech.wait_for_pending_responses(timeout=5)
+        assert slow_reply_server.requests == ["transcriptions", "chat", "speech"]
+        assert audio.played_bytes > 0
+        speech.close()
+
+    def test_next_recording_overlaps_previous_reply(self, test_config: AppConfig, slow_reply_server):
+        test_config.pipelined_turns = True
+        speech = SpeechInterface(
+            test_config, client=slow_reply_server.make_client(), audio_interface=FakePyAudio(SPOKEN_INPUT))
+
+        started = time.monotonic()
+        speech.conduct_realtime_conversation_turn()
+        speech.conduct_realtime_conversation_turn()
+        two_turns = time.monotonic() - started
+        speech.close()
+
+        # Two sequential turns would take at least 2 * (chat + tts)
+        assert two_turns < 0.8
+        assert slow_reply_server.requests.count("speech") == 2
+
+
+class TestVoiceActivityRecording:
+    def test_turn_stops_on_silence_and_reports_dead_air(self, test_config: AppConfig):
+        test_config.voice_recording_duration = 5
+        with FakeOpenAIServer(transcript="short thought") as server:
+            speech = SpeechInterface(
+                test_config, client=server.make_client(),
+                audio_interface=FakePyAudio(make_silence_pcm(2.0) + make_tone_pcm(1.0)))
+            assert speech.conduct_realtime_conversation_turn() == "short thought"
+        assert speech.last_dead_air_seconds >= 2.0
+
+    def test_no_speech_skips_transcription(self, test_config: AppConfig):
+        with FakeOpenAIServer() as server:
+            speech = SpeechInterface(
+                test_config, client=server.make_client(), audio_interface=FakePyAudio())
+            assert speech.conduct_realtime_conversation_turn() is None
+            assert server.requests == []
+
+    def test_fixed_duration_recording_when_vad_disabled(self, test_config: AppConfig):
+        test_config.vad_enabled = False
+        speech = SpeechInterface(test_config, client=object(), audio_interface=FakePyAudio())
+        stream = speech.audio_interface.open(input=True)
+        segments = speech._record_speech_segments(stream)
+        assert len(segments) == 1
+        assert len(segments[0]) == int(16000 / 1024 * test_config.voice_recording_duration) * 1024 * 2
+
+
+class TestInMemoryAudio:
+    def test_upload_is_a_complete_wav(self, test_config: AppConfig):
+        test_config.upload_format = "wav"
+        with FakeOpenAIServer() as server:
+            speech = SpeechInterface(
+                test_config, client=server.make_client(), audio_interface=FakePyAudio(SPOKEN_INPUT))
+            speech.conduct_realtime_conversation_turn()
+
+        body = server.uploads[0]
+        riff = body.index(b"RIFF")
+        data_size = int.from_bytes(body[riff + 40:riff + 44], "little")
+        assert body[riff + 8:riff + 12] == b"WAVE"
+        assert data_size > 0 and body[riff + 44:riff + 44 + data_size].count(b"\x00") < data_size
+
+    def test_buffered_reply_when_streaming_disabled(self, test_config: AppConfig):
+        test_config.streaming_tts = False
+        audio = FakePyAudio(SPOKEN_INPUT)
+        with FakeOpenAIServer(speech_duration=0.2) as server:
+            speech = SpeechInterface(test_config, client=server.make_client(), audio_interface=audio)
+            speech.conduct_realtime_conversation_turn()
+
+        assert audio.played_bytes == int(0.2 * 24000) * 2
+        assert speech.last_time_to_first_audio is None
+
+    def test_playback_uses_wav_format_and_slices(self, test_config: AppConfig):
+        audio = FakePyAudio()
+        speech = SpeechInterface(test_config, client=object(), audio_interface=audio)
+        speech.play_audio_stream(make_wav_bytes(duration=0.2, rate=24000))
+
+        assert audio.played_bytes == int(0.2 * 24000) * 2
+        assert max(len(chunk) for chunk in audio.streams[0].written) == 1024 * 2
+
+    def test_playback_of_raw_pcm(self, test_config: AppConfig):
+        audio = FakePyAudio()
+        speech = SpeechInterface(test_config, client=object(), audio_interface=audio)
+        speech.play_audio_stream(make_tone_pcm(0.1))
+        assert audio.played_bytes == len(make_tone_pcm(0.1))
+
+
+def fake_chunked_tts(chunks: int, chunk_bytes: int, delay: float):
+    """Yields PCM chunks with a pause before each, like a slow TTS download."""
+    for _ in range(chunks):
+        time.sleep(delay)
+        yield make_tone_pcm(chunk_bytes / 2 / 24000, rate=24000)
+
+
+class TestStreamingPlayback:
+    def test_playback_starts_on_first_chunk(self, test_config: AppConfig):
+        audio = FakePyAudio()
+        speech = SpeechInterface(test_config, client=object(), audio_interface=audio)
+
+        started = time.monotonic()
+        first_audio = speech.play_pcm_stream(fake_chunked_tts(10, 4800, 0.05))
+        total = time.monotonic() - started
+
+        assert first_audio < 0.25
+        assert total >= 0.5
+        assert speech.last_time_to_first_audio == first_audio
+        assert audio.played_bytes == 10 * 4800
+        assert all(len(chunk) % 2 == 0 for chunk in audio.streams[0].written)
+
+    def test_download_is_bounded_by_ring_buffer(self, test_config: AppConfig):
+        test_config.playback_buffer_seconds = 0.1
+        consumed = []
+
+        def chunks():
+            for _ in range(50):
+                consumed.append(1)
+                yield b"\x01\x00" * 1200
+
+        class SlowStream:
+            def __init__(self):
+                self.max_ahead = 0
+
+            def write(self, data):
+                self.max_ahead = max(self.max_ahead, len(consumed) * 2400 - audio.played_bytes)
+                audio.played_bytes += len(data)
+                time.sleep(0.001)
+
+            def stop_stream(self):
+                pass
+
+            def close(self):
+                pass
+
+        class SlowAudio(FakePyAudio):
+            played_bytes = 0
+
+            def open(self, **kwargs):
+                self.stream = SlowStream()
+                return self.stream
+
+        audio = SlowAudio()
+        speech = SpeechInterface(test_config, client=object(), audio_interface=audio)
+        speech.play_pcm_stream(chunks())
+
+        assert audio.played_bytes == 50 * 2400
+        # Never more than the buffer (4800 bytes) plus the chunks in flight ahead
+        assert audio.stream.max_ahead <= 4800 + 3 * 2400
+
+    def test_download_errors_are_raised(self, test_config: AppConfig):
+        def failing_chunks():
+            yield b"\x00\x00" * 100
+            raise ConnectionError("connection reset")
+
+        speech = SpeechInterface(test_config, client=object(), audio_interface=FakePyAudio())
+        with pytest.raises(ConnectionError):
+            speech.play_pcm_stream(failing_chunks())
+
+    def test_turn_streams_reply_from_server(self, test_config: AppConfig):
+        audio = FakePyAudio(SPOKEN_INPUT)
+        with FakeOpenAIServer(speech_duration=1.0, speech_chunk_size=4800,
+                              speech_chunk_delay=0.05) as server:
+            speech = SpeechInterface(test_config, client=server.make_client(), audio_interface=audio)
+            speech.conduct_realtime_conversation_turn()
+
+        assert audio.played_bytes == 24000 * 2
+        assert speech.last_time_to_first_audio < 0.4
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import idea_to_markdown
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.speech_interface import SpeechInterface
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = {"openai", "pyaudio", "numpy"}
+# Generous for slow CI machines; with openai the same import takes about a second
+IMPORT_BUDGET_MS = 300
+
+
+def import_times(statement: str) -> dict[str, float]:
+    """Runs `statement` in a fresh interpreter; cumulative import time (ms) per module."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [str(SRC_DIR), os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True, env=env, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative) / 1000
+    return times
+
+
+@pytest.mark.parametrize("statement", [
+    "from idea_to_markdown import NoteManager",
+    "import idea_to_markdown.note_manager",
+    "import idea_to_markdown.main",
+    "import idea_to_markdown.bulk_import",
+])
+def test_note_tools_start_without_audio_or_api_stack(statement: str):
+    times = import_times(statement)
+
+    assert not HEAVY_MODULES & {name.split(".")[0] for name in times}
+    assert times["idea_to_markdown"] < IMPORT_BUDGET_MS
+    package_modules = [name for name in times if name.startswith("idea_to_markdown.")]
+    assert max(times[name] for name in package_modules) < IMPORT_BUDGET_MS
+
+
+def test_package_attributes_are_lazy():
+    assert "SpeechInterface" in dir(idea_to_markdown)
+    assert idea_to_markdown.SpeechInterface is SpeechInterface
+    with pytest.raises(AttributeError):
+        idea_to_markdown.Missing
+
+
+def test_client_and_audio_are_created_on_first_use(tmp_path: Path):
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.openai_api_key = "sk-test"
+    speech = SpeechInterface(config)
+
+    assert speech.openai_engine._client is None
+    assert speech._audio_interface is None
+    client = speech.client
+    assert client is not None
+    assert speech.client is client
+    speech.close()
+
+
+def test_missing_api_key_leaves_client_unset(tmp_path: Path):
+    config = AppConfig(custom_base_dir=tmp_path)
+    config.openai_api_key = None
+    speech = SpeechInterface(config)
+
+    assert speech.client is None
+    assert speech.say("hello") is None
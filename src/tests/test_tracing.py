@@ -0,0 +1,137 @@
+import contextvars
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.note_manager import NoteManager
+from idea_to_markdown.speech_interface import SpeechInterface
+from idea_to_markdown.tracing import NULL_SPAN, LatencyHistogram, Tracer
+from tests.fakes import FakeOpenAIServer, FakePyAudio, make_silence_pcm, make_tone_pcm
+
+
+def read_trace(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestLatencyHistogram:
+    def test_percentiles_within_bucket_accuracy(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.add(float(value))
+
+        assert histogram.count == 1000
+        assert histogram.max == 1000.0
+        for p, expected in [(50, 500), (95, 950), (99, 990)]:
+            assert expected <= histogram.percentile(p) <= expected * LatencyHistogram.GROWTH
+
+    def test_empty_and_single_sample(self):
+        histogram = LatencyHistogram()
+        assert histogram.percentile(99) == 0.0
+        histogram.add(12.5)
+        assert histogram.percentile(50) == 12.5
+
+
+class TestTracer:
+    def test_disabled_tracer_is_a_no_op(self, tmp_path: Path):
+        tracer = Tracer(enabled=False, trace_path=tmp_path / "trace.jsonl")
+        with tracer.span("stt", bytes_up=10) as span:
+            span.add("retries")
+
+        assert span is NULL_SPAN
+        assert tracer.summary() == {}
+        assert not (tmp_path / "trace.jsonl").exists()
+
+    def test_spans_write_jsonl_and_histograms(self, tmp_path: Path):
+        trace_path = tmp_path / "logs" / "trace.jsonl"
+        tracer = Tracer(enabled=True, trace_path=trace_path)
+        turn = tracer.start_turn()
+        for _ in range(3):
+            with tracer.span("stt", bytes_up=100) as span:
+                span.set("retries", 1)
+                time.sleep(0.01)
+        tracer.record("tts_first_audio", 0.2)
+        tracer.close()
+
+        records = read_trace(trace_path)
+        assert [r["span"] for r in records] == ["stt", "stt", "stt", "tts_first_audio"]
+        assert all(r["turn"] == turn for r in records)
+        assert records[0]["bytes_up"] == 100
+        assert records[0]["duration_ms"] >= 10
+
+        stats = tracer.summary()["stt"]
+        assert stats["count"] == 3
+        assert stats["bytes_up"] == 300
+        assert stats["retries"] == 3
+        assert 10 <= stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+        assert "stt" in tracer.format_summary()
+
+    def test_failed_span_records_error(self):
+        tracer = Tracer(enabled=True)
+        with pytest.raises(RuntimeError):
+            with tracer.span("chat"):
+                raise RuntimeError("boom")
+        assert tracer.summary()["chat"]["count"] == 1
+
+    def test_turn_follows_copied_context_into_threads(self, tmp_path: Path):
+        trace_path = tmp_path / "trace.jsonl"
+        tracer = Tracer(enabled=True, trace_path=trace_path)
+
+        def work():
+            with tracer.span("chat"):
+                pass
+
+        def run_turn():
+            tracer.start_turn()
+            thread = threading.Thread(target=contextvars.copy_context().run, args=(work,))
+            thread.start()
+            thread.join()
+
+        context = contextvars.copy_context()
+        context.run(run_turn)
+        tracer.close()
+
+        assert read_trace(trace_path)[0]["turn"] == 1
+
+
+class TestInstrumentedTurn:
+    @pytest.fixture
+    def config(self, tmp_path: Path) -> AppConfig:
+        config = AppConfig(custom_base_dir=tmp_path)
+        config.voice_recording_duration = 1
+        config.intent_routing = False
+        config.tracing_enabled = True
+        config.trace_file = tmp_path / "trace.jsonl"
+        return config
+
+    def test_turn_records_every_stage(self, config: AppConfig):
+        tracer = Tracer.from_config(config)
+        audio = FakePyAudio(make_silence_pcm(0.5) + make_tone_pcm(1.0))
+        with FakeOpenAIServer(transcript="remember the milk", speech_chunk_delay=0.01,
+                              failures={"chat": 1}) as server:
+            speech = SpeechInterface(config, client=server.make_client(max_retries=1),
+                                     audio_interface=audio, tracer=tracer)
+            speech.conduct_realtime_conversation_turn()
+        tracer.close()
+
+        records = {r["span"]: r for r in read_trace(config.trace_file)}
+        assert {"record", "encode", "stt", "chat", "tts", "tts_first_audio", "playback"} <= set(records)
+        assert all(r["turn"] == 1 for r in records.values())
+        # The recording is trimmed and compressed before it is uploaded
+        assert records["encode"]["bytes_in"] == records["record"]["bytes"]
+        assert records["stt"]["bytes_up"] == records["encode"]["bytes_out"] < records["record"]["bytes"]
+        assert records["chat"]["retries"] == 1
+        assert records["stt"]["retries"] == 0
+        assert records["tts"]["bytes_down"] == records["playback"]["bytes"] > 0
+
+    def test_note_writes_are_traced(self, config: AppConfig):
+        config.ensure_directories()
+        tracer = Tracer.from_config(config)
+        notes = NoteManager(config, tracer=tracer)
+        notes.add_note_to_project("Traced", "an idea")
+        notes.close()
+
+        assert tracer.summary()["note_write"]["count"] == 1
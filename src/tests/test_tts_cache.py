@@ -0,0 +1,97 @@
+import pytest
+from pathlib import Path
+
+from idea_to_markdown.config import AppConfig
+from idea_to_markdown.speech_interface import ERROR_MESSAGES, NOT_CAUGHT_MESSAGE, SpeechInterface
+from idea_to_markdown.tts_cache import TTSCache
+from tests.fakes import FakeOpenAIServer, FakePyAudio
+
+
+class CountingSynth:
+    def __init__(self, size: int = 100):
+        self.calls = 0
+        self.size = size
+
+    def __call__(self) -> bytes:
+        self.calls += 1
+        return bytes([self.calls % 256]) * self.size
+
+
+class TestTTSCache:
+    def test_key_depends_on_every_field(self):
+        base = TTSCache.make_key("tts-1", "alloy", "wav", "hello")
+        assert base == TTSCache.make_key("tts-1", "alloy", "wav", "hello")
+        assert base != TTSCache.make_key("tts-1-hd", "alloy", "wav", "hello")
+        assert base != TTSCache.make_key("tts-1", "echo", "wav", "hello")
+        assert base != TTSCache.make_key("tts-1", "alloy", "pcm", "hello")
+        assert base != TTSCache.make_key("tts-1", "alloy", "wav", "hello!")
+
+    def test_miss_then_hit(self, tmp_path: Path):
+        cache = TTSCache(tmp_path)
+        synth = CountingSynth()
+
+        first = cache.get_or_create("tts-1", "alloy", "wav", "hi", synth)
+        second = cache.get_or_create("tts-1", "alloy", "wav", "hi", synth)
+
+        assert first == second
+        assert synth.calls == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_disk_tier_survives_restart(self, tmp_path: Path):
+        synth = CountingSynth()
+        TTSCache(tmp_path).get_or_create("tts-1", "alloy", "wav", "hi", synth)
+
+        reopened = TTSCache(tmp_path)
+        assert reopened.get_or_create("tts-1", "alloy", "wav", "hi", synth) == b"\x01" * 100
+        assert synth.calls == 1
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = TTSCache(None, memory_limit_bytes=250)
+        cache.put("a", b"a" * 100)
+        cache.put("b", b"b" * 100)
+        cache.get("a")
+        cache.put("c", b"c" * 100)
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_disk_tier_evicts_to_size_limit(self, tmp_path: Path):
+        cache = TTSCache(tmp_path, memory_limit_bytes=0, disk_limit_bytes=250)
+        for key in "abcd":
+            cache.put(key, key.encode() * 100)
+
+        total = sum(p.stat().st_size for p in tmp_path.glob("*.audio"))
+        assert total <= 250
+        assert cache.get("d") is not None
+
+    def test_failed_synthesis_is_not_cached(self, tmp_path: Path):
+        cache = TTSCache(tmp_path)
+        assert cache.get_or_create("tts-1", "alloy", "wav", "hi", lambda: None) is None
+        assert list(tmp_path.glob("*.audio")) == []
+
+
+class TestSpeechInterfaceCache:
+    @pytest.fixture
+    def test_config(self, tmp_path: Path) -> AppConfig:
+        return AppConfig(custom_base_dir=tmp_path)
+
+    def test_error_speech_uses_one_api_call(self, test_config: AppConfig):
+        with FakeOpenAIServer() as server:
+            speech = SpeechInterface(test_config, client=server.make_client(), audio_interface=FakePyAudio())
+            for _ in range(3):
+                assert speech._generate_error_speech(NOT_CAUGHT_MESSAGE)
+        assert server.requests == ["speech"]
+
+    def test_prewarm_fills_cache_for_next_session(self, test_config: AppConfig):
+        with FakeOpenAIServer() as server:
+            speech = SpeechInterface(test_config, client=server.make_client(), audio_interface=FakePyAudio())
+            speech.prewarm_speech_cache(["Welcome!"]).join(timeout=10)
+            assert server.requests.count("speech") == len(ERROR_MESSAGES) + 1
+
+            next_session = SpeechInterface(
+                test_config, client=server.make_client(), audio_interface=FakePyAudio())
+            next_session.speak("Welcome!")
+            next_session._generate_error_speech(NOT_CAUGHT_MESSAGE)
+        assert server.requests.count("speech") == len(ERROR_MESSAGES) + 1
+        assert next_session.audio_interface.played_bytes > 0
@@ -0,0 +1,97 @@
+import pytest
+
+from idea_to_markdown.vad import VoiceActivityDetector, frame_rms, record_with_vad
+from tests.fakes import FakeStream, make_silence_pcm, make_tone_pcm
+
+RATE = 16000
+CHUNK = 1024
+FRAME_SECONDS = CHUNK / RATE
+
+
+@pytest.fixture
+def detector() -> VoiceActivityDetector:
+    return VoiceActivityDetector(rate=RATE, frame_size=CHUNK, energy_threshold=500,
+                                 silence_duration=0.5, max_segment_duration=3.0,
+                                 no_speech_timeout=2.0, max_duration=20.0)
+
+
+class TestVoiceActivityDetector:
+    def test_frame_rms(self):
+        assert frame_rms(make_silence_pcm(0.1)) == 0.0
+        assert frame_rms(b"") == 0.0
+        # RMS of a sine is amplitude / sqrt(2)
+        assert frame_rms(make_tone_pcm(0.5, amplitude=1000)) == pytest.approx(707, rel=0.02)
+
+    def test_stops_after_trailing_silence(self, detector: VoiceActivityDetector):
+        pcm = make_silence_pcm(1.0) + make_tone_pcm(1.5) + make_silence_pcm(5.0)
+        stream = FakeStream(pcm)
+
+        result = record_with_vad(stream, detector, CHUNK)
+
+        assert len(result.segments) == 1
+        # Stopped shortly after the speech ended instead of consuming everything
+        assert stream._pos < len(pcm) - 4 * RATE * 2
+        assert result.speech_seconds == pytest.approx(1.5 + 0.3 + 0.2, abs=4 * FRAME_SECONDS)
+        assert result.dead_air_seconds == pytest.approx(0.7 + 0.3, abs=4 * FRAME_SECONDS)
+
+    def test_no_speech_times_out(self, detector: VoiceActivityDetector):
+        result = record_with_vad(FakeStream(make_silence_pcm(10.0)), detector, CHUNK)
+
+        assert result.segments == []
+        assert result.speech_seconds == 0
+        assert result.dead_air_seconds == pytest.approx(2.0, abs=FRAME_SECONDS)
+
+    def test_short_pauses_do_not_end_recording(self, detector: VoiceActivityDetector):
+        pcm = make_tone_pcm(1.0) + make_silence_pcm(0.3) + make_tone_pcm(1.0)
+        result = record_with_vad(FakeStream(pcm), detector, CHUNK)
+
+        assert len(result.segments) == 1
+        assert result.speech_seconds >= 2.3
+
+    def test_long_monologue_is_split_into_segments(self, detector: VoiceActivityDetector):
+        # Speech with brief pauses every second, 8 seconds in total
+        pcm = (make_tone_pcm(0.8) + make_silence_pcm(0.2)) * 8
+        result = record_with_vad(FakeStream(pcm), detector, CHUNK)
+
+        assert len(result.segments) >= 3
+        for segment in result.segments:
+            assert len(segment) <= 3.0 * RATE * 2 + CHUNK * 2
+        assert len(result.audio) == sum(len(s) for s in result.segments)
+
+    def test_segments_are_handed_over_as_they_close(self, detector: VoiceActivityDetector):
+        pcm = (make_tone_pcm(0.8) + make_silence_pcm(0.2)) * 8
+        stream = FakeStream(pcm)
+        handed_over = []
+        detector.on_segment = lambda segment: handed_over.append((segment, stream._pos))
+        result = record_with_vad(stream, detector, CHUNK)
+
+        assert [segment for segment, _ in handed_over] == result.segments
+        # The first segment was available while the monologue was still being read
+        assert handed_over[0][1] < len(pcm) / 2
+
+    def test_max_duration_caps_recording(self):
+        detector = VoiceActivityDetector(rate=RATE, frame_size=CHUNK, max_duration=2.0,
+                                         max_segment_duration=30.0)
+        result = record_with_vad(FakeStream(make_tone_pcm(10.0)), detector, CHUNK)
+
+        assert result.speech_seconds == pytest.approx(2.0, abs=2 * FRAME_SECONDS)
+
+    def test_detector_is_reusable(self, detector: VoiceActivityDetector):
+        pcm = make_tone_pcm(1.0) + make_silence_pcm(1.0)
+        first = record_with_vad(FakeStream(pcm), detector, CHUNK)
+        second = record_with_vad(FakeStream(pcm), detector, CHUNK)
+        assert first.segments == second.segments
+
+    def test_split_segments_overlap(self):
+        detector = VoiceActivityDetector(rate=RATE, frame_size=CHUNK, energy_threshold=500,
+                                         silence_duration=0.5, max_segment_duration=3.0,
+                                         overlap_duration=0.5)
+        pcm = make_tone_pcm(8.0, frequency=300) + make_silence_pcm(1.0)
+        result = record_with_vad(FakeStream(pcm), detector, CHUNK)
+
+        overlap = detector.overlap_frames * CHUNK * 2
+        assert len(result.segments) >= 3
+        for previous, following in zip(result.segments, result.segments[1:]):
+            assert following[:overlap] == previous[-overlap:]
+        # Repeated audio is only counted once
+        assert result.speech_seconds == pytest.approx(8.0 + 0.3 + 0.2, abs=4 * FRAME_SECONDS)